@@ -0,0 +1,59 @@
+import collections
+import itertools
+
+import stem.descriptor
+import stem.util.system
+
+from stem.descriptor.server_descriptor import RelayDescriptor, CompactRelayDescriptor
+
+
+def attribute_values(desc):
+  """
+  Provides the values a descriptor holds, whether they're in its __dict__ or
+  slots.
+  """
+
+  values = [vars(desc)] if vars(desc) else []
+
+  for cls in type(desc).__mro__:
+    for name in getattr(cls, '__slots__', ()):
+      try:
+        values.append(object.__getattribute__(desc, name))
+      except AttributeError:
+        pass  # unset slot
+
+  return values
+
+
+# teach size_of() to recurse into our descriptors
+
+stem.util.system.SIZE_RECURSES.update({
+  collections.OrderedDict: lambda d: itertools.chain.from_iterable(d.items()),
+  RelayDescriptor: attribute_values,
+  CompactRelayDescriptor: attribute_values,
+})
+
+
+def measure_memory_usage(path):
+  contents = [desc.get_bytes() for desc in stem.descriptor.parse_file(path)]
+
+  lazy = [RelayDescriptor(content) for content in contents]
+  parsed = [RelayDescriptor(content) for content in contents]
+  compact = [CompactRelayDescriptor(content) for content in contents]
+
+  for desc in parsed:
+    for attr in RelayDescriptor.ATTRIBUTES:
+      getattr(desc, attr)
+
+  print("Finished measure_memory_usage('%s')" % path)
+  print('  Processed server descriptors: %i' % len(contents))
+
+  for label, descriptors in (('Lazy loaded', lazy), ('Fully parsed', parsed), ('Compact', compact)):
+    size = stem.util.system.size_of(descriptors)
+    print('  %s: %i bytes (%i per descriptor)' % (label, size, size / len(descriptors)))
+
+  print('')
+
+
+if __name__ == '__main__':
+  measure_memory_usage('server-descriptors-2015-11.tar')
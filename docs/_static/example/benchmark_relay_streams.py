@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import os
+import time
+
+import stem.client
+import stem.client.cell
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from stem.client.cell import Cell, CreateFastCell, CreatedFastCell, RelayCell
+from stem.client.datatype import KDF, LinkProtocol, RelayCommand, ZERO
+
+LINK_PROTOCOL = LinkProtocol(5)
+MAX_RELAY_DATA = 498  # bytes of data a RELAY cell can carry
+
+
+class FakeORPort(object):
+  """
+  In-process stand-in for a relay's ORPort. This answers each directory
+  request with **response_size** bytes after **latency** seconds, letting us
+  measure our client without a network or tor instance.
+  """
+
+  def __init__(self, latency, response_size):
+    self.latency = latency
+    self.response_size = response_size
+
+    self._circuits = {}  # circuit id => (forward_key, backward_key, backward_digest)
+    self._outbound = asyncio.Queue()
+    self._is_alive = True
+
+  async def send(self, content):
+    while content:
+      circ_id = LINK_PROTOCOL.circ_id_size.unpack(content[:LINK_PROTOCOL.circ_id_size.size])
+      command = content[LINK_PROTOCOL.circ_id_size.size]
+      cell, content = content[:LINK_PROTOCOL.fixed_cell_length], content[LINK_PROTOCOL.fixed_cell_length:]
+
+      if command == CreateFastCell.VALUE:
+        self._create_circuit(Cell.pop(cell, LINK_PROTOCOL)[0])
+      elif command == RelayCell.VALUE:
+        forward_key = self._circuits[circ_id][0]
+        payload = forward_key.update(cell[LINK_PROTOCOL.circ_id_size.size + 1:])
+        relay_cell = RelayCell._unpack(payload, circ_id, LINK_PROTOCOL)
+
+        if relay_cell.command == RelayCommand.DATA:
+          asyncio.get_running_loop().call_later(self.latency, self._respond, circ_id, relay_cell.stream_id)
+
+  async def recv(self, timeout = None):
+    response = [await self._outbound.get()]
+
+    while not self._outbound.empty():
+      response.append(self._outbound.get_nowait())
+
+    return b''.join(response)
+
+  def is_alive(self):
+    return self._is_alive
+
+  def connection_time(self):
+    return 0.0
+
+  async def close(self):
+    self._is_alive = False
+
+  def _create_circuit(self, create_fast_cell):
+    key_material = os.urandom(20)
+    kdf = KDF.from_value(create_fast_cell.key_material + key_material)
+    ctr = modes.CTR(ZERO * (algorithms.AES.block_size // 8))
+
+    self._circuits[create_fast_cell.circ_id] = [
+      Cipher(algorithms.AES(kdf.forward_key), ctr).decryptor(),
+      Cipher(algorithms.AES(kdf.backward_key), ctr).encryptor(),
+      hashlib.sha1(kdf.backward_digest),
+    ]
+
+    self._outbound.put_nowait(CreatedFastCell(create_fast_cell.circ_id, kdf.key_hash, key_material).pack(LINK_PROTOCOL))
+
+  def _respond(self, circ_id, stream_id):
+    circuit = self._circuits[circ_id]
+    body = b'x' * self.response_size
+
+    for i in range(0, len(body), MAX_RELAY_DATA):
+      self._send_relay_cell(circuit, RelayCell(circ_id, RelayCommand.DATA, body[i:i + MAX_RELAY_DATA], stream_id = stream_id))
+
+    self._send_relay_cell(circuit, RelayCell(circ_id, RelayCommand.END, b'', stream_id = stream_id))
+
+  def _send_relay_cell(self, circuit, cell):
+    payload, circuit[1], circuit[2] = cell.encrypt(LINK_PROTOCOL, circuit[1], circuit[2])
+    self._outbound.put_nowait(payload)
+
+
+async def measure_directory_requests(requests = 100, latency = 0.05, response_size = 20000):
+  request = 'GET /tor/server/all HTTP/1.0\r\n\r\n'
+
+  for label in ('serial', 'concurrent'):
+    relay = stem.client.Relay(FakeORPort(latency, response_size), LINK_PROTOCOL.version)
+    circ = await relay.create_circuit()
+    start_time = time.time()
+
+    if label == 'serial':
+      responses = [await circ.directory(request) for _ in range(requests)]
+    else:
+      responses = await asyncio.gather(*[circ.directory(request) for _ in range(requests)])
+
+    runtime = time.time() - start_time
+    downloaded = sum(map(len, responses))
+    await relay.close()
+
+    print('Finished %i %s directory requests' % (requests, label))
+    print('  Total time: %0.2f seconds' % runtime)
+    print('  Downloaded: %i bytes' % downloaded)
+    print('  Throughput: %0.2f MB/s' % (downloaded / runtime / 1048576))
+    print('')
+
+
+if __name__ == '__main__':
+  asyncio.run(measure_directory_requests())
@@ -0,0 +1,36 @@
+import time
+
+import stem.descriptor
+
+from stem.descriptor.router_status_entry import RouterStatusEntryV3
+
+
+def read_attributes(entries):
+  for entry in entries:
+    for attr in RouterStatusEntryV3.ATTRIBUTES:
+      getattr(entry, attr)
+
+
+def measure_consensus_parsing(path):
+  # entries from parse_file() are fully parsed in a single pass
+
+  start_time = time.time()
+  entries = list(stem.descriptor.parse_file(path, 'network-status-consensus-3 1.0'))
+  read_attributes(entries)
+  parse_file_runtime = time.time() - start_time
+
+  # whereas individually constructed entries are lazily loaded
+
+  start_time = time.time()
+  read_attributes([RouterStatusEntryV3(entry.get_bytes(), False, entry.document) for entry in entries])
+  lazy_runtime = time.time() - start_time
+
+  print("Finished measure_consensus_parsing('%s')" % path)
+  print('  Processed router status entries: %i' % len(entries))
+  print('  Parsed by parse_file: %0.3f seconds (%0.1f microseconds per entry)' % (parse_file_runtime, parse_file_runtime * 1000000 / len(entries)))
+  print('  Lazily loaded: %0.3f seconds (%0.1f microseconds per entry)' % (lazy_runtime, lazy_runtime * 1000000 / len(entries)))
+  print('')
+
+
+if __name__ == '__main__':
+  measure_consensus_parsing('/home/atagar/.tor/cached-consensus')
@@ -6,7 +6,7 @@ def measure_average_advertised_bandwidth(path):
   start_time = time.time()
   total_bw, count = 0, 0
 
-  for desc in stem.descriptor.parse_file(path):
+  for desc in stem.descriptor.parse_file(path, fields = ['average_bandwidth', 'burst_bandwidth', 'observed_bandwidth']):
     total_bw += min(desc.average_bandwidth, desc.burst_bandwidth, desc.observed_bandwidth)
     count += 1
 
@@ -6,7 +6,7 @@ def measure_average_advertised_bandwidth(path):
   start_time = time.time()
   total_bw, count = 0, 0
 
-  for desc in stem.descriptor.parse_file(path):
+  for desc in stem.descriptor.parse_file(path, fields = ['average_bandwidth', 'burst_bandwidth', 'observed_bandwidth']):
     total_bw += min(desc.average_bandwidth, desc.burst_bandwidth, desc.observed_bandwidth)
     count += 1
 
@@ -23,7 +23,7 @@ def measure_countries_v3_requests(path):
   start_time = time.time()
   countries, count = set(), 0
 
-  for desc in stem.descriptor.parse_file(path):
+  for desc in stem.descriptor.parse_file(path, fields = ['dir_v3_responses']):
     if desc.dir_v3_responses:
       countries.update(desc.dir_v3_responses.keys())
 
@@ -64,7 +64,7 @@ def measure_fraction_relays_exit_80_microdescriptors(path):
   start_time = time.time()
   exits, count = 0, 0
 
-  for desc in stem.descriptor.parse_file(path, descriptor_type = 'microdescriptor 1.0'):
+  for desc in stem.descriptor.parse_file(path, descriptor_type = 'microdescriptor 1.0', fields = ['exit_policy']):
     if desc.exit_policy.can_exit_to(port = 80):
       exits += 1
 
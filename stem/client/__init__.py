@@ -23,10 +23,19 @@ a wrapper for :class:`~stem.socket.RelaySocket`, much the same way as
   Circuit - Circuit we've established through a relay.
     |- send - sends a message through this circuit
     +- close - closes this circuit
+
+  RelayPool - Reusable connections for directory requests.
+    |- directory - requests descriptors from a relay
+    |- close_idle - closes connections we haven't recently used
+    +- close - closes all connections
 """
 
+import asyncio
+import collections
+import functools
 import hashlib
 import threading
+import time
 
 import stem
 import stem.client.cell
@@ -34,7 +43,7 @@ import stem.socket
 import stem.util.connection
 
 from types import TracebackType
-from typing import AsyncIterator, Dict, List, Optional, Sequence, Type, Union
+from typing import AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple, Type, Union
 
 from stem.client.cell import (
   CELL_TYPE_SIZE,
@@ -49,7 +58,6 @@ from stem.client.datatype import (
   KDF,
   LinkProtocol,
   RelayCommand,
-  split,
 )
 
 __all__ = [
@@ -59,6 +67,20 @@ __all__ = [
 
 DEFAULT_LINK_PROTOCOLS = (3, 4, 5)
 
+# Stream ids are two bytes, and zero is reserved for control messages.
+
+MAX_STREAM_ID = 65535
+
+# Size of the VERSIONS cell's header, which uses a two byte circuit id:
+# [circ_id][cell_type][payload_len]
+
+VERSIONS_HEADER_SIZE = 2 + CELL_TYPE_SIZE.size + PAYLOAD_LEN_SIZE.size
+
+# Reason we provide in RELAY_END cells when abandoning a stream (REASON_DONE
+# in section 6.3 of the tor-spec).
+
+STREAM_END_REASON = b'\x06'
+
 
 class Relay(object):
   """
@@ -70,10 +92,20 @@ class Relay(object):
   def __init__(self, orport: stem.socket.RelaySocket, link_protocol: int) -> None:
     self.link_protocol = LinkProtocol(link_protocol)
     self._orport = orport
-    self._orport_buffer = b''  # unread bytes
+    self._orport_buffer = bytearray()  # unread bytes
+    self._orport_cells = collections.deque()  # type: Deque[bytes]  # cells read but not yet provided
     self._orport_lock = threading.RLock()
     self._circuits = {}  # type: Dict[int, stem.client.Circuit]
 
+    # Cells are read by a single task that routes them to the circuit they
+    # belong to, letting requests on many circuits and streams run
+    # concurrently over this connection.
+
+    self._demux_task = None  # type: Optional[asyncio.Task]
+    self._demux_error = None  # type: Optional[Exception]
+    self._pending = {}  # type: Dict[int, asyncio.Queue]  # circuits awaiting CREATED_FAST
+    self._send_lock = asyncio.Lock()
+
   @staticmethod
   async def connect(address: str, port: int, link_protocols: Sequence['stem.client.datatype.LinkProtocol'] = DEFAULT_LINK_PROTOCOLS) -> 'stem.client.Relay':  # type: ignore
     """
@@ -133,7 +165,28 @@ class Relay(object):
       await conn.close()
       raise stem.SocketError('Unable to establish a common link protocol with %s:%i' % (address, port))
 
-    versions_reply = stem.client.cell.Cell.pop(response, 2)[0]  # type: stem.client.cell.VersionsCell # type: ignore
+    # Our read can end anywhere. The rest of the handshake (CERTS,
+    # AUTH_CHALLENGE, and NETINFO cells) can follow the VERSIONS cell in the
+    # same read, and either can be split across reads. Anything beyond the
+    # VERSIONS cell is retained so we continue framing cells from the exact
+    # byte it ends on.
+
+    while True:
+      if len(response) >= VERSIONS_HEADER_SIZE:
+        payload_len = int.from_bytes(response[VERSIONS_HEADER_SIZE - PAYLOAD_LEN_SIZE.size:VERSIONS_HEADER_SIZE], 'big')
+
+        if len(response) >= VERSIONS_HEADER_SIZE + payload_len:
+          break
+
+      data = await conn.recv()
+
+      if not data:
+        await conn.close()
+        raise stem.SocketError('Unable to establish a common link protocol with %s:%i' % (address, port))
+
+      response += data
+
+    versions_reply, remainder = stem.client.cell.Cell.pop(response, 2)  # type: stem.client.cell.VersionsCell, bytes # type: ignore
     common_protocols = set(link_protocols).intersection(versions_reply.versions)
 
     if not common_protocols:
@@ -147,7 +200,11 @@ class Relay(object):
     link_protocol = max(common_protocols)
     await conn.send(stem.client.cell.NetinfoCell(relay_addr, []).pack(link_protocol))
 
-    return Relay(conn, link_protocol)
+    relay = Relay(conn, link_protocol)
+    relay._orport_buffer += remainder
+    relay._frame_cells()
+
+    return relay
 
   async def _recv_bytes(self) -> bytes:
     return await self._recv(True)  # type: ignore
@@ -163,67 +220,139 @@ class Relay(object):
     """
 
     with self._orport_lock:
-      # cells begin with [circ_id][cell_type][...]
+      while not self._orport_cells:
+        await self._fill_cells()
 
-      circ_id_size = self.link_protocol.circ_id_size.size
+      content = self._orport_cells.popleft()
+      return content if raw else Cell.pop(content, self.link_protocol)[0]  # type: ignore
 
-      while len(self._orport_buffer) < (circ_id_size + CELL_TYPE_SIZE.size):
-        self._orport_buffer += await self._orport.recv()  # read until we know the cell type
+  async def _recv_cells(self) -> List[bytes]:
+    """
+    Reads all cells that are available from our ORPort. If none are present
+    this blocks until at least one is.
 
-      cell_type = Cell.by_value(CELL_TYPE_SIZE.pop(self._orport_buffer[circ_id_size:])[0])
+    :returns: **list** with the bytes of each cell
+    """
 
-      if cell_type.IS_FIXED_SIZE:
-        cell_size = circ_id_size + CELL_TYPE_SIZE.size + FIXED_PAYLOAD_LEN
-      else:
-        # variable length, our next field is the payload size
+    with self._orport_lock:
+      while not self._orport_cells:
+        await self._fill_cells()
 
-        while len(self._orport_buffer) < (circ_id_size + CELL_TYPE_SIZE.size + FIXED_PAYLOAD_LEN):
-          self._orport_buffer += await self._orport.recv()  # read until we know the cell size
+      cells = list(self._orport_cells)
+      self._orport_cells.clear()
 
-        payload_len = PAYLOAD_LEN_SIZE.pop(self._orport_buffer[circ_id_size + CELL_TYPE_SIZE.size:])[0]
-        cell_size = circ_id_size + CELL_TYPE_SIZE.size + payload_len
+      return cells
 
-      while len(self._orport_buffer) < cell_size:
-        self._orport_buffer += await self._orport.recv()  # read until we have the full cell
+  async def _fill_cells(self) -> None:
+    """
+    Reads from our ORPort, then extracts all complete cells from our buffer.
+    """
 
-      if raw:
-        content, self._orport_buffer = split(self._orport_buffer, cell_size)
-        return content  # type: ignore
-      else:
-        cell, self._orport_buffer = Cell.pop(self._orport_buffer, self.link_protocol)
-        return cell
+    self._orport_buffer += await self._read()
+    self._frame_cells()
 
-  async def _msg(self, cell: 'stem.client.cell.Cell') -> AsyncIterator['stem.client.cell.Cell']:
+  def _frame_cells(self) -> None:
     """
-    Sends a cell on the ORPort and provides the response we receive in reply.
+    Extracts all complete cells from our buffer. Our buffer is only compacted
+    once per call, rather than for each cell.
+    """
+
+    buffer, offset = self._orport_buffer, 0
+    header_size = self.link_protocol.circ_id_size.size + CELL_TYPE_SIZE.size
 
-    Unfortunately unlike control sockets, ORPorts don't have generalized rules
-    for predictable message IO. With control sockets...
+    with memoryview(buffer) as view:
+      while len(buffer) - offset >= header_size:
+        # cells begin with [circ_id][cell_type][...]
 
-      * Each message we send receives a single reply.
-      * We may also receive asynchronous events marked with a 650 status.
+        if _is_fixed_size(buffer[offset + header_size - 1]):
+          cell_size = header_size + FIXED_PAYLOAD_LEN
+        elif len(buffer) - offset >= header_size + PAYLOAD_LEN_SIZE.size:
+          # variable length, our next field is the payload size
 
-    ORPorts by contrast receive variable length cells with differing rules on
-    their arrival. As such making a best effort attempt at a send-and-receive
-    method in which we do the following...
+          payload_len = int.from_bytes(view[offset + header_size:offset + header_size + PAYLOAD_LEN_SIZE.size], 'big')
+          cell_size = header_size + PAYLOAD_LEN_SIZE.size + payload_len
+        else:
+          break  # need more data to know the cell size
 
-      * Discard any existing unread data from the socket.
-      * Send our request.
-      * Await up to a second for a reply.
+        if len(buffer) - offset < cell_size:
+          break  # need more data for the full cell
 
-    It's quite possible this is a stupid approach. If so, patches welcome.
+        self._orport_cells.append(view[offset:offset + cell_size].tobytes())
+        offset += cell_size
 
-    :param cell: cell to be sent
+    del buffer[:offset]
 
-    :returns: **generator** with the cells received in reply
+  async def _read(self) -> bytes:
     """
+    Reads the next chunk of data from our ORPort.
+
+    :raises: :class:`stem.SocketClosed` if our connection has closed
+    """
+
+    data = await self._orport.recv()
+
+    if not data:
+      raise stem.SocketClosed('ORPort connection has closed')
+
+    return data
+
+  def _start_demux(self) -> None:
+    """
+    Starts the task that reads cells from our ORPort, if it isn't already
+    running.
+
+    :raises: the exception that stopped our demultiplexer, if it has failed
+    """
+
+    if self._demux_error:
+      raise self._demux_error
+    elif self._demux_task is None or self._demux_task.done():
+      self._demux_task = asyncio.get_running_loop().create_task(self._demux())
+
+  async def _demux(self) -> None:
+    """
+    Reads cells from our ORPort, routing each to the circuit it belongs to.
+    Cells for circuits we don't know about (such as padding) are discarded.
+
+    If our connection fails or we're closed then all of our circuits and their
+    streams are notified.
+    """
+
+    circ_id_size = self.link_protocol.circ_id_size
+
+    try:
+      while True:
+        for content in await self._recv_cells():
+          circ_id = int.from_bytes(content[:circ_id_size.size], 'big')
+
+          if circ_id in self._circuits:
+            self._circuits[circ_id]._deliver(content)
+          elif circ_id in self._pending:
+            self._pending[circ_id].put_nowait(content)
+    except asyncio.CancelledError:
+      self._fail(stem.SocketClosed('Relay connection has been closed'))
+      raise
+    except Exception as exc:
+      self._fail(exc)
+
+  def _fail(self, exc: Exception) -> None:
+    """
+    Notifies our circuits, their streams, and circuits we're creating that this
+    connection can no longer be used. Only our first failure is reported.
+
+    :param exc: reason for our failure
+    """
+
+    if self._demux_error:
+      return
 
-    # TODO: why is this an iterator?
+    self._demux_error = exc
 
-    await self._orport.recv(timeout = 0)  # discard unread data
-    await self._orport.send(cell.pack(self.link_protocol))
-    response = await self._orport.recv(timeout = 1)
-    yield stem.client.cell.Cell.pop(response, self.link_protocol)[0]
+    for circ in list(self._circuits.values()):
+      circ._fail(exc)
+
+    for queue in self._pending.values():
+      queue.put_nowait(exc)
 
   def is_alive(self) -> bool:
     """
@@ -251,28 +380,52 @@ class Relay(object):
     """
     Closes our socket connection. This is a pass-through for our socket's
     :func:`~stem.socket.BaseSocket.close` method.
+
+    .. versionchanged:: 2.0.0
+       Requests in progress on our circuits fail with a
+       :class:`stem.SocketClosed`.
     """
 
+    # our demultiplexer might not have begun running, in which case cancelling
+    # it won't notify our circuits
+
+    self._fail(stem.SocketClosed('Relay connection has been closed'))
+
+    if self._demux_task and not self._demux_task.done():
+      self._demux_task.cancel()
+
     with self._orport_lock:
       return await self._orport.close()
 
   async def create_circuit(self) -> 'stem.client.Circuit':
     """
     Establishes a new circuit.
+
+    .. versionchanged:: 2.0.0
+       Circuits can be created while requests are in progress on others.
     """
 
-    with self._orport_lock:
-      circ_id = max(self._circuits) + 1 if self._circuits else self.link_protocol.first_circ_id
+    circ_ids = list(self._circuits) + list(self._pending)
+    circ_id = max(circ_ids) + 1 if circ_ids else self.link_protocol.first_circ_id
 
-      create_fast_cell = stem.client.cell.CreateFastCell(circ_id)
-      created_fast_cell = None
+    create_fast_cell = stem.client.cell.CreateFastCell(circ_id)
+    response = asyncio.Queue()  # type: asyncio.Queue
+    self._pending[circ_id] = response
 
-      async for cell in self._msg(create_fast_cell):
-        if isinstance(cell, stem.client.cell.CreatedFastCell):
-          created_fast_cell = cell
-          break
+    try:
+      self._start_demux()
+
+      async with self._send_lock:
+        await self._orport.send(create_fast_cell.pack(self.link_protocol))
+
+      reply = await response.get()
+
+      if isinstance(reply, Exception):
+        raise reply
+
+      created_fast_cell = Cell.pop(reply, self.link_protocol)[0]
 
-      if not created_fast_cell:
+      if not isinstance(created_fast_cell, stem.client.cell.CreatedFastCell):
         raise ValueError('We should get a CREATED_FAST response from a CREATE_FAST request')
 
       kdf = KDF.from_value(create_fast_cell.key_material + created_fast_cell.key_material)
@@ -284,6 +437,8 @@ class Relay(object):
       self._circuits[circ.id] = circ
 
       return circ
+    finally:
+      del self._pending[circ_id]
 
   async def __aiter__(self) -> AsyncIterator['stem.client.Circuit']:
     with self._orport_lock:
@@ -327,40 +482,134 @@ class Circuit(object):
     self.forward_key = Cipher(algorithms.AES(kdf.forward_key), ctr).encryptor()
     self.backward_key = Cipher(algorithms.AES(kdf.backward_key), ctr).decryptor()
 
+    self._streams = {}  # type: Dict[int, asyncio.Queue]  # responses for our in-flight requests
+    self._last_stream_id = 0
+    self._error = None  # type: Optional[Exception]
+
   async def directory(self, request: str, stream_id: int = 0) -> bytes:
     """
-    Request descriptors from the relay.
+    Request descriptors from the relay. Requests can be made concurrently, each
+    on its own stream.
+
+    .. versionchanged:: 2.0.0
+       Requests no longer block each other, and a **stream_id** of zero now
+       selects a stream we aren't using.
 
     :param request: directory request to make
     :param stream_id: specific stream this concerns
 
     :returns: **str** with the requested descriptor data
+
+    :raises:
+      * **ValueError** if the stream already has a request in progress
+      * :class:`stem.ProtocolError` if the relay's response is malformed or
+        our circuit has been closed
+      * :class:`stem.SocketClosed` if our connection closes
     """
 
-    with self.relay._orport_lock:
+    if not stream_id:
+      stream_id = self._new_stream_id()
+    elif stream_id in self._streams:
+      raise ValueError('Stream %i already has a request in progress' % stream_id)
+
+    responses = asyncio.Queue()  # type: asyncio.Queue
+    self._streams[stream_id] = responses
+
+    try:
+      if self._error:
+        raise self._error
+
+      self.relay._start_demux()
+
       await self._send(RelayCommand.BEGIN_DIR, stream_id = stream_id)
       await self._send(RelayCommand.DATA, request, stream_id = stream_id)
 
-      response = []  # type: List[stem.client.cell.RelayCell]
+      response = []  # type: List[bytes]
 
       while True:
-        # Decrypt relay cells received in response. Our digest/key only
-        # updates when handled successfully.
+        cell = await responses.get()
 
-        encrypted_cell = await self.relay._recv_bytes()
+        if isinstance(cell, Exception):
+          raise cell
+        elif cell.command == RelayCommand.END:
+          return b''.join(response)
+        else:
+          response.append(cell.data)
+    except BaseException:
+      # If we stopped waiting (for instance, because we were cancelled) then
+      # tell the relay that we're done with this stream. Cells that are
+      # already on their way are still decrypted and discarded, so the rest of
+      # our circuit is unaffected.
+
+      if not self._error and self.relay.is_alive():
+        try:
+          await self._send(RelayCommand.END, STREAM_END_REASON, stream_id = stream_id)
+        except Exception:
+          pass  # connection is failing, which our other requests will be told
 
-        decrypted_cell, backward_key, backward_digest = stem.client.cell.RelayCell.decrypt(self.relay.link_protocol, encrypted_cell, self.backward_key, self.backward_digest)
+      raise
+    finally:
+      del self._streams[stream_id]
 
-        if self.id != decrypted_cell.circ_id:
-          raise stem.ProtocolError('Response should be for circuit id %i, not %i' % (self.id, decrypted_cell.circ_id))
+  def _new_stream_id(self) -> int:
+    """
+    Provides a stream id that doesn't have a request in progress.
 
-        self.backward_digest = backward_digest
-        self.backward_key = backward_key
+    :raises: :class:`stem.ProtocolError` if all stream ids are in use
+    """
 
-        if decrypted_cell.command == RelayCommand.END:
-          return b''.join([cell.data for cell in response])
-        else:
-          response.append(decrypted_cell)
+    for _ in range(MAX_STREAM_ID):
+      self._last_stream_id = self._last_stream_id % MAX_STREAM_ID + 1
+
+      if self._last_stream_id not in self._streams:
+        return self._last_stream_id
+
+    raise stem.ProtocolError('Circuit %i has no unused stream ids' % self.id)
+
+  def _deliver(self, content: bytes) -> None:
+    """
+    Handles a cell our relay received for this circuit. This is called in the
+    order cells arrive so our backward key and digest stay in sync.
+
+    :param content: cell's encrypted content
+    """
+
+    command = content[self.relay.link_protocol.circ_id_size.size]
+
+    if command == stem.client.cell.DestroyCell.VALUE:
+      self._fail(stem.ProtocolError('Circuit %i was closed by the relay' % self.id))
+      return
+    elif command != stem.client.cell.RelayCell.VALUE:
+      return
+
+    # Decrypt relay cells received in response. Cipher contexts can't be
+    # copied, so decryption advances our key in place even if the cell is
+    # malformed. At that point we're out of sync with the relay, so rather
+    # than carrying on we fail the whole circuit.
+
+    try:
+      cell, backward_key, backward_digest = stem.client.cell.RelayCell.decrypt(self.relay.link_protocol, content, self.backward_key, self.backward_digest)
+    except (ValueError, stem.ProtocolError) as exc:
+      self._fail(exc)
+      return
+
+    self.backward_digest = backward_digest
+    self.backward_key = backward_key
+
+    if cell.stream_id in self._streams:
+      self._streams[cell.stream_id].put_nowait(cell)
+
+  def _fail(self, exc: Exception) -> None:
+    """
+    Notifies our requests that this circuit can no longer be used.
+
+    :param exc: reason for our failure
+    """
+
+    self._error = exc
+
+    for responses in self._streams.values():
+      responses.put_nowait(exc)
 
   async def _send(self, command: 'stem.client.datatype.RelayCommand', data: Union[bytes, str] = b'', stream_id: int = 0) -> None:
     """
@@ -371,19 +620,26 @@ class Circuit(object):
     :param stream_id: specific stream this concerns
     """
 
-    with self.relay._orport_lock:
-      # Encrypt and send the cell. Our digest/key only updates if the cell is
-      # successfully sent.
+    async with self.relay._send_lock:
+      # Encrypt and send the cell. Cipher contexts can't be copied, so
+      # encryption advances our key in place whether or not the cell is sent.
+      # Our send is shielded so cancelling a request doesn't drop a cell we've
+      # encrypted, and if sending fails we're out of sync with the relay so
+      # the circuit can no longer be used.
 
       cell = stem.client.cell.RelayCell(self.id, command, data, stream_id = stream_id)
-      payload, forward_key, forward_digest = cell.encrypt(self.relay.link_protocol, self.forward_key, self.forward_digest)
-      await self.relay._orport.send(payload)
+      payload, self.forward_key, self.forward_digest = cell.encrypt(self.relay.link_protocol, self.forward_key, self.forward_digest)
 
-      self.forward_digest = forward_digest
-      self.forward_key = forward_key
+      try:
+        await asyncio.shield(self.relay._orport.send(payload))
+      except asyncio.CancelledError:
+        raise
+      except Exception as exc:
+        self._fail(exc)
+        raise
 
   async def close(self) -> None:
-    with self.relay._orport_lock:
+    async with self.relay._send_lock:
       await self.relay._orport.send(stem.client.cell.DestroyCell(self.id).pack(self.relay.link_protocol))
       del self.relay._circuits[self.id]
 
@@ -392,3 +648,254 @@ class Circuit(object):
 
   async def __aexit__(self, exit_type: Optional[Type[BaseException]], value: Optional[BaseException], traceback: Optional[TracebackType]) -> None:
     await self.close()
+
+
+class _PooledCircuit(object):
+  """
+  Relay connection and circuit that's retained by a
+  :class:`~stem.client.RelayPool`.
+  """
+
+  def __init__(self, relay: 'stem.client.Relay', circuit: 'stem.client.Circuit', loop: asyncio.AbstractEventLoop) -> None:
+    self.relay = relay
+    self.circuit = circuit
+    self.loop = loop
+    self.lock = asyncio.Lock()
+    self.last_used = time.time()
+
+    self._last_stream_id = 0
+    self._active = {}  # type: Dict[stem.client.Circuit, int]  # requests in progress on each circuit
+
+  async def open_stream(self) -> Tuple['stem.client.Circuit', int]:
+    """
+    Reserves a stream id we haven't yet used. If our circuit's ids are
+    exhausted we replace it, closing the old circuit once its requests finish.
+
+    :returns: **tuple** of the form (circuit, stream_id)
+    """
+
+    async with self.lock:
+      if self._last_stream_id >= MAX_STREAM_ID:
+        retired = self.circuit
+        self.circuit = await self.relay.create_circuit()
+        self._last_stream_id = 0
+
+        if retired not in self._active:
+          await retired.close()
+
+      self._last_stream_id += 1
+      self._active[self.circuit] = self._active.get(self.circuit, 0) + 1
+
+      return self.circuit, self._last_stream_id
+
+  def close_stream(self, circuit: 'stem.client.Circuit') -> bool:
+    """
+    Notes that a request made through :func:`~stem.client._PooledCircuit.open_stream`
+    has finished.
+
+    :param circuit: circuit the request was made on
+
+    :returns: **True** if the circuit has been replaced and is no longer
+      in use, **False** otherwise
+    """
+
+    self.last_used = time.time()
+    self._active[circuit] -= 1
+
+    if not self._active[circuit]:
+      del self._active[circuit]
+      return circuit is not self.circuit
+
+    return False
+
+  def in_use(self) -> bool:
+    return bool(self._active) or self.lock.locked()
+
+  def is_usable(self) -> bool:
+    return self.relay.is_alive() and not self.loop.is_closed() and self.loop.is_running()
+
+
+class RelayPool(object):
+  """
+  Retains authenticated relay connections and circuits so directory requests
+  can skip the costly TLS and link handshakes. Each request opens a new
+  BEGIN_DIR stream on our pooled circuit for that relay, so concurrent
+  requests share a single connection.
+
+  Connections are bound to the event loop that made them, so they're only
+  reused by requests within the same loop.
+
+  ::
+
+    pool = stem.client.RelayPool()
+
+    for resource in ('/tor/server/authority', '/tor/status-vote/current/consensus'):
+      request = 'GET %s HTTP/1.0\\r\\n\\r\\n' % resource
+      response = await pool.directory('128.31.0.34', 9101, request)
+
+    await pool.close()
+
+  .. versionadded:: 2.0.0
+
+  :var float max_idle: seconds a connection can go unused before we close it
+  """
+
+  def __init__(self, max_idle: float = 60.0) -> None:
+    self.max_idle = max_idle
+
+    self._pool = {}  # type: Dict[Tuple[asyncio.AbstractEventLoop, str, int, Tuple[int, ...]], _PooledCircuit]
+    self._pool_lock = threading.RLock()
+    self._connecting = {}  # type: Dict[Tuple[asyncio.AbstractEventLoop, str, int, Tuple[int, ...]], asyncio.Task]
+
+  async def directory(self, address: str, port: int, request: str, link_protocols: Sequence['stem.client.datatype.LinkProtocol'] = DEFAULT_LINK_PROTOCOLS) -> bytes:  # type: ignore
+    """
+    Requests descriptors from a relay, reusing our connection to it if we
+    have one.
+
+    :param address: ip address of the relay
+    :param port: ORPort of the relay
+    :param request: directory request to make
+    :param link_protocols: acceptable link protocol versions
+
+    :returns: **bytes** with the directory's response
+
+    :raises:
+      * **ValueError** if address or port are invalid
+      * :class:`stem.SocketError` if we're unable to establish a connection
+      * :class:`stem.ProtocolError` if the relay's response is malformed
+    """
+
+    self.close_idle()
+
+    loop = asyncio.get_running_loop()
+    key = (loop, address, port, tuple(link_protocols))
+
+    with self._pool_lock:
+      pooled = self._pool.get(key)
+
+      # concurrent requests for a relay we aren't yet connected to await the
+      # same connection
+
+      if pooled is None and key not in self._connecting:
+        self._connecting[key] = loop.create_task(self._connect(key, address, port, link_protocols))
+
+      connecting = self._connecting.get(key)
+
+    if pooled is None:
+      pooled = await asyncio.shield(connecting)
+
+    try:
+      circuit, stream_id = await pooled.open_stream()
+    except Exception:
+      self._discard(key, pooled)
+      await pooled.relay.close()
+      raise
+
+    # Only this request's stream is affected if it fails or is cancelled
+    # (such as a hedged request that lost), so other requests on our
+    # connection carry on. We only discard the connection if it or our
+    # circuit have failed.
+
+    try:
+      response = await circuit.directory(request, stream_id = stream_id)
+    except BaseException:
+      retired = pooled.close_stream(circuit)
+
+      if circuit._error or not pooled.relay.is_alive():
+        self._discard(key, pooled)
+        await pooled.relay.close()
+      elif retired:
+        await circuit.close()
+
+      raise
+
+    if pooled.close_stream(circuit):
+      await circuit.close()
+
+    return response
+
+  async def _connect(self, key: Tuple[asyncio.AbstractEventLoop, str, int, Tuple[int, ...]], address: str, port: int, link_protocols: Sequence['stem.client.datatype.LinkProtocol']) -> '_PooledCircuit':  # type: ignore
+    try:
+      relay = await Relay.connect(address, port, link_protocols)
+
+      try:
+        pooled = _PooledCircuit(relay, await relay.create_circuit(), key[0])
+      except:
+        await relay.close()
+        raise
+
+      with self._pool_lock:
+        self._pool[key] = pooled
+
+      return pooled
+    finally:
+      with self._pool_lock:
+        del self._connecting[key]
+
+  def _discard(self, key: Tuple[asyncio.AbstractEventLoop, str, int, Tuple[int, ...]], pooled: '_PooledCircuit') -> None:
+    with self._pool_lock:
+      if self._pool.get(key) is pooled:
+        del self._pool[key]
+
+  def close_idle(self) -> None:
+    """
+    Closes connections that haven't been used within our **max_idle**, or
+    whose event loop has stopped.
+    """
+
+    now = time.time()
+
+    with self._pool_lock:
+      for key, pooled in list(self._pool.items()):
+        if pooled.in_use():
+          continue
+        elif not pooled.is_usable() or now - pooled.last_used > self.max_idle:
+          del self._pool[key]
+
+          # connections within stopped loops can't be closed, but will be
+          # when garbage collected
+
+          if pooled.loop is _running_loop():
+            pooled.loop.create_task(pooled.relay.close())
+          elif pooled.is_usable():
+            asyncio.run_coroutine_threadsafe(pooled.relay.close(), pooled.loop)
+
+  async def close(self) -> None:
+    """
+    Closes all connections made within our present event loop.
+    """
+
+    loop = asyncio.get_running_loop()
+
+    with self._pool_lock:
+      closing = [pooled for key, pooled in self._pool.items() if key[0] is loop]
+      self._pool = dict([(key, pooled) for key, pooled in self._pool.items() if key[0] is not loop])
+
+    for pooled in closing:
+      await pooled.relay.close()
+
+  def __len__(self) -> int:
+    with self._pool_lock:
+      return len(self._pool)
+
+
+@functools.lru_cache()
+def _is_fixed_size(cell_type: int) -> bool:
+  """
+  Checks if cells of the given type have a fixed size.
+
+  :param cell_type: numeric cell type
+
+  :returns: **True** if the cell type has a fixed size, **False** otherwise
+
+  :raises: **ValueError** if cell type is invalid
+  """
+
+  return Cell.by_value(cell_type).IS_FIXED_SIZE
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+  try:
+    return asyncio.get_running_loop()
+  except RuntimeError:
+    return None
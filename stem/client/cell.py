@@ -37,10 +37,11 @@ Messages communicated over a Tor relay's ORPort.
     +- pop - decodes cell with remainder
 """
 
-import copy
 import datetime
+import functools
 import inspect
 import os
+import struct
 import sys
 
 import stem.util
@@ -58,6 +59,12 @@ CELL_TYPE_SIZE = Size.CHAR  # type: stem.client.datatype.Size
 PAYLOAD_LEN_SIZE = Size.SHORT
 RELAY_DIGEST_SIZE = Size.LONG
 
+# RELAY cell payloads begin with...
+#
+#   [ Relay command ][ Recognized ][ StreamID ][ Digest ][ Length ]
+
+RELAY_HEADER = struct.Struct('>BHHLH')
+
 STREAM_ID_REQUIRED = (
   RelayCommand.BEGIN,
   RelayCommand.DATA,
@@ -103,6 +110,7 @@ class Cell(object):
     self.unused = unused
 
   @staticmethod
+  @functools.lru_cache()
   def by_name(name: str) -> Type['stem.client.cell.Cell']:
     """
     Provides cell attributes by its name.
@@ -121,6 +129,7 @@ class Cell(object):
     raise ValueError("'%s' isn't a valid cell type" % name)
 
   @staticmethod
+  @functools.lru_cache()
   def by_value(value: int) -> Type['stem.client.cell.Cell']:
     """
     Provides cell attributes by its value.
@@ -402,6 +411,13 @@ class RelayCell(CircuitCell):
 
       (cell (RelayCell), new_key (CipherContext), new_digest (HASH))
 
+    Cipher contexts cannot be copied, so our key is advanced in place. This
+    consumes its keystream for the cell even if the payload is malformed, as
+    the relay's does.
+
+    .. versionchanged:: 2.0.0
+       Key is updated in place rather than copied.
+
     :param link_protocol: link protocol version
     :param content: cell content to be decrypted
     :param key: key established with the relay we received this cell from
@@ -413,19 +429,17 @@ class RelayCell(CircuitCell):
       cell
     """
 
-    new_key = copy.copy(key)
-    new_digest = digest.copy()
-
     if len(content) != link_protocol.fixed_cell_length:
       raise stem.ProtocolError('RELAY cells should be %i bytes, but received %i' % (link_protocol.fixed_cell_length, len(content)))
 
-    circ_id, content = link_protocol.circ_id_size.pop(content)
-    command, encrypted_payload = Size.CHAR.pop(content)
+    header_size = link_protocol.circ_id_size.size + 1
+    circ_id = int.from_bytes(content[:header_size - 1], 'big')
+    command = content[header_size - 1]
 
     if command != RelayCell.VALUE:
       raise stem.ProtocolError('Cannot decrypt as a RELAY cell. This had command %i instead.' % command)
 
-    payload = new_key.update(encrypted_payload)
+    payload = key.update(memoryview(content)[header_size:])
 
     cell = RelayCell._unpack(payload, circ_id, link_protocol)
 
@@ -444,7 +458,7 @@ class RelayCell(CircuitCell):
     # ... or something like that. Until we attempt to support relaying this is
     # both moot and difficult to exercise in order to ensure we get it right.
 
-    return cell, new_key, new_digest
+    return cell, key, digest
 
   def encrypt(self, link_protocol: 'stem.client.datatype.LinkProtocol', key: 'cryptography.hazmat.primitives.ciphers.CipherContext', digest: 'hashlib._HASH') -> Tuple[bytes, 'cryptography.hazmat.primitives.ciphers.CipherContext', 'hashlib._HASH']:  # type: ignore
     """
@@ -455,6 +469,11 @@ class RelayCell(CircuitCell):
 
       (payload (bytes), new_key (CipherContext), new_digest (HASH))
 
+    Cipher contexts cannot be copied, so our key is advanced in place.
+
+    .. versionchanged:: 2.0.0
+       Key is updated in place rather than copied.
+
     :param link_protocol: link protocol version
     :param key: key established with the relay we're sending this cell to
     :param digest: running digest held with the relay
@@ -462,7 +481,6 @@ class RelayCell(CircuitCell):
     :returns: **tuple** with our encrypted payload and updated key/digest
     """
 
-    new_key = copy.copy(key)
     new_digest = digest.copy()
 
     # Digests are computed from our payload, not including our header's circuit
@@ -478,16 +496,16 @@ class RelayCell(CircuitCell):
     cell = RelayCell(self.circ_id, self.command, self.data, new_digest, self.stream_id, self.recognized, self.unused)
     header, payload = split(cell.pack(link_protocol), header_size)
 
-    return header + new_key.update(payload), new_key, new_digest
+    return header + key.update(payload), key, new_digest
 
   @classmethod
   def _unpack(cls, content: bytes, circ_id: int, link_protocol: 'stem.client.datatype.LinkProtocol') -> 'stem.client.cell.RelayCell':
-    command, content = Size.CHAR.pop(content)
-    recognized, content = Size.SHORT.pop(content)  # 'recognized' field
-    stream_id, content = Size.SHORT.pop(content)
-    digest, content = Size.LONG.pop(content)
-    data_len, content = Size.SHORT.pop(content)
-    data, unused = split(content, data_len)
+    if len(content) < RELAY_HEADER.size:
+      raise ValueError('%s cell should have a payload of at least %i bytes, but only had %i' % (cls.NAME, RELAY_HEADER.size, len(content)))
+
+    command, recognized, stream_id, digest, data_len = RELAY_HEADER.unpack_from(content)
+    data = content[RELAY_HEADER.size:RELAY_HEADER.size + data_len]
+    unused = content[RELAY_HEADER.size + data_len:]
 
     if len(data) != data_len:
       raise ValueError('%s cell said it had %i bytes of data, but only had %i' % (cls.NAME, data_len, len(data)))
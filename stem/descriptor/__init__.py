@@ -9,6 +9,7 @@ Package for parsing and processing descriptor data.
 ::
 
   parse_file - Parses the descriptors in a file.
+  join_by_digest - Pairs router status entries with the descriptors they reference.
   create_signing_key - Cretes a signing key that can be used for creating descriptors.
 
   Compression - method of descriptor decompression
@@ -105,29 +106,37 @@ Package for parsing and processing descriptor data.
 """
 
 import base64
+import binascii
 import codecs
 import collections
+import contextlib
 import copy
 import datetime
+import functools
 import hashlib
 import io
 import os
+import queue
 import random
 import re
 import string
+import sys
 import tarfile
+import threading
 
 import stem.util
 import stem.util.enum
 import stem.util.str_tools
 import stem.util.system
 
-from typing import Any, BinaryIO, Callable, Dict, IO, Iterator, List, Mapping, Optional, Sequence, Tuple, Type, Union
+from typing import Any, BinaryIO, Callable, Dict, FrozenSet, IO, Iterable, Iterator, List, Mapping, Optional, Pattern, Sequence, Tuple, Type, Union
 
 __all__ = [
+  'archive',
   'bandwidth_file',
   'certificate',
   'collector',
+  'columnar',
   'extrainfo_descriptor',
   'hidden_service',
   'microdescriptor',
@@ -135,19 +144,16 @@ __all__ = [
   'remote',
   'router_status_entry',
   'server_descriptor',
+  'snapshot',
+  'store',
   'tordnsel',
 
   'Descriptor',
+  'JoinedDescriptor',
+  'join_by_digest',
   'parse_file',
 ]
 
-UNSEEKABLE_MSG = """\
-File object isn't seekable. Try using Descriptor.from_str() instead:
-
-  content = my_file.read()
-  parsed_descriptors = stem.descriptor.Descriptor.from_str(content)
-"""
-
 KEYWORD_CHAR = 'a-zA-Z0-9-'
 WHITESPACE = ' \t'
 KEYWORD_LINE = re.compile('^([%s]+)(?:[%s]+(.*))?$' % (KEYWORD_CHAR, WHITESPACE))
@@ -168,6 +174,16 @@ WPi4Fl2qryzTb3QO5r5x7T8OsG2IBUET1bLQzmtbC560SYR49IvVAgMBAAE=
 
 ENTRY_TYPE = Dict[str, List[Tuple[str, str, str]]]
 
+# Attributes of all descriptors, which compact descriptors keep in slots.
+
+COMPACT_SLOTS = ('_path', '_archive_path', '_raw_contents', '_lazy_loading', '_fields', '_keywords', '_entries', '_hash', '_unrecognized_lines', '_digests')
+
+# Bytes can't be interned by python, so we deduplicate them ourselves (up to
+# a limit, since values like contact information are usually unique).
+
+INTERNED_BYTES_LIMIT = 50000
+_INTERNED_BYTES = {}  # type: Dict[bytes, bytes]
+
 DigestHash = stem.util.enum.UppercaseEnum(
   'SHA1',
   'SHA256',
@@ -198,7 +214,7 @@ class _Compression(object):
   .. versionadded:: 1.8.0
   """
 
-  def __init__(self, name: str, module: Optional[str], encoding: str, extension: str, decompression_func: Callable[[Any, bytes], bytes]) -> None:
+  def __init__(self, name: str, module: Optional[str], encoding: str, extension: str, decompression_func: Callable[[Any, bytes], bytes], decompressor_func: Optional[Callable[[Any], Any]] = None) -> None:
     if module is None:
       self._module = None
       self.available = True
@@ -227,6 +243,7 @@ class _Compression(object):
     self._name = name
     self._module_name = module
     self._decompression_func = decompression_func
+    self._decompressor_func = decompressor_func
 
   def decompress(self, content: bytes) -> bytes:
     """
@@ -243,6 +260,29 @@ class _Compression(object):
       * **ImportError** if this method if decompression is unavalable
     """
 
+    self._check_available()
+
+    try:
+      return self._decompression_func(self._module, content)
+    except Exception as exc:
+      raise OSError('Failed to decompress as %s: %s' % (self, exc))
+
+  def decompressor(self) -> '_Decompressor':
+    """
+    Provides an object that decompresses content incrementally, so it can be
+    processed as it's read.
+
+    .. versionadded:: 2.0.0
+
+    :returns: **_Decompressor** with **decompress()** and **flush()** methods
+
+    :raises: **ImportError** if this method if decompression is unavalable
+    """
+
+    self._check_available()
+    return _Decompressor(self, self._decompressor_func(self._module) if self._decompressor_func else None)
+
+  def _check_available(self) -> None:
     if not self.available:
       if self._name == 'zstd':
         raise ImportError('Decompressing zstd data requires https://pypi.org/project/zstandard/')
@@ -251,13 +291,59 @@ class _Compression(object):
       else:
         raise ImportError("'%s' decompression module is unavailable" % self._module_name)
 
+  def __str__(self) -> str:
+    return self._name
+
+
+class _Decompressor(object):
+  """
+  Incremental decompression for a :class:`~stem.descriptor.__init__._Compression`.
+  """
+
+  def __init__(self, compression: '_Compression', decompressor: Any) -> None:
+    self._compression = compression
+    self._decompressor = decompressor
+
+  def decompress(self, content: bytes) -> bytes:
+    """
+    Decompresses the next portion of our content.
+
+    :param content: compressed content that follows what we've been provided
+
+    :returns: **bytes** of content that has been decompressed so far
+
+    :raises: **OSError** if content isn't compressed with this method
+    """
+
+    if self._decompressor is None:
+      return content
+
     try:
-      return self._decompression_func(self._module, content)
+      return self._decompressor.decompress(content)
     except Exception as exc:
-      raise OSError('Failed to decompress as %s: %s' % (self, exc))
+      raise OSError('Failed to decompress as %s: %s' % (self._compression, exc))
 
-  def __str__(self) -> str:
-    return self._name
+  def flush(self) -> bytes:
+    """
+    Provides any content that remains buffered after we've been given all
+    compressed content.
+
+    :returns: **bytes** with the remainder of our decompressed content
+
+    :raises: **OSError** if the compressed content was truncated
+    """
+
+    if self._decompressor is None:
+      return b''
+    elif getattr(self._decompressor, 'eof', True) is False:
+      raise OSError('Failed to decompress as %s: content was truncated' % self._compression)
+
+    flush = getattr(self._decompressor, 'flush', None)
+
+    try:
+      return flush() if flush else b''
+    except Exception as exc:
+      raise OSError('Failed to decompress as %s: %s' % (self._compression, exc))
 
 
 def _zstd_decompress(module: Any, content: bytes) -> bytes:
@@ -271,12 +357,23 @@ def _zstd_decompress(module: Any, content: bytes) -> bytes:
 
 Compression = stem.util.enum.Enum(
   ('PLAINTEXT', _Compression('plaintext', None, 'identity', '.txt', lambda module, content: content)),
-  ('GZIP', _Compression('gzip', 'zlib', 'gzip', '.gz', lambda module, content: module.decompress(content, module.MAX_WBITS | 32))),
-  ('BZ2', _Compression('bzip2', 'bz2', 'bzip2', '.bz2', lambda module, content: module.decompress(content))),
-  ('LZMA', _Compression('lzma', 'lzma', 'x-tor-lzma', '.xz', lambda module, content: module.decompress(content))),
-  ('ZSTD', _Compression('zstd', 'zstd', 'x-zstd', '.zst', _zstd_decompress)),
+  ('GZIP', _Compression('gzip', 'zlib', 'gzip', '.gz', lambda module, content: module.decompress(content, module.MAX_WBITS | 32), lambda module: module.decompressobj(module.MAX_WBITS | 32))),
+  ('BZ2', _Compression('bzip2', 'bz2', 'bzip2', '.bz2', lambda module, content: module.decompress(content), lambda module: module.BZ2Decompressor())),
+  ('LZMA', _Compression('lzma', 'lzma', 'x-tor-lzma', '.xz', lambda module, content: module.decompress(content), lambda module: module.LZMADecompressor())),
+  ('ZSTD', _Compression('zstd', 'zstd', 'x-zstd', '.zst', _zstd_decompress, lambda module: module.ZstdDecompressor().decompressobj())),
+)
+
+# Leading bytes of each compression method. Archives without one of these are
+# uncompressed.
+
+MAGIC_BYTES = (
+  (b'\x1f\x8b', Compression.GZIP),
+  (b'BZh', Compression.BZ2),
+  (b'\xfd7zXZ\x00', Compression.LZMA),
 )
 
+PIPELINE_CHUNK_SIZE = 1048576  # decompressed bytes we buffer at a time when pipelining
+
 
 class TypeAnnotation(collections.namedtuple('TypeAnnotation', ['name', 'major_version', 'minor_version'])):
   """
@@ -296,6 +393,21 @@ class TypeAnnotation(collections.namedtuple('TypeAnnotation', ['name', 'major_ve
     return '@type %s %s.%s' % (self.name, self.major_version, self.minor_version)
 
 
+class JoinedDescriptor(collections.namedtuple('JoinedDescriptor', ['digest', 'entry', 'descriptor'])):
+  """
+  Router status entry paired with the descriptor it references. These are
+  provided by :func:`~stem.descriptor.__init__.join_by_digest`.
+
+  .. versionadded:: 2.0.0
+
+  :var str digest: digest the entry and descriptor were paired by
+  :var stem.descriptor.router_status_entry.RouterStatusEntry entry: router
+    status entry, this is **None** if no entry references the descriptor
+  :var stem.descriptor.Descriptor descriptor: descriptor the entry references,
+    this is **None** if it's missing
+  """
+
+
 class SigningKey(collections.namedtuple('SigningKey', ['private', 'public', 'public_digest'])):
   """
   Key used by relays to sign their server and extrainfo descriptors.
@@ -308,7 +420,7 @@ class SigningKey(collections.namedtuple('SigningKey', ['private', 'public', 'pub
   """
 
 
-def parse_file(descriptor_file: Union[str, BinaryIO, tarfile.TarFile, IO[bytes]], descriptor_type: str = None, validate: bool = False, document_handler: 'stem.descriptor.DocumentHandler' = DocumentHandler.ENTRIES, normalize_newlines: Optional[bool] = None, **kwargs: Any) -> Iterator['stem.descriptor.Descriptor']:
+def parse_file(descriptor_file: Union[str, BinaryIO, tarfile.TarFile, IO[bytes]], descriptor_type: str = None, validate: bool = False, document_handler: 'stem.descriptor.DocumentHandler' = DocumentHandler.ENTRIES, normalize_newlines: Optional[bool] = None, digests: Sequence['stem.descriptor.DigestHash'] = (), fields: Optional[Sequence[str]] = None, store: Optional['stem.descriptor.store.DescriptorStore'] = None, pipeline: int = 0, **kwargs: Any) -> Iterator['stem.descriptor.Descriptor']:
   """
   Simple function to read the descriptor contents from a file, providing an
   iterator for its :class:`~stem.descriptor.__init__.Descriptor` contents.
@@ -356,6 +468,80 @@ def parse_file(descriptor_file: Union[str, BinaryIO, tarfile.TarFile, IO[bytes]]
 
     my_descriptor_file = open(descriptor_path, 'rb')
 
+  Descriptor digests are calculated on demand, and retained afterward. If you
+  know you'll need them (for instance, to match microdescriptors with a
+  consensus) then the **digests** argument calculates them as we read each
+  descriptor, while its content is at hand...
+
+  ::
+
+    for desc in parse_file('cached-microdescs', digests = [DigestHash.SHA256]):
+      print(desc.digest())  # already calculated
+
+  Files are read in a single forward pass, so this can read from pipes,
+  sockets, and compressed streams...
+
+  ::
+
+    with lzma.open('server-descriptors-2019-11.tar.xz') as archive:
+      for desc in parse_file(tarfile.open(fileobj = archive, mode = 'r|')):
+        print(desc.fingerprint)
+
+  Descriptors are lazily parsed, but we still break up all of their content
+  as we read it. If you know which attributes you'll need then the **fields**
+  argument skips everything else, which is much faster when reading a handful
+  of attributes from a large archive. Other attributes are still available,
+  but reading one parses the descriptor in full...
+
+  ::
+
+    for desc in parse_file('cached-descriptors', fields = ['nickname', 'average_bandwidth']):
+      print('%s: %i' % (desc.nickname, desc.average_bandwidth))
+
+  Fields are supported by server descriptors, extrainfo descriptors,
+  microdescriptors, and router status entries. They're ignored when
+  validating, which requires reading everything.
+
+  When repeatedly reading files that mostly contain descriptors we've seen
+  before, such as tor's cached descriptors, a
+  :class:`~stem.descriptor.store.DescriptorStore` provides those descriptors
+  without parsing them again...
+
+  ::
+
+    store = DescriptorStore(max_size = 50000)
+
+    while True:
+      for desc in parse_file('cached-descriptors', store = store):
+        print(desc.nickname)
+
+      time.sleep(3600)
+
+  Decompressing a tarball and parsing its descriptors usually take turns on a
+  single thread. With a **pipeline** the tarball is instead decompressed on a
+  separate thread while we parse, buffering up to that many megabytes of
+  decompressed content ahead of us...
+
+  ::
+
+    for desc in parse_file('server-descriptors-2019-11.tar.xz', pipeline = 8):
+      print(desc.fingerprint)
+
+  .. versionchanged:: 2.0.0
+     Added the digests argument.
+
+  .. versionchanged:: 2.0.0
+     Unseekable files such as pipes and sockets are now supported.
+
+  .. versionchanged:: 2.0.0
+     Added the fields argument.
+
+  .. versionchanged:: 2.0.0
+     Added the store argument.
+
+  .. versionchanged:: 2.0.0
+     Added the pipeline argument.
+
   :param descriptor_file: path or opened file with the descriptor contents
   :param descriptor_type: `descriptor type <https://metrics.torproject.org/collector.html#data-formats>`_, this is guessed if not provided
   :param validate: checks the validity of the descriptor's content if **True**,
@@ -364,12 +550,23 @@ def parse_file(descriptor_file: Union[str, BinaryIO, tarfile.TarFile, IO[bytes]]
     :class:`~stem.descriptor.networkstatus.NetworkStatusDocument`
   :param normalize_newlines: converts windows newlines (CRLF), this is the
     default when reading data directories on windows
+  :param digests: :data:`~stem.descriptor.__init__.DigestHash` digests to
+    calculate for each descriptor as it's read
+  :param fields: attributes we'll read from the descriptors, if set then
+    other content is skipped until it's needed (only supported by server,
+    extrainfo, microdescriptor and router status entries)
+  :param store: :class:`~stem.descriptor.store.DescriptorStore` to provide
+    descriptors we've seen before
+  :param pipeline: if positive then tarballs are decompressed on a separate
+    thread, buffering up to this many megabytes ahead of our parsing
   :param kwargs: additional arguments for the descriptor constructor
 
   :returns: iterator for :class:`~stem.descriptor.__init__.Descriptor` instances in the file
 
   :raises:
-    * **ValueError** if the contents is malformed and validate is True
+    * **ValueError** if the contents is malformed and validate is True,
+      fields includes something that isn't an attribute of the descriptors, or
+      fields are provided for a descriptor type that doesn't support them
     * **TypeError** if we can't match the contents of the file to a descriptor type
     * **OSError** if unable to read from the descriptor_file
   """
@@ -387,13 +584,20 @@ def parse_file(descriptor_file: Union[str, BinaryIO, tarfile.TarFile, IO[bytes]]
     handler = _parse_file_for_tarfile
 
   if handler:
-    for desc in handler(descriptor_file, descriptor_type, validate, document_handler, **kwargs):
+    for desc in handler(descriptor_file, descriptor_type, validate, document_handler, digests = digests, fields = fields, store = store, pipeline = pipeline, **kwargs):
       yield desc
 
     return
 
-  if not descriptor_file.seekable():  # type: ignore
-    raise OSError(UNSEEKABLE_MSG)
+  if fields is not None:
+    kwargs['fields'] = fields
+
+  for hash_type in digests:
+    if hash_type not in DigestHash:
+      raise ValueError('Digests should be among our DigestHash enumeration (%s), not %s' % (', '.join(DigestHash), hash_type))
+
+  if _is_stream(descriptor_file):
+    descriptor_file = _ForwardReader(descriptor_file)  # type: ignore
 
   # The tor descriptor specifications do not provide a reliable method for
   # identifying a descriptor file's type and version so we need to guess
@@ -419,14 +623,14 @@ def parse_file(descriptor_file: Union[str, BinaryIO, tarfile.TarFile, IO[bytes]]
 
       if descriptor_type_match:
         desc_type, major_version, minor_version = descriptor_type_match.groups()
-        return _parse_metrics_file(desc_type, int(major_version), int(minor_version), descriptor_file, validate, document_handler, **kwargs)
+        return _parse_metrics_file(desc_type, int(major_version), int(minor_version), descriptor_file, validate, document_handler, store = store, **kwargs)
       else:
         raise ValueError("The descriptor_type must be of the form '<type> <major_version>.<minor_version>'")
     elif metrics_header_match:
       # Metrics descriptor handling
 
       desc_type, major_version, minor_version = metrics_header_match.groups()
-      return _parse_metrics_file(desc_type, int(major_version), int(minor_version), descriptor_file, validate, document_handler, **kwargs)
+      return _parse_metrics_file(desc_type, int(major_version), int(minor_version), descriptor_file, validate, document_handler, store = store, **kwargs)
     else:
       # Cached descriptor handling. These contain multiple descriptors per file.
 
@@ -434,11 +638,11 @@ def parse_file(descriptor_file: Union[str, BinaryIO, tarfile.TarFile, IO[bytes]]
         descriptor_file = NewlineNormalizer(descriptor_file)  # type: ignore
 
       if filename == 'cached-descriptors' or filename == 'cached-descriptors.new':
-        return stem.descriptor.server_descriptor._parse_file(descriptor_file, validate = validate, **kwargs)
+        return stem.descriptor.server_descriptor._parse_file(descriptor_file, validate = validate, store = store, **kwargs)
       elif filename == 'cached-extrainfo' or filename == 'cached-extrainfo.new':
-        return stem.descriptor.extrainfo_descriptor._parse_file(descriptor_file, validate = validate, **kwargs)
+        return stem.descriptor.extrainfo_descriptor._parse_file(descriptor_file, validate = validate, store = store, **kwargs)
       elif filename == 'cached-microdescs' or filename == 'cached-microdescs.new':
-        return stem.descriptor.microdescriptor._parse_file(descriptor_file, validate = validate, **kwargs)
+        return stem.descriptor.microdescriptor._parse_file(descriptor_file, validate = validate, store = store, **kwargs)
       elif filename == 'cached-consensus':
         return stem.descriptor.networkstatus._parse_file(descriptor_file, validate = validate, document_handler = document_handler, **kwargs)
       elif filename == 'cached-microdesc-consensus':
@@ -450,17 +654,200 @@ def parse_file(descriptor_file: Union[str, BinaryIO, tarfile.TarFile, IO[bytes]]
     if descriptor_path is not None:
       desc._set_path(os.path.abspath(descriptor_path))
 
+    for hash_type in digests:
+      _precompute_digest(desc, hash_type)
+
     yield desc
 
 
+def _precompute_digest(desc: 'stem.descriptor.Descriptor', hash_type: 'stem.descriptor.DigestHash') -> None:
+  """
+  Calculates a digest of the descriptor so it's retained for later calls.
+  Descriptors that lack a digest method, or can't calculate it (for instance,
+  because they're malformed), are skipped. Router status entries have a digest
+  attribute rather than method, which is the digest of their server
+  descriptor.
+  """
+
+  # check our class so we don't lazy load the attribute of router status entries
+
+  if not callable(getattr(type(desc), 'digest', None)):
+    return
+
+  try:
+    desc.digest(hash_type, DigestEncoding.HEX)  # type: ignore
+  except (ValueError, NotImplementedError):
+    pass  # unavailable for this descriptor
+
+
+def _from_store(store: Optional['stem.descriptor.store.DescriptorStore'], descriptor_type: Type['stem.descriptor.Descriptor'], content: bytes, validate: bool, *args: Any, **kwargs: Any) -> Optional['stem.descriptor.Descriptor']:
+  """
+  Provides the descriptor with the given content from our store if we've seen
+  it before, and otherwise parses it and adds it to our store. This provides
+  **None** if the store skips descriptors it has seen.
+
+  Descriptors from our store are shallow copies, with the annotations we're
+  given rather than those it was stored with. Annotations must be provided as
+  an **annotations** keyword argument.
+
+  :param store: store to consult, descriptors are simply parsed if **None**
+  :param descriptor_type: class of the descriptor
+  :param content: descriptor content
+  :param validate: checks the validity of the descriptor's content if
+    **True**, skips these checks otherwise
+  :param args: additional arguments for the descriptor constructor
+  :param kwargs: additional keyword arguments for the descriptor constructor
+
+  :returns: :class:`~stem.descriptor.__init__.Descriptor` for the content,
+    **None** if it should be skipped
+
+  :raises: **ValueError** if the contents is malformed and validate is True
+  """
+
+  if store is None:
+    return descriptor_type(content, validate, *args, **kwargs)  # type: ignore
+
+  # Digests are calculated from our raw content, so we can determine it with a
+  # bare instance that hasn't tokenized anything.
+
+  bare = descriptor_type.__new__(descriptor_type)
+  Descriptor.__init__(bare, content, lazy_load = True)
+
+  try:
+    digest = bare.digest()  # type: ignore
+  except ValueError:
+    digest = None  # content lacks what we'd digest
+
+  if digest is None:
+    return descriptor_type(content, validate, *args, **kwargs)  # type: ignore
+  elif store.skip_seen and digest in store:
+    return None
+
+  desc = store.get(digest, validated = validate)
+
+  if desc is None:
+    desc = descriptor_type(content, validate, *args, **kwargs)  # type: ignore
+    store.add(desc, validated = validate, digest = digest)
+
+  # Our digest doesn't cover annotations, and our caller sets where this was
+  # read from. Provide a copy so these reflect this read rather than when the
+  # descriptor was stored.
+
+  desc = copy.copy(desc)
+  desc._path = None
+  desc._archive_path = None
+
+  if 'annotations' in kwargs:
+    desc._annotation_lines = kwargs['annotations'] if kwargs['annotations'] else []  # type: ignore
+
+  return desc
+
+
+def join_by_digest(entries: Union['stem.descriptor.networkstatus.NetworkStatusDocument', Iterable['stem.descriptor.router_status_entry.RouterStatusEntry']], descriptors: Iterable['stem.descriptor.Descriptor']) -> Iterator['stem.descriptor.JoinedDescriptor']:
+  """
+  Pairs router status entries with the descriptors they reference. Entries of
+  a microdescriptor consensus are matched by their **microdescriptor_digest**
+  with :class:`~stem.descriptor.microdescriptor.Microdescriptor`, and other
+  entries by their **digest** with server descriptors...
+
+  ::
+
+    import stem.descriptor
+    from stem.descriptor import DigestHash
+
+    consensus = stem.descriptor.parse_file('cached-microdesc-consensus')
+    microdescriptors = stem.descriptor.parse_file('cached-microdescs', digests = [DigestHash.SHA256])
+
+    for joined in stem.descriptor.join_by_digest(consensus, microdescriptors):
+      if joined.descriptor is None:
+        print('%s lacks a microdescriptor' % joined.entry.fingerprint)
+      elif joined.entry is not None:
+        print('%s has an onion key of %s' % (joined.entry.nickname, joined.descriptor.onion_key))
+
+  This reads both arguments a single time, indexing one and streaming the
+  other. If both have a length we index the shorter, otherwise the entries are
+  indexed. Pairs are provided as we read the streamed side, after which
+  anything left unpaired within the index is provided.
+
+  .. versionadded:: 2.0.0
+
+  :param entries: network status document or router status entries, such as
+    those provided by :func:`~stem.descriptor.__init__.parse_file`
+  :param descriptors: descriptors the entries reference, such as those from
+    :func:`~stem.descriptor.__init__.parse_file` or
+    :func:`~stem.control.Controller.get_microdescriptors`
+
+  :returns: iterator for :class:`~stem.descriptor.__init__.JoinedDescriptor`,
+    with **None** for the entry or descriptor if unpaired
+  """
+
+  if isinstance(entries, stem.descriptor.networkstatus.NetworkStatusDocument):
+    entries = list(entries.routers.values())
+
+  index_entries = True
+
+  if hasattr(entries, '__len__') and hasattr(descriptors, '__len__'):
+    index_entries = len(entries) <= len(descriptors)  # type: ignore
+
+  if index_entries:
+    indexed, streamed = entries, descriptors  # type: Iterable[Any], Iterable[Any]
+    indexed_digest, streamed_digest = _entry_digest, _descriptor_digest
+  else:
+    indexed, streamed = descriptors, entries
+    indexed_digest, streamed_digest = _descriptor_digest, _entry_digest
+
+  def _joined(digest: Optional[str], indexed_item: Any, streamed_item: Any) -> 'stem.descriptor.JoinedDescriptor':
+    if index_entries:
+      return JoinedDescriptor(digest, indexed_item, streamed_item)
+    else:
+      return JoinedDescriptor(digest, streamed_item, indexed_item)
+
+  index = collections.OrderedDict()  # type: Dict[Optional[str], List[Any]]
+  paired = set()
+
+  for item in indexed:
+    index.setdefault(indexed_digest(item), []).append(item)
+
+  for item in streamed:
+    digest = streamed_digest(item)
+    matches = index.get(digest) if digest is not None else None
+
+    if matches:
+      paired.add(digest)
+
+      for match in matches:
+        yield _joined(digest, match, item)
+    else:
+      yield _joined(digest, None, item)
+
+  for digest, matches in index.items():
+    if digest not in paired:
+      for match in matches:
+        yield _joined(digest, match, None)
+
+
+def _entry_digest(entry: 'stem.descriptor.router_status_entry.RouterStatusEntry') -> Optional[str]:
+  if isinstance(entry, stem.descriptor.router_status_entry.RouterStatusEntryMicroV3):
+    return entry.microdescriptor_digest
+  else:
+    return getattr(entry, 'digest', None)
+
+
+def _descriptor_digest(desc: 'stem.descriptor.Descriptor') -> Optional[str]:
+  try:
+    return desc.digest()  # type: ignore
+  except (AttributeError, ValueError, NotImplementedError):
+    return None
+
+
 def _parse_file_for_path(descriptor_file: str, *args: Any, **kwargs: Any) -> Iterator['stem.descriptor.Descriptor']:
   with open(descriptor_file, 'rb') as desc_file:
     for desc in parse_file(desc_file, *args, **kwargs):
       yield desc
 
 
-def _parse_file_for_tar_path(descriptor_file: str, *args: Any, **kwargs: Any) -> Iterator['stem.descriptor.Descriptor']:
-  with tarfile.open(descriptor_file) as tar_file:
+def _parse_file_for_tar_path(descriptor_file: str, *args: Any, pipeline: int = 0, **kwargs: Any) -> Iterator['stem.descriptor.Descriptor']:
+  with _tar_stream(descriptor_file, pipeline) as tar_file:
     for desc in parse_file(tar_file, *args, **kwargs):
       desc._set_path(os.path.abspath(descriptor_file))
       yield desc
@@ -482,25 +869,42 @@ def _parse_file_for_tarfile(descriptor_file: tarfile.TarFile, *args: Any, **kwar
         entry.close()
 
 
-def _parse_metrics_file(descriptor_type: str, major_version: int, minor_version: int, descriptor_file: BinaryIO, validate: bool, document_handler: 'stem.descriptor.DocumentHandler', **kwargs: Any) -> Iterator['stem.descriptor.Descriptor']:
+def _parse_metrics_file(descriptor_type: str, major_version: int, minor_version: int, descriptor_file: BinaryIO, validate: bool, document_handler: 'stem.descriptor.DocumentHandler', store: Optional['stem.descriptor.store.DescriptorStore'] = None, **kwargs: Any) -> Iterator['stem.descriptor.Descriptor']:
   # Parses descriptor files from metrics, yielding individual descriptors. This
   # throws a TypeError if the descriptor_type or version isn't recognized.
+  # Stores are only consulted for server, extrainfo, and microdescriptors.
+
+  supports_fields = (
+    stem.descriptor.server_descriptor.RelayDescriptor.TYPE_ANNOTATION_NAME,
+    stem.descriptor.server_descriptor.BridgeDescriptor.TYPE_ANNOTATION_NAME,
+    stem.descriptor.extrainfo_descriptor.RelayExtraInfoDescriptor.TYPE_ANNOTATION_NAME,
+    stem.descriptor.extrainfo_descriptor.BridgeExtraInfoDescriptor.TYPE_ANNOTATION_NAME,
+    stem.descriptor.microdescriptor.Microdescriptor.TYPE_ANNOTATION_NAME,
+    stem.descriptor.networkstatus.NetworkStatusDocumentV2.TYPE_ANNOTATION_NAME,
+    stem.descriptor.networkstatus.BridgeNetworkStatusDocument.TYPE_ANNOTATION_NAME,
+    'network-status-consensus-3',
+    'network-status-vote-3',
+    'network-status-microdesc-consensus-3',
+  )
+
+  if kwargs.get('fields') is not None and descriptor_type not in supports_fields:
+    raise ValueError('Fields are only supported by server, extrainfo, microdescriptor and router status entries, not %s' % descriptor_type)
 
   desc = None  # type: Optional[Any]
   desc_type = None  # type: Optional[Type[stem.descriptor.Descriptor]]
   document_type = None  # type: Optional[Type]
 
   if descriptor_type == stem.descriptor.server_descriptor.RelayDescriptor.TYPE_ANNOTATION_NAME and major_version == 1:
-    for desc in stem.descriptor.server_descriptor._parse_file(descriptor_file, is_bridge = False, validate = validate, **kwargs):
+    for desc in stem.descriptor.server_descriptor._parse_file(descriptor_file, is_bridge = False, validate = validate, store = store, **kwargs):
       yield desc
   elif descriptor_type == stem.descriptor.server_descriptor.BridgeDescriptor.TYPE_ANNOTATION_NAME and major_version == 1:
     for desc in stem.descriptor.server_descriptor._parse_file(descriptor_file, is_bridge = True, validate = validate, **kwargs):
       yield desc
   elif descriptor_type == stem.descriptor.extrainfo_descriptor.RelayExtraInfoDescriptor.TYPE_ANNOTATION_NAME and major_version == 1:
-    for desc in stem.descriptor.extrainfo_descriptor._parse_file(descriptor_file, is_bridge = False, validate = validate, **kwargs):
+    for desc in stem.descriptor.extrainfo_descriptor._parse_file(descriptor_file, is_bridge = False, validate = validate, store = store, **kwargs):
       yield desc
   elif descriptor_type == stem.descriptor.microdescriptor.Microdescriptor.TYPE_ANNOTATION_NAME and major_version == 1:
-    for desc in stem.descriptor.microdescriptor._parse_file(descriptor_file, validate = validate, **kwargs):
+    for desc in stem.descriptor.microdescriptor._parse_file(descriptor_file, validate = validate, store = store, **kwargs):
       yield desc
   elif descriptor_type == stem.descriptor.extrainfo_descriptor.BridgeExtraInfoDescriptor.TYPE_ANNOTATION_NAME and major_version == 1:
     for desc in stem.descriptor.extrainfo_descriptor._parse_file(descriptor_file, is_bridge = True, validate = validate, **kwargs):
@@ -819,14 +1223,25 @@ class Descriptor(object):
   PARSER_FOR_LINE = {}  # type: Dict[str,  Callable[['stem.descriptor.Descriptor', ENTRY_TYPE], None]] # line keyword to its associated parsing function
   TYPE_ANNOTATION_NAME = None  # type: Optional[str]
 
-  def __init__(self, contents: bytes, lazy_load: bool = False) -> None:
+  def __init__(self, contents: bytes, lazy_load: bool = False, fields: Optional[Sequence[str]] = None) -> None:
     self._path = None  # type: Optional[str]
     self._archive_path = None  # type: Optional[str]
     self._raw_contents = contents
     self._lazy_loading = lazy_load
+    self._fields = None  # type: Optional[FrozenSet[str]] # attributes our entries are limited to, None if unlimited
+    self._keywords = None  # type: Optional[FrozenSet[str]] # keywords those attributes are parsed from
     self._entries = {}  # type: ENTRY_TYPE
     self._hash = None  # type: Optional[int]
     self._unrecognized_lines = []  # type: List[str]
+    self._digests = {}  # type: Dict[stem.descriptor.DigestHash, bytes]
+
+    if fields is not None:
+      # check our fields even if validating, where we parse everything
+
+      projection = _projection(type(self), tuple(fields))
+
+      if lazy_load:
+        self._fields, self._keywords = projection
 
   @classmethod
   def from_str(cls, content: str, **kwargs: Any) -> Union['stem.descriptor.Descriptor', List['stem.descriptor.Descriptor']]:
@@ -992,11 +1407,36 @@ class Descriptor(object):
 
     if self._lazy_loading:
       # we need to go ahead and parse the whole document to figure this out
+
+      if self._fields is not None:
+        self._unproject()
+
       self._parse(self._entries, False)
       self._lazy_loading = False
 
     return list(self._unrecognized_lines)
 
+  def _tokenize(self, validate: bool, keywords: Optional[FrozenSet[str]] = None) -> ENTRY_TYPE:
+    """
+    Breaks our content into 'keyword => (value, pgp block)' entries.
+
+    :param validate: checks the validity of our content if True
+    :param keywords: only provides entries with these keywords if set
+
+    :returns: **collections.OrderedDict** of our entries
+    """
+
+    return _descriptor_components(self._raw_contents, validate, keywords = keywords)
+
+  def _unproject(self) -> None:
+    """
+    Tokenizes the content we skipped for a field projection, so any attribute
+    can be lazily loaded.
+    """
+
+    self._entries = self._tokenize(False)
+    self._fields, self._keywords = None, None
+
   def _parse(self, entries: ENTRY_TYPE, validate: bool, parser_for_line: Optional[Dict[str, Callable]] = None) -> None:
     """
     Parses a series of 'keyword => (value, pgp block)' mappings and applies
@@ -1129,6 +1569,40 @@ class Descriptor(object):
 
     return content[start_index:end_index]
 
+  def _cached_digest(self, hash_type: 'stem.descriptor.DigestHash', encoding: 'stem.descriptor.DigestEncoding', content_func: Callable[[], bytes]) -> Union[str, 'hashlib._HASH']:  # type: ignore
+    """
+    Provides a digest of our content, retaining the hash so subsequent calls
+    (including those for other encodings) needn't rescan our content.
+
+    :param hash_type: digest hashing algorithm, either SHA1 or SHA256
+    :param encoding: digest encoding
+    :param content_func: provides the content our digest is calculated from
+
+    :returns: **hashlib.HASH** or **str** based on our encoding argument
+
+    :raises: **ValueError** if the digested content cannot be determined
+    """
+
+    hash_func = hashlib.sha1 if hash_type == DigestHash.SHA1 else hashlib.sha256
+
+    if encoding == DigestEncoding.RAW:
+      return hash_func(content_func())  # hash objects are mutable so not cached
+
+    digest = self._digests.get(hash_type)
+
+    if digest is None:
+      digest = hash_func(content_func()).digest()
+      self._digests[hash_type] = digest
+
+    if encoding == DigestEncoding.HEX:
+      return stem.util.str_tools._to_unicode(binascii.hexlify(digest).upper())
+    elif encoding == DigestEncoding.BASE64:
+      return stem.util.str_tools._to_unicode(base64.b64encode(digest).rstrip(b'='))
+    elif encoding not in DigestEncoding:
+      raise ValueError('Digest encodings should be among our DigestEncoding enumeration (%s), not %s' % (', '.join(DigestEncoding), encoding))
+    else:
+      raise NotImplementedError('BUG: stem.descriptor._cached_digest should recognize all DigestEncoding, lacked %s' % encoding)
+
   def __getattr__(self, name: str) -> Any:
     # We can't use standard hasattr() since it calls this function, recursing.
     # Doing so works since it stops recursing after several dozen iterations
@@ -1150,6 +1624,9 @@ class Descriptor(object):
       default, parsing_function = self.ATTRIBUTES[name]
 
       if self._lazy_loading:
+        if self._fields is not None and name not in self._fields:
+          self._unproject()
+
         try:
           parsing_function(self, self._entries)
         except (ValueError, KeyError):
@@ -1193,6 +1670,92 @@ class Descriptor(object):
     return self._compare(other, lambda s, o: s <= o)
 
 
+class _CompactDescriptor(object):
+  """
+  Mixin for descriptors that use less memory. Subclasses keep their attributes
+  in slots, parse their content up front, and share the strings they hold
+  with other descriptors.
+  """
+
+  __slots__ = ()
+
+  def _compact(self, free_entries: bool = True) -> None:
+    """
+    Parses our attributes and interns their strings.
+
+    :param free_entries: discards our tokenized content after parsing it if
+      **True**
+    """
+
+    if self._lazy_loading:
+      entries = self._entries
+      self._parse(entries, False)
+      self._lazy_loading = False
+
+      # parsers of attributes that aren't for a particular line (such as a
+      # server descriptor's exit policy)
+
+      line_parsers = set(self.PARSER_FOR_LINE.values())
+
+      for default, parser in self.ATTRIBUTES.values():
+        if parser not in line_parsers:
+          try:
+            parser(self, entries)
+          except ValueError:
+            pass
+
+    for name in self.ATTRIBUTES:
+      try:
+        value = object.__getattribute__(self, name)
+      except AttributeError:
+        continue  # unset, so we'll provide the default when it's requested
+
+      setattr(self, name, _intern(value))
+
+    if free_entries:
+      self._entries = {}
+
+
+def _compact_slots(descriptor_type: Type['stem.descriptor.Descriptor'], extra: Sequence[str] = ()) -> Tuple[str, ...]:
+  """
+  Provides the slots a compact variant of a descriptor needs.
+
+  :param descriptor_type: descriptor class to provide slots for
+  :param extra: attributes beside our ATTRIBUTES this type of descriptor sets
+
+  :returns: **tuple** with the slot names
+  """
+
+  return tuple(sorted(set(descriptor_type.ATTRIBUTES).union(COMPACT_SLOTS, extra)))
+
+
+def _intern(value: Any) -> Any:
+  """
+  Provides a copy of a value with its strings interned, so repeated values
+  (like platforms, versions, flags, and country codes) are only held once.
+  """
+
+  value_type = type(value)
+
+  if value_type == str:
+    return sys.intern(value)
+  elif value_type == bytes:
+    interned = _INTERNED_BYTES.get(value)
+
+    if interned is not None:
+      return interned
+    elif len(_INTERNED_BYTES) < INTERNED_BYTES_LIMIT:
+      _INTERNED_BYTES[value] = value
+
+    return value
+  elif value_type in (list, tuple, set):
+    return value_type([_intern(entry) for entry in value])
+  elif value_type in (dict, collections.OrderedDict):
+    return value_type([(_intern(k), _intern(v)) for k, v in value.items()])
+  else:
+    return value
+
+
 class NewlineNormalizer(object):
   """
   File wrapper that normalizes CRLF line endings.
@@ -1218,6 +1781,223 @@ class NewlineNormalizer(object):
     return self._wrapped_file.tell(*args)
 
 
+class _ForwardReader(object):
+  """
+  File wrapper that only reads forward. Our parsers step back onto the line
+  they last read, so we retain it rather than seeking.
+
+  Pipes and sockets can't seek, and seeking backward within compressed
+  streams (including members of compressed tarballs) restarts their
+  decompression from the beginning.
+  """
+
+  def __init__(self, wrapped_file: BinaryIO) -> None:
+    name = getattr(wrapped_file, 'name', None)
+
+    self._wrapped_file = wrapped_file
+    self.name = name if isinstance(name, str) else None  # sockets are named by their file descriptor
+
+    self._position = 0
+    self._last_line = b''  # last line we've provided
+    self._unread = b''  # line we've stepped back onto
+
+  def read(self, size: int = -1) -> bytes:
+    if size is None or size < 0:
+      content = self._unread + self._wrapped_file.read()
+    elif len(self._unread) >= size:
+      content = self._unread[:size]
+    else:
+      content = self._unread + self._wrapped_file.read(size - len(self._unread))
+
+    self._unread = self._unread[len(content):]
+    self._last_line = b''
+    self._position += len(content)
+
+    return content
+
+  def readline(self) -> bytes:
+    if self._unread:
+      line, self._unread = self._unread, b''
+    else:
+      line = self._wrapped_file.readline()
+
+    self._last_line = line
+    self._position += len(line)
+
+    return line
+
+  def readlines(self) -> List[bytes]:
+    return list(iter(self.readline, b''))
+
+  def seekable(self) -> bool:
+    return True
+
+  def seek(self, offset: int, whence: int = 0) -> int:
+    if whence != 0:
+      raise OSError('Descriptor files can only seek to absolute positions')
+    elif offset > self._position:
+      self.read(offset - self._position)
+    elif offset < self._position:
+      if self._unread or offset != self._position - len(self._last_line):
+        raise OSError('Descriptor files can only seek back to the start of the last line (unable to seek from %i to %i)' % (self._position, offset))
+
+      self._unread, self._last_line = self._last_line, b''
+      self._position = offset
+
+    return self._position
+
+  def tell(self) -> int:
+    return self._position
+
+
+class _PipelineReader(object):
+  """
+  File wrapper that decompresses on a separate thread, buffering up to
+  **depth** chunks ahead of our reader. Python's decompression modules release
+  the GIL, so this overlaps decompression with our parsing.
+  """
+
+  def __init__(self, path: str, depth: int, chunk_size: int = PIPELINE_CHUNK_SIZE) -> None:
+    if depth < 1:
+      raise ValueError('Pipeline depth must be positive, but was %i' % depth)
+
+    self.name = path
+
+    self._queue = queue.Queue(maxsize = depth)  # type: queue.Queue
+    self._closed = threading.Event()
+    self._buffer = b''
+    self._offset = 0  # position within our buffer that we've read up to
+    self._error = None  # type: Optional[BaseException]
+    self._finished = False
+
+    self._decompressed_file = _open_decompressed(path)
+    self._thread = threading.Thread(target = self._decompress, args = (path, chunk_size), name = 'descriptor decompression')
+    self._thread.daemon = True
+    self._thread.start()
+
+  def read(self, size: int = -1) -> bytes:
+    while not self._finished and (size is None or size < 0 or len(self._buffer) - self._offset < size):
+      chunk = self._queue.get()
+
+      if isinstance(chunk, BaseException):
+        self._error, self._finished = chunk, True
+      elif not chunk:
+        self._finished = True
+      else:
+        self._buffer, self._offset = self._buffer[self._offset:] + chunk, 0
+
+    if self._error and self._offset == len(self._buffer):
+      raise self._error
+
+    end = len(self._buffer) if (size is None or size < 0) else min(self._offset + size, len(self._buffer))
+    content = self._buffer[self._offset:end]
+    self._offset = end
+
+    return content
+
+  def close(self) -> None:
+    self._closed.set()
+    self._thread.join()
+
+  def _decompress(self, path: str, chunk_size: int) -> None:
+    try:
+      with self._decompressed_file:
+        while not self._closed.is_set():
+          chunk = self._decompressed_file.read(chunk_size)
+          self._put(chunk)
+
+          if not chunk:
+            break  # end of the file
+    except OSError as exc:
+      self._put(exc)
+    except Exception as exc:
+      self._put(OSError('Unable to decompress %s: %s' % (path, exc)))
+
+  def _put(self, item: Any) -> None:
+    # Block while our queue is full, unless our reader is closed.
+
+    while not self._closed.is_set():
+      try:
+        self._queue.put(item, timeout = 0.1)
+        break
+      except queue.Full:
+        pass
+
+
+def _open_decompressed(path: str) -> BinaryIO:
+  """
+  Opens a file, decompressing it if it's compressed with gzip, bzip2, or xz.
+
+  :raises:
+    * **ImportError** if the module needed to decompress the file is
+      unavailable
+    * **OSError** if the file cannot be read
+  """
+
+  with open(path, 'rb') as prefix_file:
+    prefix = prefix_file.read(8)
+
+  compression = Compression.PLAINTEXT
+
+  for magic, magic_compression in MAGIC_BYTES:
+    if prefix.startswith(magic):
+      compression = magic_compression
+
+  compression._check_available()
+
+  if compression == Compression.GZIP:
+    import gzip
+    return gzip.open(path)  # type: ignore
+  elif compression == Compression.BZ2:
+    import bz2
+    return bz2.open(path)  # type: ignore
+  elif compression == Compression.LZMA:
+    import lzma
+    return lzma.open(path)  # type: ignore
+  else:
+    return open(path, 'rb')
+
+
+@contextlib.contextmanager
+def _tar_stream(path: str, pipeline: int = 0) -> Iterator[tarfile.TarFile]:
+  """
+  Opens a tarball as a stream, so compressed tarballs are decompressed in a
+  single forward pass.
+
+  :param path: tarball to be read
+  :param pipeline: if positive we decompress on a separate thread, buffering
+    up to this many chunks ahead of our reader
+  """
+
+  if not pipeline:
+    with tarfile.open(path, 'r|*') as tar_file:
+      yield tar_file
+  else:
+    reader = _PipelineReader(path, pipeline)
+
+    try:
+      with tarfile.open(fileobj = reader, mode = 'r|') as tar_file:  # type: ignore
+        yield tar_file
+    finally:
+      reader.close()
+
+
+def _is_stream(descriptor_file: BinaryIO) -> bool:
+  """
+  Checks if a file should be read in a single forward pass.
+  """
+
+  if isinstance(descriptor_file, _ForwardReader):
+    return False
+  elif isinstance(descriptor_file, tarfile.ExFileObject) or type(descriptor_file).__module__ in ('gzip', 'bz2', 'lzma'):
+    return True  # compressed content that's costly to seek backward within
+
+  try:
+    return not descriptor_file.seekable()
+  except (AttributeError, ValueError):
+    return True
+
+
 def _read_until_keywords(keywords: Union[str, Sequence[str]], descriptor_file: BinaryIO, inclusive: bool = False, ignore_first: bool = False, skip: bool = False, end_position: Optional[int] = None) -> List[bytes]:
   return _read_until_keywords_with_ending_keyword(keywords, descriptor_file, inclusive, ignore_first, skip, end_position, include_ending_keyword = False)  # type: ignore
 
@@ -1253,7 +2033,7 @@ def _read_until_keywords_with_ending_keyword(keywords: Union[str, Sequence[str]]
     if first_line and content is not None:
       content.append(first_line)
 
-  keyword_match = re.compile(SPECIFIC_KEYWORD_LINE % '|'.join(keywords))
+  keyword_prefixes, keyword_match = _keyword_matcher(tuple(keywords))
 
   while True:
     last_position = descriptor_file.tell()
@@ -1266,10 +2046,12 @@ def _read_until_keywords_with_ending_keyword(keywords: Union[str, Sequence[str]]
     if not line:
       break  # EOF
 
-    line_match = keyword_match.match(stem.util.str_tools._to_unicode(line))
+    # checking the line's prefix first is much cheaper than a regex
+
+    line_match = keyword_match.match(line) if line.startswith(keyword_prefixes) else None
 
     if line_match:
-      ending_keyword = line_match.groups()[0]
+      ending_keyword = stem.util.str_tools._to_unicode(line_match.group(1))
 
       if not inclusive:
         descriptor_file.seek(last_position)
@@ -1286,6 +2068,18 @@ def _read_until_keywords_with_ending_keyword(keywords: Union[str, Sequence[str]]
     return content  # type: ignore
 
 
+@functools.lru_cache()
+def _keyword_matcher(keywords: Tuple[str, ...]) -> Tuple[Tuple[bytes, ...], Pattern]:
+  """
+  Provides the prefixes and regex for lines that start with the given keywords.
+  """
+
+  keywords = tuple([stem.util.str_tools._to_unicode(keyword) for keyword in keywords])
+  prefixes = tuple([stem.util.str_tools._to_bytes(keyword) for keyword in keywords])
+
+  return prefixes, re.compile(stem.util.str_tools._to_bytes(SPECIFIC_KEYWORD_LINE % '|'.join(keywords)))
+
+
 def _bytes_for_block(content: str) -> bytes:
   """
   Provides the base64 decoded content of a pgp-style block.
@@ -1426,11 +2220,72 @@ def _random_crypto_blob(block_type: Optional[str] = None) -> str:
     return crypto_blob
 
 
-def _descriptor_components(raw_contents: bytes, validate: bool, non_ascii_fields: Sequence[str] = ()) -> ENTRY_TYPE:
-  return _descriptor_components_with_extra(raw_contents, validate, (), non_ascii_fields)  # type: ignore
+@functools.lru_cache()
+def _projection(descriptor_type: Type['stem.descriptor.Descriptor'], fields: Tuple[str, ...]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+  """
+  Determines the keywords we need to parse the given attributes. Parsers
+  often provide several attributes (for instance, a server descriptor's
+  'bandwidth' line provides its average, burst, and observed bandwidth), so
+  this also provides all the attributes those keywords yield.
+
+  :param descriptor_type: descriptor class the attributes belong to
+  :param fields: attributes to be parsed
+
+  :returns: **tuple** with the attributes and keywords of the projection
+
+  :raises: **ValueError** if a field isn't one of the descriptor's attributes
+  """
+
+  parsers = set()
+
+  for field in fields:
+    if field not in descriptor_type.ATTRIBUTES:
+      raise ValueError("'%s' isn't an attribute of %s" % (field, descriptor_type.__name__))
+
+    parsers.add(descriptor_type.ATTRIBUTES[field][1])
+
+  attributes = frozenset([name for name, (default, parser) in descriptor_type.ATTRIBUTES.items() if parser in parsers])
+  keywords = frozenset([keyword for keyword, parser in descriptor_type.PARSER_FOR_LINE.items() if parser in parsers])
+
+  return attributes, keywords
+
+
+def _lines_with_keywords(raw_contents: bytes, keywords: FrozenSet[str]) -> List[str]:
+  """
+  Provides the lines of a descriptor that start with the given keywords, along
+  with any pgp style blocks that follow them. Other lines are dropped without
+  being decoded.
+
+  :param raw_contents: descriptor content
+  :param keywords: keywords of the lines to provide
+
+  :returns: **list** of the lines we're interested in
+  """
+
+  keywords_bytes = set([stem.util.str_tools._to_bytes(keyword) for keyword in keywords])
+  lines = []
+  in_block, keep = False, False
+
+  for line in stem.util.str_tools._to_bytes(raw_contents).split(b'\n'):
+    if in_block:
+      in_block = not line.startswith(b'-----END ')
+    elif line.startswith(b'-----BEGIN '):
+      in_block = True
+    else:
+      words = line.split(None, 2)
+      keep = bool(words) and (words[1] if words[0] == b'opt' and len(words) > 1 else words[0]) in keywords_bytes
+
+    if keep:
+      lines.append(stem.util.str_tools._to_unicode(line))
 
+  return lines
 
-def _descriptor_components_with_extra(raw_contents: bytes, validate: bool, extra_keywords: Sequence[str] = (), non_ascii_fields: Sequence[str] = ()) -> Tuple[ENTRY_TYPE, List[str]]:
+
+def _descriptor_components(raw_contents: bytes, validate: bool, non_ascii_fields: Sequence[str] = (), keywords: Optional[FrozenSet[str]] = None) -> ENTRY_TYPE:
+  return _descriptor_components_with_extra(raw_contents, validate, (), non_ascii_fields, keywords)  # type: ignore
+
+
+def _descriptor_components_with_extra(raw_contents: bytes, validate: bool, extra_keywords: Sequence[str] = (), non_ascii_fields: Sequence[str] = (), keywords: Optional[FrozenSet[str]] = None) -> Tuple[ENTRY_TYPE, List[str]]:
   """
   Initial breakup of the server descriptor contents to make parsing easier.
 
@@ -1450,6 +2305,8 @@ def _descriptor_components_with_extra(raw_contents: bytes, validate: bool, extra
   :param extra_keywords: entity keywords to put into a separate listing
     with ordering intact
   :param non_ascii_fields: fields containing non-ascii content
+  :param keywords: only provides entries with these keywords (and
+    extra_keywords among them) if set, skipping the rest without decoding it
 
   :returns:
     **collections.OrderedDict** with the 'keyword => (value, pgp key) entries'
@@ -1459,7 +2316,11 @@ def _descriptor_components_with_extra(raw_contents: bytes, validate: bool, extra
 
   entries = collections.OrderedDict()  # type: ENTRY_TYPE
   extra_entries = []  # entries with a keyword in extra_keywords
-  remaining_lines = stem.util.str_tools._to_unicode(raw_contents).split('\n')
+
+  if keywords is not None:
+    remaining_lines = _lines_with_keywords(raw_contents, keywords)
+  else:
+    remaining_lines = stem.util.str_tools._to_unicode(raw_contents).split('\n')
 
   while remaining_lines:
     line = remaining_lines.pop(0)
@@ -1533,5 +2394,6 @@ import stem.descriptor.extrainfo_descriptor
 import stem.descriptor.hidden_service
 import stem.descriptor.microdescriptor
 import stem.descriptor.networkstatus
+import stem.descriptor.router_status_entry
 import stem.descriptor.server_descriptor
 import stem.descriptor.tordnsel
@@ -0,0 +1,609 @@
+# Copyright 2020, Damian Johnson and The Tor Project
+# See LICENSE for licensing information
+
+"""
+Random access into descriptor archives such as those from `CollecTor
+<https://metrics.torproject.org/collector.html>`_. Reading a tarball with
+:func:`~stem.descriptor.__init__.parse_file` decompresses and parses all of
+it, so finding one relay's descriptors within a month long archive is slow.
+Instead we can index the archive once, then read only the descriptors we
+need...
+
+::
+
+  from stem.descriptor.archive import ArchiveIndex
+
+  with ArchiveIndex('server-descriptors-2019-11.tar.xz') as index:
+    for desc in index.get(fingerprint = '9695DFC35FFEB861329B9F1AB04C46397020CE31'):
+      print('%s published a descriptor at %s' % (desc.nickname, desc.published))
+
+Indexes are sqlite databases kept alongside the archive (by default its path
+with an **.index** suffix). They map each descriptor's fingerprint, digest,
+and publication time to where its content resides within the archive, and
+are rebuilt when the archive changes.
+
+Uncompressed archives are read by seeking to each descriptor. Compressed
+archives need to be decompressed up to the descriptors we read, but no
+further, and without parsing anything else. Xz archives that consist of
+multiple blocks or streams (such as those made by **xz --threads** or
+**xz --block-size**) are decompressed from the start of the block
+containing each descriptor. This isn't possible with gzip or bzip2 archives,
+so they're decompressed from their start.
+
+Network status documents (such as consensuses) are indexed as a whole, with
+their **valid_after** as their publication time.
+
+::
+
+  ArchiveIndex - Index of the descriptors within an archive
+    |- build - indexes the archive's descriptors
+    |- entries - index entries that match given criteria
+    |- read - raw content of index entries
+    |- get - descriptors that match given criteria
+    +- close - closes the index
+
+  IndexEntry - Location of a descriptor within an archive
+
+.. versionadded:: 2.0.0
+"""
+
+import bisect
+import collections
+import datetime
+import io
+import os
+import struct
+import tarfile
+import threading
+
+import stem.descriptor
+import stem.util.str_tools
+
+from stem.descriptor import MAGIC_BYTES, Compression
+from typing import Any, BinaryIO, Iterator, List, Optional, Sequence, Tuple, Type
+
+INDEX_SCHEMA_VERSION = 1  # version of our ArchiveIndex schema, bump this if you change the following
+INDEX_SCHEMA = (
+  'CREATE TABLE schema(version INTEGER)',
+  'INSERT INTO schema(version) VALUES (%i)' % INDEX_SCHEMA_VERSION,
+
+  'CREATE TABLE archive(size INTEGER, last_modified REAL, compression TEXT)',
+
+  'CREATE TABLE members(id INTEGER PRIMARY KEY, name TEXT, descriptor_type TEXT)',
+
+  'CREATE TABLE descriptors(member INTEGER, offset INTEGER, length INTEGER, fingerprint TEXT, digest TEXT, published TEXT)',
+  'CREATE INDEX descriptors_fingerprint ON descriptors(fingerprint)',
+  'CREATE INDEX descriptors_digest ON descriptors(digest)',
+  'CREATE INDEX descriptors_published ON descriptors(published)',
+
+  'CREATE TABLE checkpoints(uncompressed_offset INTEGER PRIMARY KEY, compressed_offset INTEGER, stream_start INTEGER, blocks_end INTEGER, stream_end INTEGER)',
+)
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+READ_SIZE = 65536  # bytes we read from the archive at a time
+
+XZ_HEADER_SIZE = 12  # size of both the xz stream header and footer
+
+
+class IndexEntry(collections.namedtuple('IndexEntry', ['member', 'descriptor_type', 'offset', 'length', 'fingerprint', 'digest', 'published'])):
+  """
+  Location of a descriptor within an archive.
+
+  :var str member: name of the archive member the descriptor is within
+  :var str descriptor_type: descriptor's type annotation, such as
+    'server-descriptor 1.0'
+  :var int offset: position of the descriptor within the uncompressed archive
+  :var int length: size of the descriptor's content in bytes
+  :var str fingerprint: relay's fingerprint, **None** if the descriptor lacks
+    one
+  :var str digest: descriptor's digest as provided by its **digest()**
+    method, **None** if it lacks one
+  :var datetime.datetime published: when the descriptor was published,
+    **None** if unknown
+  """
+
+
+class ArchiveIndex(object):
+  """
+  Index of the descriptors within an archive. This is built if it doesn't yet
+  exist, or the archive has changed since it was built.
+
+  :var str archive_path: location of the archive
+  :var str path: location of our sqlite database
+
+  :param archive_path: location of the archive, which can be an uncompressed
+    tarball or compressed with gzip, bzip2, or xz
+  :param path: location of our sqlite database, if unset this is the
+    archive's path with an **.index** suffix
+
+  :raises:
+    * **ImportError** if the sqlite3 module is unavailable, or the module
+      needed to decompress the archive
+    * **OSError** if the archive cannot be read
+    * **sqlite3.Error** if the database cannot be opened
+  """
+
+  def __init__(self, archive_path: str, path: Optional[str] = None) -> None:
+    try:
+      import sqlite3
+    except (ImportError, ModuleNotFoundError):
+      raise ImportError('ArchiveIndex requires the sqlite3 module')
+
+    self.archive_path = archive_path
+    self.path = path if path else archive_path + '.index'
+
+    self._lock = threading.RLock()
+    self._conn = sqlite3.connect(self.path, check_same_thread = False)
+
+    try:
+      schema = self._conn.execute('SELECT version FROM schema').fetchone()[0]
+      archive = self._conn.execute('SELECT size, last_modified, compression FROM archive').fetchone()
+    except (sqlite3.OperationalError, TypeError):
+      schema, archive = None, None  # new or incomplete database
+
+    stat = os.stat(archive_path)
+
+    if schema != INDEX_SCHEMA_VERSION or archive is None or tuple(archive[:2]) != (stat.st_size, stat.st_mtime):
+      self.build()
+    else:
+      self._compression = Compression[archive[2]]
+
+  def build(self) -> None:
+    """
+    Indexes the descriptors within our archive, replacing any prior index.
+
+    :raises:
+      * **ImportError** if the module needed to decompress the archive is
+        unavailable
+      * **OSError** if the archive cannot be read
+    """
+
+    stat = os.stat(self.archive_path)
+
+    with open(self.archive_path, 'rb') as archive_file:
+      compression = _compression(archive_file)
+      checkpoints = _xz_checkpoints(archive_file, stat.st_size) if compression == Compression.LZMA else None
+
+    if checkpoints is None:
+      checkpoints = [(0, 0, None, None, None)]  # decompress from the start of the archive
+
+    with self._lock, self._conn:
+      for table in ('schema', 'archive', 'members', 'descriptors', 'checkpoints'):
+        self._conn.execute('DROP TABLE IF EXISTS %s' % table)
+
+      for cmd in INDEX_SCHEMA:
+        self._conn.execute(cmd)
+
+      self._conn.executemany('INSERT INTO checkpoints(uncompressed_offset, compressed_offset, stream_start, blocks_end, stream_end) VALUES (?, ?, ?, ?, ?)', checkpoints)
+
+      with tarfile.open(self.archive_path, 'r:*') as tar_file:
+        for member_id, tar_entry in enumerate(tar_file):
+          if not tar_entry.isfile() or tar_entry.size == 0:
+            continue
+
+          with tar_file.extractfile(tar_entry) as member_file:
+            content = member_file.read()
+
+          descriptor_type, rows = _index_member(content, tar_entry.offset_data)
+
+          if descriptor_type is None:
+            continue  # lacks a type annotation, so we can't parse it later
+
+          self._conn.execute('INSERT INTO members(id, name, descriptor_type) VALUES (?, ?, ?)', (member_id, tar_entry.name, descriptor_type))
+          self._conn.executemany('INSERT INTO descriptors(member, offset, length, fingerprint, digest, published) VALUES (%i, ?, ?, ?, ?, ?)' % member_id, rows)
+
+      # written last so an interrupted build is redone
+
+      self._conn.execute('INSERT INTO archive(size, last_modified, compression) VALUES (?, ?, ?)', (stat.st_size, stat.st_mtime, Compression.keys()[Compression.index_of(compression)]))
+
+    self._compression = compression
+
+  def entries(self, fingerprint: Optional[str] = None, digest: Optional[str] = None, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None) -> List['stem.descriptor.archive.IndexEntry']:
+    """
+    Provides the index entries that match all of the given criteria, in the
+    order they appear within the archive.
+
+    :param fingerprint: relay fingerprint to match
+    :param digest: descriptor digest to match
+    :param start: descriptors published at or after this time
+    :param end: descriptors published at or before this time
+
+    :returns: **list** of :class:`~stem.descriptor.archive.IndexEntry`
+    """
+
+    query = 'SELECT members.name, members.descriptor_type, offset, length, fingerprint, digest, published FROM descriptors JOIN members ON members.id = descriptors.member'
+    conditions, args = [], []  # type: List[str], List[Any]
+
+    if fingerprint:
+      conditions.append('fingerprint = ?')
+      args.append(fingerprint.lstrip('$').upper())
+
+    if digest:
+      conditions.append('digest = ?')
+      args.append(digest)
+
+    if start:
+      conditions.append('published >= ?')
+      args.append(start.strftime(TIMESTAMP_FORMAT))
+
+    if end:
+      conditions.append('published <= ?')
+      args.append(end.strftime(TIMESTAMP_FORMAT))
+
+    if conditions:
+      query += ' WHERE ' + ' AND '.join(conditions)
+
+    with self._lock:
+      rows = self._conn.execute(query + ' ORDER BY offset', args).fetchall()
+
+    return [IndexEntry(*row[:6], datetime.datetime.strptime(row[6], TIMESTAMP_FORMAT) if row[6] else None) for row in rows]
+
+  def read(self, entries: Sequence['stem.descriptor.archive.IndexEntry']) -> Iterator[bytes]:
+    """
+    Provides the raw content of index entries. Compressed archives are read
+    in a single forward pass, so entries should be provided in the order
+    they appear within the archive (as
+    :func:`~stem.descriptor.archive.ArchiveIndex.entries` provides them).
+
+    :param entries: index entries to read
+
+    :returns: **iterator** for the **bytes** of each entry
+
+    :raises:
+      * **ImportError** if the module needed to decompress the archive is
+        unavailable
+      * **OSError** if the archive cannot be read or is truncated
+    """
+
+    with self._lock:
+      checkpoints = self._conn.execute('SELECT uncompressed_offset, compressed_offset, stream_start, blocks_end, stream_end FROM checkpoints ORDER BY uncompressed_offset').fetchall()
+
+    checkpoint_offsets = [checkpoint[0] for checkpoint in checkpoints]
+
+    with open(self.archive_path, 'rb') as archive_file:
+      if self._compression == Compression.PLAINTEXT:
+        for entry in entries:
+          archive_file.seek(entry.offset)
+          yield archive_file.read(entry.length)
+
+        return
+
+      chunks = None  # type: Optional[Iterator[bytes]]
+      position, buffered = 0, b''  # uncompressed offset of our buffered content
+
+      for entry in entries:
+        checkpoint = checkpoints[bisect.bisect_right(checkpoint_offsets, entry.offset) - 1]
+
+        # Decompress from a checkpoint if this entry is before our position,
+        # or starting from the checkpoint lets us skip ahead.
+
+        if chunks is None or entry.offset < position or checkpoint[0] > position + len(buffered):
+          chunks = _decompress(archive_file, self._compression, checkpoint)
+          position, buffered = checkpoint[0], b''
+
+        while position + len(buffered) < entry.offset + entry.length:
+          # discard content prior to this entry before reading more
+
+          if position + len(buffered) <= entry.offset:
+            position, buffered = position + len(buffered), b''
+          elif position < entry.offset:
+            position, buffered = entry.offset, buffered[entry.offset - position:]
+
+          try:
+            buffered += next(chunks)
+          except StopIteration:
+            raise OSError('%s is truncated, ended before the descriptor at offset %i' % (self.archive_path, entry.offset))
+
+        start = entry.offset - position
+        yield buffered[start:start + entry.length]
+
+  def get(self, fingerprint: Optional[str] = None, digest: Optional[str] = None, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None, validate: bool = False, **kwargs: Any) -> Iterator['stem.descriptor.Descriptor']:
+    """
+    Provides the descriptors that match all of the given criteria, in the
+    order they appear within the archive. Only these descriptors are read
+    and parsed.
+
+    :param fingerprint: relay fingerprint to match
+    :param digest: descriptor digest to match
+    :param start: descriptors published at or after this time
+    :param end: descriptors published at or before this time
+    :param validate: checks the validity of the descriptor's content if
+      **True**, skips these checks otherwise
+    :param kwargs: additional arguments for
+      :func:`~stem.descriptor.__init__.parse_file`
+
+    :returns: **iterator** for :class:`~stem.descriptor.__init__.Descriptor`
+      instances
+
+    :raises:
+      * **ValueError** if the contents is malformed and validate is **True**
+      * **ImportError** if the module needed to decompress the archive is
+        unavailable
+      * **OSError** if the archive cannot be read or is truncated
+    """
+
+    entries = self.entries(fingerprint, digest, start, end)
+    archive_path = os.path.abspath(self.archive_path)
+
+    for entry, content in zip(entries, self.read(entries)):
+      for desc in stem.descriptor.parse_file(io.BytesIO(content), entry.descriptor_type, validate = validate, **kwargs):
+        desc._set_path(archive_path)
+        desc._set_archive_path(entry.member)
+        yield desc
+
+  def close(self) -> None:
+    """
+    Closes our database connection.
+    """
+
+    with self._lock:
+      self._conn.close()
+
+  def __len__(self) -> int:
+    with self._lock:
+      return self._conn.execute('SELECT COUNT(*) FROM descriptors').fetchone()[0]
+
+  def __enter__(self) -> 'stem.descriptor.archive.ArchiveIndex':
+    return self
+
+  def __exit__(self, exit_type: Optional[Type[BaseException]], value: Optional[BaseException], traceback: Any) -> None:
+    self.close()
+
+
+def _index_member(content: bytes, data_offset: int) -> Tuple[Optional[str], List[Tuple[int, int, Optional[str], Optional[str], Optional[str]]]]:
+  """
+  Indexes the descriptors within an archive member.
+
+  :param content: member's content
+  :param data_offset: position of the member's content within the
+    uncompressed archive
+
+  :returns: **tuple** of the form (descriptor_type, rows), with a row of
+    (offset, length, fingerprint, digest, published) for each descriptor
+  """
+
+  if not content.startswith(b'@type '):
+    return None, []
+
+  descriptor_type = stem.util.str_tools._to_unicode(content.split(b'\n', 1)[0][6:].strip())
+  document_handler = stem.descriptor.DocumentHandler.DOCUMENT
+  rows = []
+  position = 0
+
+  for desc in stem.descriptor.parse_file(io.BytesIO(content), descriptor_type, document_handler = document_handler):
+    raw = desc.get_bytes()
+    offset = content.find(raw, position)
+
+    if offset == -1:
+      # content was altered when read (such as normalizing newlines), so
+      # point at the whole member
+
+      offset, raw = 0, content
+
+    position = offset + len(raw)
+
+    fingerprint = getattr(desc, 'fingerprint', None)
+    published = getattr(desc, 'published', None) or getattr(desc, 'valid_after', None)
+
+    try:
+      digest = desc.digest()
+    except (AttributeError, NotImplementedError, TypeError, ValueError):
+      digest = None
+
+    rows.append((
+      data_offset + offset,
+      len(raw),
+      fingerprint.upper() if isinstance(fingerprint, str) else None,
+      digest if isinstance(digest, str) else None,
+      published.strftime(TIMESTAMP_FORMAT) if isinstance(published, datetime.datetime) else None,
+    ))
+
+  return descriptor_type, rows
+
+
+def _compression(archive_file: BinaryIO) -> 'stem.descriptor._Compression':
+  """
+  Determines how an archive is compressed from its leading bytes.
+  """
+
+  archive_file.seek(0)
+  prefix = archive_file.read(8)
+
+  for magic, compression in MAGIC_BYTES:
+    if prefix.startswith(magic):
+      return compression
+
+  return Compression.PLAINTEXT
+
+
+def _xz_checkpoints(archive_file: BinaryIO, size: int) -> Optional[List[Tuple[int, int, int, int, int]]]:
+  """
+  Provides the positions we can start decompressing a xz archive from. Each
+  block of a xz stream can be decompressed independently, and the index at
+  the end of the stream lists their sizes.
+
+  :param archive_file: xz archive
+  :param size: size of the archive in bytes
+
+  :returns: **list** of (uncompressed_offset, compressed_offset,
+    stream_start, blocks_end, stream_end) tuples for each block, or **None**
+    if the archive's structure isn't what we expect
+  """
+
+  streams = []
+  end = size
+
+  while end > 0:
+    # streams can be followed by null padding
+
+    archive_file.seek(end - 4)
+
+    while end > 4 and archive_file.read(4) == b'\x00' * 4:
+      end -= 4
+      archive_file.seek(end - 4)
+
+    archive_file.seek(max(0, end - XZ_HEADER_SIZE))
+    footer = archive_file.read(XZ_HEADER_SIZE)
+
+    if len(footer) != XZ_HEADER_SIZE or footer[-2:] != b'YZ':
+      return None
+
+    index_size = (struct.unpack('<I', footer[4:8])[0] + 1) * 4
+    index_start = end - XZ_HEADER_SIZE - index_size
+
+    archive_file.seek(max(0, index_start))
+    index = archive_file.read(index_size)
+
+    if index_start < XZ_HEADER_SIZE or not index or index[0] != 0:
+      return None
+
+    records = []
+    record_count, position = _xz_varint(index, 1)
+
+    for _ in range(record_count):
+      unpadded_size, position = _xz_varint(index, position)
+      uncompressed_size, position = _xz_varint(index, position)
+      records.append(((unpadded_size + 3) // 4 * 4, uncompressed_size))
+
+    stream_start = index_start - sum([block_size for block_size, _ in records]) - XZ_HEADER_SIZE
+    archive_file.seek(max(0, stream_start))
+
+    if stream_start < 0 or archive_file.read(6) != b'\xfd7zXZ\x00':
+      return None
+
+    streams.append((stream_start, index_start, end, records))
+    end = stream_start
+
+  checkpoints = []
+  uncompressed_offset = 0
+
+  for stream_start, blocks_end, stream_end, records in reversed(streams):
+    compressed_offset = stream_start + XZ_HEADER_SIZE
+
+    for block_size, uncompressed_size in records:
+      checkpoints.append((uncompressed_offset, compressed_offset, stream_start, blocks_end, stream_end))
+      compressed_offset += block_size
+      uncompressed_offset += uncompressed_size
+
+  return checkpoints if checkpoints else None
+
+
+def _xz_varint(content: bytes, position: int) -> Tuple[int, int]:
+  """
+  Reads a xz variable length integer, seven bits per a byte.
+
+  :returns: **tuple** of the form (value, position after the integer)
+  """
+
+  value, shift = 0, 0
+
+  while True:
+    if position >= len(content):
+      raise OSError('xz index is truncated')
+
+    byte = content[position]
+    value |= (byte & 0x7F) << shift
+    position += 1
+    shift += 7
+
+    if not byte & 0x80:
+      return value, position
+
+
+def _decompress(archive_file: BinaryIO, compression: 'stem.descriptor._Compression', checkpoint: Tuple[int, int, Optional[int], Optional[int], Optional[int]]) -> Iterator[bytes]:
+  """
+  Decompresses an archive from a checkpoint. Archives can consist of multiple
+  concatenated streams, so we start a new decompressor whenever one ends.
+
+  :param archive_file: archive to decompress
+  :param compression: archive's compression method
+  :param checkpoint: (uncompressed_offset, compressed_offset, stream_start,
+    blocks_end, stream_end) tuple to decompress from, the later three are
+    **None** unless this is a xz block
+
+  :returns: **iterator** for decompressed content
+  """
+
+  _, compressed_offset, stream_start, blocks_end, stream_end = checkpoint
+
+  if stream_start is not None:
+    # Decompress the remaining blocks of this xz stream. Its index is omitted
+    # since it lists the blocks we skipped, and would fail validation.
+
+    archive_file.seek(stream_start)
+    decompressor = _decompressor(compression)
+    _feed(decompressor, compression, archive_file.read(XZ_HEADER_SIZE))
+
+    archive_file.seek(compressed_offset)
+    remaining = blocks_end - compressed_offset
+
+    while remaining > 0:
+      content = archive_file.read(min(READ_SIZE, remaining))
+
+      if not content:
+        return
+
+      remaining -= len(content)
+      output = _feed(decompressor, compression, content)
+
+      if output:
+        yield output
+
+    compressed_offset = stream_end
+
+  archive_file.seek(compressed_offset)
+  decompressor, pending = None, b''
+
+  while True:
+    if not pending:
+      pending = archive_file.read(READ_SIZE)
+
+      if not pending:
+        return
+
+    if decompressor is None or decompressor.eof:
+      pending = pending.lstrip(b'\x00')  # padding between streams
+
+      if not pending:
+        continue
+
+      decompressor = _decompressor(compression)
+
+    output = _feed(decompressor, compression, pending)
+    pending = decompressor.unused_data if decompressor.eof else b''
+
+    if output:
+      yield output
+
+
+def _feed(decompressor: Any, compression: 'stem.descriptor._Compression', content: bytes) -> bytes:
+  """
+  Provides a decompressor with more content.
+  """
+
+  try:
+    return decompressor.decompress(content)
+  except Exception as exc:
+    raise OSError('Failed to decompress as %s: %s' % (compression, exc))
+
+
+def _decompressor(compression: 'stem.descriptor._Compression') -> Any:
+  """
+  Provides a decompressor that reports when its stream has ended.
+  """
+
+  if compression == Compression.GZIP:
+    import zlib
+    return zlib.decompressobj(zlib.MAX_WBITS | 32)
+  elif compression == Compression.BZ2:
+    import bz2
+    return bz2.BZ2Decompressor()
+  elif compression == Compression.LZMA:
+    try:
+      import lzma
+    except ImportError:
+      raise ImportError('Decompressing lzma data requires https://docs.python.org/3/library/lzma.html')
+
+    return lzma.LZMADecompressor()
+  else:
+    raise ValueError('%s archives cannot be decompressed incrementally' % compression)
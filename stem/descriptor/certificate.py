@@ -54,7 +54,9 @@ used to for a variety of purposes...
 
 import base64
 import binascii
+import copy
 import datetime
+import functools
 import hashlib
 import re
 
@@ -65,7 +67,7 @@ import stem.util.str_tools
 
 from stem.client.datatype import CertType, Field, Size, split
 from stem.descriptor import ENTRY_TYPE
-from typing import Callable, List, Optional, Sequence, Tuple, Union
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
 
 ED25519_KEY_LENGTH = 32
 ED25519_HEADER_LENGTH = 40
@@ -76,6 +78,11 @@ SIG_PREFIX_HS_V3 = b'Tor onion service descriptor sig v3'
 
 DEFAULT_EXPIRATION_HOURS = 54  # HSv3 certificate expiration of tor
 
+# Relays republish the same identity certificate with each of their server
+# descriptors, so we retain enough parsed certificates for a full network.
+
+CERTIFICATE_CACHE_SIZE = 16384
+
 ExtensionType = stem.util.enum.Enum(('HAS_SIGNING_KEY', 4),)
 ExtensionFlag = stem.util.enum.UppercaseEnum('AFFECTS_VALIDATION', 'UNKNOWN')
 
@@ -166,7 +173,12 @@ class Ed25519Certificate(object):
   @staticmethod
   def from_base64(content: str) -> 'stem.descriptor.certificate.Ed25519Certificate':
     """
-    Parses a base64 encoded ED25519 certificate.
+    Parses a base64 encoded ED25519 certificate. Parsed certificates are cached
+    by their content, and we provide a copy of the cached certificate so
+    modifying it has no effect on others.
+
+    .. versionchanged:: 2.0.0
+       Results are cached by their base64 content.
 
     :param content: base64 encoded certificate
 
@@ -176,20 +188,7 @@ class Ed25519Certificate(object):
     :raises: **ValueError** if content is malformed
     """
 
-    content = stem.util.str_tools._to_unicode(content)
-
-    if content.startswith('-----BEGIN ED25519 CERT-----\n') and content.endswith('\n-----END ED25519 CERT-----'):
-      content = content[29:-27]
-
-    try:
-      decoded = base64.b64decode(content)
-
-      if not decoded:
-        raise TypeError('empty')
-
-      return Ed25519Certificate.unpack(decoded)
-    except (TypeError, binascii.Error) as exc:
-      raise ValueError("Ed25519 certificate wasn't propoerly base64 encoded (%s):\n%s" % (exc, content))
+    return _copy_certificate(_from_base64(stem.util.str_tools._to_unicode(content)))
 
   def pack(self) -> bytes:
     """
@@ -397,11 +396,7 @@ class Ed25519CertificateV1(Ed25519Certificate):
       if not signing_key:
         raise ValueError('Server descriptor missing an ed25519 signing key')
 
-      try:
-        key = Ed25519PublicKey.from_public_bytes(signing_key)
-        key.verify(self.signature, base64.b64decode(stem.util.str_tools._to_bytes(self.to_base64()))[:-ED25519_SIGNATURE_LENGTH])
-      except InvalidSignature:
-        raise ValueError('Ed25519KeyCertificate signing key is invalid (signature forged or corrupt)')
+      _validate_certificate_signature(signing_key, self.signature, self.pack()[:-ED25519_SIGNATURE_LENGTH])
     elif isinstance(descriptor, stem.descriptor.hidden_service.HiddenServiceDescriptorV3):
       signed_content = Ed25519CertificateV1._signed_content(descriptor)
       signature = stem.util.str_tools._decode_b64(descriptor.signature)
@@ -438,3 +433,76 @@ class Ed25519CertificateV1(Ed25519Certificate):
       raise ValueError('Malformed descriptor missing signature line')
 
     return prefix + match.group(1)
+
+  def __hash__(self) -> int:
+    return stem.util._hash_attr(self, 'version', 'type_int', 'expiration', 'key_type', 'key', 'extensions', 'signature')
+
+  def __eq__(self, other: Any) -> bool:
+    return hash(self) == hash(other) if isinstance(other, Ed25519CertificateV1) else False
+
+  def __ne__(self, other: Any) -> bool:
+    return not self == other
+
+
+def _copy_certificate(cert: 'stem.descriptor.certificate.Ed25519Certificate') -> 'stem.descriptor.certificate.Ed25519Certificate':
+  """
+  Provides a copy of a certificate that can be modified without changing the
+  original, which is much cheaper than parsing it again.
+  """
+
+  cert_copy = copy.copy(cert)
+
+  if isinstance(cert, Ed25519CertificateV1):
+    cert_copy.extensions = []  # type: ignore
+
+    for extension in cert.extensions:
+      extension_copy = copy.copy(extension)
+      extension_copy.flags = list(extension.flags)
+      extension_copy._cached_hash = None  # type: ignore # recalculate if modified
+      cert_copy.extensions.append(extension_copy)  # type: ignore
+
+  return cert_copy
+
+
+@functools.lru_cache(maxsize = CERTIFICATE_CACHE_SIZE)
+def _from_base64(content: str) -> 'stem.descriptor.certificate.Ed25519Certificate':
+  """
+  Parses a base64 encoded certificate. Malformed content raises an exception,
+  so only successfully parsed certificates are cached. Certificates this
+  provides are shared, so they must not be modified.
+  """
+
+  if content.startswith('-----BEGIN ED25519 CERT-----\n') and content.endswith('\n-----END ED25519 CERT-----'):
+    content = content[29:-27]
+
+  try:
+    decoded = base64.b64decode(content)
+
+    if not decoded:
+      raise TypeError('empty')
+
+    return Ed25519Certificate.unpack(decoded)
+  except (TypeError, binascii.Error) as exc:
+    raise ValueError("Ed25519 certificate wasn't propoerly base64 encoded (%s):\n%s" % (exc, content))
+
+
+@functools.lru_cache(maxsize = CERTIFICATE_CACHE_SIZE)
+def _validate_certificate_signature(signing_key: bytes, signature: bytes, signed_content: bytes) -> bool:
+  """
+  Checks that a certificate was signed by the given key. Forged signatures
+  raise an exception, so only successful checks are cached.
+
+  :raises:
+    * **ValueError** if the signature is invalid
+    * **ImportError** if cryptography module with ed25519 support is unavailable
+  """
+
+  from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+  from cryptography.exceptions import InvalidSignature
+
+  try:
+    Ed25519PublicKey.from_public_bytes(signing_key).verify(signature, signed_content)
+  except InvalidSignature:
+    raise ValueError('Ed25519KeyCertificate signing key is invalid (signature forged or corrupt)')
+
+  return True
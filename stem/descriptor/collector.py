@@ -43,35 +43,81 @@ With CollecTor you can either read descriptors directly...
     |- get_exit_lists - TorDNSEL exit list
     |
     |- index - metadata for content available from CollecTor
-    +- files - files available from CollecTor
+    |- files - files available from CollecTor
+    |- plan - fewest files that cover a time range
+    +- download - concurrently download files to disk
+
+  LocalIndex - Persistent index of CollecTor's files
+    |- sync - update our index with CollecTor's present files
+    |- synced_at - when we last synced
+    |- files - files available from CollecTor
+    |- plan - fewest files that cover a time range
+    |- record_download - note that we've downloaded and verified a file
+    +- downloaded_to - location we've downloaded a file to
 
 .. versionadded:: 1.8.0
 """
 
 import base64
 import binascii
+import concurrent.futures
 import datetime
 import hashlib
+import io
 import json
 import os
 import re
+import socket
+import sys
 import tempfile
+import threading
 import time
+import urllib.request
 
 import stem.descriptor
 import stem.util.connection
 import stem.util.str_tools
+import stem.util.system
 
 from stem.descriptor import Compression, DocumentHandler
-from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from stem.util import log
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 COLLECTOR_URL = 'https://collector.torproject.org/'
 REFRESH_INDEX_RATE = 3600  # get new index if cached copy is an hour old
 SINGLETON_COLLECTOR = None
 
+DOWNLOAD_CONCURRENCY = 4  # files CollecTor.download() fetches at a time
+DOWNLOAD_CHUNK_SIZE = 65536  # bytes we read and write at a time
+
 YEAR_DATE = re.compile('-(\\d{4})-(\\d{2})\\.')
 SEC_DATE = re.compile('(\\d{4}-\\d{2}-\\d{2}-\\d{2}-\\d{2}-\\d{2})')
 
+# Descriptor types we can skip by peeking at their 'published' lines. These
+# all have exactly one such line per descriptor, so an archive member can be
+# skipped when all of them fall outside the range we're after.
+
+PUBLISHED_TYPES = ('server-descriptor', 'extra-info', 'bridge-server-descriptor', 'bridge-extra-info')
+TYPE_ANNOTATION = re.compile(b'^@type (\\S+) ')
+PUBLISHED_LINE = re.compile(b'^published (\\d{4}-\\d{2}-\\d{2} \\d{2}:\\d{2}:\\d{2})\\r?$', re.MULTILINE)
+
+INDEX_SCHEMA_VERSION = 1  # version of our LocalIndex schema, bump this if you change the following
+INDEX_SCHEMA = (
+  'CREATE TABLE schema(version INTEGER)',
+  'INSERT INTO schema(version) VALUES (%i)' % INDEX_SCHEMA_VERSION,
+
+  'CREATE TABLE metadata(synced_at REAL)',
+  'INSERT INTO metadata(synced_at) VALUES (0)',
+
+  'CREATE TABLE files(path TEXT PRIMARY KEY, types TEXT, size INTEGER, sha256 TEXT, first_published TEXT, last_published TEXT, last_modified TEXT, start_time TEXT, end_time TEXT, downloaded_to TEXT, verified_at REAL)',
+  'CREATE INDEX files_start_time ON files(start_time)',
+  'CREATE INDEX files_end_time ON files(end_time)',
+
+  'CREATE TABLE file_types(type TEXT, path TEXT)',
+  'CREATE INDEX file_types_type ON file_types(type)',
+  'CREATE INDEX file_types_path ON file_types(path)',
+)
+
 # distant future date so we can sort files without a timestamp at the end
 
 FUTURE = datetime.datetime(9999, 1, 1)
@@ -206,7 +252,7 @@ class File(object):
     else:
       self.start, self.end = File._guess_time_range(path)
 
-  def read(self, directory: Optional[str] = None, descriptor_type: Optional[str] = None, start: datetime.datetime = None, end: datetime.datetime = None, document_handler: stem.descriptor.DocumentHandler = DocumentHandler.ENTRIES, timeout: Optional[int] = None, retries: Optional[int] = 3) -> Iterator[stem.descriptor.Descriptor]:
+  def read(self, directory: Optional[str] = None, descriptor_type: Optional[str] = None, start: datetime.datetime = None, end: datetime.datetime = None, document_handler: stem.descriptor.DocumentHandler = DocumentHandler.ENTRIES, timeout: Optional[int] = None, retries: Optional[int] = 3, pipeline: int = 0) -> Iterator[stem.descriptor.Descriptor]:
     """
     Provides descriptors from this archive. Descriptors are downloaded or read
     from disk as follows...
@@ -236,6 +282,9 @@ class File(object):
     :param timeout: timeout when connection becomes idle, no timeout
       applied if **None**
     :param retries: maximum attempts to impose
+    :param pipeline: if positive then the archive is decompressed on a
+      separate thread, buffering up to this many megabytes ahead of our
+      parsing
 
     :returns: iterator for :class:`~stem.descriptor.__init__.Descriptor`
       instances in the file
@@ -265,17 +314,18 @@ class File(object):
         directory = os.path.dirname(self._downloaded_to)
       else:
         with tempfile.TemporaryDirectory() as tmp_directory:
-          for desc in self.read(tmp_directory, descriptor_type, start, end, document_handler, timeout, retries):
+          for desc in self.read(tmp_directory, descriptor_type, start, end, document_handler, timeout, retries, pipeline):
             yield desc
 
         return
 
     path = self.download(directory, timeout, retries)
 
-    # Archives can contain multiple descriptor types, so parsing everything and
-    # filtering to what we're after.
+    # Archives can contain multiple descriptor types. Members that plainly
+    # aren't what we're after are skipped prior to parsing, then we filter
+    # whatever remains.
 
-    for desc in stem.descriptor.parse_file(path, document_handler = document_handler):
+    for desc in _parse_archive(path, descriptor_type, start, end, document_handler, pipeline):
       if descriptor_type is None or descriptor_type.startswith(desc.type_annotation().name):
         # TODO: This can filter server and extrainfo times, but other
         # descriptor types may use other attribute names.
@@ -309,33 +359,166 @@ class File(object):
       * **OSError** if a mismatching file exists and **overwrite** is **False**
     """
 
-    filename = self.path.split('/')[-1]
+    path = self._destination(directory)
+
+    if self._is_downloaded(path, overwrite):
+      return path  # nothing to do, we already have the file
+
+    response = stem.util.connection.download(COLLECTOR_URL + self.path, timeout, retries)
+
+    with open(path, 'wb') as output_file:
+      output_file.write(response)
+
+    self._downloaded_to = path
+    return path
+
+  def _destination(self, directory: str) -> str:
+    """
+    Provides the path we download to within the given directory, creating it
+    if necessary.
+    """
+
     directory = os.path.expanduser(directory)
-    path = os.path.join(directory, filename)
+    os.makedirs(directory, exist_ok = True)
 
-    if not os.path.exists(directory):
-      os.makedirs(directory)
+    return os.path.join(directory, self.path.split('/')[-1])
 
-    # check if this file already exists with the correct checksum
+  def _expected_hash(self) -> Optional[str]:
+    return binascii.hexlify(base64.b64decode(self.sha256)).decode('utf-8') if self.sha256 else None
 
-    if os.path.exists(path):
-      with open(path, 'rb') as prior_file:
-        expected_hash = binascii.hexlify(base64.b64decode(self.sha256)).decode('utf-8')
-        actual_hash = hashlib.sha256(prior_file.read()).hexdigest()
+  def _is_downloaded(self, path: str, overwrite: bool) -> bool:
+    """
+    Checks if this file already exists with the correct checksum.
 
-        if expected_hash == actual_hash:
-          return path  # nothing to do, we already have the file
-        elif not overwrite:
-          raise OSError("%s already exists but mismatches CollecTor's checksum (expected: %s, actual: %s)" % (path, expected_hash, actual_hash))
+    :raises: **OSError** if a mismatching file exists and **overwrite** is
+      **False**
+    """
 
-    response = stem.util.connection.download(COLLECTOR_URL + self.path, timeout, retries)
+    if not os.path.exists(path):
+      return False
 
-    with open(path, 'wb') as output_file:
-      output_file.write(response)
+    expected_hash = self._expected_hash()
+    actual_hash = _sha256(path).hexdigest()
+
+    if expected_hash == actual_hash:
+      self._downloaded_to = path
+      return True
+    elif not overwrite:
+      raise OSError("%s already exists but mismatches CollecTor's checksum (expected: %s, actual: %s)" % (path, expected_hash, actual_hash))
+
+    return False
+
+  def _download_streamed(self, directory: str, timeout: Optional[int], retries: Optional[int], overwrite: bool, rate_limit: Optional['stem.descriptor.collector._RateLimit'], progress: Optional[Callable[['stem.descriptor.collector.File', int, int], None]]) -> str:
+    """
+    Downloads this file like :func:`~stem.descriptor.collector.File.download`,
+    but writes content to disk as it arrives and checks it against CollecTor's
+    checksum. If a download is interrupted its partial content is retained
+    (with a '.part' suffix) and later attempts resume from it.
+
+    Our **timeout** is the total time we can spend on this file, including
+    any retries.
 
+    :raises:
+      * :class:`~stem.DownloadTimeout` if our download didn't complete
+        within our timeout
+      * :class:`~stem.DownloadFailed` if the download fails or mismatches
+        CollecTor's checksum
+      * **OSError** if a mismatching file exists and **overwrite** is **False**
+    """
+
+    path = self._destination(directory)
+
+    if self._is_downloaded(path, overwrite):
+      return path
+
+    url = COLLECTOR_URL + self.path
+    partial_path = path + '.part'
+    retries = retries if retries is not None else 0
+    deadline = time.time() + timeout if timeout is not None else None
+
+    while True:
+      try:
+        self._fetch(url, partial_path, deadline, rate_limit, progress)
+        break
+      except socket.timeout as exc:
+        raise stem.DownloadTimeout(url, exc, sys.exc_info()[2], timeout)
+      except Exception as exc:
+        if retries > 0 and (deadline is None or deadline > time.time()):
+          log.debug('Failed to download from %s (%i retries remaining): %s' % (url, retries, exc))
+          retries -= 1
+        else:
+          log.debug('Failed to download from %s: %s' % (url, exc))
+          raise stem.DownloadFailed(url, exc, sys.exc_info()[2])
+
+    os.replace(partial_path, path)
     self._downloaded_to = path
     return path
 
+  def _fetch(self, url: str, partial_path: str, deadline: Optional[float], rate_limit: Optional['stem.descriptor.collector._RateLimit'], progress: Optional[Callable[['stem.descriptor.collector.File', int, int], None]]) -> None:
+    """
+    Downloads this file to the given path, resuming from any content it
+    already has.
+
+    :raises:
+      * **socket.timeout** if we don't finish by our deadline
+      * **ValueError** if the download mismatches CollecTor's checksum
+    """
+
+    def remaining() -> Optional[float]:
+      if deadline is None:
+        return None
+
+      timeout = deadline - time.time()
+
+      if timeout <= 0:
+        raise socket.timeout('timed out')
+
+      return timeout
+
+    offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+
+    if self.size and offset >= self.size:
+      offset = 0  # already complete yet we're here, so it must be malformed
+
+    request = urllib.request.Request(url)
+
+    if offset:
+      request.add_header('Range', 'bytes=%i-' % offset)
+
+    with urllib.request.urlopen(request, timeout = remaining()) as response:
+      # servers that don't support ranges provide the whole file
+
+      if offset and getattr(response, 'status', None) != 206:
+        offset = 0
+
+      checksum = _sha256(partial_path, offset) if offset else hashlib.sha256()
+      downloaded = offset
+
+      with open(partial_path, 'ab' if offset else 'wb') as partial_file:
+        while True:
+          chunk = response.read(DOWNLOAD_CHUNK_SIZE)
+
+          if not chunk:
+            break
+
+          remaining()  # raises if we've run out of time
+
+          partial_file.write(chunk)
+          checksum.update(chunk)
+          downloaded += len(chunk)
+
+          if rate_limit:
+            rate_limit.consume(len(chunk))
+
+          if progress:
+            progress(self, downloaded, self.size)
+
+    expected_hash = self._expected_hash()
+
+    if expected_hash and checksum.hexdigest() != expected_hash:
+      os.remove(partial_path)
+      raise ValueError("Download mismatches CollecTor's checksum (expected: %s, actual: %s)" % (expected_hash, checksum.hexdigest()))
+
   @staticmethod
   def _guess_compression(path: str) -> stem.descriptor._Compression:
     """
@@ -385,15 +568,23 @@ class CollecTor(object):
   provided in `an index <https://collector.torproject.org/index/index.json>`_
   that's fetched as required.
 
+  .. versionchanged:: 2.0.0
+     Added the index_path argument.
+
   :var int retries: number of times to attempt the request if downloading it
     fails
   :var float timeout: duration before we'll time out our request
+
+  :param index_path: sqlite database to persist CollecTor's index within,
+    see :class:`~stem.descriptor.collector.LocalIndex`, the index is only
+    kept in memory if **None**
   """
 
-  def __init__(self, retries: Optional[int] = 2, timeout: Optional[int] = None) -> None:
+  def __init__(self, retries: Optional[int] = 2, timeout: Optional[int] = None, index_path: Optional[str] = None) -> None:
     self.retries = retries
     self.timeout = timeout
 
+    self._local_index = LocalIndex(index_path) if index_path else None
     self._cached_index = None
     self._cached_files = None  # type: Optional[List[File]]
     self._cached_index_at = 0.0
@@ -602,6 +793,92 @@ class CollecTor(object):
       for desc in f.read(cache_to, 'tordnsel', start, end, timeout = timeout, retries = retries):
         yield desc  # type: ignore
 
+  def download(self, directory: str, descriptor_type: Optional[str] = None, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None, concurrency: int = DOWNLOAD_CONCURRENCY, rate_limit: Optional[float] = None, progress: Optional[Callable[['stem.descriptor.collector.File', int, int], None]] = None, overwrite: bool = False, timeout: Optional[int] = None, retries: Optional[int] = 3) -> List[str]:
+    """
+    Downloads the :func:`~stem.descriptor.collector.CollecTor.files` matching
+    the given criteria, fetching several at a time. Files we already have are
+    skipped, and partial downloads are resumed.
+
+    ::
+
+      import stem.descriptor.collector
+
+      def progress(f, downloaded, size):
+        print('%s: %i of %i bytes' % (f.path, downloaded, size))
+
+      collector = stem.descriptor.collector.get_instance()
+      collector.download('/tmp/archives', 'server-descriptor', rate_limit = 1048576, progress = progress)
+
+    .. versionadded:: 2.0.0
+
+    :param directory: destination to download into
+    :param descriptor_type: descriptor type or prefix to retrieve
+    :param start: publication time to begin with
+    :param end: publication time to end with
+    :param concurrency: maximum number of files to download at a time
+    :param rate_limit: maximum bytes per second to download, shared among
+      all of our files, unlimited if **None**
+    :param progress: callback that's notified as content arrives with the
+      file, the bytes we have so far, and its total size, this is called
+      from multiple threads
+    :param overwrite: replace existing files that mismatch CollecTor's
+      checksum if **True**, otherwise raises an exception
+    :param timeout: seconds we can spend downloading each individual file,
+      including retries, no timeout applied if **None**
+    :param retries: maximum attempts to impose on a per-file basis
+
+    :returns: **list** with the paths of our files, sorted oldest to newest
+
+    :raises:
+      * :class:`~stem.DownloadTimeout` if a download exceeds our timeout
+      * :class:`~stem.DownloadFailed` if a download fails
+      * **OSError** if a mismatching file exists and **overwrite** is **False**
+      * **ValueError** if our concurrency is not a positive integer
+    """
+
+    if not isinstance(concurrency, int) or concurrency < 1:
+      raise ValueError('Concurrency must be a positive integer, was %s' % concurrency)
+
+    files = self.files(descriptor_type, start, end)
+    limit = _RateLimit(rate_limit) if rate_limit else None
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = concurrency) as executor:
+      downloads = [executor.submit(self._download_file, f, directory, timeout, retries, overwrite, limit, progress) for f in files]
+
+      try:
+        return [download.result() for download in downloads]
+      except:
+        for download in downloads:
+          download.cancel()
+
+        raise
+
+  def plan(self, descriptor_type: Optional[str] = None, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None) -> List['stem.descriptor.collector.File']:
+    """
+    Provides the fewest :func:`~stem.descriptor.collector.CollecTor.files`
+    that cover the given criteria. CollecTor folds its recent files into
+    monthly archives, so recent files that an archive already spans are
+    omitted.
+
+    .. versionadded:: 2.0.0
+
+    :param descriptor_type: descriptor type or prefix to retrieve
+    :param start: publication time to begin with
+    :param end: publication time to end with
+
+    :returns: **list** of :class:`~stem.descriptor.collector.File`, sorted
+      oldest to newest
+
+    :raises:
+      If unable to retrieve the index this provide...
+
+        * **ValueError** if json is malformed
+        * **OSError** if unable to decompress
+        * :class:`~stem.DownloadFailed` if the download fails
+    """
+
+    return _plan(self.files(descriptor_type, start, end))
+
   def index(self, compression: Union[str, stem.descriptor._Compression] = 'best') -> Dict[str, Any]:
     """
     Provides the archives available in CollecTor.
@@ -659,6 +936,13 @@ class CollecTor(object):
         * :class:`~stem.DownloadFailed` if the download fails
     """
 
+    if self._local_index:
+      if time.time() - self._local_index.synced_at() >= REFRESH_INDEX_RATE:
+        self._local_index.sync(CollecTor._files(self.index(), []))
+        self._cached_index = None  # index now resides on disk
+
+      return self._local_index.files(descriptor_type, start, end)
+
     if not self._cached_files or time.time() - self._cached_index_at >= REFRESH_INDEX_RATE:
       self._cached_files = sorted(CollecTor._files(self.index(), []), key = lambda x: x.start if x.start else FUTURE)
 
@@ -675,6 +959,26 @@ class CollecTor(object):
 
     return matches
 
+  def _download_file(self, f: 'stem.descriptor.collector.File', directory: str, timeout: Optional[int], retries: Optional[int], overwrite: bool, rate_limit: Optional['stem.descriptor.collector._RateLimit'], progress: Optional[Callable[['stem.descriptor.collector.File', int, int], None]]) -> str:
+    """
+    Downloads a file, skipping our checksum of files our local index says
+    we've already verified.
+    """
+
+    if self._local_index:
+      path = self._local_index.downloaded_to(f)
+
+      if path and path == f._destination(directory):
+        f._downloaded_to = path
+        return path
+
+    path = f._download_streamed(directory, timeout, retries, overwrite, rate_limit, progress)
+
+    if self._local_index:
+      self._local_index.record_download(f, path)
+
+    return path
+
   @staticmethod
   def _files(val: Dict[str, Any], path: List[str]) -> List['stem.descriptor.collector.File']:
     """
@@ -701,3 +1005,365 @@ class CollecTor(object):
           files.extend(CollecTor._files(attr, path + [attr.get('path')]))
 
     return files
+
+
+class LocalIndex(object):
+  """
+  Persistent index of CollecTor's files, and which of them we've downloaded
+  and verified. This is a sqlite database that's synced incrementally, only
+  rewriting entries whose **last_modified** timestamp has changed, and
+  indexed by publication time so queries don't need to consider every file.
+
+  ::
+
+    import datetime
+
+    from stem.descriptor.collector import CollecTor
+
+    collector = CollecTor(index_path = '/var/cache/stem/collector.sqlite')
+
+    for f in collector.plan('server-descriptor', start = datetime.datetime(2019, 11, 1)):
+      print(f.path)
+
+  .. versionadded:: 2.0.0
+
+  :var str path: location of our sqlite database
+
+  :param path: location of our sqlite database, this is created if it
+    doesn't already exist
+
+  :raises:
+    * **ImportError** if the sqlite3 module is unavailable
+    * **sqlite3.Error** if the database cannot be opened
+  """
+
+  def __init__(self, path: str) -> None:
+    try:
+      import sqlite3
+    except (ImportError, ModuleNotFoundError):
+      raise ImportError('LocalIndex requires the sqlite3 module')
+
+    self.path = path
+
+    self._lock = threading.RLock()
+    self._conn = sqlite3.connect(path, check_same_thread = False)
+
+    try:
+      schema = self._conn.execute('SELECT version FROM schema').fetchone()[0]
+    except sqlite3.OperationalError:
+      schema = None  # new database
+
+    if schema != INDEX_SCHEMA_VERSION:
+      # Our database is just a cache of CollecTor's index, so rather than
+      # migrating prior schemas we start over.
+
+      with self._conn:
+        for table in ('schema', 'metadata', 'files', 'file_types'):
+          self._conn.execute('DROP TABLE IF EXISTS %s' % table)
+
+        for cmd in INDEX_SCHEMA:
+          self._conn.execute(cmd)
+
+  def sync(self, files: Sequence['stem.descriptor.collector.File']) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Updates our index to reflect CollecTor's present files. Files whose
+    **last_modified** timestamp has changed are replaced, and no longer
+    considered to be downloaded.
+
+    :param files: files CollecTor presently has
+
+    :returns: **tuple** with the paths that were (added, modified, removed)
+    """
+
+    added, modified = [], []  # type: List[str], List[str]
+    present = set()
+
+    with self._lock, self._conn:
+      known = dict(self._conn.execute('SELECT path, last_modified FROM files').fetchall())
+
+      for f in files:
+        present.add(f.path)
+        last_modified = f.last_modified.strftime('%Y-%m-%d %H:%M')
+
+        if f.path not in known:
+          added.append(f.path)
+        elif known[f.path] != last_modified:
+          modified.append(f.path)
+        else:
+          continue
+
+        self._conn.execute('DELETE FROM file_types WHERE path = ?', (f.path,))
+        self._conn.execute('INSERT OR REPLACE INTO files(path, types, size, sha256, last_modified, start_time, end_time) VALUES (?,?,?,?,?,?,?)', (f.path, json.dumps(f.types), f.size, f.sha256, last_modified, _timestamp(f.start), _timestamp(f.end)))
+        self._conn.executemany('INSERT INTO file_types(type, path) VALUES (?,?)', [(desc_type, f.path) for desc_type in f.types])
+
+      removed = [path for path in known if path not in present]
+
+      for path in removed:
+        self._conn.execute('DELETE FROM files WHERE path = ?', (path,))
+        self._conn.execute('DELETE FROM file_types WHERE path = ?', (path,))
+
+      self._conn.execute('UPDATE metadata SET synced_at = ?', (time.time(),))
+
+    return added, modified, removed
+
+  def synced_at(self) -> float:
+    """
+    Provides when we last synced with CollecTor.
+
+    :returns: **float** unix timestamp of our last sync, zero if we haven't
+    """
+
+    with self._lock:
+      return self._conn.execute('SELECT synced_at FROM metadata').fetchone()[0]
+
+  def files(self, descriptor_type: Optional[str] = None, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None) -> List['stem.descriptor.collector.File']:
+    """
+    Provides files within our index, sorted oldest to newest.
+
+    :param descriptor_type: descriptor type or prefix to retrieve
+    :param start: publication time to begin with
+    :param end: publication time to end with
+
+    :returns: **list** of :class:`~stem.descriptor.collector.File`
+    """
+
+    query = 'SELECT path, types, size, sha256, last_modified, start_time, end_time, downloaded_to FROM files'
+    conditions, params = [], []  # type: List[str], List[Any]
+
+    if descriptor_type is not None:
+      conditions.append('path IN (SELECT path FROM file_types WHERE type >= ? AND type < ?)')
+      params += [descriptor_type, descriptor_type + '\uffff']  # types with this prefix
+
+    if start:
+      conditions.append('end_time >= ?')
+      params.append(_timestamp(start))
+
+    if end:
+      conditions.append('start_time <= ?')
+      params.append(_timestamp(end))
+
+    if conditions:
+      query += ' WHERE ' + ' AND '.join(conditions)
+
+    files = []
+
+    with self._lock:
+      rows = self._conn.execute(query + ' ORDER BY start_time IS NULL, start_time, path', params).fetchall()
+
+    for path, types, size, sha256, last_modified, start_time, end_time, downloaded_to in rows:
+      f = File(path, json.loads(types), size, sha256, start_time[:16] if start_time else None, end_time[:16] if end_time else None, last_modified)
+
+      if downloaded_to and os.path.exists(downloaded_to):
+        f._downloaded_to = downloaded_to
+
+      files.append(f)
+
+    return files
+
+  def plan(self, descriptor_type: Optional[str] = None, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None) -> List['stem.descriptor.collector.File']:
+    """
+    Provides the fewest files within our index that cover the given criteria.
+    This is like :func:`~stem.descriptor.collector.CollecTor.plan`, but
+    doesn't sync with CollecTor.
+
+    :param descriptor_type: descriptor type or prefix to retrieve
+    :param start: publication time to begin with
+    :param end: publication time to end with
+
+    :returns: **list** of :class:`~stem.descriptor.collector.File`, sorted
+      oldest to newest
+    """
+
+    return _plan(self.files(descriptor_type, start, end))
+
+  def record_download(self, f: 'stem.descriptor.collector.File', path: str) -> None:
+    """
+    Notes that we've downloaded a file and verified its checksum.
+
+    :param f: file that was downloaded
+    :param path: location we downloaded it to
+    """
+
+    with self._lock, self._conn:
+      self._conn.execute('UPDATE files SET downloaded_to = ?, verified_at = ? WHERE path = ?', (os.path.abspath(path), time.time(), f.path))
+
+  def downloaded_to(self, f: 'stem.descriptor.collector.File') -> Optional[str]:
+    """
+    Provides where we've downloaded a file to. Files that have since been
+    removed or modified are disregarded.
+
+    :param f: file to check for
+
+    :returns: **str** with the location we downloaded this file to, **None**
+      if we don't have it
+    """
+
+    with self._lock:
+      row = self._conn.execute('SELECT downloaded_to, verified_at, size FROM files WHERE path = ?', (f.path,)).fetchone()
+
+    if not row or not row[0]:
+      return None
+
+    path, verified_at, size = row
+
+    try:
+      if (size is None or os.path.getsize(path) == size) and os.path.getmtime(path) <= verified_at:
+        return path
+    except OSError:
+      pass  # file has been removed
+
+    return None
+
+  def close(self) -> None:
+    """
+    Closes our database connection.
+    """
+
+    with self._lock:
+      self._conn.close()
+
+
+class _RateLimit(object):
+  """
+  Throttles downloads to a maximum rate. This is thread safe so concurrent
+  downloads can share a limit.
+
+  :var float rate: maximum bytes per second
+  """
+
+  def __init__(self, rate: float) -> None:
+    if rate <= 0:
+      raise ValueError('Rate limit must be a positive number of bytes per second, was %s' % rate)
+
+    self.rate = rate
+    self._available_at = time.time()  # when our budget catches up with what we've read
+    self._lock = threading.Lock()
+
+  def consume(self, size: int) -> None:
+    """
+    Accounts for bytes we've read, sleeping if we're ahead of our rate.
+
+    :param size: number of bytes read
+    """
+
+    with self._lock:
+      now = time.time()
+      self._available_at = max(self._available_at, now) + size / self.rate
+      delay = self._available_at - now
+
+    if delay > 0:
+      time.sleep(delay)
+
+
+def _sha256(path: str, size: Optional[int] = None) -> 'hashlib._HASH':
+  """
+  Incrementally calculates the sha256 of a file's content.
+
+  :param path: file to read
+  :param size: bytes to read, the whole file if **None**
+
+  :returns: **hashlib.sha256** of the content
+  """
+
+  checksum = hashlib.sha256()
+  remaining = size
+
+  with open(path, 'rb') as input_file:
+    while remaining is None or remaining > 0:
+      chunk = input_file.read(DOWNLOAD_CHUNK_SIZE if remaining is None else min(DOWNLOAD_CHUNK_SIZE, remaining))
+
+      if not chunk:
+        break
+
+      checksum.update(chunk)
+
+      if remaining is not None:
+        remaining -= len(chunk)
+
+  return checksum
+
+
+def _parse_archive(path: str, descriptor_type: str, start: Optional[datetime.datetime], end: Optional[datetime.datetime], document_handler: stem.descriptor.DocumentHandler, pipeline: int = 0) -> Iterator[stem.descriptor.Descriptor]:
+  """
+  Parses the descriptors of a CollecTor archive, skipping tarball members
+  whose '@type' annotation doesn't match our **descriptor_type** or whose
+  descriptors were all published outside our time range.
+
+  :param path: archive to read
+  :param descriptor_type: descriptor type we're after
+  :param start: publication time to begin with
+  :param end: publication time to end with
+  :param document_handler: method in
+    which to parse a :class:`~stem.descriptor.networkstatus.NetworkStatusDocument`
+  :param pipeline: megabytes to decompress ahead of our parsing on a separate
+    thread, if positive
+
+  :returns: iterator for :class:`~stem.descriptor.__init__.Descriptor`
+    instances that might be within our range
+  """
+
+  if not stem.util.system.is_tarfile(path):
+    for desc in stem.descriptor.parse_file(path, document_handler = document_handler):
+      yield desc
+
+    return
+
+  check_published = bool(start or end) and descriptor_type.split(' ')[0] in PUBLISHED_TYPES
+
+  # Reading the archive as a stream so it's decompressed in a single forward
+  # pass. Members are read into memory so we can peek at them first.
+
+  with stem.descriptor._tar_stream(path, pipeline) as tar_file:
+    for tar_entry in tar_file:
+      if not tar_entry.isfile() or tar_entry.size == 0:
+        continue
+
+      with tar_file.extractfile(tar_entry) as entry:
+        content = entry.read()
+
+      type_match = TYPE_ANNOTATION.match(content)
+
+      if type_match and not descriptor_type.startswith(stem.util.str_tools._to_unicode(type_match.group(1))):
+        continue
+
+      if check_published:
+        published = [datetime.datetime.strptime(stem.util.str_tools._to_unicode(timestamp), '%Y-%m-%d %H:%M:%S') for timestamp in PUBLISHED_LINE.findall(content)]
+
+        if published and all((start and timestamp < start) or (end and timestamp > end) for timestamp in published):
+          continue
+
+      for desc in stem.descriptor.parse_file(io.BytesIO(content), document_handler = document_handler):
+        desc._set_path(os.path.abspath(path))
+        desc._set_archive_path(tar_entry.name)
+        yield desc
+
+
+def _timestamp(value: Optional[datetime.datetime]) -> Optional[str]:
+  """
+  Formats a datetime so lexical comparisons match chronological ones.
+  """
+
+  return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+
+def _plan(files: List['stem.descriptor.collector.File']) -> List['stem.descriptor.collector.File']:
+  """
+  Omits recent files whose publication range is spanned by an archive of the
+  same descriptor types.
+
+  :param files: files to choose among, sorted oldest to newest
+
+  :returns: **list** of the files we need
+  """
+
+  archives = [f for f in files if f.path.startswith('archive/') and f.start and f.end]
+  plan = []
+
+  for f in files:
+    if f.path.startswith('recent/') and f.start and f.end:
+      if any(a.start <= f.start and f.end <= a.end and set(f.types) <= set(a.types) for a in archives):
+        continue
+
+    plan.append(f)
+
+  return plan
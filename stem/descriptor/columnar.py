@@ -0,0 +1,329 @@
+# Copyright 2020, Damian Johnson and The Tor Project
+# See LICENSE for licensing information
+
+"""
+Columnar export of descriptors. Analysis libraries like `pandas
+<https://pandas.pydata.org/>`_ work best with a column of values for each
+attribute rather than an object for each row. This converts a stream of
+descriptors into batches of columns...
+
+::
+
+  import pandas
+  import stem.descriptor
+  import stem.descriptor.columnar
+
+  descriptors = stem.descriptor.parse_file('/home/atagar/.tor/cached-consensus')
+  frames = []
+
+  for batch in stem.descriptor.columnar.batches(descriptors, ['nickname', 'bandwidth', 'flags']):
+    frames.append(pandas.DataFrame(batch))
+
+  consensus = pandas.concat(frames)
+
+Only one batch is retained at a time, so memory usage depends upon the
+**batch_size** rather than how many descriptors we read.
+
+Columns are typed by the descriptor attribute they're read from, as described
+by the class' documentation. Batches are provided as a dictionary of lists by
+default, or optionally as...
+
+  * **NUMPY**: `NumPy <https://numpy.org/>`_ masked structured array. Absent
+    integers, floats, booleans, and datetimes are masked.
+
+  * **ARROW**: `pyarrow <https://arrow.apache.org/docs/python/>`_ record
+    batch. Lists are converted into lists of strings, dictionaries into maps
+    of strings, and other objects (such as exit policies and versions) into
+    strings.
+
+::
+
+  schema - columns we can export from a descriptor type
+  batches - converts descriptors into batches of columns
+
+  Column - Name and type of a column
+
+.. versionadded:: 2.0.0
+
+.. data:: Format (enum)
+
+  Form of the batches we provide.
+
+  ========== ===========
+  Format     Description
+  ========== ===========
+  **LIST**   dictionary mapping column names to lists of values
+  **NUMPY**  numpy masked structured array
+  **ARROW**  pyarrow record batch
+  ========== ===========
+
+.. data:: ColumnType (enum)
+
+  Type of a column's values.
+
+  ============== ===========
+  ColumnType     Description
+  ============== ===========
+  **INT**        integer
+  **FLOAT**      floating point number
+  **BOOL**       boolean
+  **STR**        string
+  **BYTES**      bytes
+  **DATETIME**   datetime
+  **LIST**       list, tuple, or set
+  **DICT**       dictionary
+  **OBJECT**     any other object
+  ============== ===========
+"""
+
+import collections
+import functools
+import re
+
+import stem.descriptor
+import stem.util.enum
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Type
+
+Format = stem.util.enum.UppercaseEnum('LIST', 'NUMPY', 'ARROW')
+ColumnType = stem.util.enum.UppercaseEnum('INT', 'FLOAT', 'BOOL', 'STR', 'BYTES', 'DATETIME', 'LIST', 'DICT', 'OBJECT')
+
+DEFAULT_BATCH_SIZE = 10000
+
+# attribute types as documented by our descriptor classes, for instance...
+#
+#   :var int or_port: **\\*** port used for relaying
+
+VAR_TYPE = re.compile(r'^\s*:var ([\w.,]+) (\w+):', re.MULTILINE)
+
+DOCUMENTED_TYPES = {
+  'int': ColumnType.INT,
+  'float': ColumnType.FLOAT,
+  'bool': ColumnType.BOOL,
+  'str': ColumnType.STR,
+  'unicode': ColumnType.STR,
+  'bytes': ColumnType.BYTES,
+  'datetime': ColumnType.DATETIME,
+  'list': ColumnType.LIST,
+  'tuple': ColumnType.LIST,
+  'set': ColumnType.LIST,
+  'dict': ColumnType.DICT,
+}
+
+NUMPY_TYPES = {
+  ColumnType.INT: 'i8',
+  ColumnType.FLOAT: 'f8',
+  ColumnType.BOOL: '?',
+  ColumnType.DATETIME: 'M8[s]',
+}
+
+
+class Column(collections.namedtuple('Column', ['name', 'type'])):
+  """
+  Column we can export from a descriptor.
+
+  :var str name: descriptor attribute the column is read from, with periods
+    separating nested attributes
+  :var stem.descriptor.columnar.ColumnType type: type of the column's values
+  """
+
+
+@functools.lru_cache()
+def _documented_types(descriptor_type: Type['stem.descriptor.Descriptor']) -> Dict[str, 'stem.descriptor.columnar.ColumnType']:  # type: ignore
+  """
+  Provides the attribute types documented by a descriptor class and its
+  parents.
+  """
+
+  types = {}
+
+  for cls in reversed(descriptor_type.__mro__):
+    for var_type, name in VAR_TYPE.findall(cls.__doc__ or ''):
+      types[name] = DOCUMENTED_TYPES.get(var_type, ColumnType.OBJECT)
+
+  return types
+
+
+def schema(descriptor_type: Type['stem.descriptor.Descriptor'], attributes: Optional[Sequence[str]] = None) -> List['stem.descriptor.columnar.Column']:
+  """
+  Provides the columns we can export from a type of descriptor. These are
+  derived from the class' **ATTRIBUTES**, typed by their default values or
+  the class' documentation.
+
+  :param descriptor_type: descriptor class to provide the columns of
+  :param attributes: attributes to provide columns for, all of them if
+    unset
+
+  :returns: **list** of :class:`~stem.descriptor.columnar.Column`
+
+  :raises: **ValueError** if an attribute isn't one of the descriptor's
+  """
+
+  available = getattr(descriptor_type, 'ATTRIBUTES', {})
+  documented = _documented_types(descriptor_type)
+  columns = []
+
+  if attributes is None:
+    attributes = list(available.keys())
+
+  for name in attributes:
+    if name not in available:
+      raise ValueError("'%s' isn't an attribute of %s" % (name, descriptor_type.__name__))
+
+    default = available[name][0]
+
+    if isinstance(default, bool):
+      column_type = ColumnType.BOOL
+    elif isinstance(default, (list, tuple, set)):
+      column_type = ColumnType.LIST
+    elif isinstance(default, dict):
+      column_type = ColumnType.DICT
+    else:
+      column_type = documented.get(name, ColumnType.OBJECT)
+
+    columns.append(Column(name, column_type))
+
+  return columns
+
+
+def batches(descriptors: Iterable['stem.descriptor.Descriptor'], attributes: Optional[Sequence[str]] = None, batch_size: int = DEFAULT_BATCH_SIZE, format: 'stem.descriptor.columnar.Format' = Format.LIST) -> Iterator[Any]:  # type: ignore
+  """
+  Converts descriptors into batches of columns. The schema is determined by
+  the first descriptor, so these should all be of the same type (as they are
+  from :func:`~stem.descriptor.__init__.parse_file`).
+
+  :param descriptors: descriptors to convert, such as those from
+    :func:`~stem.descriptor.__init__.parse_file`
+  :param attributes: attributes to provide columns for, all of them if unset
+  :param batch_size: maximum number of rows per batch
+  :param format: :data:`~stem.descriptor.columnar.Format` of the batches
+
+  :returns: **iterator** for the batches of descriptor attributes
+
+  :raises:
+    * **ValueError** if an attribute isn't one of the descriptor's, or the
+      batch_size or format are invalid
+    * **ImportError** if the format requires a module that's unavailable
+  """
+
+  if batch_size < 1:
+    raise ValueError('Batch size must be positive, but was %i' % batch_size)
+  elif format not in Format:
+    raise ValueError("'%s' isn't a batch format, must be one of: %s" % (format, ', '.join(Format)))
+
+  converter = {
+    Format.LIST: _to_lists,
+    Format.NUMPY: _to_numpy,
+    Format.ARROW: _to_arrow,
+  }[format]
+
+  columns = None
+  rows = []  # type: List[Any]
+
+  for desc in descriptors:
+    if columns is None:
+      columns = schema(type(desc), attributes)
+
+    rows.append(tuple([_value(desc, column.name) for column in columns]))
+
+    if len(rows) >= batch_size:
+      yield converter(columns, rows)
+      rows = []
+
+  if rows:
+    yield converter(columns, rows)
+
+
+def _value(desc: 'stem.descriptor.Descriptor', name: str) -> Any:
+  """
+  Provides a descriptor attribute. Some descriptors (such as bandwidth files)
+  have nested attributes, which are named with a dotted path.
+  """
+
+  # Asking for the full name lazy loads it. Nested attributes then need to be
+  # resolved one level at a time.
+
+  value = getattr(desc, name, None)
+
+  if value is not None or '.' not in name:
+    return value
+
+  value = desc
+
+  for attr in name.split('.'):
+    value = getattr(value, attr, None)
+
+    if value is None:
+      return None
+
+  return value
+
+
+def _to_lists(columns: List['stem.descriptor.columnar.Column'], rows: List[Any]) -> Dict[str, List[Any]]:
+  return collections.OrderedDict([(column.name, [row[i] for row in rows]) for i, column in enumerate(columns)])
+
+
+def _to_numpy(columns: List['stem.descriptor.columnar.Column'], rows: List[Any]) -> Any:
+  try:
+    import numpy
+  except ImportError:
+    raise ImportError('Exporting NumPy arrays requires the numpy module')
+
+  dtype = numpy.dtype([(column.name, NUMPY_TYPES.get(column.type, 'O')) for column in columns])
+  data = numpy.zeros(len(rows), dtype = dtype)
+  mask = numpy.zeros(len(rows), dtype = [(column.name, '?') for column in columns])
+
+  for i, column in enumerate(columns):
+    values = [row[i] for row in rows]
+
+    if column.type in NUMPY_TYPES:
+      mask[column.name] = [value is None for value in values]
+      data[column.name] = [0 if value is None else value for value in values]
+    else:
+      data[column.name] = values
+
+  return numpy.ma.masked_array(data, mask = mask)
+
+
+def _to_arrow(columns: List['stem.descriptor.columnar.Column'], rows: List[Any]) -> Any:
+  try:
+    import pyarrow
+  except ImportError:
+    raise ImportError('Exporting Arrow record batches requires the pyarrow module')
+
+  arrow_types = {
+    ColumnType.INT: pyarrow.int64(),
+    ColumnType.FLOAT: pyarrow.float64(),
+    ColumnType.BOOL: pyarrow.bool_(),
+    ColumnType.STR: pyarrow.string(),
+    ColumnType.BYTES: pyarrow.binary(),
+    ColumnType.DATETIME: pyarrow.timestamp('s'),
+    ColumnType.LIST: pyarrow.list_(pyarrow.string()),
+    ColumnType.DICT: pyarrow.map_(pyarrow.string(), pyarrow.string()),
+    ColumnType.OBJECT: pyarrow.string(),
+  }
+
+  arrays = []
+
+  for i, column in enumerate(columns):
+    values = [_arrow_value(column.type, row[i]) for row in rows]
+    arrays.append(pyarrow.array(values, type = arrow_types[column.type]))
+
+  return pyarrow.RecordBatch.from_arrays(arrays, schema = pyarrow.schema([(column.name, arrow_types[column.type]) for column in columns]))
+
+
+def _arrow_value(column_type: 'stem.descriptor.columnar.ColumnType', value: Any) -> Any:  # type: ignore
+  """
+  Converts values without a native arrow type into strings.
+  """
+
+  if value is None:
+    return None
+  elif column_type == ColumnType.LIST:
+    return [str(entry) for entry in value]
+  elif column_type == ColumnType.DICT:
+    return [(str(k), str(v)) for k, v in value.items()]
+  elif column_type == ColumnType.OBJECT:
+    return str(value)
+  else:
+    return value
@@ -86,8 +86,8 @@ from stem.descriptor import (
   DigestEncoding,
   create_signing_key,
   _descriptor_content,
+  _from_store,
   _read_until_keywords,
-  _descriptor_components,
   _value,
   _values,
   _parse_simple_line,
@@ -167,7 +167,7 @@ _timestamp_re = re.compile('^(.*) \\(([0-9]+) s\\)( .*)?$')
 _locale_re = re.compile('^[a-zA-Z0-9\\?]{2}$')
 
 
-def _parse_file(descriptor_file: BinaryIO, is_bridge = False, validate = False, **kwargs: Any) -> Iterator['stem.descriptor.extrainfo_descriptor.ExtraInfoDescriptor']:
+def _parse_file(descriptor_file: BinaryIO, is_bridge = False, validate = False, fields: Optional[Sequence[str]] = None, store: Optional['stem.descriptor.store.DescriptorStore'] = None, **kwargs: Any) -> Iterator['stem.descriptor.extrainfo_descriptor.ExtraInfoDescriptor']:
   """
   Iterates over the extra-info descriptors in a file.
 
@@ -175,6 +175,8 @@ def _parse_file(descriptor_file: BinaryIO, is_bridge = False, validate = False,
   :param is_bridge: parses the file as being a bridge descriptor
   :param validate: checks the validity of the descriptor's content if
     **True**, skips these checks otherwise
+  :param fields: attributes we'll read from the descriptors
+  :param store: store to provide relay descriptors we've seen before
   :param kwargs: additional arguments for the descriptor constructor
 
   :returns: iterator for :class:`~stem.descriptor.extrainfo_descriptor.ExtraInfoDescriptor`
@@ -204,9 +206,12 @@ def _parse_file(descriptor_file: BinaryIO, is_bridge = False, validate = False,
         extrainfo_content = extrainfo_content[1:]
 
       if is_bridge:
-        yield BridgeExtraInfoDescriptor(bytes.join(b'', extrainfo_content), validate)
+        yield BridgeExtraInfoDescriptor(bytes.join(b'', extrainfo_content), validate, fields = fields)
       else:
-        yield RelayExtraInfoDescriptor(bytes.join(b'', extrainfo_content), validate)
+        desc = _from_store(store, RelayExtraInfoDescriptor, bytes.join(b'', extrainfo_content), validate, fields = fields)
+
+        if desc is not None:
+          yield desc
     else:
       break  # done parsing file
 
@@ -653,9 +658,9 @@ class ExtraInfoDescriptor(Descriptor):
 
   :var datetime hs_stats_end: end of the sampling interval
   :var int hs_rend_cells: rounded count of the RENDEZVOUS1 cells seen
-  :var int hs_rend_cells_attr: **\\*** attributes provided for the hs_rend_cells
+  :var dict hs_rend_cells_attr: **\\*** attributes provided for the hs_rend_cells
   :var int hs_dir_onions_seen: rounded count of the identities seen
-  :var int hs_dir_onions_seen_attr: **\\*** attributes provided for the hs_dir_onions_seen
+  :var dict hs_dir_onions_seen_attr: **\\*** attributes provided for the hs_dir_onions_seen
 
   **Padding Count Attributes:**
 
@@ -821,21 +826,28 @@ class ExtraInfoDescriptor(Descriptor):
     'bridge-ip-transports': _parse_bridge_ip_transports_line,
   }
 
-  def __init__(self, raw_contents: bytes, validate: bool = False) -> None:
+  def __init__(self, raw_contents: bytes, validate: bool = False, fields: Optional[Sequence[str]] = None) -> None:
     """
     Extra-info descriptor constructor. By default this validates the
     descriptor's content as it's parsed. This validation can be disabled to
     either improve performance or be accepting of malformed data.
 
+    .. versionchanged:: 2.0.0
+       Added the fields argument.
+
     :param raw_contents: extra-info content provided by the relay
     :param validate: checks the validity of the extra-info descriptor if
       **True**, skips these checks otherwise
+    :param fields: attributes we'll read, if set then other lines are skipped
+      until they're needed (this is ignored when validating)
 
-    :raises: **ValueError** if the contents is malformed and validate is True
+    :raises:
+      * **ValueError** if the contents is malformed and validate is True, or
+        fields includes something that isn't an attribute
     """
 
-    super(ExtraInfoDescriptor, self).__init__(raw_contents, lazy_load = not validate)
-    entries = _descriptor_components(raw_contents, validate)
+    super(ExtraInfoDescriptor, self).__init__(raw_contents, lazy_load = not validate, fields = fields)
+    entries = self._tokenize(validate, self._keywords)
 
     if validate:
       for keyword in self._required_fields():
@@ -953,15 +965,14 @@ class RelayExtraInfoDescriptor(ExtraInfoDescriptor):
     if hash_type == DigestHash.SHA1:
       # our digest is calculated from everything except our signature
 
-      content = self._content_range(end = '\nrouter-signature\n')
-      return stem.descriptor._encode_digest(hashlib.sha1(content), encoding)
+      return self._cached_digest(hash_type, encoding, lambda: self._content_range(end = '\nrouter-signature\n'))
     elif hash_type == DigestHash.SHA256:
       # Due to a tor bug sha256 digests are calculated from the
       # whole descriptor rather than ommiting the signature...
       #
       #   https://gitlab.torproject.org/tpo/core/tor/-/issues/28415
 
-      return stem.descriptor._encode_digest(hashlib.sha256(self.get_bytes()), encoding)
+      return self._cached_digest(hash_type, encoding, self.get_bytes)
     else:
       raise NotImplementedError('Extrainfo descriptor digests are only available in sha1 and sha256, not %s' % hash_type)
 
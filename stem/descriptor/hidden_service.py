@@ -28,11 +28,19 @@ These are only available through the Controller's
   OuterLayer - First encrypted layer of a hidden service v3 descriptor
   InnerLayer - Second encrypted layer of a hidden service v3 descriptor
 
+  HSDirRing - Hash ring of hidden service directories for a time period
+    |- from_consensus - ring for the time period of a consensus
+    |- responsible_hsdirs - relays a v3 hidden service's descriptor is stored on
+    +- responsible_hsdirs_for - responsible relays for many hidden services
+
+  time_period - hidden service v3 time period for a given time
+
 .. versionadded:: 1.4.0
 """
 
 import base64
 import binascii
+import bisect
 import collections
 import datetime
 import functools
@@ -124,6 +132,18 @@ CHECKSUM_CONSTANT = b'.onion checksum'
 SALT_LEN = 16
 MAC_LEN = 32
 
+# Hash ring constants from section 2.2 of the rend-spec-v3. These are used when
+# the consensus doesn't include its own value for them.
+
+HSDIR_INTERVAL = 1440  # time period length in minutes ('hsdir-interval')
+HSDIR_N_REPLICAS = 2  # replicas for each descriptor ('hsdir_n_replicas')
+HSDIR_SPREAD_STORE = 4  # relays each replica is uploaded to ('hsdir_spread_store')
+HSDIR_SPREAD_FETCH = 3  # relays each replica is fetched from ('hsdir_spread_fetch')
+HSDIR_ROTATION_OFFSET = 720  # default time period offset, twelve one hour voting intervals
+
+BLIND_STRING = b'Derive temporary signing key\x00'
+ED25519_BASEPOINT = b'(15112221349535400772501151409588531511454012693041857206046113283949847762202, 46316835694926478169428394003475163141307993866256225615783033603165251855960)'
+
 S_KEY_LEN = 32
 S_IV_LEN = 16
 
@@ -1112,12 +1132,9 @@ class HiddenServiceDescriptorV3(HiddenServiceDescriptor):
     """
 
     key = stem.util._pubkey_bytes(key)  # normalize key into bytes
+    onion_address = _address_from_identity_key(key)
 
-    version = stem.client.datatype.Size.CHAR.pack(3)
-    checksum = hashlib.sha3_256(CHECKSUM_CONSTANT + key + version).digest()[:2]
-    onion_address = base64.b32encode(key + checksum + version)
-
-    return stem.util.str_tools._to_unicode(onion_address + b'.onion' if suffix else onion_address).lower()
+    return onion_address + '.onion' if suffix else onion_address
 
   @staticmethod
   def identity_key_from_address(onion_address: str) -> bytes:
@@ -1134,19 +1151,12 @@ class HiddenServiceDescriptorV3(HiddenServiceDescriptor):
     if onion_address.endswith('.onion'):
       onion_address = onion_address[:-6]
 
-    if not stem.util.tor_tools.HS_V3_ADDRESS_PATTERN.match(onion_address):
-      raise ValueError("'%s.onion' isn't a valid hidden service v3 address" % onion_address)
+    decoded = stem.util.tor_tools._decode_hs_v3_address(onion_address)
 
-    # onion_address = base32(PUBKEY | CHECKSUM | VERSION) + '.onion'
-    # CHECKSUM = H('.onion checksum' | PUBKEY | VERSION)[:2]
-
-    decoded_address = base64.b32decode(onion_address.upper())
-
-    pubkey = decoded_address[:32]
-    expected_checksum = decoded_address[32:34]
-    version = decoded_address[34:35]
+    if decoded is None:
+      raise ValueError("'%s.onion' isn't a valid hidden service v3 address" % onion_address)
 
-    checksum = hashlib.sha3_256(CHECKSUM_CONSTANT + pubkey + version).digest()[:2]
+    pubkey, version, expected_checksum, checksum = decoded
 
     if expected_checksum != checksum:
       checksum_str = stem.util.str_tools._to_unicode(binascii.hexlify(checksum))
@@ -1344,6 +1354,265 @@ class InnerLayer(Descriptor):
       self._entries = entries
 
 
+def time_period(when: Optional[Union[datetime.datetime, float]] = None, period_length: int = HSDIR_INTERVAL, rotation_offset: int = HSDIR_ROTATION_OFFSET) -> int:
+  """
+  Provides the hidden service v3 time period number (`spec
+  <https://gitweb.torproject.org/torspec.git/tree/rend-spec-v3.txt>`_ section
+  2.2.1) in effect at the given time.
+
+  .. versionadded:: 2.0.0
+
+  :param when: datetime or unix timestamp to provide the period of, the
+    current time if unset
+  :param period_length: length of a time period in minutes
+  :param rotation_offset: minutes that time periods are offset from the epoch
+
+  :returns: **int** for the time period number
+  """
+
+  if when is None:
+    when = time.time()
+  elif isinstance(when, datetime.datetime):
+    when = stem.util.datetime_to_unix(when)
+
+  return (int(when) // 60 - rotation_offset) // period_length
+
+
+class HSDirRing(object):
+  """
+  Hash ring of the relays with the HSDir flag for a single time period (`spec
+  <https://gitweb.torproject.org/torspec.git/tree/rend-spec-v3.txt>`_ section
+  2.2.3). Relays are sorted by their index once when the ring is constructed,
+  after which lookups are a bisection for each replica.
+
+  .. versionadded:: 2.0.0
+
+  :var int period_num: time period this ring is for
+  :var int period_length: length of the time period in minutes
+  :var bytes shared_random_value: shared random value the ring is keyed by
+  :var int replicas: number of replicas each descriptor is stored at
+  :var int spread_store: number of relays each replica is uploaded to
+  :var int spread_fetch: number of relays each replica is fetched from
+  """
+
+  def __init__(self, relays: Mapping[str, bytes], shared_random_value: Optional[bytes], period_num: int, period_length: int = HSDIR_INTERVAL, replicas: int = HSDIR_N_REPLICAS, spread_store: int = HSDIR_SPREAD_STORE, spread_fetch: int = HSDIR_SPREAD_FETCH) -> None:
+    """
+    :param relays: mapping of relay fingerprints to their ed25519 identity key
+      (either raw bytes or base64 encoded)
+    :param shared_random_value: shared random value for this time period, if
+      **None** then the disaster value is used
+    :param period_num: time period this ring is for
+    :param period_length: length of the time period in minutes
+    :param replicas: number of replicas each descriptor is stored at
+    :param spread_store: number of relays each replica is uploaded to
+    :param spread_fetch: number of relays each replica is fetched from
+
+    :raises: **ValueError** if an identity key is malformed
+    """
+
+    if shared_random_value is None:
+      # disaster SRV = H('shared-random-disaster' | INT_8(period_length) | INT_8(period_num))
+
+      shared_random_value = hashlib.sha3_256(b'shared-random-disaster' + struct.pack('>QQ', period_length, period_num)).digest()
+
+    self.period_num = period_num
+    self.period_length = period_length
+    self.shared_random_value = shared_random_value
+    self.replicas = replicas
+    self.spread_store = spread_store
+    self.spread_fetch = spread_fetch
+
+    # hs_relay_index = H('node-idx' | node_identity | shared_random_value | INT_8(period_num) | INT_8(period_length))
+
+    suffix = shared_random_value + struct.pack('>QQ', period_num, period_length)
+    ring = []
+
+    for fingerprint, identity in relays.items():
+      if isinstance(identity, str):
+        identity = base64.b64decode(stem.util.str_tools._to_bytes(identity) + b'=' * (-len(identity) % 4))
+
+      if len(identity) != 32:
+        raise ValueError("%s's ed25519 identity should be 32 bytes, but was %i" % (fingerprint, len(identity)))
+
+      ring.append((hashlib.sha3_256(b'node-idx' + identity + suffix).digest(), fingerprint))
+
+    ring.sort()
+
+    self._indices = [index for index, _ in ring]
+    self._fingerprints = [fingerprint for _, fingerprint in ring]
+
+  @classmethod
+  def from_consensus(cls: Type['stem.descriptor.hidden_service.HSDirRing'], consensus: 'stem.descriptor.networkstatus.NetworkStatusDocumentV3', identities: Optional[Mapping[str, Union[str, bytes]]] = None, when: Optional[datetime.datetime] = None) -> 'stem.descriptor.hidden_service.HSDirRing':
+    """
+    Provides the ring of relays with the HSDir flag for the time period this
+    consensus is valid for. Consensuses don't include ed25519 identities, so
+    these are taken from the **identities** argument (microdescriptors provide
+    them through their **identifiers** attribute) or the router status
+    entry's **identifier** if it's an ed25519 key. Relays without a known
+    identity are omitted.
+
+    Following tor, from the start of a time period until the next shared random
+    value is generated the current shared random value is used. Afterward the
+    previous value is used until the next time period begins.
+
+    :param consensus: consensus with populated **routers**
+    :param identities: mapping of relay fingerprints to their ed25519 identity
+    :param when: time to provide the ring for, the consensus' **valid_after**
+      if unset
+
+    :returns: :class:`~stem.descriptor.hidden_service.HSDirRing` for the
+      consensus
+
+    :raises: **ValueError** if the consensus lacks routers or an identity key
+      is malformed
+    """
+
+    if not consensus.routers:
+      raise ValueError('Consensus must be read with its routers to determine the hsdir ring')
+
+    if when is None:
+      when = consensus.valid_after
+
+    params = consensus.params
+    period_length = params.get('hsdir-interval', HSDIR_INTERVAL)
+    rotation_offset = HSDIR_ROTATION_OFFSET
+
+    if consensus.valid_after and consensus.fresh_until:
+      # time periods are offset by twelve voting intervals
+
+      rotation_offset = int((consensus.fresh_until - consensus.valid_after).total_seconds()) // 60 * 12
+
+    period_num = time_period(when, period_length, rotation_offset)
+    minutes_into_period = (int(stem.util.datetime_to_unix(when)) // 60 - rotation_offset) % period_length
+
+    if minutes_into_period < period_length - rotation_offset:
+      srv = consensus.shared_randomness_current_value
+    else:
+      srv = consensus.shared_randomness_previous_value
+
+    relays = {}
+
+    for fingerprint, router in consensus.routers.items():
+      if 'HSDir' not in router.flags:
+        continue
+
+      identity = identities.get(fingerprint) if identities else None
+
+      if identity is None and getattr(router, 'identifier_type', None) == 'ed25519' and router.identifier != 'none':
+        identity = router.identifier
+
+      if identity is not None:
+        relays[fingerprint] = identity
+
+    return cls(
+      relays,
+      base64.b64decode(srv) if srv else None,
+      period_num,
+      period_length,
+      params.get('hsdir_n_replicas', HSDIR_N_REPLICAS),
+      params.get('hsdir_spread_store', HSDIR_SPREAD_STORE),
+      params.get('hsdir_spread_fetch', HSDIR_SPREAD_FETCH),
+    )
+
+  def responsible_hsdirs(self, onion_address: Union[str, bytes], spread: Optional[int] = None) -> List[str]:
+    """
+    Provides the relays a hidden service's descriptor is stored on during this
+    time period.
+
+    :param onion_address: hidden service address or identity key bytes
+    :param spread: number of relays for each replica, **spread_store** if unset
+
+    :returns: **list** of relay fingerprints, ordered by replica
+
+    :raises: **ValueError** if the address is malformed
+    """
+
+    if isinstance(onion_address, bytes):
+      identity_key = onion_address
+    else:
+      identity_key = HiddenServiceDescriptorV3.identity_key_from_address(onion_address)
+
+    if spread is None:
+      spread = self.spread_store
+
+    blinded_key = _blinded_identity_key(identity_key, self.period_num, self.period_length)
+    ring_size = len(self._indices)
+    responsible = []  # type: List[str]
+
+    for replica in range(1, self.replicas + 1):
+      # hs_service_index = H('store-at-idx' | blinded_public_key | INT_8(replicanum) | INT_8(period_length) | INT_8(period_num))
+
+      service_index = hashlib.sha3_256(b'store-at-idx' + blinded_key + struct.pack('>QQQ', replica, self.period_length, self.period_num)).digest()
+      position = bisect.bisect_left(self._indices, service_index)
+      selected = 0
+
+      for offset in range(ring_size):
+        fingerprint = self._fingerprints[(position + offset) % ring_size]
+
+        if fingerprint not in responsible:
+          responsible.append(fingerprint)
+          selected += 1
+
+          if selected == spread:
+            break
+
+    return responsible
+
+  def responsible_hsdirs_for(self, onion_addresses: Sequence[Union[str, bytes]], spread: Optional[int] = None) -> Dict[Union[str, bytes], List[str]]:
+    """
+    Provides the relays responsible for each of the given hidden services.
+
+    :param onion_addresses: hidden service addresses or identity key bytes
+    :param spread: number of relays for each replica, **spread_store** if unset
+
+    :returns: **dict** mapping addresses to the fingerprints responsible for them
+
+    :raises: **ValueError** if an address is malformed
+    """
+
+    return dict([(address, self.responsible_hsdirs(address, spread)) for address in onion_addresses])
+
+  def __len__(self) -> int:
+    return len(self._indices)
+
+  def __iter__(self) -> Iterator[Tuple[bytes, str]]:
+    for entry in zip(self._indices, self._fingerprints):
+      yield entry
+
+
+@functools.lru_cache(maxsize = 4096)
+def _blinded_identity_key(identity_key: bytes, period_num: int, period_length: int) -> bytes:
+  """
+  Blinds a hidden service identity key for the given time period (`spec
+  <https://gitweb.torproject.org/torspec.git/tree/rend-spec-v3.txt>`_
+  appendix A.2). This is pure python ed25519 math, so we cache the results.
+  """
+
+  # h = H(BLIND_STRING | A | s | B | N)
+  # N = 'key-blind' | INT_8(period_num) | INT_8(period_length)
+
+  nonce = b'key-blind' + struct.pack('>QQ', period_num, period_length)
+  blinding_factor = hashlib.sha3_256(BLIND_STRING + identity_key + ED25519_BASEPOINT + nonce).digest()
+
+  return _blinded_pubkey(identity_key, blinding_factor)
+
+
+@functools.lru_cache(maxsize = stem.util.tor_tools.HS_V3_ADDRESS_CACHE_SIZE)
+def _address_from_identity_key(key: bytes) -> str:
+  """
+  Provides the hidden service address (without a '.onion' suffix) for the
+  given public identity key bytes.
+  """
+
+  # onion_address = base32(PUBKEY | CHECKSUM | VERSION) + '.onion'
+  # CHECKSUM = H('.onion checksum' | PUBKEY | VERSION)[:2]
+
+  version = stem.client.datatype.Size.CHAR.pack(3)
+  checksum = hashlib.sha3_256(CHECKSUM_CONSTANT + key + version).digest()[:2]
+
+  return stem.util.str_tools._to_unicode(base64.b32encode(key + checksum + version)).lower()
+
+
 def _blinded_pubkey(identity_key: bytes, blinding_nonce: bytes) -> bytes:
   from stem.util import ed25519
 
@@ -52,9 +52,9 @@ Doing the same is trivial with server descriptors...
 ::
 
   Microdescriptor - Tor microdescriptor.
+    +- CompactMicrodescriptor - Microdescriptor that uses less memory.
 """
 
-import functools
 import hashlib
 
 import stem.exit_policy
@@ -66,8 +66,11 @@ from stem.descriptor import (
   Descriptor,
   DigestHash,
   DigestEncoding,
+  _CompactDescriptor,
+  _compact_slots,
   _descriptor_content,
-  _descriptor_components,
+  _from_store,
+  _intern,
   _read_until_keywords,
   _values,
   _parse_simple_line,
@@ -95,13 +98,15 @@ SINGLE_FIELDS = (
 )
 
 
-def _parse_file(descriptor_file: BinaryIO, validate: bool = False, **kwargs: Any) -> Iterator['stem.descriptor.microdescriptor.Microdescriptor']:
+def _parse_file(descriptor_file: BinaryIO, validate: bool = False, fields: Optional[Sequence[str]] = None, store: Optional['stem.descriptor.store.DescriptorStore'] = None, **kwargs: Any) -> Iterator['stem.descriptor.microdescriptor.Microdescriptor']:
   """
   Iterates over the microdescriptors in a file.
 
   :param descriptor_file: file with descriptor content
   :param validate: checks the validity of the descriptor's content if
     **True**, skips these checks otherwise
+  :param fields: attributes we'll read from the descriptors
+  :param store: store to provide descriptors we've seen before
   :param kwargs: additional arguments for the descriptor constructor
 
   :returns: iterator for Microdescriptor instances in the file
@@ -150,7 +155,10 @@ def _parse_file(descriptor_file: BinaryIO, validate: bool = False, **kwargs: Any
 
       descriptor_text = bytes.join(b'', descriptor_lines)
 
-      yield Microdescriptor(descriptor_text, validate, annotations)
+      desc = _from_store(store, Microdescriptor, descriptor_text, validate, annotations = annotations, fields = fields)
+
+      if desc is not None:
+        yield desc
     else:
       break  # done parsing descriptors
 
@@ -213,6 +221,10 @@ class Microdescriptor(Descriptor):
      because of the name conflict. The old digest had multiple problems (for
      instance, being hex rather than base64 encoded), so hopefully no one was
      using it. Very sorry if this causes trouble for anyone.
+
+  .. versionchanged:: 2.0.0
+     Added the fields constructor argument to only parse particular
+     attributes.
   """
 
   TYPE_ANNOTATION_NAME = 'microdescriptor'
@@ -245,10 +257,10 @@ class Microdescriptor(Descriptor):
       ('onion-key', _random_crypto_blob('RSA PUBLIC KEY')),
     ))
 
-  def __init__(self, raw_contents: bytes, validate: bool = False, annotations: Optional[Sequence[bytes]] = None) -> None:
-    super(Microdescriptor, self).__init__(raw_contents, lazy_load = not validate)
+  def __init__(self, raw_contents: bytes, validate: bool = False, annotations: Optional[Sequence[bytes]] = None, fields: Optional[Sequence[str]] = None) -> None:
+    super(Microdescriptor, self).__init__(raw_contents, lazy_load = not validate, fields = fields)
     self._annotation_lines = annotations if annotations else []
-    entries = _descriptor_components(raw_contents, validate)
+    entries = self._tokenize(validate, self._keywords)
 
     if validate:
       self._parse(entries, validate)
@@ -273,14 +285,11 @@ class Microdescriptor(Descriptor):
     :returns: **hashlib.HASH** or **str** based on our encoding argument
     """
 
-    if hash_type == DigestHash.SHA1:
-      return stem.descriptor._encode_digest(hashlib.sha1(self.get_bytes()), encoding)
-    elif hash_type == DigestHash.SHA256:
-      return stem.descriptor._encode_digest(hashlib.sha256(self.get_bytes()), encoding)
+    if hash_type in (DigestHash.SHA1, DigestHash.SHA256):
+      return self._cached_digest(hash_type, encoding, self.get_bytes)
     else:
       raise NotImplementedError('Microdescriptor digests are only available in sha1 and sha256, not %s' % hash_type)
 
-  @functools.lru_cache()
   def get_annotations(self) -> Dict[bytes, bytes]:
     """
     Provides content that appeared prior to the descriptor. If this comes from
@@ -339,3 +348,28 @@ class Microdescriptor(Descriptor):
 
   def _name(self, is_plural: bool = False) -> str:
     return 'microdescriptors' if is_plural else 'microdescriptor'
+
+
+class CompactMicrodescriptor(_CompactDescriptor, Microdescriptor):
+  """
+  Microdescriptor that uses less memory, for holding many of them at once.
+  Attributes are kept in slots rather than a dictionary, parsed when we're
+  constructed, and strings that repeat between descriptors (like family
+  members and annotations) are shared.
+
+  .. versionadded:: 2.0.0
+
+  :param raw_contents: microdescriptor content
+  :param validate: checks the validity of the content if **True**, skips
+    these checks otherwise
+  :param annotations: lines that appeared prior to the descriptor
+  :param free_entries: discards our tokenized content once it's parsed if
+    **True**, keeps it otherwise
+  """
+
+  __slots__ = _compact_slots(Microdescriptor, ('_annotation_lines',))
+
+  def __init__(self, raw_contents: bytes, validate: bool = False, annotations: Optional[Sequence[bytes]] = None, free_entries: bool = True) -> None:
+    super(CompactMicrodescriptor, self).__init__(raw_contents, validate, annotations)
+    self._annotation_lines = _intern(self._annotation_lines)
+    self._compact(free_entries)
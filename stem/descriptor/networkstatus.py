@@ -296,7 +296,7 @@ class DocumentDigest(collections.namedtuple('DocumentDigest', ['flavor', 'algori
   """
 
 
-def _parse_file(document_file: BinaryIO, document_type: Optional[Type] = None, validate: bool = False, is_microdescriptor: bool = False, document_handler: 'stem.descriptor.DocumentHandler' = DocumentHandler.ENTRIES, **kwargs: Any) -> Iterator[Union['stem.descriptor.networkstatus.NetworkStatusDocument', 'stem.descriptor.router_status_entry.RouterStatusEntry']]:
+def _parse_file(document_file: BinaryIO, document_type: Optional[Type] = None, validate: bool = False, is_microdescriptor: bool = False, document_handler: 'stem.descriptor.DocumentHandler' = DocumentHandler.ENTRIES, fields: Optional[Sequence[str]] = None, **kwargs: Any) -> Iterator[Union['stem.descriptor.networkstatus.NetworkStatusDocument', 'stem.descriptor.router_status_entry.RouterStatusEntry']]:
   """
   Parses a network status and iterates over the RouterStatusEntry in it. The
   document that these instances reference have an empty 'routers' attribute to
@@ -310,16 +310,21 @@ def _parse_file(document_file: BinaryIO, document_type: Optional[Type] = None, v
     consensus, **False** otherwise
   :param document_handler: method in
     which to parse :class:`~stem.descriptor.networkstatus.NetworkStatusDocument`
+  :param fields: attributes we'll read from the router status entries
   :param kwargs: additional arguments for the descriptor constructor
 
   :returns: :class:`stem.descriptor.networkstatus.NetworkStatusDocument` object
 
   :raises:
     * **ValueError** if the document_version is unrecognized or the contents is
-      malformed and validate is **True**
+      malformed and validate is **True**, or fields are provided when we're
+      not reading router status entries
     * **OSError** if the file can't be read
   """
 
+  if fields is not None and document_handler != DocumentHandler.ENTRIES:
+    raise ValueError('Fields can only be used when reading router status entries, not with the %s document handler' % document_handler)
+
   # we can't properly default this since NetworkStatusDocumentV3 isn't defined yet
 
   if document_type is None:
@@ -350,24 +355,26 @@ def _parse_file(document_file: BinaryIO, document_type: Optional[Type] = None, v
   if header and header[0].startswith(b'@type'):
     header = header[1:]
 
-  routers_start = document_file.tell()
-  _read_until_keywords((FOOTER_START, V2_FOOTER_START), document_file, skip = True)
-  routers_end = document_file.tell()
+  # Buffering the routers rather than seeking back to them, so we can parse
+  # unseekable files and compressed streams in a single pass.
 
+  routers = _read_until_keywords((FOOTER_START, V2_FOOTER_START), document_file, skip = document_handler != DocumentHandler.ENTRIES)
   footer = document_file.readlines()
   document_content = bytes.join(b'', header + footer)
 
   if document_handler == DocumentHandler.BARE_DOCUMENT:
     yield document_type(document_content, validate, **kwargs)  # type: ignore
   elif document_handler == DocumentHandler.ENTRIES:
+    routers_content = bytes.join(b'', routers)
+
     desc_iterator = stem.descriptor.router_status_entry._parse_file(
-      document_file,
+      io.BytesIO(routers_content),
       validate,
       entry_class = router_type,
       entry_keyword = ROUTERS_START,
-      start_position = routers_start,
-      end_position = routers_end,
+      end_position = len(routers_content),
       extra_args = (document_type(document_content, validate),),
+      fields = fields,
       **kwargs
     )
 
@@ -453,12 +460,8 @@ class NetworkStatusDocument(Descriptor):
     :returns: **hashlib.HASH** or **str** based on our encoding argument
     """
 
-    content = self._content_range(end = '\ndirectory-signature ')
-
-    if hash_type == DigestHash.SHA1:
-      return stem.descriptor._encode_digest(hashlib.sha1(content), encoding)
-    elif hash_type == DigestHash.SHA256:
-      return stem.descriptor._encode_digest(hashlib.sha256(content), encoding)
+    if hash_type in (DigestHash.SHA1, DigestHash.SHA256):
+      return self._cached_digest(hash_type, encoding, lambda: self._content_range(end = '\ndirectory-signature '))
     else:
       raise NotImplementedError('Network status document digests are only available in sha1 and sha256, not %s' % hash_type)
 
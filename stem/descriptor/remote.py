@@ -55,7 +55,14 @@ content. For example...
 
   Query - Asynchronous request to download tor descriptors
     |- start - issues the query if it isn't already running
-    +- run - blocks until the request is finished and provides the results
+    |- run - blocks until the request is finished and provides the results
+    +- stream - provides descriptors as they're downloaded
+
+  DescriptorCache - On-disk cache of directory responses
+    |- get - provides a cached response
+    |- put - caches a response
+    |- refresh - extends the freshness of a revalidated response
+    +- evict - removes expired responses, and the least recently used if over our size limit
 
   DescriptorDownloader - Configurable class for issuing queries
     |- use_directory_mirrors - use directory mirrors to download future descriptors
@@ -68,6 +75,7 @@ content. For example...
     |- get_key_certificates - provides present authority key certificates
     |- get_bandwidth_file - provides bandwidth heuristics used to make the next consensus
     |- get_detached_signatures - authority signatures used to make the next consensus
+    |- get_bulk - descriptors for any number of fingerprints or hashes
     +- query - request an arbitrary descriptor resource
 
 .. versionadded:: 1.1.0
@@ -81,11 +89,29 @@ content. For example...
 
   Maximum number of microdescriptors that can requested at a time by their
   hashes.
+
+.. data:: HEDGE_PERCENTILE
+
+  Percentile of the download times we've observed that hedged queries wait
+  before also requesting from another directory.
+
+.. data:: BULK_CONCURRENCY
+
+  Default number of batches
+  :func:`~stem.descriptor.remote.DescriptorDownloader.get_bulk` downloads at
+  a time.
 """
 
 import asyncio
+import collections
+import datetime
+import email.utils
+import hashlib
 import io
+import json
+import os
 import random
+import re
 import sys
 import threading
 import time
@@ -95,12 +121,13 @@ import stem.client
 import stem.descriptor
 import stem.descriptor.networkstatus
 import stem.directory
+import stem.util
 import stem.util.enum
 import stem.util.tor_tools
 
 from stem.descriptor import Compression
 from stem.util import log, str_tools
-from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 # Tor has a limited number of descriptors we can fetch explicitly by their
 # fingerprint or hashes due to a limit on the url length by squid proxies.
@@ -108,8 +135,50 @@ from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence,
 MAX_FINGERPRINTS = 96
 MAX_MICRODESCRIPTOR_HASHES = 90
 
+# Bulk downloads split their request into batches of the above size, and fetch
+# this many of them at a time from separate directories.
+
+BULK_CONCURRENCY = 8
+
+# Hedged queries issue a second request if the first hasn't responded by this
+# percentile of our observed download times. Until we've made enough downloads
+# to say we wait a fixed delay instead.
+
+HEDGE_PERCENTILE = 0.9
+HEDGE_DEFAULT_DELAY = 2.0
+HEDGE_MIN_SAMPLES = 10
+
+# Streamed downloads read and parse this much of the response at a time.
+
+STREAM_CHUNK_SIZE = 65536
+
+# Consensuses and votes say when a newer document will be available, which is
+# better than the Expires header for how long we can use a cached copy. Once
+# revalidated with a '304 Not Modified' response we instead rely on that
+# response's Expires header, or if it lacks one check again after this many
+# seconds.
+
+FRESH_UNTIL_LINE = re.compile(b'^fresh-until ([0-9-]+ [0-9:]+)$', re.MULTILINE)
+NOT_MODIFIED_FRESHNESS = 300
+
+# Keyword that begins each descriptor of these types, so we can parse them as
+# they arrive. Other descriptor types are parsed when their download completes.
+
+STREAM_BOUNDARIES = {
+  'server-descriptor': b'router ',
+  'extra-info': b'extra-info ',
+  'microdescriptor': b'onion-key',
+  'dir-key-certificate-3': b'dir-key-certificate-version ',
+}
+
 SINGLETON_DOWNLOADER = None
 
+# ORPort connections are retained so subsequent requests can skip their
+# handshakes. Connections are bound to their event loop, so those made by
+# synchronous queries are closed when their loop finishes.
+
+ORPORT_POOL = stem.client.RelayPool()
+
 # Some authorities intentionally break their DirPort to discourage DOS. In
 # particular they throttle the rate to such a degree that requests can take
 # hours to complete. Unfortunately Python's socket timeouts only kick in
@@ -322,6 +391,17 @@ class Query(object):
      Using :class:`~stem.descriptor.__init__.Compression` for our compression
      argument.
 
+  .. versionchanged:: 2.0.0
+     Added the hedge argument, and endpoints that have responded quickly and
+     reliably are now favored over others.
+
+  .. versionchanged:: 2.0.0
+     Added the cache argument.
+
+  .. versionchanged:: 2.0.0
+     ORPort connections are reused by later queries within the same event
+     loop.
+
   :var str resource: resource being fetched, such as '/tor/server/all'
   :var str descriptor_type: type of descriptors being fetched (for options see
     :func:`~stem.descriptor.__init__.parse_file`), this is guessed from the
@@ -336,6 +416,14 @@ class Query(object):
     fails
   :var bool fall_back_to_authority: when retrying request issues the last
     request to a directory authority if **True**
+  :var float,bool hedge: if our endpoint hasn't responded after this many
+    seconds also request from another, using whichever responds first. If
+    **True** this waits for the :data:`~stem.descriptor.remote.HEDGE_PERCENTILE`
+    of our download times, and **False** never requests from more than one
+    endpoint at a time
+  :var stem.descriptor.remote.DescriptorCache cache: cache to provide fresh
+    responses from, and revalidate stale ones with. This can also be provided
+    as a directory path.
 
   :var list downloaded: downloaded descriptors, **None** if not yet retrieved
   :var Exception error: exception if a problem occured
@@ -364,7 +452,7 @@ class Query(object):
     the same as running **query.run(True)** (default is **False**)
   """
 
-  def __init__(self, resource: str, descriptor_type: Optional[str] = None, endpoints: Optional[Sequence[stem.Endpoint]] = None, compression: Union[stem.descriptor._Compression, Sequence[stem.descriptor._Compression]] = (Compression.GZIP,), retries: int = 2, fall_back_to_authority: bool = False, timeout: Optional[float] = None, start: bool = True, block: bool = False, validate: bool = False, document_handler: stem.descriptor.DocumentHandler = stem.descriptor.DocumentHandler.ENTRIES, **kwargs: Any) -> None:
+  def __init__(self, resource: str, descriptor_type: Optional[str] = None, endpoints: Optional[Sequence[stem.Endpoint]] = None, compression: Union[stem.descriptor._Compression, Sequence[stem.descriptor._Compression]] = (Compression.GZIP,), retries: int = 2, fall_back_to_authority: bool = False, timeout: Optional[float] = None, start: bool = True, block: bool = False, validate: bool = False, document_handler: stem.descriptor.DocumentHandler = stem.descriptor.DocumentHandler.ENTRIES, hedge: Union[bool, float] = False, cache: Optional[Union[str, 'stem.descriptor.remote.DescriptorCache']] = None, **kwargs: Any) -> None:
     super(Query, self).__init__()
 
     if not resource.startswith('/'):
@@ -403,10 +491,15 @@ class Query(object):
         else:
           raise ValueError("Endpoints must be an stem.ORPort or stem.DirPort. '%s' is a %s." % (endpoint, type(endpoint).__name__))
 
+    if not isinstance(hedge, (bool, int, float)) or hedge < 0:
+      raise ValueError('Hedge should be a boolean or non-negative number of seconds, was %s (%s)' % (hedge, type(hedge).__name__))
+
     self.resource = resource
     self.compression = compression
     self.retries = retries
     self.fall_back_to_authority = fall_back_to_authority
+    self.hedge = hedge
+    self.cache = DescriptorCache(cache) if isinstance(cache, str) else cache
 
     self.downloaded = None  # type: Optional[List[stem.descriptor.Descriptor]]
     self.error = None  # type: Optional[BaseException]
@@ -423,6 +516,7 @@ class Query(object):
 
     self._downloader_task = None  # type: Optional[asyncio.Task]
     self._downloader_lock = threading.RLock()
+    self._if_modified_since = None  # type: Optional[str]
 
     # background thread if outside an asyncio context
 
@@ -471,6 +565,9 @@ class Query(object):
 
     with self._loop_lock:
       if self._loop_thread and self._loop_thread.is_alive():
+        # ORPort connections can't be reused once our loop stops, so close them
+
+        asyncio.run_coroutine_threadsafe(ORPORT_POOL.close(), self._loop).result()
         self._loop.call_soon_threadsafe(self._loop.stop)
         self._loop_thread.join()
 
@@ -548,6 +645,73 @@ class Query(object):
       for desc in self.downloaded:
         yield desc
 
+  def stream(self, suppress: bool = False) -> Iterator[stem.descriptor.Descriptor]:
+    """
+    Downloads and provides descriptors as they arrive, rather than once the
+    whole response has been read. Descriptors are not retained, so this is
+    well suited for large resources such as **/tor/server/all**.
+
+    Streaming is only possible if this query hasn't already been started (so
+    construct it with **start = False**), otherwise this simply provides the
+    results of :func:`~stem.descriptor.remote.Query.run`.
+
+    Failed requests are retried until we've provided our first descriptor,
+    after which we cannot retry without repeating ourselves.
+
+    .. versionadded:: 2.0.0
+
+    :param suppress: avoids raising exceptions if **True**
+
+    :returns: iterator for the requested :class:`~stem.descriptor.__init__.Descriptor` instances
+
+    :raises:
+      Using the iterator can fail with the following if **suppress** is
+      **False**...
+
+        * **ValueError** if the descriptor contents is malformed
+        * :class:`~stem.DownloadTimeout` if our request timed out
+        * :class:`~stem.DownloadFailed` if our request fails
+    """
+
+    with self._downloader_lock:
+      started = self._downloader_task is not None or self.downloaded is not None or self.error is not None
+
+    if started:
+      return iter(self.run(suppress))
+
+    return _iterate_async(self.stream_async(suppress))
+
+  async def stream_async(self, suppress: bool = False) -> AsyncIterator[stem.descriptor.Descriptor]:
+    """
+    Asynchronous counterpart of :func:`stem.descriptor.remote.Query.stream`
+
+    .. versionadded:: 2.0.0
+
+    :param suppress: avoids raising exceptions if **True**
+
+    :returns: asynchronous iterator for the requested :class:`~stem.descriptor.__init__.Descriptor` instances
+
+    :raises: same exceptions as :func:`~stem.descriptor.remote.Query.stream`
+    """
+
+    with self._downloader_lock:
+      started = self._downloader_task is not None or self.downloaded is not None or self.error is not None
+
+    if started:
+      async for desc in self.run_async(suppress):
+        yield desc
+
+      return
+
+    try:
+      async for desc in self._stream_descriptors():
+        yield desc
+    except Exception as exc:
+      self.error = exc
+
+      if not suppress:
+        raise
+
   def __iter__(self) -> Iterator[stem.descriptor.Descriptor]:
     for desc in self.run(True):
       yield desc
@@ -556,23 +720,43 @@ class Query(object):
     async for desc in self.run_async(True):
       yield desc
 
-  def _pick_endpoint(self, use_authority: bool = False) -> stem.Endpoint:
+  def _pick_endpoint(self, use_authority: bool = False, exclude: Sequence[stem.Endpoint] = ()) -> stem.Endpoint:
     """
     Provides an endpoint to query. If we have multiple endpoints then one
-    is picked at random.
+    is picked at random, favoring those that have responded quickly and
+    reliably.
 
     :param use_authority: ignores our endpoints and uses a directory
       authority instead
+    :param exclude: endpoints to avoid unless they're our only option
 
     :returns: :class:`stem.Endpoint` for the location to be downloaded
       from by this request
     """
 
     if use_authority or not self.endpoints:
-      picked = random.choice([auth for auth in stem.directory.Authority.from_cache().values() if auth.nickname not in DIR_PORT_BLACKLIST])
-      return stem.DirPort(picked.address, picked.dir_port)
+      endpoints = [stem.DirPort(auth.address, auth.dir_port) for auth in stem.directory.Authority.from_cache().values() if auth.nickname not in DIR_PORT_BLACKLIST]  # type: Sequence[stem.Endpoint]
     else:
-      return random.choice(self.endpoints)
+      endpoints = self.endpoints
+
+    candidates = [endpoint for endpoint in endpoints if endpoint not in exclude] or endpoints
+    return random.choices(candidates, weights = [_ENDPOINT_HEALTH.weight(endpoint) for endpoint in candidates])[0]
+
+  def _hedge_delay(self) -> Optional[float]:
+    """
+    Provides how long we should wait for an endpoint before also requesting
+    from another.
+
+    :returns: **float** with the delay in seconds, **None** if we don't hedge
+    """
+
+    if self.hedge is True:
+      delay = _ENDPOINT_HEALTH.percentile(HEDGE_PERCENTILE)
+      return delay if delay is not None else HEDGE_DEFAULT_DELAY
+    elif self.hedge is False:
+      return None
+    else:
+      return float(self.hedge)
 
   async def _download_descriptors(self, retries: int, timeout: Optional[float]) -> List['stem.descriptor.Descriptor']:
     self.start_time = time.time()
@@ -580,36 +764,51 @@ class Query(object):
     retries = self.retries
     time_remaining = self.timeout
 
+    cached = self.cache.get(self.resource) if self.cache else None
+
+    if cached:
+      if cached.fresh_until > self.start_time:
+        self.reply_headers = cached.headers
+        self.runtime = time.time() - self.start_time
+
+        log.trace('Descriptors for %s were cached, and are fresh for another %i seconds' % (self.resource, cached.fresh_until - self.start_time))
+        return self._parse(cached.content)
+
+      self._if_modified_since = cached.last_modified
+
     while True:
       endpoint = self._pick_endpoint(use_authority = retries == 0 and self.fall_back_to_authority)
+      downloaded_from = self._download_location(endpoint)
 
-      if isinstance(endpoint, stem.ORPort):
-        downloaded_from = 'ORPort %s:%s (resource %s)' % (endpoint.address, endpoint.port, self.resource)
-      elif isinstance(endpoint, stem.DirPort):
-        downloaded_from = 'http://%s:%i/%s' % (endpoint.address, endpoint.port, self.resource.lstrip('/'))
+      if isinstance(endpoint, stem.DirPort):
         self.download_url = downloaded_from
-      else:
-        raise ValueError("BUG: endpoints can only be ORPorts or DirPorts, '%s' was a %s" % (endpoint, type(endpoint).__name__))
 
       try:
-        response = await asyncio.wait_for(self._download_from(endpoint), time_remaining)
-        content, self.reply_headers = _http_body_and_headers(response)
+        endpoint, content, self.reply_headers = await asyncio.wait_for(self._download_hedged(endpoint), time_remaining)
+        downloaded_from = self._download_location(endpoint)
+
+        if isinstance(endpoint, stem.DirPort):
+          self.download_url = downloaded_from
 
         self.runtime = time.time() - self.start_time
 
-        log.trace('Descriptors retrieved from %s in %0.2fs' % (downloaded_from, self.runtime))
+        if content is None:
+          log.trace('Cached descriptors for %s are unchanged according to %s (took %0.2fs)' % (self.resource, downloaded_from, self.runtime))
 
-        try:
-          return list(stem.descriptor.parse_file(
-            io.BytesIO(content),
-            self.descriptor_type,
-            validate = self.validate,
-            document_handler = self.document_handler,
-            **self.kwargs
-          ))
-        except ValueError:
-          raise  # parsing failed
+          descriptors = self._parse(cached.content)
+          self.cache.refresh(self.resource, self.reply_headers)
+          self.reply_headers = dict(cached.headers, **self.reply_headers)
+        else:
+          log.trace('Descriptors retrieved from %s in %0.2fs' % (downloaded_from, self.runtime))
+
+          descriptors = self._parse(content)
+
+          if self.cache:
+            self.cache.put(self.resource, content, self.reply_headers)
+
+        return descriptors
       except asyncio.TimeoutError as exc:
+        _ENDPOINT_HEALTH.record_failure(endpoint)
         raise stem.DownloadTimeout(downloaded_from, exc, sys.exc_info()[2], self.timeout)
       except:
         exception = sys.exc_info()[1]
@@ -625,19 +824,211 @@ class Query(object):
 
           raise
 
-  async def _download_from(self, endpoint: stem.Endpoint) -> bytes:
-    http_request = '\r\n'.join((
+  def _parse(self, content: bytes) -> List['stem.descriptor.Descriptor']:
+    return list(stem.descriptor.parse_file(
+      io.BytesIO(content),
+      self.descriptor_type,
+      validate = self.validate,
+      document_handler = self.document_handler,
+      **self.kwargs
+    ))
+
+  async def _stream_descriptors(self) -> AsyncIterator[stem.descriptor.Descriptor]:
+    self.start_time = time.time()
+
+    retries = self.retries
+    deadline = self.start_time + self.timeout if self.timeout is not None else None
+
+    while True:
+      endpoint = self._pick_endpoint(use_authority = retries == 0 and self.fall_back_to_authority)
+      downloaded_from = self._download_location(endpoint)
+      provided = 0
+
+      if isinstance(endpoint, stem.DirPort):
+        self.download_url = downloaded_from
+
+      try:
+        async for desc in self._stream_from(endpoint, deadline):
+          provided += 1
+          yield desc
+
+        self.runtime = time.time() - self.start_time
+        _ENDPOINT_HEALTH.record_success(endpoint, self.runtime)
+
+        log.trace('Streamed %i descriptors from %s in %0.2fs' % (provided, downloaded_from, self.runtime))
+        return
+      except asyncio.TimeoutError as exc:
+        _ENDPOINT_HEALTH.record_failure(endpoint)
+        raise stem.DownloadTimeout(downloaded_from, exc, sys.exc_info()[2], self.timeout)
+      except Exception as exc:
+        _ENDPOINT_HEALTH.record_failure(endpoint)
+        retries -= 1
+
+        if retries > 0 and not provided:
+          log.debug("Failed to stream descriptors from '%s' (%i retries remaining): %s" % (downloaded_from, retries, exc))
+        else:
+          log.debug("Failed to stream descriptors from '%s': %s" % (downloaded_from, exc))
+          raise
+
+  async def _stream_from(self, endpoint: stem.Endpoint, deadline: Optional[float]) -> AsyncIterator[stem.descriptor.Descriptor]:
+    """
+    Parses descriptors from an endpoint as its response arrives.
+
+    :param endpoint: endpoint to download from
+    :param deadline: unix timestamp when we should time out
+
+    :returns: iterator for the descriptors we've parsed
+    """
+
+    decoder = _HttpStreamDecoder()
+    splitter = _DescriptorSplitter(STREAM_BOUNDARIES.get(self.descriptor_type.split(' ')[0]))
+
+    def parse(contents: Sequence[bytes]) -> Iterator[stem.descriptor.Descriptor]:
+      for content in contents:
+        for desc in stem.descriptor.parse_file(io.BytesIO(content), self.descriptor_type, validate = self.validate, document_handler = self.document_handler, **self.kwargs):
+          yield desc
+
+    async for chunk in self._read_from(endpoint, deadline):
+      body = decoder.feed(chunk)
+
+      if decoder.headers is not None:
+        self.reply_headers = decoder.headers
+
+      for desc in parse(splitter.feed(body)):
+        yield desc
+
+    for desc in parse(splitter.feed(decoder.flush()) + splitter.finish()):
+      yield desc
+
+  async def _read_from(self, endpoint: stem.Endpoint, deadline: Optional[float]) -> AsyncIterator[bytes]:
+    """
+    Reads the response from an endpoint as it arrives. Responses through
+    ORPorts are provided all at once.
+    """
+
+    def time_remaining() -> Optional[float]:
+      return max(0.0, deadline - time.time()) if deadline is not None else None
+
+    if not isinstance(endpoint, stem.DirPort):
+      yield await asyncio.wait_for(self._download_from(endpoint), time_remaining())
+      return
+
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(endpoint.address, endpoint.port), time_remaining())
+
+    try:
+      writer.write(str_tools._to_bytes(self._http_request()))
+
+      while True:
+        chunk = await asyncio.wait_for(reader.read(STREAM_CHUNK_SIZE), time_remaining())
+
+        if not chunk:
+          break
+
+        yield chunk
+    finally:
+      writer.close()
+
+  async def _download_hedged(self, endpoint: stem.Endpoint) -> Tuple[stem.Endpoint, Optional[bytes], Dict[str, str]]:
+    """
+    Downloads from the given endpoint. If we're hedging and it's slow to
+    respond then we also request from another, providing whichever succeeds
+    first and cancelling the other.
+
+    :param endpoint: endpoint to download from
+
+    :returns: **tuple** of the form (endpoint, content, headers) for the
+      successful response
+
+    :raises: exception from our last failed request if all of them fail
+    """
+
+    delay = self._hedge_delay()
+    downloads = {asyncio.ensure_future(self._download_and_record(endpoint)): endpoint}
+
+    try:
+      if delay is not None:
+        done, _ = await asyncio.wait(list(downloads), timeout = delay)
+
+        if not done:
+          alternate = self._pick_endpoint(exclude = [endpoint])
+
+          if alternate != endpoint:
+            log.trace('%s has not responded after %0.2fs, also requesting from %s' % (self._download_location(endpoint), delay, self._download_location(alternate)))
+            downloads[asyncio.ensure_future(self._download_and_record(alternate))] = alternate
+
+      pending = set(downloads)
+      error = None  # type: Optional[BaseException]
+
+      while pending:
+        done, pending = await asyncio.wait(pending, return_when = asyncio.FIRST_COMPLETED)
+
+        for download in done:
+          try:
+            content, headers = download.result()
+            return downloads[download], content, headers
+          except Exception as exc:
+            error = exc
+
+      raise error
+    finally:
+      for download in downloads:
+        download.cancel()
+
+  async def _download_and_record(self, endpoint: stem.Endpoint) -> Tuple[Optional[bytes], Dict[str, str]]:
+    """
+    Downloads from an endpoint, noting how long it took or if it failed. If
+    we made a conditional request and our cached content is unchanged then the
+    content we provide is **None**.
+    """
+
+    start_time = time.time()
+
+    try:
+      response = await self._download_from(endpoint)
+
+      if self._if_modified_since and response.startswith(b'HTTP/1.0 304'):
+        content, headers = None, _http_headers(response.split(b'\r\n\r\n', 1)[0], not_modified = True)
+      else:
+        content, headers = _http_body_and_headers(response)
+    except asyncio.CancelledError:
+      raise  # we stopped waiting, so this doesn't reflect on the endpoint
+    except Exception:
+      _ENDPOINT_HEALTH.record_failure(endpoint)
+      raise
+
+    _ENDPOINT_HEALTH.record_success(endpoint, time.time() - start_time)
+    return content, headers
+
+  def _download_location(self, endpoint: stem.Endpoint) -> str:
+    """
+    Describes where we're downloading from.
+    """
+
+    if isinstance(endpoint, stem.ORPort):
+      return 'ORPort %s:%s (resource %s)' % (endpoint.address, endpoint.port, self.resource)
+    elif isinstance(endpoint, stem.DirPort):
+      return 'http://%s:%i/%s' % (endpoint.address, endpoint.port, self.resource.lstrip('/'))
+    else:
+      raise ValueError("BUG: endpoints can only be ORPorts or DirPorts, '%s' was a %s" % (endpoint, type(endpoint).__name__))
+
+  def _http_request(self) -> str:
+    lines = [
       'GET %s HTTP/1.0' % self.resource,
       'Accept-Encoding: %s' % ', '.join(map(lambda c: c.encoding, self.compression)),
       'User-Agent: %s' % stem.USER_AGENT,
-    )) + '\r\n\r\n'
+    ]
+
+    if self._if_modified_since:
+      lines.append('If-Modified-Since: %s' % self._if_modified_since)
+
+    return '\r\n'.join(lines) + '\r\n\r\n'
+
+  async def _download_from(self, endpoint: stem.Endpoint) -> bytes:
+    http_request = self._http_request()
 
     if isinstance(endpoint, stem.ORPort):
       link_protocols = endpoint.link_protocols if endpoint.link_protocols else [3]
-
-      async with await stem.client.Relay.connect(endpoint.address, endpoint.port, link_protocols) as relay:
-        async with await relay.create_circuit() as circ:
-          return await circ.directory(http_request, stream_id = 1)
+      return await ORPORT_POOL.directory(endpoint.address, endpoint.port, http_request, link_protocols)
     elif isinstance(endpoint, stem.DirPort):
       reader, writer = await asyncio.open_connection(endpoint.address, endpoint.port)
       writer.write(str_tools._to_bytes(http_request))
@@ -647,11 +1038,296 @@ class Query(object):
       raise ValueError("BUG: endpoints can only be ORPorts or DirPorts, '%s' was a %s" % (endpoint, type(endpoint).__name__))
 
 
+class _EndpointHealth(object):
+  """
+  Download times and failures we've observed for our endpoints, so queries
+  can favor those that are fast and reliable.
+
+  :param samples: number of recent download times to retain per endpoint
+  """
+
+  def __init__(self, samples: int = 20) -> None:
+    self._samples = samples
+    self._latencies = {}  # type: Dict[stem.Endpoint, collections.deque]
+    self._failures = collections.Counter()  # type: collections.Counter
+    self._lock = threading.RLock()
+
+  def record_success(self, endpoint: stem.Endpoint, runtime: float) -> None:
+    with self._lock:
+      if endpoint not in self._latencies:
+        self._latencies[endpoint] = collections.deque(maxlen = self._samples)
+
+      self._latencies[endpoint].append(runtime)
+      self._failures[endpoint] //= 2  # forgive past failures as it recovers
+
+  def record_failure(self, endpoint: stem.Endpoint) -> None:
+    with self._lock:
+      self._failures[endpoint] += 1
+
+  def latency(self, endpoint: stem.Endpoint) -> Optional[float]:
+    """
+    Provides the average of an endpoint's recent download times.
+
+    :returns: **float** with the endpoint's latency, **None** if unknown
+    """
+
+    with self._lock:
+      runtimes = self._latencies.get(endpoint)
+      return sum(runtimes) / len(runtimes) if runtimes else None
+
+  def percentile(self, percentile: float) -> Optional[float]:
+    """
+    Provides the given percentile of download times across all endpoints.
+
+    :returns: **float** with the download time, **None** if we haven't made
+      enough downloads to say
+    """
+
+    with self._lock:
+      runtimes = sorted([runtime for endpoint_runtimes in self._latencies.values() for runtime in endpoint_runtimes])
+
+    if len(runtimes) < HEDGE_MIN_SAMPLES:
+      return None
+
+    return runtimes[min(len(runtimes) - 1, int(percentile * len(runtimes)))]
+
+  def weight(self, endpoint: stem.Endpoint) -> float:
+    """
+    Relative likelihood that we should pick this endpoint. Endpoints we
+    haven't used are considered typical so they're still explored, and each
+    consecutive failure halves an endpoint's weight.
+    """
+
+    latency = self.latency(endpoint)
+
+    if latency is None:
+      latency = self.percentile(0.5) or 1.0
+
+    with self._lock:
+      failures = min(self._failures[endpoint], 10)
+
+    return 1.0 / (max(latency, 0.01) * (2 ** failures))
+
+
+_ENDPOINT_HEALTH = _EndpointHealth()
+
+
+class _CachedResponse(collections.namedtuple('_CachedResponse', ['resource', 'content', 'headers', 'stored', 'fresh_until', 'last_modified'])):
+  """
+  Directory response from our :class:`~stem.descriptor.remote.DescriptorCache`.
+
+  :var str resource: resource that was downloaded
+  :var bytes content: decompressed response body
+  :var dict headers: headers provided with the response
+  :var float stored: unix timestamp when this was cached
+  :var float fresh_until: unix timestamp until which we can use this without
+    checking with a directory
+  :var str last_modified: http date to make conditional requests with
+  """
+
+
+class DescriptorCache(object):
+  """
+  On-disk cache of directory responses. Fresh responses are provided without
+  contacting a directory, and stale ones are revalidated with conditional
+  (**If-Modified-Since**) requests so unchanged documents aren't downloaded
+  again.
+
+  Responses are fresh until the **fresh-until** time of consensuses and
+  votes, or the **Expires** header of other resources.
+
+  ::
+
+    from stem.descriptor.remote import DescriptorCache, DescriptorDownloader
+
+    downloader = DescriptorDownloader(cache = DescriptorCache('/var/cache/stem'))
+    consensus = downloader.get_consensus().run()  # only downloads when stale
+
+  .. versionadded:: 2.0.0
+
+  :var str path: directory responses are stored within
+  :var int max_size: maximum bytes of content to retain
+  :var float max_age: seconds after which stale responses are removed
+
+  :param path: directory to store responses within, this is created if
+    it doesn't already exist
+  :param max_size: maximum bytes of content to retain, evicting the least
+    recently used responses beyond this
+  :param max_age: seconds after which stale responses are removed
+  """
+
+  def __init__(self, path: str, max_size: int = 256 * 1024 * 1024, max_age: float = 7 * 24 * 60 * 60) -> None:
+    self.path = path
+    self.max_size = max_size
+    self.max_age = max_age
+
+    self._lock = threading.RLock()
+
+  def get(self, resource: str) -> Optional[_CachedResponse]:
+    """
+    Provides our cached response for a resource.
+
+    :param resource: resource that was downloaded, such as
+      '/tor/status-vote/current/consensus'
+
+    :returns: **_CachedResponse** with the content and validity of our cached
+      response, **None** if we don't have one
+    """
+
+    metadata_path, content_path = self._paths(resource)
+
+    with self._lock:
+      try:
+        with open(metadata_path) as metadata_file:
+          metadata = json.load(metadata_file)
+
+        with open(content_path, 'rb') as content_file:
+          content = content_file.read()
+
+        os.utime(content_path)  # note when we last used this for eviction
+      except (OSError, ValueError):
+        return None
+
+    if metadata.get('resource') != resource or self._is_expired(metadata):
+      return None
+
+    return _CachedResponse(resource, content, metadata['headers'], metadata['stored'], metadata['fresh_until'], metadata['last_modified'])
+
+  def put(self, resource: str, content: bytes, headers: Dict[str, str]) -> None:
+    """
+    Caches a response, then evicts responses as needed.
+
+    :param resource: resource that was downloaded
+    :param content: decompressed response body
+    :param headers: headers provided with the response
+
+    :raises: **OSError** if unable to write to our directory
+    """
+
+    now = time.time()
+    metadata_path, content_path = self._paths(resource)
+
+    metadata = {
+      'resource': resource,
+      'headers': headers,
+      'stored': now,
+      'fresh_until': _fresh_until(content, headers, now),
+      'last_modified': headers.get('Last-Modified') or email.utils.formatdate(now, usegmt = True),
+    }
+
+    with self._lock:
+      if not os.path.exists(self.path):
+        os.makedirs(self.path)
+
+      # write to temporary files then move them into place so we never read
+      # partial content
+
+      with open(content_path + '.tmp', 'wb') as content_file:
+        content_file.write(content)
+
+      with open(metadata_path + '.tmp', 'w') as metadata_file:
+        json.dump(metadata, metadata_file)
+
+      os.replace(content_path + '.tmp', content_path)
+      os.replace(metadata_path + '.tmp', metadata_path)
+
+      self.evict()
+
+  def refresh(self, resource: str, headers: Dict[str, str]) -> None:
+    """
+    Extends the freshness of a response that a directory told us is unchanged
+    (a '304 Not Modified' response). The document's own **fresh-until** time
+    has passed by then, so this is fresh until the **Expires** header of the
+    304 response, or :data:`~stem.descriptor.remote.NOT_MODIFIED_FRESHNESS`
+    seconds if it lacks one.
+
+    :param resource: resource that was revalidated
+    :param headers: headers provided with the 304 response
+
+    :raises: **OSError** if unable to write to our directory
+    """
+
+    now = time.time()
+    metadata_path, content_path = self._paths(resource)
+
+    with self._lock:
+      try:
+        with open(metadata_path) as metadata_file:
+          metadata = json.load(metadata_file)
+      except (OSError, ValueError):
+        return  # evicted since we read it
+
+      if metadata.get('resource') != resource:
+        return
+
+      metadata['headers'] = dict(metadata['headers'], **headers)
+      metadata['stored'] = now
+      metadata['fresh_until'] = _fresh_until(b'', headers, now + NOT_MODIFIED_FRESHNESS)
+
+      with open(metadata_path + '.tmp', 'w') as metadata_file:
+        json.dump(metadata, metadata_file)
+
+      os.replace(metadata_path + '.tmp', metadata_path)
+
+  def evict(self) -> None:
+    """
+    Removes responses that have been stale longer than our **max_age**, then
+    the least recently used responses until we're within our **max_size**.
+    """
+
+    entries = []  # tuples of the form (last used, size, metadata path, content path)
+
+    with self._lock:
+      if not os.path.isdir(self.path):
+        return
+
+      for filename in os.listdir(self.path):
+        if not filename.endswith('.json'):
+          continue
+
+        metadata_path = os.path.join(self.path, filename)
+        content_path = metadata_path[:-5] + '.content'
+
+        try:
+          with open(metadata_path) as metadata_file:
+            metadata = json.load(metadata_file)
+
+          stat = os.stat(content_path)
+        except (OSError, ValueError):
+          _remove_files(metadata_path, content_path)
+          continue
+
+        if self._is_expired(metadata):
+          _remove_files(metadata_path, content_path)
+        else:
+          entries.append((stat.st_mtime, stat.st_size, metadata_path, content_path))
+
+      total_size = sum([entry[1] for entry in entries])
+
+      for last_used, size, metadata_path, content_path in sorted(entries):
+        if total_size <= self.max_size:
+          break
+
+        _remove_files(metadata_path, content_path)
+        total_size -= size
+
+  def _is_expired(self, metadata: Dict[str, Any]) -> bool:
+    now = time.time()
+    return metadata['fresh_until'] < now and now - metadata['stored'] > self.max_age
+
+  def _paths(self, resource: str) -> Tuple[str, str]:
+    name = os.path.join(self.path, hashlib.sha1(str_tools._to_bytes(resource)).hexdigest())
+    return name + '.json', name + '.content'
+
+
 class DescriptorDownloader(object):
   """
   Configurable class that issues :class:`~stem.descriptor.remote.Query`
   instances on your behalf.
 
+  To avoid downloading documents we already have provide a
+  :class:`~stem.descriptor.remote.DescriptorCache` as a **cache** argument.
+
   :param use_mirrors: downloads the present consensus and uses the directory
     mirrors to fetch future requests, this fails silently if the consensus
     cannot be downloaded
@@ -982,6 +1658,95 @@ class DescriptorDownloader(object):
 
     return self.query('/tor/status-vote/next/consensus-signatures', **query_args)
 
+  def get_bulk(self, descriptor_type: str, identifiers: Sequence[str], concurrency: int = BULK_CONCURRENCY, attempts: int = 3, **query_args: Any) -> Iterator[stem.descriptor.Descriptor]:
+    """
+    Downloads descriptors for any number of fingerprints or microdescriptor
+    hashes. These are split into batches that tor will serve (see
+    :data:`~stem.descriptor.remote.MAX_FINGERPRINTS` and
+    :data:`~stem.descriptor.remote.MAX_MICRODESCRIPTOR_HASHES`), which are
+    fetched concurrently from separate directories.
+
+    Batches that fail are retried on another directory, and descriptors are
+    provided as each batch completes. For example, to refresh all
+    microdescriptors...
+
+    ::
+
+      downloader = DescriptorDownloader(use_mirrors = True)
+      consensus = downloader.get_consensus(microdescriptor = True).run()
+      hashes = [entry.microdescriptor_digest for entry in consensus]
+
+      for desc in downloader.get_bulk('micro', hashes):
+        print(desc.identifiers)
+
+    This blocks on each batch, so within asyncio applications use
+    :func:`~stem.descriptor.remote.DescriptorDownloader.get_bulk_async`
+    instead.
+
+    .. versionadded:: 2.0.0
+
+    :param descriptor_type: **server**, **extrainfo**, or **micro** for the
+      kind of descriptors to download
+    :param identifiers: relay fingerprints, or microdescriptor hashes
+    :param concurrency: maximum number of batches to download at a time
+    :param attempts: number of directories to try for each batch
+    :param query_args: additional arguments for the
+      :class:`~stem.descriptor.remote.Query` constructor
+
+    :returns: iterator for the requested
+      :class:`~stem.descriptor.__init__.Descriptor` instances
+
+    :raises:
+      * **ValueError** if the descriptor type is unrecognized or the
+        descriptor content is malformed
+      * :class:`~stem.DownloadTimeout` if a batch timed out on each attempt
+      * :class:`~stem.DownloadFailed` if a batch failed on each attempt
+    """
+
+    return _iterate_async(self.get_bulk_async(descriptor_type, identifiers, concurrency, attempts, **query_args))
+
+  def get_bulk_async(self, descriptor_type: str, identifiers: Sequence[str], concurrency: int = BULK_CONCURRENCY, attempts: int = 3, **query_args: Any) -> AsyncIterator[stem.descriptor.Descriptor]:
+    """
+    Asynchronous counterpart of
+    :func:`~stem.descriptor.remote.DescriptorDownloader.get_bulk`.
+
+    .. versionadded:: 2.0.0
+
+    :returns: asynchronous iterator for the requested
+      :class:`~stem.descriptor.__init__.Descriptor` instances
+
+    :raises: **ValueError** if the descriptor type is unrecognized, other
+      exceptions are the same as
+      :func:`~stem.descriptor.remote.DescriptorDownloader.get_bulk`
+    """
+
+    if descriptor_type == 'server':
+      getter, batch_size = self.get_server_descriptors, MAX_FINGERPRINTS  # type: Callable[..., Query], int
+    elif descriptor_type == 'extrainfo':
+      getter, batch_size = self.get_extrainfo_descriptors, MAX_FINGERPRINTS
+    elif descriptor_type == 'micro':
+      getter, batch_size = self.get_microdescriptors, MAX_MICRODESCRIPTOR_HASHES
+    else:
+      raise ValueError("Bulk downloads can be for 'server', 'extrainfo', or 'micro' descriptors, not '%s'" % descriptor_type)
+
+    if concurrency < 1:
+      raise ValueError('Bulk download concurrency must be positive, was %i' % concurrency)
+    elif attempts < 1:
+      raise ValueError('Bulk downloads must make at least one attempt, was %i' % attempts)
+
+    if isinstance(identifiers, str):
+      identifiers = [identifiers]
+
+    identifiers = list(collections.OrderedDict.fromkeys(identifiers))  # deduplicate
+    batches = [identifiers[i:i + batch_size] for i in range(0, len(identifiers), batch_size)]
+
+    if self._endpoints:
+      directories = list(self._endpoints)  # type: List[stem.Endpoint]
+    else:
+      directories = [stem.DirPort(auth.address, auth.dir_port) for auth in stem.directory.Authority.from_cache().values() if auth.nickname not in DIR_PORT_BLACKLIST]
+
+    return _bulk_download(getter, batches, directories, concurrency, attempts, query_args)
+
   def query(self, resource: str, **query_args: Any) -> 'stem.descriptor.remote.Query':
     """
     Issues a request for the given resource.
@@ -1009,6 +1774,52 @@ class DescriptorDownloader(object):
     return Query(resource, **args)
 
 
+async def _bulk_download(getter: Callable[..., Query], batches: Sequence[Sequence[str]], directories: Sequence[stem.Endpoint], concurrency: int, attempts: int, query_args: Dict[str, Any]) -> AsyncIterator[stem.descriptor.Descriptor]:
+  """
+  Downloads batches of descriptors, spreading them across our directories and
+  providing descriptors as each batch completes.
+  """
+
+  semaphore = asyncio.Semaphore(concurrency)
+  active = collections.Counter()  # type: collections.Counter
+
+  async def download_batch(batch: Sequence[str]) -> List[stem.descriptor.Descriptor]:
+    async with semaphore:
+      attempted = set()  # type: set
+      error = None  # type: Optional[BaseException]
+
+      for attempt in range(attempts):
+        # prefer directories this batch hasn't tried, that are the least busy
+
+        candidates = [d for d in directories if d not in attempted] or list(directories)
+        least_busy = min([active[d] for d in candidates])
+        endpoint = random.choice([d for d in candidates if active[d] == least_busy])
+
+        attempted.add(endpoint)
+        active[endpoint] += 1
+
+        try:
+          query = getter(batch, **dict(query_args, endpoints = [endpoint], retries = 1, start = False))
+          return [desc async for desc in query.run_async(False)]
+        except (OSError, stem.ProtocolError) as exc:
+          error = exc
+          log.debug('Bulk download of %i descriptors failed from %s (attempt %i of %i): %s' % (len(batch), endpoint, attempt + 1, attempts, exc))
+        finally:
+          active[endpoint] -= 1
+
+      raise error
+
+  tasks = [asyncio.ensure_future(download_batch(batch)) for batch in batches]
+
+  try:
+    for completed in asyncio.as_completed(tasks):
+      for desc in await completed:
+        yield desc
+  finally:
+    for task in tasks:
+      task.cancel()
+
+
 def _http_body_and_headers(data: bytes) -> Tuple[bytes, Dict[str, str]]:
   """
   Parse the headers and decompressed body from a HTTP response, such as...
@@ -1036,10 +1847,31 @@ def _http_body_and_headers(data: bytes) -> Tuple[bytes, Dict[str, str]]:
     * **ImportError** if missing the decompression module
   """
 
-  first_line, data = data.split(b'\r\n', 1)
   header_data, body_data = data.split(b'\r\n\r\n', 1)
+  headers = _http_headers(header_data)
+
+  return _http_compression(headers).decompress(body_data).rstrip(), headers
+
+
+def _http_headers(data: bytes, not_modified: bool = False) -> Dict[str, str]:
+  """
+  Parses the status line and headers of a HTTP response.
+
+  :param data: HTTP response up to its body
+  :param not_modified: accept a '304 Not Modified' status in addition to
+    success
 
-  if not first_line.startswith(b'HTTP/1.0 2'):
+  :returns: **dict** with the response headers
+
+  :raises: **stem.ProtocolError** if response was unsuccessful or malformed
+  """
+
+  if b'\r\n' in data:
+    first_line, header_data = data.split(b'\r\n', 1)
+  else:
+    first_line, header_data = data, b''
+
+  if not first_line.startswith(b'HTTP/1.0 2') and not (not_modified and first_line.startswith(b'HTTP/1.0 304')):
     raise stem.ProtocolError("Response should begin with HTTP success, but was '%s'" % str_tools._to_unicode(first_line))
 
   headers = {}
@@ -1051,18 +1883,187 @@ def _http_body_and_headers(data: bytes) -> Tuple[bytes, Dict[str, str]]:
     key, value = line.split(': ', 1)
     headers[key] = value
 
+  return headers
+
+
+def _http_compression(headers: Dict[str, str]) -> stem.descriptor._Compression:
+  """
+  Provides the compression of a HTTP response's body.
+
+  :raises: **ValueError** if encoding is unrecognized
+  """
+
   encoding = headers.get('Content-Encoding')
 
   if encoding == 'deflate':
-    return stem.descriptor.Compression.GZIP.decompress(body_data).rstrip(), headers
+    return stem.descriptor.Compression.GZIP
 
   for compression in stem.descriptor.Compression:
     if encoding == compression.encoding:
-      return compression.decompress(body_data).rstrip(), headers
+      return compression
 
   raise ValueError("'%s' is an unrecognized encoding" % encoding)
 
 
+class _HttpStreamDecoder(object):
+  """
+  Incrementally parses a HTTP response, providing its decompressed body as it
+  arrives.
+
+  :var dict headers: response headers, **None** until they've been read
+  """
+
+  def __init__(self) -> None:
+    self.headers = None  # type: Optional[Dict[str, str]]
+
+    self._header_buffer = b''
+    self._decompressor = None  # type: Optional[stem.descriptor._Decompressor]
+
+  def feed(self, data: bytes) -> bytes:
+    """
+    Processes the next portion of our response.
+
+    :param data: response content that follows what we've been provided
+
+    :returns: **bytes** with the body content we've decompressed so far
+
+    :raises:
+      * **stem.ProtocolError** if response was unsuccessful or malformed
+      * **ValueError** if encoding is unrecognized
+      * **ImportError** if missing the decompression module
+      * **OSError** if the body cannot be decompressed
+    """
+
+    if self.headers is None:
+      self._header_buffer += data
+
+      if b'\r\n\r\n' not in self._header_buffer:
+        return b''
+
+      header_data, data = self._header_buffer.split(b'\r\n\r\n', 1)
+      self._header_buffer = b''
+
+      self.headers = _http_headers(header_data)
+      self._decompressor = _http_compression(self.headers).decompressor()
+
+    return self._decompressor.decompress(data) if data else b''
+
+  def flush(self) -> bytes:
+    """
+    Provides the remainder of our body once the response has been fully read.
+
+    :returns: **bytes** with any remaining decompressed content
+
+    :raises:
+      * **stem.ProtocolError** if the response ended before its body
+      * **OSError** if the body was truncated
+    """
+
+    if self.headers is None:
+      raise stem.ProtocolError('HTTP response ended before its headers were complete')
+
+    return self._decompressor.flush()
+
+
+class _DescriptorSplitter(object):
+  """
+  Divides a stream of content into its descriptors.
+
+  :param boundary: keyword each descriptor begins with, if **None** then
+    content is provided all at once when finished
+  """
+
+  def __init__(self, boundary: Optional[bytes]) -> None:
+    self._boundary = b'\n' + boundary if boundary else None
+    self._buffer = bytearray()
+    self._scanned = 0  # position up to which we've looked for a boundary
+
+  def feed(self, data: bytes) -> List[bytes]:
+    """
+    Adds content, providing the descriptors that are now complete.
+
+    :param data: content that follows what we've been provided
+
+    :returns: **list** with the content of each completed descriptor
+    """
+
+    self._buffer += data
+
+    if self._boundary is None:
+      return []
+
+    descriptors = []
+
+    while True:
+      index = self._buffer.find(self._boundary, self._scanned)
+
+      if index == -1:
+        self._scanned = max(0, len(self._buffer) - len(self._boundary) + 1)
+        return descriptors
+
+      descriptors.append(bytes(self._buffer[:index + 1]))
+      del self._buffer[:index + 1]
+      self._scanned = 0
+
+  def finish(self) -> List[bytes]:
+    """
+    Provides the content that remains once we've been given everything.
+
+    :returns: **list** with the final descriptor's content, if there is one
+    """
+
+    remaining = bytes(self._buffer).rstrip()
+    self._buffer = bytearray()
+    self._scanned = 0
+
+    return [remaining] if remaining else []
+
+
+def _fresh_until(content: bytes, headers: Dict[str, str], default: float) -> float:
+  """
+  Determines until when a response can be used without checking with a
+  directory.
+  """
+
+  match = FRESH_UNTIL_LINE.search(content[:4096])
+
+  try:
+    if match:
+      return stem.util.datetime_to_unix(datetime.datetime.strptime(str_tools._to_unicode(match.group(1)), '%Y-%m-%d %H:%M:%S'))
+
+    return email.utils.parsedate_to_datetime(headers['Expires']).timestamp()
+  except (KeyError, TypeError, ValueError):
+    return default
+
+
+def _remove_files(*paths: str) -> None:
+  for path in paths:
+    try:
+      os.remove(path)
+    except OSError:
+      pass
+
+
+def _iterate_async(async_iterator: AsyncIterator[Any]) -> Iterator[Any]:
+  """
+  Synchronously iterates over an asynchronous iterator, running it within its
+  own event loop.
+  """
+
+  loop = asyncio.new_event_loop()
+
+  try:
+    while True:
+      try:
+        yield loop.run_until_complete(async_iterator.__anext__())
+      except StopAsyncIteration:
+        break
+  finally:
+    loop.run_until_complete(async_iterator.aclose())  # type: ignore
+    loop.run_until_complete(ORPORT_POOL.close())
+    loop.close()
+
+
 def _guess_descriptor_type(resource: str) -> str:
   # Attempts to determine the descriptor type based on the resource url. This
   # raises a ValueError if the resource isn't recognized.
@@ -18,37 +18,55 @@ sources...
     |   +- RouterStatusEntryBridgeV2 - Entry for a bridge flavored v2 document
     |
     |- RouterStatusEntryV3 - Entry for a network status v3 document
+    |   +- CompactRouterStatusEntryV3 - Entry for a v3 document that uses less memory
     +- RouterStatusEntryMicroV3 - Entry for a microdescriptor flavored v3 document
 """
 
+import base64
 import binascii
+import collections
 import datetime
+import functools
 import io
+import threading
 
 import stem.exit_policy
 import stem.util.str_tools
 
-from typing import Any, BinaryIO, Iterator, List, Mapping, Optional, Sequence, Tuple, Type, Union
+from typing import Any, BinaryIO, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Type, Union
 
 from stem.descriptor import (
   ENTRY_TYPE,
   KEYWORD_LINE,
   Descriptor,
+  _CompactDescriptor,
+  _compact_slots,
+  _copy,
   _descriptor_content,
+  _keyword_matcher,
   _value,
   _values,
-  _descriptor_components,
   _parse_protocol_line,
+  _read_until_keywords,
   _read_until_keywords_with_ending_keyword,
   _random_nickname,
   _random_ipv4_address,
   _random_date,
 )
 
+# Number of base64 identities and digests we retain the hex encoding of. Most
+# relays recur between hourly consensuses, and each entry is roughly two
+# hundred bytes, so this caps us at a few megabytes.
+
+FINGERPRINT_CACHE_SIZE = 32768
+
+_FINGERPRINT_CACHE = collections.OrderedDict()  # type: collections.OrderedDict[str, str]
+_FINGERPRINT_CACHE_LOCK = threading.Lock()
+
 _parse_pr_line = _parse_protocol_line('pr', 'protocols')
 
 
-def _parse_file(document_file: BinaryIO, validate: bool, entry_class: Type['stem.descriptor.router_status_entry.RouterStatusEntry'], entry_keyword: str = 'r', start_position: Optional[int] = None, end_position: Optional[int] = None, section_end_keywords: Tuple[str, ...] = (), extra_args: Sequence[Any] = ()) -> Iterator['stem.descriptor.router_status_entry.RouterStatusEntry']:
+def _parse_file(document_file: BinaryIO, validate: bool, entry_class: Type['stem.descriptor.router_status_entry.RouterStatusEntry'], entry_keyword: str = 'r', start_position: Optional[int] = None, end_position: Optional[int] = None, section_end_keywords: Tuple[str, ...] = (), extra_args: Sequence[Any] = (), fields: Optional[Sequence[str]] = None) -> Iterator['stem.descriptor.router_status_entry.RouterStatusEntry']:
   """
   Reads a range of the document_file containing some number of entry_class
   instances. We deliminate the entry_class entries by the keyword on their
@@ -68,6 +86,7 @@ def _parse_file(document_file: BinaryIO, validate: bool, entry_class: Type['stem
     section if no end_position was provided
   :param extra_args: extra arguments for the entry_class (after the
     content and validate flag)
+  :param fields: attributes we'll read from the entries
 
   :returns: iterator over entry_class instances
 
@@ -94,6 +113,24 @@ def _parse_file(document_file: BinaryIO, validate: bool, entry_class: Type['stem
     if first_keyword in section_end_keywords:
       return
 
+  entry_kwargs = {} if fields is None else {'fields': fields}
+
+  if entry_class in (RouterStatusEntryV3, RouterStatusEntryMicroV3) and entry_keyword == 'r' and not validate and fields is None:
+    if end_position is not None:
+      section = document_file.read(max(0, end_position - document_file.tell()))
+
+      if section and not section.endswith(b'\n'):
+        section += document_file.readline()  # finish the line we ended within
+
+      lines = section.splitlines(True)
+    else:
+      lines = _read_until_keywords(section_end_keywords, document_file)
+
+    for entry in _parse_entries(lines, entry_class, extra_args[0] if extra_args else None):
+      yield entry
+
+    return
+
   while end_position is None or document_file.tell() < end_position:
     desc_lines, ending_keyword = _read_until_keywords_with_ending_keyword(
       (entry_keyword,) + section_end_keywords,
@@ -106,7 +143,7 @@ def _parse_file(document_file: BinaryIO, validate: bool, entry_class: Type['stem
     desc_content = bytes.join(b'', desc_lines)
 
     if desc_content:
-      yield entry_class(desc_content, validate, *extra_args)
+      yield entry_class(desc_content, validate, *extra_args, **entry_kwargs)
 
       # check if we stopped at the end of the section
       if ending_keyword in section_end_keywords:
@@ -115,6 +152,137 @@ def _parse_file(document_file: BinaryIO, validate: bool, entry_class: Type['stem
       break
 
 
+def _parse_entries(lines: List[bytes], entry_class: Type['stem.descriptor.router_status_entry.RouterStatusEntry'], document: Optional['stem.descriptor.networkstatus.NetworkStatusDocument']) -> Iterator['stem.descriptor.router_status_entry.RouterStatusEntry']:
+  """
+  Parses the router section of a v3 network status document. Rather than
+  tokenizing each entry and lazily parsing its lines when attributes are read,
+  this splits the section into entries and applies our line parsers in a
+  single pass.
+
+  Entries with content we wouldn't tokenize into the usual r/a/s/v/pr/w/p/m
+  lines (like unrecognized keywords or irregular whitespace) are constructed
+  normally instead, so either way entries are identical.
+
+  :param lines: lines of the router section
+  :param entry_class: class to construct instances for
+  :param document: document the entries are from
+
+  :returns: iterator over fully parsed entry_class instances
+  """
+
+  if not lines:
+    return
+
+  r_prefixes, r_match = _keyword_matcher(('r',))
+  starts = [0] + [i for i in range(1, len(lines)) if lines[i].startswith(r_prefixes) and r_match.match(lines[i])]
+
+  # decode the identities and digests of our 'r' lines together, so parsing
+  # each entry finds them in our cache (microdescriptor flavored 'r' lines
+  # lack a digest, so their fourth field is a publication date)
+
+  identities = []
+  include_digest = not issubclass(entry_class, RouterStatusEntryMicroV3)
+
+  for start in starts:
+    r_comp = lines[start].split(b' ', 4)
+
+    if r_comp[0] == b'r' and len(r_comp) > 3:
+      identities.append(stem.util.str_tools._to_unicode(r_comp[2]))
+
+      if include_digest:
+        identities.append(stem.util.str_tools._to_unicode(r_comp[3]))
+
+  _cache_fingerprints(identities)
+
+  for start, end in zip(starts, starts[1:] + [len(lines)]):
+    yield _parse_entry(b''.join(lines[start:end]), entry_class, document)
+
+
+def _parse_entry(content: bytes, entry_class: Type['stem.descriptor.router_status_entry.RouterStatusEntry'], document: Optional['stem.descriptor.networkstatus.NetworkStatusDocument']) -> 'stem.descriptor.router_status_entry.RouterStatusEntry':
+  """
+  Constructs a fully parsed router status entry, with the same attributes as
+  lazily loading each of them.
+  """
+
+  parser_for_line = entry_class.PARSER_FOR_LINE
+  values = {}  # type: Dict[str, List[str]]
+
+  for line in stem.util.str_tools._to_unicode(content).split('\n'):
+    if not line:
+      continue
+
+    keyword, _, value = line.partition(' ')
+
+    if keyword not in parser_for_line or value.startswith(' ') or '\t' in line:
+      return entry_class(content, False, document)  # type: ignore
+
+    values.setdefault(keyword, []).append(value)
+
+  entry = entry_class.__new__(entry_class)
+  Descriptor.__init__(entry, content, lazy_load = True)
+  entry.document = document
+
+  attributes = entry.__dict__
+
+  for keyword, keyword_values in values.items():
+    if keyword == 's':
+      attributes['flags'] = [] if keyword_values[0] == '' else keyword_values[0].split(' ')
+    elif keyword == 'p':
+      try:
+        attributes['exit_policy'] = _micro_exit_policy(keyword_values[0])
+      except ValueError:
+        pass  # provides our default
+    elif keyword == 'pr':
+      try:
+        attributes['protocols'] = collections.OrderedDict([(name, list(versions)) for name, versions in _protocols(keyword_values[0])])
+      except ValueError:
+        pass  # provides our default
+    else:
+      parser = parser_for_line[keyword]
+
+      try:
+        parser(entry, {keyword: [(value, None, None) for value in keyword_values]})
+      except (ValueError, KeyError):
+        # Like lazy loading, keep whatever the parser set and default the rest.
+
+        for name, (default, attr_parser) in entry_class.ATTRIBUTES.items():
+          if attr_parser == parser and name not in attributes:
+            attributes[name] = _copy(default)
+
+  for name, (default, _) in entry_class.ATTRIBUTES.items():
+    if name not in attributes:
+      attributes[name] = _copy(default)
+
+  entry._lazy_loading = False
+  return entry
+
+
+@functools.lru_cache(maxsize = 1024)
+def _micro_exit_policy(value: str) -> 'stem.exit_policy.MicroExitPolicy':
+  """
+  Provides the exit policy of a 'p' line. Relays share a small number of
+  policies, and exit policies are immutable, so we reuse them.
+  """
+
+  return stem.exit_policy.MicroExitPolicy(value)
+
+
+@functools.lru_cache(maxsize = 1024)
+def _protocols(value: str) -> Tuple[Tuple[str, Tuple[int, ...]], ...]:
+  """
+  Provides the protocols of a 'pr' line. These are mutable so we cache their
+  content, rather than the dictionary itself.
+  """
+
+  class Protocols(object):
+    pass
+
+  result = Protocols()
+  _parse_pr_line(result, {'pr': [(value, None, None)]})  # type: ignore
+
+  return tuple([(name, tuple(versions)) for name, versions in result.protocols.items()])  # type: ignore
+
+
 def _parse_r_line(descriptor: 'stem.descriptor.Descriptor', entries: ENTRY_TYPE) -> None:
   # Parses a RouterStatusEntry's 'r' line. They're very nearly identical for
   # all current entry types (v2, v3, and microdescriptor v3) with one little
@@ -367,6 +535,14 @@ def _base64_to_hex(identity: str, check_if_fingerprint: bool = True) -> str:
   :raises: **ValueError** if the result isn't a valid fingerprint
   """
 
+  if check_if_fingerprint:
+    with _FINGERPRINT_CACHE_LOCK:
+      fingerprint = _FINGERPRINT_CACHE.get(identity)
+
+      if fingerprint is not None:
+        _FINGERPRINT_CACHE.move_to_end(identity)
+        return fingerprint
+
   try:
     identity_decoded = stem.util.str_tools._decode_b64(stem.util.str_tools._to_bytes(identity))
   except (TypeError, binascii.Error):
@@ -379,9 +555,92 @@ def _base64_to_hex(identity: str, check_if_fingerprint: bool = True) -> str:
     if not stem.util.tor_tools.is_valid_fingerprint(fingerprint):
       raise ValueError("Decoded '%s' to be '%s', which isn't a valid fingerprint" % (identity, fingerprint))
 
+    _cache_fingerprints_for({identity: fingerprint})
+
   return fingerprint
 
 
+def _base64_to_hex_batch(identities: Sequence[str]) -> Dict[str, str]:
+  """
+  Decodes many base64 fingerprints to hex at once. This is equivalent to
+  calling :func:`~stem.descriptor.router_status_entry._base64_to_hex` for
+  each of them, but rather than decoding each identity we concatenate and
+  decode them together.
+
+  ::
+
+    >>> _base64_to_hex_batch(['p1aag7VwarGxqctS7/fS0y5FU+s', 'AAoQ1DAR6kkoo19hBAX5K0QztNw'])
+    {'p1aag7VwarGxqctS7/fS0y5FU+s': 'A7569A83B5706AB1B1A9CB52EFF7D2D32E4553EB', 'AAoQ1DAR6kkoo19hBAX5K0QztNw': '000A10D43011EA4928A35F610405F92B4433B4DC'}
+
+  :param identities: encoded fingerprints from the consensus
+
+  :returns: **dict** mapping identities to the uppercase hex encoding of
+    their fingerprint, this omits identities that aren't valid fingerprints
+  """
+
+  results = {}  # type: Dict[str, str]
+  unpadded, others = [], []  # type: List[str], List[str]
+
+  for identity in identities:
+    if len(identity) == 27:
+      unpadded.append(identity)
+    else:
+      others.append(identity)
+
+  # A fingerprint is twenty bytes, which is twenty seven base64 characters
+  # without padding. Appending a character gives each a whole number of base64
+  # blocks, so their concatenation decodes to fingerprints followed by a byte
+  # we discard.
+
+  if unpadded:
+    try:
+      decoded = binascii.hexlify(base64.b64decode(''.join([identity + 'A' for identity in unpadded]), validate = True)).upper().decode('ascii')
+
+      for i, identity in enumerate(unpadded):
+        results[identity] = decoded[i * 42:i * 42 + 40]
+    except (TypeError, ValueError):
+      others += unpadded  # something isn't base64, so decode them individually
+
+  for identity in others:
+    try:
+      results[identity] = _base64_to_hex(identity)
+    except ValueError:
+      pass
+
+  return results
+
+
+def _cache_fingerprints(identities: Sequence[str]) -> None:
+  """
+  Decodes the identities we haven't cached, so subsequent
+  :func:`~stem.descriptor.router_status_entry._base64_to_hex` calls for them
+  are cheap.
+
+  :param identities: encoded fingerprints from the consensus
+  """
+
+  with _FINGERPRINT_CACHE_LOCK:
+    uncached = [identity for identity in identities if identity not in _FINGERPRINT_CACHE]
+
+  _cache_fingerprints_for(_base64_to_hex_batch(uncached))
+
+
+def _cache_fingerprints_for(fingerprints: Mapping[str, str]) -> None:
+  """
+  Adds decoded fingerprints to our cache, evicting the least recently used
+  beyond our size.
+  """
+
+  with _FINGERPRINT_CACHE_LOCK:
+    _FINGERPRINT_CACHE.update(fingerprints)
+
+    for identity in fingerprints:
+      _FINGERPRINT_CACHE.move_to_end(identity)
+
+    while len(_FINGERPRINT_CACHE) > FINGERPRINT_CACHE_SIZE:
+      _FINGERPRINT_CACHE.popitem(last = False)
+
+
 class RouterStatusEntry(Descriptor):
   """
   Information about an individual router stored within a network status
@@ -444,21 +703,28 @@ class RouterStatusEntry(Descriptor):
     else:
       raise ValueError("Descriptor.from_str() expected a single descriptor, but had %i instead. Please include 'multiple = True' if you want a list of results instead." % len(results))
 
-  def __init__(self, content: bytes, validate: bool = False, document: Optional['stem.descriptor.networkstatus.NetworkStatusDocument'] = None) -> None:
+  def __init__(self, content: bytes, validate: bool = False, document: Optional['stem.descriptor.networkstatus.NetworkStatusDocument'] = None, fields: Optional[Sequence[str]] = None) -> None:
     """
     Parse a router descriptor in a network status document.
 
+    .. versionchanged:: 2.0.0
+       Added the fields argument.
+
     :param content: router descriptor content to be parsed
     :param validate: checks the validity of the content if **True**, skips
       these checks otherwise
     :param document: document this descriptor came from
+    :param fields: attributes we'll read, if set then other lines are skipped
+      until they're needed (this is ignored when validating)
 
-    :raises: **ValueError** if the descriptor data is invalid
+    :raises:
+      * **ValueError** if the descriptor data is invalid, or fields includes
+        something that isn't an attribute
     """
 
-    super(RouterStatusEntry, self).__init__(content, lazy_load = not validate)
+    super(RouterStatusEntry, self).__init__(content, lazy_load = not validate, fields = fields)
     self.document = document
-    entries = _descriptor_components(content, validate)
+    entries = self._tokenize(validate, self._keywords)
 
     if validate:
       for keyword in self._required_fields():
@@ -623,6 +889,30 @@ class RouterStatusEntryV3(RouterStatusEntry):
     return ('r', 's', 'v', 'w', 'p', 'pr')
 
 
+class CompactRouterStatusEntryV3(_CompactDescriptor, RouterStatusEntryV3):
+  """
+  Router status entry that uses less memory, for holding many of them at
+  once. Attributes are kept in slots rather than a dictionary, parsed when
+  we're constructed, and strings that repeat between entries (like flags and
+  versions) are shared.
+
+  .. versionadded:: 2.0.0
+
+  :param content: router descriptor content to be parsed
+  :param validate: checks the validity of the content if **True**, skips
+    these checks otherwise
+  :param document: document this descriptor came from
+  :param free_entries: discards our tokenized content once it's parsed if
+    **True**, keeps it otherwise
+  """
+
+  __slots__ = _compact_slots(RouterStatusEntryV3, ('document',))
+
+  def __init__(self, content: bytes, validate: bool = False, document: Optional['stem.descriptor.networkstatus.NetworkStatusDocument'] = None, free_entries: bool = True) -> None:
+    super(CompactRouterStatusEntryV3, self).__init__(content, validate, document)
+    self._compact(free_entries)
+
+
 class RouterStatusEntryMicroV3(RouterStatusEntry):
   """
   Information about an individual router stored within a microdescriptor
@@ -20,7 +20,8 @@ etc). This information is provided from a few sources...
 
   ServerDescriptor - Tor server descriptor.
     |- RelayDescriptor - Server descriptor for a relay.
-    |  +- make_router_status_entry - Creates a router status entry for this descriptor.
+    |  |- make_router_status_entry - Creates a router status entry for this descriptor.
+    |  +- CompactRelayDescriptor - Relay descriptor that uses less memory.
     |
     |- BridgeDescriptor - Scrubbed server descriptor for a bridge.
     |  |- is_scrubbed - checks if our content has been properly scrubbed
@@ -61,7 +62,7 @@ import stem.version
 
 from stem.descriptor.certificate import Ed25519Certificate
 from stem.descriptor.router_status_entry import RouterStatusEntryV3
-from typing import Any, BinaryIO, Iterator, Optional, Mapping, Sequence, Tuple, Type, Union
+from typing import Any, BinaryIO, FrozenSet, Iterator, Optional, Mapping, Sequence, Tuple, Type, Union
 
 from stem.descriptor import (
   ENTRY_TYPE,
@@ -70,7 +71,10 @@ from stem.descriptor import (
   DigestHash,
   DigestEncoding,
   create_signing_key,
+  _CompactDescriptor,
+  _compact_slots,
   _descriptor_content,
+  _from_store,
   _descriptor_components_with_extra,
   _read_until_keywords,
   _bytes_for_block,
@@ -145,7 +149,7 @@ def _truncated_b64encode(content: bytes) -> str:
   return stem.util.str_tools._to_unicode(base64.b64encode(content).rstrip(b'='))
 
 
-def _parse_file(descriptor_file: BinaryIO, is_bridge: bool = False, validate: bool = False, **kwargs: Any) -> Iterator['stem.descriptor.server_descriptor.ServerDescriptor']:
+def _parse_file(descriptor_file: BinaryIO, is_bridge: bool = False, validate: bool = False, fields: Optional[Sequence[str]] = None, store: Optional['stem.descriptor.store.DescriptorStore'] = None, **kwargs: Any) -> Iterator['stem.descriptor.server_descriptor.ServerDescriptor']:
   """
   Iterates over the server descriptors in a file.
 
@@ -153,6 +157,8 @@ def _parse_file(descriptor_file: BinaryIO, is_bridge: bool = False, validate: bo
   :param is_bridge: parses the file as being a bridge descriptor
   :param validate: checks the validity of the descriptor's content if
     **True**, skips these checks otherwise
+  :param fields: attributes we'll read from the descriptors
+  :param store: store to provide relay descriptors we've seen before
   :param kwargs: additional arguments for the descriptor constructor
 
   :returns: iterator for ServerDescriptor instances in the file
@@ -218,9 +224,12 @@ def _parse_file(descriptor_file: BinaryIO, is_bridge: bool = False, validate: bo
         if kwargs:
           raise ValueError('BUG: keyword arguments unused by bridge descriptors')
 
-        yield BridgeDescriptor(descriptor_text, validate)
+        yield BridgeDescriptor(descriptor_text, validate, fields = fields)
       else:
-        yield RelayDescriptor(descriptor_text, validate, **kwargs)
+        desc = _from_store(store, RelayDescriptor, descriptor_text, validate, fields = fields, **kwargs)
+
+        if desc is not None:
+          yield desc
     else:
       break  # done parsing descriptors
 
@@ -581,7 +590,7 @@ class ServerDescriptor(Descriptor):
     'eventdns': _parse_eventdns_line,
   }
 
-  def __init__(self, raw_contents: bytes, validate: bool = False) -> None:
+  def __init__(self, raw_contents: bytes, validate: bool = False, fields: Optional[Sequence[str]] = None) -> None:
     """
     Server descriptor constructor, created from an individual relay's
     descriptor content (as provided by 'GETINFO desc/*', cached descriptors,
@@ -591,14 +600,21 @@ class ServerDescriptor(Descriptor):
     validation can be disables to either improve performance or be accepting of
     malformed data.
 
+    .. versionchanged:: 2.0.0
+       Added the fields argument.
+
     :param raw_contents: descriptor content provided by the relay
     :param validate: checks the validity of the descriptor's content if
       **True**, skips these checks otherwise
+    :param fields: attributes we'll read, if set then other lines are skipped
+      until they're needed (this is ignored when validating)
 
-    :raises: **ValueError** if the contents is malformed and validate is True
+    :raises:
+      * **ValueError** if the contents is malformed and validate is True, or
+        fields includes something that isn't an attribute
     """
 
-    super(ServerDescriptor, self).__init__(raw_contents, lazy_load = not validate)
+    super(ServerDescriptor, self).__init__(raw_contents, lazy_load = not validate, fields = fields)
 
     # A descriptor contains a series of 'keyword lines' which are simply a
     # keyword followed by an optional value. Lines can also be followed by a
@@ -608,7 +624,7 @@ class ServerDescriptor(Descriptor):
     # influences the resulting exit policy, but for everything else the order
     # does not matter so breaking it into key / value pairs.
 
-    entries, self._unparsed_exit_policy = _descriptor_components_with_extra(raw_contents, validate, extra_keywords = ('accept', 'reject'), non_ascii_fields = ('contact', 'platform'))
+    entries = self._tokenize(validate, self._keywords)
 
     if validate:
       self._parse(entries, validate)
@@ -626,6 +642,15 @@ class ServerDescriptor(Descriptor):
     else:
       self._entries = entries
 
+  def _tokenize(self, validate: bool, keywords: Optional[FrozenSet[str]] = None) -> ENTRY_TYPE:
+    # exit policies are parsed from the 'accept' and 'reject' lines in order
+
+    if keywords is not None and 'exit_policy' in self._fields:
+      keywords = keywords.union(('accept', 'reject'))
+
+    entries, self._unparsed_exit_policy = _descriptor_components_with_extra(self._raw_contents, validate, extra_keywords = ('accept', 'reject'), non_ascii_fields = ('contact', 'platform'), keywords = keywords)
+    return entries
+
   def digest(self, hash_type: 'stem.descriptor.DigestHash' = DigestHash.SHA1, encoding: 'stem.descriptor.DigestEncoding' = DigestEncoding.HEX) -> Union[str, 'hashlib._HASH']:  # type: ignore
     """
     Digest of this descriptor's content. These are referenced by...
@@ -758,8 +783,8 @@ class RelayDescriptor(ServerDescriptor):
     'router-signature': _parse_router_signature_line,
   })
 
-  def __init__(self, raw_contents: bytes, validate: bool = False, skip_crypto_validation: bool = False) -> None:
-    super(RelayDescriptor, self).__init__(raw_contents, validate)
+  def __init__(self, raw_contents: bytes, validate: bool = False, skip_crypto_validation: bool = False, fields: Optional[Sequence[str]] = None) -> None:
+    super(RelayDescriptor, self).__init__(raw_contents, validate, fields)
 
     if validate:
       if not skip_crypto_validation:
@@ -856,12 +881,8 @@ class RelayDescriptor(ServerDescriptor):
     :raises: ValueError if the digest cannot be calculated
     """
 
-    content = self._content_range(start = 'router', end = '\nrouter-signature\n')
-
-    if hash_type == DigestHash.SHA1:
-      return stem.descriptor._encode_digest(hashlib.sha1(content), encoding)
-    elif hash_type == DigestHash.SHA256:
-      return stem.descriptor._encode_digest(hashlib.sha256(content), encoding)
+    if hash_type in (DigestHash.SHA1, DigestHash.SHA256):
+      return self._cached_digest(hash_type, encoding, lambda: self._content_range(start = 'router', end = '\nrouter-signature\n'))
     else:
       raise NotImplementedError('Server descriptor digests are only available in sha1 and sha256, not %s' % hash_type)
 
@@ -928,6 +949,30 @@ class RelayDescriptor(ServerDescriptor):
         raise ValueError("Descriptor must have a 'router-sig-ed25519' when identity-ed25519 is present")
 
 
+class CompactRelayDescriptor(_CompactDescriptor, RelayDescriptor):
+  """
+  Relay descriptor that uses less memory, for holding many of them at once.
+  Attributes are kept in slots rather than a dictionary, parsed when we're
+  constructed, and strings that repeat between descriptors (like platforms
+  and contact information) are shared.
+
+  .. versionadded:: 2.0.0
+
+  :param raw_contents: descriptor content provided by the relay
+  :param validate: checks the validity of the descriptor's content if
+    **True**, skips these checks otherwise
+  :param skip_crypto_validation: validates signature if **False**
+  :param free_entries: discards our tokenized content once it's parsed if
+    **True**, keeps it otherwise
+  """
+
+  __slots__ = _compact_slots(RelayDescriptor, ('_unparsed_exit_policy',))
+
+  def __init__(self, raw_contents: bytes, validate: bool = False, skip_crypto_validation: bool = False, free_entries: bool = True) -> None:
+    super(CompactRelayDescriptor, self).__init__(raw_contents, validate, skip_crypto_validation)
+    self._compact(free_entries)
+
+
 class BridgeDescriptor(ServerDescriptor):
   """
   Bridge descriptor (`bridge descriptor specification
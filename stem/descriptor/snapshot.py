@@ -0,0 +1,456 @@
+# Copyright 2020, Damian Johnson and The Tor Project
+# See LICENSE for licensing information
+
+"""
+Compact binary snapshots of parsed descriptors. Reading descriptors from their
+plaintext is slow, so if you'll be reading the same consensus or archive
+repeatedly you can save its descriptors to a snapshot instead...
+
+::
+
+  import stem.descriptor
+  import stem.descriptor.snapshot
+
+  descriptors = stem.descriptor.parse_file('/home/atagar/.tor/cached-descriptors')
+  stem.descriptor.snapshot.save(descriptors, '/tmp/descriptors.snapshot')
+
+  with stem.descriptor.snapshot.Snapshot('/tmp/descriptors.snapshot') as snapshot:
+    print('%i descriptors' % len(snapshot))
+    print(snapshot.get('9695DFC35FFEB861329B9F1AB04C46397020CE31').nickname)
+
+Snapshots are memory mapped, so opening one is nearly instant regardless of
+its size. Commonly used fields are kept within fixed size records that can be
+read without parsing, and each descriptor's raw content is retained so it can
+be fully parsed (or validated) on demand.
+
+Snapshots can contain any one of the following...
+
+  * :class:`~stem.descriptor.server_descriptor.RelayDescriptor`
+  * :class:`~stem.descriptor.microdescriptor.Microdescriptor`
+  * :class:`~stem.descriptor.router_status_entry.RouterStatusEntryV3`
+  * :class:`~stem.descriptor.router_status_entry.RouterStatusEntryMicroV3`
+  * :class:`~stem.descriptor.networkstatus.NetworkStatusDocumentV3`, which is
+    saved as its router status entries along with the rest of the document
+
+::
+
+  save - saves descriptors as a snapshot
+
+  Snapshot - Memory mapped snapshot of descriptors
+    |- document - network status document the entries belong to
+    |- record - fields of a descriptor, without parsing it
+    |- raw - raw content of a descriptor
+    |- get - descriptor with a given fingerprint or digest
+    +- close - closes the snapshot
+
+  Record - Fields of a descriptor within a snapshot
+
+.. versionadded:: 2.0.0
+"""
+
+import base64
+import binascii
+import bisect
+import calendar
+import collections
+import datetime
+import mmap
+import os
+import re
+import struct
+
+import stem.descriptor
+import stem.descriptor.microdescriptor
+import stem.descriptor.networkstatus
+import stem.descriptor.router_status_entry
+import stem.descriptor.server_descriptor
+import stem.util.str_tools
+
+from stem.descriptor import DigestHash, DigestEncoding
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+MAGIC = b'STEMSNAP'
+VERSION = 1  # version of our format, bump this if you change the following
+
+# Snapshots consist of...
+#
+#   * header
+#   * fixed size record for each descriptor
+#   * keys (fingerprints or digests) sorted for binary search
+#   * string table with nicknames, addresses, and flags
+#   * raw descriptor content
+#   * network status document without its router status entries, if the
+#     snapshot was of a document
+
+HEADER = struct.Struct('<8sHHIQQQ')  # magic, version, type, record count, string table size, content size, document size
+RECORD = struct.Struct('<32sqIHIHIHHHqQI')  # key, published, nickname, address, flags, or_port, dir_port, bandwidth, content
+KEY = struct.Struct('<32sI')  # key, record index
+
+NO_TIMESTAMP = -2 ** 63  # published value for descriptors without a timestamp
+NO_PORT = 0
+NO_BANDWIDTH = -1
+
+DESCRIPTOR_TYPES = {
+  1: stem.descriptor.server_descriptor.RelayDescriptor,
+  2: stem.descriptor.microdescriptor.Microdescriptor,
+  3: stem.descriptor.router_status_entry.RouterStatusEntryV3,
+  4: stem.descriptor.router_status_entry.RouterStatusEntryMicroV3,
+}
+
+ROUTERS_START = re.compile(b'^r ', re.MULTILINE)
+FOOTER_START = re.compile(b'^directory-footer', re.MULTILINE)
+
+
+class Record(collections.namedtuple('Record', ['index', 'identifier', 'nickname', 'address', 'or_port', 'dir_port', 'published', 'bandwidth', 'flags'])):
+  """
+  Fields of a descriptor within a snapshot, read without parsing it.
+
+  :var int index: position of the descriptor within the snapshot
+  :var str identifier: hex fingerprint of relays, or base64 sha256 digest of
+    microdescriptors
+  :var str nickname: relay's nickname, **None** for microdescriptors
+  :var str address: relay's IPv4 address, **None** for microdescriptors
+  :var int or_port: relay's ORPort, **None** for microdescriptors
+  :var int dir_port: relay's DirPort, **None** if it doesn't have one
+  :var datetime published: publication time, **None** for microdescriptors
+  :var int bandwidth: router status entry's bandwidth weight or server
+    descriptor's observed bandwidth, **None** if unavailable
+  :var tuple flags: router status entry's flags
+  """
+
+
+def save(descriptors: Union[Iterable[stem.descriptor.Descriptor], 'stem.descriptor.networkstatus.NetworkStatusDocumentV3'], path: str) -> None:
+  """
+  Saves descriptors as a snapshot.
+
+  :param descriptors: descriptors of a single type, or a network status
+    document with its router status entries
+  :param path: location to save the snapshot to
+
+  :raises:
+    * **TypeError** if we're unable to save this type of descriptor, or
+      there's a mixture of types
+    * **OSError** if unable to write to the path
+  """
+
+  document = b''
+
+  if isinstance(descriptors, stem.descriptor.networkstatus.NetworkStatusDocumentV3):
+    document = _bare_document(descriptors.get_bytes())
+    descriptors = list(descriptors.routers.values())
+
+  type_codes = dict((desc_type, code) for code, desc_type in DESCRIPTOR_TYPES.items())
+  type_code = None
+  strings = _StringTable()
+  records, keys, content = [], [], []  # type: List[bytes], List[Tuple[bytes, int]], List[bytes]
+  content_size = 0
+
+  for desc in descriptors:
+    desc_code = type_codes.get(type(desc))
+
+    if desc_code is None:
+      raise TypeError('Snapshots cannot contain %s' % type(desc).__name__)
+    elif type_code is not None and type_code != desc_code:
+      raise TypeError('Snapshots can only contain a single descriptor type, but had both %s and %s' % (DESCRIPTOR_TYPES[type_code].__name__, type(desc).__name__))
+
+    type_code = desc_code
+    raw_content = desc.get_bytes()
+    key = _key(desc)
+
+    records.append(RECORD.pack(
+      key,
+      calendar.timegm(desc.published.utctimetuple()) if getattr(desc, 'published', None) else NO_TIMESTAMP,
+      *strings.add(getattr(desc, 'nickname', None)),
+      *strings.add(getattr(desc, 'address', None)),
+      *strings.add(' '.join(getattr(desc, 'flags', None) or [])),
+      getattr(desc, 'or_port', None) or NO_PORT,
+      getattr(desc, 'dir_port', None) or NO_PORT,
+      _bandwidth(desc),
+      content_size,
+      len(raw_content),
+    ))
+
+    keys.append((key, len(records) - 1))
+    content.append(raw_content)
+    content_size += len(raw_content)
+
+  if type_code is None:
+    type_code = 3 if document else 0  # documents without any entries
+
+  string_table = strings.pack()
+  tmp_path = path + '.new'
+
+  with open(tmp_path, 'wb') as snapshot_file:
+    snapshot_file.write(HEADER.pack(MAGIC, VERSION, type_code, len(records), len(string_table), content_size, len(document)))
+    snapshot_file.write(b''.join(records))
+    snapshot_file.write(b''.join([KEY.pack(key, index) for key, index in sorted(keys)]))
+    snapshot_file.write(string_table)
+
+    for raw_content in content:
+      snapshot_file.write(raw_content)
+
+    snapshot_file.write(document)
+
+  os.replace(tmp_path, path)
+
+
+class Snapshot(object):
+  """
+  Memory mapped snapshot of descriptors. This is a read-only sequence, so
+  descriptors can be iterated over or accessed by their index. Descriptors
+  are constructed on demand and lazily parsed, so only what you use is read.
+
+  :var str path: location of the snapshot
+  :var class descriptor_type: class of the descriptors within this snapshot
+
+  :param path: location of the snapshot
+
+  :raises:
+    * **ValueError** if the file isn't a snapshot, or is from an
+      unsupported version
+    * **OSError** if unable to read the path
+  """
+
+  def __init__(self, path: str) -> None:
+    self.path = path
+
+    with open(path, 'rb') as snapshot_file:
+      self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    try:
+      magic, version, type_code, count, strings_size, content_size, document_size = HEADER.unpack_from(self._mmap, 0)
+    except struct.error:
+      self._mmap.close()
+      raise ValueError("%s isn't a descriptor snapshot" % path)
+
+    if magic != MAGIC:
+      self._mmap.close()
+      raise ValueError("%s isn't a descriptor snapshot" % path)
+    elif version != VERSION:
+      self._mmap.close()
+      raise ValueError('%s is snapshot version %i, but we only support version %i' % (path, version, VERSION))
+
+    self.descriptor_type = DESCRIPTOR_TYPES.get(type_code)  # type: Optional[Type[stem.descriptor.Descriptor]]
+
+    self._count = count
+    self._records_offset = HEADER.size
+    self._keys_offset = self._records_offset + count * RECORD.size
+    self._strings_offset = self._keys_offset + count * KEY.size
+    self._content_offset = self._strings_offset + strings_size
+    self._document_offset = self._content_offset + content_size
+    self._document_size = document_size
+    self._document = None  # type: Optional[stem.descriptor.networkstatus.NetworkStatusDocumentV3]
+
+    if self._document_offset + document_size > len(self._mmap):
+      self._mmap.close()
+      raise ValueError('%s is truncated' % path)
+
+  def document(self) -> Optional['stem.descriptor.networkstatus.NetworkStatusDocumentV3']:
+    """
+    Provides the network status document our router status entries belong
+    to. This lacks its **routers**, which are the contents of this snapshot.
+
+    :returns: :class:`~stem.descriptor.networkstatus.NetworkStatusDocumentV3`
+      of our entries, **None** if this isn't a snapshot of a document
+    """
+
+    if self._document is None and self._document_size:
+      self._document = stem.descriptor.networkstatus.NetworkStatusDocumentV3(self._mmap[self._document_offset:self._document_offset + self._document_size])
+
+    return self._document
+
+  def record(self, index: int) -> 'stem.descriptor.snapshot.Record':
+    """
+    Provides the fields of a descriptor without parsing it.
+
+    :param index: position of the descriptor
+
+    :returns: :class:`~stem.descriptor.snapshot.Record` for the descriptor
+
+    :raises: **IndexError** if index is out of range
+    """
+
+    key, published, nickname_offset, nickname_size, address_offset, address_size, flags_offset, flags_size, or_port, dir_port, bandwidth, _, _ = RECORD.unpack_from(self._mmap, self._record_offset(index))
+
+    if self.descriptor_type == stem.descriptor.microdescriptor.Microdescriptor:
+      identifier = base64.b64encode(key).rstrip(b'=').decode('utf-8')
+    else:
+      identifier = binascii.hexlify(key[:20]).decode('utf-8').upper()
+
+    flags = self._string(flags_offset, flags_size)
+
+    return Record(
+      index = index % self._count,
+      identifier = identifier,
+      nickname = self._string(nickname_offset, nickname_size),
+      address = self._string(address_offset, address_size),
+      or_port = or_port if or_port != NO_PORT else None,
+      dir_port = dir_port if dir_port != NO_PORT else None,
+      published = datetime.datetime.utcfromtimestamp(published) if published != NO_TIMESTAMP else None,
+      bandwidth = bandwidth if bandwidth != NO_BANDWIDTH else None,
+      flags = tuple(flags.split(' ')) if flags else (),
+    )
+
+  def raw(self, index: int) -> bytes:
+    """
+    Provides the raw content of a descriptor.
+
+    :param index: position of the descriptor
+
+    :returns: **bytes** with the descriptor's content
+
+    :raises: **IndexError** if index is out of range
+    """
+
+    content_offset, content_size = RECORD.unpack_from(self._mmap, self._record_offset(index))[-2:]
+    start = self._content_offset + content_offset
+
+    return self._mmap[start:start + content_size]
+
+  def get(self, identifier: str, default: Any = None) -> Any:
+    """
+    Provides the descriptor with a given fingerprint or microdescriptor
+    digest.
+
+    :param identifier: hex relay fingerprint, or base64 sha256 digest of a
+      microdescriptor
+    :param default: response if we don't have this descriptor
+
+    :returns: :class:`~stem.descriptor.__init__.Descriptor` with the given
+      identifier, **default** if we don't have it
+    """
+
+    try:
+      if self.descriptor_type == stem.descriptor.microdescriptor.Microdescriptor:
+        key = base64.b64decode(stem.util.str_tools._to_bytes(identifier) + b'=' * (-len(identifier) % 4))
+      else:
+        key = binascii.unhexlify(stem.util.str_tools._to_bytes(identifier))
+    except (TypeError, ValueError, binascii.Error):
+      return default
+
+    key = key.ljust(32, b'\x00')
+    keys = _SortedKeys(self)
+    position = bisect.bisect_left(keys, key)
+
+    if position < len(keys) and keys[position] == key:
+      return self[KEY.unpack_from(self._mmap, self._keys_offset + position * KEY.size)[1]]
+
+    return default
+
+  def close(self) -> None:
+    """
+    Closes the snapshot. Descriptors we've provided remain usable.
+    """
+
+    self._mmap.close()
+
+  def _record_offset(self, index: int) -> int:
+    if index < 0:
+      index += self._count
+
+    if not 0 <= index < self._count:
+      raise IndexError('snapshot index out of range')
+
+    return self._records_offset + index * RECORD.size
+
+  def _string(self, offset: int, size: int) -> Optional[str]:
+    if not size:
+      return None
+
+    start = self._strings_offset + offset
+    return self._mmap[start:start + size].decode('utf-8')
+
+  def __getitem__(self, index: int) -> stem.descriptor.Descriptor:
+    if self.descriptor_type in (stem.descriptor.router_status_entry.RouterStatusEntryV3, stem.descriptor.router_status_entry.RouterStatusEntryMicroV3):
+      return self.descriptor_type(self.raw(index), False, self.document())
+
+    return self.descriptor_type(self.raw(index))
+
+  def __len__(self) -> int:
+    return self._count
+
+  def __iter__(self) -> Iterator[stem.descriptor.Descriptor]:
+    for i in range(self._count):
+      yield self[i]
+
+  def __enter__(self) -> 'stem.descriptor.snapshot.Snapshot':
+    return self
+
+  def __exit__(self, exit_type: Optional[Type[BaseException]], value: Optional[BaseException], traceback: Any) -> None:
+    self.close()
+
+
+class _SortedKeys(object):
+  """
+  Sequence of the sorted keys within a snapshot, so we can bisect them.
+  """
+
+  def __init__(self, snapshot: 'stem.descriptor.snapshot.Snapshot') -> None:
+    self._snapshot = snapshot
+
+  def __getitem__(self, index: int) -> bytes:
+    return KEY.unpack_from(self._snapshot._mmap, self._snapshot._keys_offset + index * KEY.size)[0]
+
+  def __len__(self) -> int:
+    return self._snapshot._count
+
+
+class _StringTable(object):
+  """
+  Deduplicated strings, which we reference by their (offset, size).
+  """
+
+  def __init__(self) -> None:
+    self._offsets = {}  # type: Dict[str, Tuple[int, int]]
+    self._content = []  # type: List[bytes]
+    self._size = 0
+
+  def add(self, value: Optional[str]) -> Tuple[int, int]:
+    if not value:
+      return (0, 0)
+    elif value not in self._offsets:
+      encoded = stem.util.str_tools._to_bytes(value)
+      self._offsets[value] = (self._size, len(encoded))
+      self._content.append(encoded)
+      self._size += len(encoded)
+
+    return self._offsets[value]
+
+  def pack(self) -> bytes:
+    return b''.join(self._content)
+
+
+def _key(desc: stem.descriptor.Descriptor) -> bytes:
+  """
+  Provides the 32 byte key we look descriptors up by.
+  """
+
+  if isinstance(desc, stem.descriptor.microdescriptor.Microdescriptor):
+    return desc.digest(DigestHash.SHA256, DigestEncoding.RAW).digest()
+  elif getattr(desc, 'fingerprint', None):
+    return binascii.unhexlify(desc.fingerprint).ljust(32, b'\x00')
+  else:
+    return b'\x00' * 32
+
+
+def _bandwidth(desc: stem.descriptor.Descriptor) -> int:
+  if isinstance(desc, stem.descriptor.server_descriptor.ServerDescriptor):
+    bandwidth = desc.observed_bandwidth
+  else:
+    bandwidth = getattr(desc, 'bandwidth', None)
+
+  return bandwidth if bandwidth is not None else NO_BANDWIDTH
+
+
+def _bare_document(content: bytes) -> bytes:
+  """
+  Provides a network status document without its router status entries.
+  """
+
+  routers_start = ROUTERS_START.search(content)
+  footer_start = FOOTER_START.search(content)
+
+  if not routers_start:
+    return content
+
+  return content[:routers_start.start()] + (content[footer_start.start():] if footer_start else b'')
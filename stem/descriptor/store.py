@@ -0,0 +1,236 @@
+# Copyright 2020, Damian Johnson and The Tor Project
+# See LICENSE for licensing information
+
+"""
+Deduplicating store of parsed descriptors. Tor's cached descriptor files and
+CollecTor's recent descriptors mostly consist of descriptors we've read
+before, so when ingesting them repeatedly a store lets us skip parsing
+anything we've already seen...
+
+::
+
+  import stem.descriptor
+  from stem.descriptor.store import DescriptorStore
+
+  with DescriptorStore(path = '/var/lib/crawler/descriptors.store') as store:
+    for desc in stem.descriptor.parse_file('/home/atagar/.tor/cached-descriptors', store = store):
+      print(desc.nickname)  # previously seen descriptors are provided from our store
+
+Descriptors are keyed by the digest their **digest()** method provides. This
+is calculated from the raw content we read, so a descriptor we've seen before
+is provided from our store without tokenizing or parsing it. Stores with
+**skip_seen** instead omit descriptors they've seen from
+:func:`~stem.descriptor.__init__.parse_file`, so only new descriptors are
+provided.
+
+Descriptors from a store are shallow copies. Their annotations (such as a
+microdescriptor's **@last-listed**) and path are those of the file we just
+read, rather than when they were first stored.
+
+Stores retain the **max_size** most recently used descriptors in memory. If
+given a **path** descriptors are also pickled into a sqlite database, so
+they're available after being evicted from memory or across runs. Pickles
+can execute arbitrary code when loaded, so only use databases you've written.
+
+Stores are consulted for relay server descriptors, extrainfo descriptors, and
+microdescriptors. Bridge descriptors are always parsed since their digest is
+read from their content.
+
+::
+
+  DescriptorStore - Bounded store of parsed descriptors
+    |- get - provides a descriptor with the given digest
+    |- add - adds a descriptor to the store
+    |- flush - writes pending additions to disk
+    +- close - closes our database
+
+.. versionadded:: 2.0.0
+"""
+
+import collections
+import pickle
+import threading
+
+import stem.descriptor
+
+from typing import Any, Dict, Optional, Tuple, Type
+
+DEFAULT_MAX_SIZE = 10000  # descriptors retained in memory
+COMMIT_INTERVAL = 1000  # additions we write to disk at a time
+
+STORE_SCHEMA_VERSION = 1  # version of our DescriptorStore schema, bump this if you change the following
+STORE_SCHEMA = (
+  'CREATE TABLE schema(version INTEGER)',
+  'INSERT INTO schema(version) VALUES (%i)' % STORE_SCHEMA_VERSION,
+
+  'CREATE TABLE descriptors(digest TEXT PRIMARY KEY, validated INTEGER, descriptor BLOB)',
+)
+
+
+class DescriptorStore(object):
+  """
+  Store of parsed descriptors, keyed by their digest. The least recently used
+  descriptors are evicted from memory when we have more than **max_size** of
+  them.
+
+  :var int max_size: maximum number of descriptors retained in memory
+  :var str path: location of our sqlite database, **None** if we're only
+    in memory
+  :var bool skip_seen: :func:`~stem.descriptor.__init__.parse_file` omits
+    descriptors we've seen if **True**, provides them from our store otherwise
+
+  :param max_size: maximum number of descriptors retained in memory
+  :param path: location of a sqlite database to persist descriptors in
+  :param skip_seen: omit descriptors we've seen from
+    :func:`~stem.descriptor.__init__.parse_file` rather than providing them
+
+  :raises:
+    * **ValueError** if the max_size isn't positive
+    * **ImportError** if a path is given and the sqlite3 module is unavailable
+    * **sqlite3.Error** if the database cannot be opened
+  """
+
+  def __init__(self, max_size: int = DEFAULT_MAX_SIZE, path: Optional[str] = None, skip_seen: bool = False) -> None:
+    if max_size < 1:
+      raise ValueError('Store size must be positive, but was %i' % max_size)
+
+    self.max_size = max_size
+    self.path = path
+    self.skip_seen = skip_seen
+
+    self._cache = collections.OrderedDict()  # type: Dict[str, Tuple[stem.descriptor.Descriptor, bool]]
+    self._lock = threading.RLock()
+    self._conn = None  # type: Optional[Any]
+    self._pending = 0  # additions we've yet to commit
+
+    if path:
+      try:
+        import sqlite3
+      except (ImportError, ModuleNotFoundError):
+        raise ImportError('Persisting a DescriptorStore requires the sqlite3 module')
+
+      self._conn = sqlite3.connect(path, check_same_thread = False)
+
+      try:
+        schema = self._conn.execute('SELECT version FROM schema').fetchone()[0]
+      except (sqlite3.OperationalError, TypeError):
+        schema = None  # new or incomplete database
+
+      if schema != STORE_SCHEMA_VERSION:
+        with self._conn:
+          for table in ('schema', 'descriptors'):
+            self._conn.execute('DROP TABLE IF EXISTS %s' % table)
+
+          for statement in STORE_SCHEMA:
+            self._conn.execute(statement)
+
+  def get(self, digest: str, validated: bool = False) -> Optional['stem.descriptor.Descriptor']:
+    """
+    Provides the descriptor with the given digest.
+
+    :param digest: digest provided by the descriptor's **digest()** method
+    :param validated: only provide the descriptor if it was validated when
+      parsed
+
+    :returns: :class:`~stem.descriptor.__init__.Descriptor` with the given
+      digest, **None** if we don't have it
+    """
+
+    with self._lock:
+      stored = self._cache.get(digest)
+
+      if stored is not None:
+        self._cache.move_to_end(digest)
+      elif self._conn is not None:
+        row = self._conn.execute('SELECT descriptor, validated FROM descriptors WHERE digest = ?', (digest,)).fetchone()
+
+        if row:
+          stored = (pickle.loads(row[0]), bool(row[1]))
+          self._remember(digest, stored)
+
+      if stored is None or (validated and not stored[1]):
+        return None
+
+      return stored[0]
+
+  def add(self, desc: 'stem.descriptor.Descriptor', validated: bool = False, digest: Optional[str] = None) -> None:
+    """
+    Adds a descriptor to our store, replacing any prior descriptor with its
+    digest.
+
+    :param desc: descriptor to be added
+    :param validated: **True** if the descriptor was validated when parsed,
+      **False** otherwise
+    :param digest: descriptor's digest, this is calculated if unset
+
+    :raises: **ValueError** if the descriptor's digest cannot be determined
+    """
+
+    if digest is None:
+      digest = desc.digest()  # type: ignore
+
+    with self._lock:
+      self._remember(digest, (desc, validated))
+
+      if self._conn is not None:
+        self._conn.execute('INSERT OR REPLACE INTO descriptors(digest, validated, descriptor) VALUES (?, ?, ?)', (digest, validated, pickle.dumps(desc)))
+        self._pending += 1
+
+        if self._pending >= COMMIT_INTERVAL:
+          self.flush()
+
+  def flush(self) -> None:
+    """
+    Writes descriptors we've added to our database. This is done periodically
+    and when we're closed.
+    """
+
+    with self._lock:
+      if self._conn is not None and self._pending:
+        self._conn.commit()
+        self._pending = 0
+
+  def close(self) -> None:
+    """
+    Writes pending additions and closes our database.
+    """
+
+    with self._lock:
+      if self._conn is not None:
+        self.flush()
+        self._conn.close()
+        self._conn = None
+
+  def _remember(self, digest: str, stored: Tuple['stem.descriptor.Descriptor', bool]) -> None:
+    """
+    Retains a descriptor in memory, evicting the least recently used
+    descriptors if we're beyond our size.
+    """
+
+    self._cache[digest] = stored
+    self._cache.move_to_end(digest)
+
+    while len(self._cache) > self.max_size:
+      self._cache.popitem(last = False)
+
+  def __contains__(self, digest: str) -> bool:
+    with self._lock:
+      if digest in self._cache:
+        return True
+      elif self._conn is not None:
+        return self._conn.execute('SELECT 1 FROM descriptors WHERE digest = ?', (digest,)).fetchone() is not None
+      else:
+        return False
+
+  def __len__(self) -> int:
+    with self._lock:
+      if self._conn is not None:
+        return self._conn.execute('SELECT COUNT(*) FROM descriptors').fetchone()[0]
+      else:
+        return len(self._cache)
+
+  def __enter__(self) -> 'stem.descriptor.store.DescriptorStore':
+    return self
+
+  def __exit__(self, exit_type: Optional[Type[BaseException]], value: Optional[BaseException], traceback: Any) -> None:
+    self.close()
@@ -101,6 +101,10 @@ ERROR_MSG = 'Error while receiving a control message (%s): %s'
 
 TRUNCATE_LOGS = 10
 
+# maximum bytes we read from an ORPort at a time
+
+RELAY_READ_SIZE = 65536
+
 
 class BaseSocket(object):
   """
@@ -366,10 +370,10 @@ class RelaySocket(BaseSocket):
 
     async def wrapped_recv(reader: asyncio.StreamReader) -> Optional[bytes]:
       if timeout is None:
-        return await reader.read(1024)
+        return await reader.read(RELAY_READ_SIZE)
       else:
         try:
-          return await asyncio.wait_for(reader.read(1024), max(timeout, 0.0001))
+          return await asyncio.wait_for(reader.read(RELAY_READ_SIZE), max(timeout, 0.0001))
         except asyncio.TimeoutError:
           return None
 
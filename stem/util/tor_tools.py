@@ -16,16 +16,18 @@ Miscellaneous utility functions for working with tor.
   is_valid_stream_id - checks if a string is a valid tor stream id
   is_valid_connection_id - checks if a string is a valid tor connection id
   is_valid_hidden_service_address - checks if a string is a valid hidden service address
+  validate_hidden_service_addresses - checks many v3 hidden service addresses at once
   is_hex_digits - checks if a string is only made up of hex digits
 """
 
 import base64
+import functools
 import hashlib
 import re
 
 import stem.util.str_tools
 
-from typing import Optional, Sequence, Union
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 
 # The control-spec defines the following as...
 #
@@ -48,6 +50,11 @@ CIRC_ID_PATTERN = re.compile('^[a-zA-Z0-9]{1,16}$')
 HS_V2_ADDRESS_PATTERN = re.compile('^[a-z2-7]{16}$')
 HS_V3_ADDRESS_PATTERN = re.compile('^[a-z2-7]{56}$')
 
+# Number of decoded v3 hidden service addresses we retain. Each entry is
+# roughly a hundred and fifty bytes, so this caps us at a few dozen megabytes.
+
+HS_V3_ADDRESS_CACHE_SIZE = 262144
+
 
 def is_valid_fingerprint(entry: str, check_prefix: bool = False) -> bool:
   """
@@ -169,19 +176,17 @@ def is_valid_hidden_service_address(entry: str, version: Optional[Union[int, Seq
     if 2 in version and bool(HS_V2_ADDRESS_PATTERN.match(entry)):
       return True
 
-    if 3 in version and bool(HS_V3_ADDRESS_PATTERN.match(entry)):
-      # onion_address = base32(PUBKEY | CHECKSUM | VERSION) + ".onion"
+    if 3 in version:
+      decoded = _decode_hs_v3_address(entry)
+
+      if decoded is None:
+        return False
 
-      decoded = base64.b32decode(entry.upper())
-      pubkey, checksum, addr_version = decoded[:32], decoded[32:34], decoded[34:]
+      pubkey, addr_version, checksum, expected_checksum = decoded
 
       if addr_version != b'\x03':
         return False  # VERSION component must be three
 
-      # CHECKSUM = H(".onion checksum" | PUBKEY | VERSION)[:2]
-
-      expected_checksum = hashlib.sha3_256(b'.onion checksum' + pubkey + addr_version).digest()[:2]
-
       return checksum == expected_checksum
 
     return False
@@ -189,6 +194,79 @@ def is_valid_hidden_service_address(entry: str, version: Optional[Union[int, Seq
     return False
 
 
+def validate_hidden_service_addresses(entries: Iterable[str]) -> List[Tuple[Optional[bytes], bool]]:
+  """
+  Checks a series of version 3 hidden service addresses, providing the
+  identity key and checksum validity of each. Addresses may optionally
+  include the '.onion' suffix. This is considerably cheaper than calling
+  :func:`~stem.util.tor_tools.is_valid_hidden_service_address` for each
+  address since repeated addresses are only decoded once.
+
+  .. versionadded:: 2.0.0
+
+  :param entries: hidden service addresses to check
+
+  :returns: **list** with a (identity_key, is_valid) tuple for each address,
+    the identity key is **None** if the address is malformed
+  """
+
+  decode = _decode_hs_v3_address
+  results = {}  # type: dict
+  checked = []
+
+  for entry in entries:
+    result = results.get(entry)
+
+    if result is None:
+      address = stem.util.str_tools._to_unicode(entry) if isinstance(entry, bytes) else entry
+
+      if isinstance(address, str) and address.endswith('.onion'):
+        address = address[:-6]
+
+      try:
+        decoded = decode(address)
+      except TypeError:
+        decoded = None
+
+      if decoded is None:
+        result = (None, False)
+      else:
+        pubkey, addr_version, checksum, expected_checksum = decoded
+        result = (pubkey, addr_version == b'\x03' and checksum == expected_checksum)
+
+      results[entry] = result
+
+    checked.append(result)
+
+  return checked
+
+
+@functools.lru_cache(maxsize = HS_V3_ADDRESS_CACHE_SIZE)
+def _decode_hs_v3_address(entry: str) -> Optional[Tuple[bytes, bytes, bytes, bytes]]:
+  """
+  Decodes a version 3 hidden service address (without its '.onion' suffix).
+  Results are cached since callers such as onion directories check the same
+  addresses repeatedly.
+
+  :param entry: hidden service address to decode
+
+  :returns: **tuple** of the form (pubkey, version, checksum, expected_checksum),
+    or **None** if the address isn't properly formatted
+  """
+
+  if not HS_V3_ADDRESS_PATTERN.match(entry):
+    return None
+
+  # onion_address = base32(PUBKEY | CHECKSUM | VERSION) + ".onion"
+  # CHECKSUM = H(".onion checksum" | PUBKEY | VERSION)[:2]
+
+  decoded = base64.b32decode(entry.upper())
+  pubkey, checksum, addr_version = decoded[:32], decoded[32:34], decoded[34:]
+  expected_checksum = hashlib.sha3_256(b'.onion checksum' + pubkey + addr_version).digest()[:2]
+
+  return pubkey, addr_version, checksum, expected_checksum
+
+
 def is_hex_digits(entry: str, count: int) -> bool:
   """
   Checks if a string is the given number of hex digits. Digits represented by
@@ -9,6 +9,7 @@ __all__ = [
   'cell',
   'certificate',
   'kdf',
+  'relay',
   'size',
 ]
 
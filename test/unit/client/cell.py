@@ -7,7 +7,10 @@ import hashlib
 import os
 import unittest
 
-from stem.client.datatype import ZERO, CertType, CloseReason, Address, Certificate
+import stem
+import test.require
+
+from stem.client.datatype import ZERO, KDF, LinkProtocol, CertType, CloseReason, Address, Certificate
 from test.unit.client import test_data
 
 from stem.client.cell import (
@@ -228,6 +231,34 @@ class TestCell(unittest.TestCase):
 
     self.assertRaisesWith(ValueError, 'RELAY cell said it had 65535 bytes of data, but only had 498', Cell.pop, mismatched_data_length_bytes, 2)
 
+  @test.require.cryptography
+  def test_relay_cell_encryption(self):
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+    kdf = KDF.from_value(b'\x01' * 40)
+    ctr = modes.CTR(ZERO * (algorithms.AES.block_size // 8))
+    link_protocol = LinkProtocol(5)
+
+    encryptor = Cipher(algorithms.AES(kdf.forward_key), ctr).encryptor()
+    decryptor = Cipher(algorithms.AES(kdf.forward_key), ctr).decryptor()
+    encrypt_digest = hashlib.sha1(kdf.forward_digest)
+    decrypt_digest = hashlib.sha1(kdf.forward_digest)
+
+    # keys are updated in place, so successive cells each decrypt
+
+    for i in range(3):
+      cell = RelayCell(0x80000000, 'RELAY_DATA', 'message %i' % i, stream_id = 5)
+      encrypted, encryptor, encrypt_digest = cell.encrypt(link_protocol, encryptor, encrypt_digest)
+      self.assertEqual(link_protocol.fixed_cell_length, len(encrypted))
+
+      decrypted, decryptor, decrypt_digest = RelayCell.decrypt(link_protocol, encrypted, decryptor, decrypt_digest)
+      self.assertEqual(0x80000000, decrypted.circ_id)
+      self.assertEqual(5, decrypted.stream_id)
+      self.assertEqual(b'message %i' % i, decrypted.data)
+
+    self.assertRaisesWith(stem.ProtocolError, 'RELAY cells should be 514 bytes, but received 12', RelayCell.decrypt, link_protocol, b'\x00' * 12, decryptor, decrypt_digest)
+    self.assertRaisesWith(stem.ProtocolError, 'Cannot decrypt as a RELAY cell. This had command 4 instead.', RelayCell.decrypt, link_protocol, DestroyCell(0x80000000).pack(link_protocol), decryptor, decrypt_digest)
+
   def test_destroy_cell(self):
     for cell_bytes, (circ_id, reason, reason_int, unused, link_protocol) in DESTROY_CELLS.items():
       if not unused.strip(ZERO):
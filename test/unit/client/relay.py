@@ -0,0 +1,484 @@
+"""
+Unit tests for the stem.client.Relay class and its helpers.
+"""
+
+import asyncio
+import hashlib
+import unittest
+
+import stem
+import stem.client
+
+from unittest.mock import patch, Mock
+
+from stem.client.cell import AuthChallengeCell, CertsCell, DestroyCell, NetinfoCell, PaddingCell, RelayCell, VersionsCell, VPaddingCell
+from stem.client.datatype import Address, Certificate, LinkProtocol, RelayCommand
+from stem.util.test_tools import coro_func_returning_value
+
+LINK_PROTOCOL = LinkProtocol(5)
+
+
+class FakeORPort(object):
+  """
+  Socket that provides the given content, then reports that it's closed.
+  """
+
+  def __init__(self, *content):
+    self.content = list(content)
+
+  async def recv(self, timeout = None):
+    await asyncio.sleep(0)
+    return self.content.pop(0) if self.content else b''
+
+  def is_alive(self):
+    return bool(self.content)
+
+  async def close(self):
+    pass
+
+
+class HandshakeORPort(FakeORPort):
+  """
+  Socket that we can establish a connection through.
+  """
+
+  def __init__(self, *content):
+    super(HandshakeORPort, self).__init__(*content)
+    self.sent = []
+
+  async def connect(self):
+    pass
+
+  async def send(self, data):
+    self.sent.append(data)
+
+
+class BlockingORPort(FakeORPort):
+  """
+  Socket that never provides any content until it's closed.
+  """
+
+  def __init__(self):
+    self.closed = asyncio.Event()
+
+  async def recv(self, timeout = None):
+    await self.closed.wait()
+    return b''
+
+  def is_alive(self):
+    return not self.closed.is_set()
+
+  async def close(self):
+    self.closed.set()
+
+
+class SlowORPort(FakeORPort):
+  """
+  Socket that takes a moment to send, optionally failing.
+  """
+
+  def __init__(self, error = None):
+    super(SlowORPort, self).__init__()
+    self.error = error
+    self.sent = []
+
+  async def send(self, data):
+    await asyncio.sleep(0.01)
+
+    if self.error:
+      raise self.error
+
+    self.sent.append(data)
+
+
+class FakeKey(object):
+  """
+  Stand-in for a cipher context, which leaves content unchanged.
+  """
+
+  def update(self, data):
+    return data
+
+
+def fake_circuit(relay):
+  """
+  Circuit with fake keys, since constructing one requires cryptography.
+  """
+
+  circuit = stem.client.Circuit.__new__(stem.client.Circuit)
+  circuit.relay = relay
+  circuit.id = 0x80000000
+  circuit.forward_digest = hashlib.sha1(b'forward')
+  circuit.backward_digest = hashlib.sha1(b'backward')
+  circuit.forward_key = FakeKey()
+  circuit.backward_key = FakeKey()
+  circuit._streams = {}
+  circuit._last_stream_id = 0
+  circuit._error = None
+
+  return circuit
+
+
+class FakeCircuitHandler(object):
+  """
+  Records the cells our relay's demultiplexer provides a circuit.
+  """
+
+  def __init__(self):
+    self.delivered = []
+    self.failure = None
+
+  def _deliver(self, content):
+    self.delivered.append(content)
+
+  def _fail(self, exc):
+    self.failure = exc
+
+
+class FakeCircuit(object):
+  def __init__(self, relay):
+    self.relay = relay
+    self.stream_ids = []
+    self._error = None
+
+  async def directory(self, request, stream_id = 0):
+    if request == 'fail':
+      self._error = stem.ProtocolError('malformed response')
+      raise self._error
+    elif request == 'slow':
+      await asyncio.sleep(10)
+
+    self.stream_ids.append(stream_id)
+    return b'response to ' + request.encode('utf-8')
+
+  async def close(self):
+    pass
+
+
+class FakeRelay(object):
+  def __init__(self):
+    self.closed = False
+    self.circuits = []
+
+  async def create_circuit(self):
+    self.circuits.append(FakeCircuit(self))
+    return self.circuits[-1]
+
+  def is_alive(self):
+    return not self.closed
+
+  async def close(self):
+    self.closed = True
+
+
+class TestRelay(unittest.TestCase):
+  def test_recv_cells(self):
+    """
+    Read fixed and variable sized cells, including ones that span reads or
+    arrive many at a time.
+    """
+
+    cells = [
+      RelayCell(0x80000000, RelayCommand.DATA, 'first', stream_id = 1).pack(LINK_PROTOCOL),
+      VPaddingCell(payload = b'\x01' * 600).pack(LINK_PROTOCOL),
+      PaddingCell().pack(LINK_PROTOCOL),
+      VPaddingCell(payload = b'').pack(LINK_PROTOCOL),
+      RelayCell(0x80000000, RelayCommand.DATA, 'second', stream_id = 1).pack(LINK_PROTOCOL),
+    ]
+
+    content = b''.join(cells)
+    orport = FakeORPort(content[:3], content[3:6], content[6:520], content[520:])
+
+    async def run():
+      relay = stem.client.Relay(orport, 5)
+
+      self.assertEqual(cells[0], await relay._recv_bytes())
+      self.assertEqual(cells[1:], await relay._recv_cells())
+      self.assertEqual(0, len(relay._orport_buffer))
+
+      with self.assertRaises(stem.SocketClosed):
+        await relay._recv()
+
+    asyncio.run(run())
+
+  def test_connect_with_split_handshake(self):
+    """
+    Continue reading cells from where the VERSIONS cell ends, even if the
+    handshake cells that follow it are split across reads.
+    """
+
+    cells = [
+      CertsCell([Certificate(1, b'\x01' * 300), Certificate(2, b'\x02' * 300)]).pack(LINK_PROTOCOL),
+      AuthChallengeCell([1, 3], b'\x03' * 32).pack(LINK_PROTOCOL),
+      NetinfoCell(Address('127.0.0.1'), []).pack(LINK_PROTOCOL),
+      RelayCell(0x80000000, RelayCommand.DATA, 'hello', stream_id = 1).pack(LINK_PROTOCOL),
+    ]
+
+    versions = VersionsCell([3, 4, 5]).pack(2)
+    content = b''.join(cells)
+
+    # our first read ends partway through the VERSIONS cell, and the second
+    # partway through the CERTS cell
+
+    orport = HandshakeORPort(versions[:4], versions[4:] + content[:200], content[200:])
+
+    async def run():
+      with patch('stem.socket.RelaySocket', Mock(return_value = orport)):
+        relay = await stem.client.Relay.connect('127.0.0.1', 9001, [3, 4, 5])
+
+      self.assertEqual(5, relay.link_protocol)
+      self.assertEqual(cells, [await relay._recv_bytes() for i in range(len(cells))])
+
+    asyncio.run(run())
+
+  def test_demux_routes_cells(self):
+    """
+    Cells are routed to the circuit they belong to, in the order they arrive,
+    regardless of how they're split across reads.
+    """
+
+    first_cells = [RelayCell(0x80000000, RelayCommand.DATA, 'cell %i' % i, stream_id = 1).pack(LINK_PROTOCOL) for i in range(3)]
+    second_cells = [RelayCell(0x80000001, RelayCommand.DATA, 'cell %i' % i, stream_id = 2).pack(LINK_PROTOCOL) for i in range(2)]
+    padding = PaddingCell().pack(LINK_PROTOCOL)
+
+    content = first_cells[0] + padding + second_cells[0] + first_cells[1] + second_cells[1] + first_cells[2]
+    orport = FakeORPort(content[:100], content[100:1500], content[1500:])
+
+    async def run():
+      relay = stem.client.Relay(orport, 5)
+      first, second = FakeCircuitHandler(), FakeCircuitHandler()
+      relay._circuits = {0x80000000: first, 0x80000001: second}
+
+      relay._start_demux()
+      await relay._demux_task
+
+      self.assertEqual(first_cells, first.delivered)
+      self.assertEqual(second_cells, second.delivered)
+
+      # once our connection closes circuits are notified, and further requests
+      # fail right away
+
+      self.assertEqual(stem.SocketClosed, type(first.failure))
+      self.assertEqual(stem.SocketClosed, type(second.failure))
+      self.assertRaises(stem.SocketClosed, relay._start_demux)
+
+    asyncio.run(run())
+
+  def test_demux_pending_circuits(self):
+    """
+    Provide replies for circuits that are being created, and discard cells for
+    unknown circuits.
+    """
+
+    destroy_cell = DestroyCell(0x80000000).pack(LINK_PROTOCOL)
+    orport = FakeORPort(DestroyCell(0x80000005).pack(LINK_PROTOCOL) + destroy_cell)
+
+    async def run():
+      relay = stem.client.Relay(orport, 5)
+      pending = asyncio.Queue()
+      relay._pending = {0x80000000: pending}
+
+      relay._start_demux()
+      await relay._demux_task
+
+      self.assertEqual(destroy_cell, pending.get_nowait())
+      self.assertEqual(stem.SocketClosed, type(pending.get_nowait()))
+      self.assertTrue(pending.empty())
+
+    asyncio.run(run())
+
+  def test_close_notifies_circuits(self):
+    """
+    Closing our relay fails requests that are awaiting a response, rather
+    than leaving them waiting forever.
+    """
+
+    async def run():
+      relay = stem.client.Relay(BlockingORPort(), 5)
+      circuit, pending = FakeCircuitHandler(), asyncio.Queue()
+      relay._circuits = {0x80000000: circuit}
+      relay._pending = {0x80000001: pending}
+
+      relay._start_demux()
+      await asyncio.sleep(0)
+      await relay.close()
+
+      self.assertEqual(stem.SocketClosed, type(circuit.failure))
+      self.assertEqual(stem.SocketClosed, type(pending.get_nowait()))
+      self.assertTrue(pending.empty())
+      self.assertRaises(stem.SocketClosed, relay._start_demux)
+
+    asyncio.run(run())
+
+  def test_circuit_send_failures(self):
+    """
+    Cells we encrypt are sent even if our request is cancelled, and if sending
+    fails our circuit is no longer usable since its key has advanced.
+    """
+
+    async def run():
+      orport = SlowORPort()
+      circuit = fake_circuit(stem.client.Relay(orport, 5))
+
+      send_task = asyncio.ensure_future(circuit._send(RelayCommand.DATA, 'hello', stream_id = 1))
+      await asyncio.sleep(0)
+      send_task.cancel()
+
+      with self.assertRaises(asyncio.CancelledError):
+        await send_task
+
+      await asyncio.sleep(0.05)
+      self.assertEqual(1, len(orport.sent))
+      self.assertEqual(None, circuit._error)
+
+      orport.error = stem.SocketClosed('connection lost')
+      responses = asyncio.Queue()
+      circuit._streams[2] = responses
+
+      with self.assertRaises(stem.SocketClosed):
+        await circuit._send(RelayCommand.DATA, 'hello', stream_id = 2)
+
+      self.assertEqual(stem.SocketClosed, type(circuit._error))
+      self.assertEqual(circuit._error, responses.get_nowait())
+
+    asyncio.run(run())
+
+  def test_pool_reuses_connections(self):
+    """
+    Make several directory requests through the same pooled connection.
+    """
+
+    relays = []
+
+    async def connect(address, port, link_protocols):
+      relays.append(FakeRelay())
+      return relays[-1]
+
+    async def run():
+      pool = stem.client.RelayPool()
+
+      responses = [await pool.directory('10.0.0.1', 9001, 'request %i' % i) for i in range(3)]
+      await pool.directory('10.0.0.2', 9001, 'other relay')
+
+      self.assertEqual(2, len(pool))
+      await pool.close()
+      self.assertEqual(0, len(pool))
+
+      return responses
+
+    with patch('stem.client.Relay.connect', Mock(side_effect = connect)):
+      responses = asyncio.run(run())
+
+    self.assertEqual([b'response to request 0', b'response to request 1', b'response to request 2'], responses)
+    self.assertEqual(2, len(relays))
+    self.assertEqual([1, 2, 3], relays[0].circuits[0].stream_ids)
+    self.assertTrue(all([relay.closed for relay in relays]))
+
+  def test_pool_concurrent_requests(self):
+    """
+    Concurrent requests share a pooled connection, each on its own stream.
+    """
+
+    relays = []
+
+    async def connect(address, port, link_protocols):
+      relays.append(FakeRelay())
+      return relays[-1]
+
+    async def run():
+      pool = stem.client.RelayPool()
+      responses = await asyncio.gather(*[pool.directory('10.0.0.1', 9001, 'request %i' % i) for i in range(5)])
+      await pool.close()
+
+      return responses
+
+    with patch('stem.client.Relay.connect', Mock(side_effect = connect)):
+      responses = asyncio.run(run())
+
+    self.assertEqual([b'response to request %i' % i for i in range(5)], responses)
+    self.assertEqual(1, len(relays))
+    self.assertEqual([1, 2, 3, 4, 5], sorted(relays[0].circuits[0].stream_ids))
+
+  def test_pool_discards_failures(self):
+    """
+    Connections are dropped from our pool when a request fails.
+    """
+
+    relay = FakeRelay()
+
+    async def run():
+      pool = stem.client.RelayPool()
+
+      with self.assertRaises(stem.ProtocolError):
+        await pool.directory('10.0.0.1', 9001, 'fail')
+
+      self.assertEqual(0, len(pool))
+      self.assertTrue(relay.closed)
+
+    with patch('stem.client.Relay.connect', Mock(side_effect = coro_func_returning_value(relay))):
+      asyncio.run(run())
+
+  def test_pool_cancelled_requests(self):
+    """
+    Cancelling a request, such as a hedged request that lost its race, doesn't
+    disrupt others on the same connection.
+    """
+
+    relay = FakeRelay()
+
+    async def run():
+      pool = stem.client.RelayPool()
+
+      slow_request = asyncio.ensure_future(pool.directory('10.0.0.1', 9001, 'slow'))
+      other_request = asyncio.ensure_future(pool.directory('10.0.0.1', 9001, 'request'))
+
+      self.assertEqual(b'response to request', await other_request)
+      slow_request.cancel()
+
+      with self.assertRaises(asyncio.CancelledError):
+        await slow_request
+
+      self.assertFalse(relay.closed)
+      self.assertEqual(1, len(pool))
+      self.assertEqual(b'response to request', await pool.directory('10.0.0.1', 9001, 'request'))
+
+      with self.assertRaises(asyncio.TimeoutError):
+        await asyncio.wait_for(pool.directory('10.0.0.1', 9001, 'slow'), 0.01)
+
+      self.assertFalse(relay.closed)
+      self.assertEqual(1, len(relay.circuits))
+
+      await pool.close()
+      self.assertTrue(relay.closed)
+
+    with patch('stem.client.Relay.connect', Mock(side_effect = coro_func_returning_value(relay))):
+      asyncio.run(run())
+
+  def test_pool_closes_idle_connections(self):
+    """
+    Close connections that we haven't recently used, and replace circuits
+    once their stream ids are exhausted.
+    """
+
+    relay = FakeRelay()
+
+    async def run():
+      pool = stem.client.RelayPool()
+
+      with patch('stem.client.MAX_STREAM_ID', 2):
+        await pool.directory('10.0.0.1', 9001, 'request')
+        await pool.directory('10.0.0.1', 9001, 'request')
+        await pool.directory('10.0.0.1', 9001, 'request')
+
+      self.assertEqual(2, len(relay.circuits))
+      self.assertEqual(1, len(pool))
+
+      pool.max_idle = -1
+      pool.close_idle()
+      self.assertEqual(0, len(pool))
+
+      await asyncio.sleep(0)  # let the connection close
+      self.assertTrue(relay.closed)
+
+    with patch('stem.client.Relay.connect', Mock(side_effect = coro_func_returning_value(relay))):
+      asyncio.run(run())
@@ -5,8 +5,10 @@ Unit tests for stem.descriptor.
 import os
 
 __all__ = [
+  'archive',
   'bandwidth_file',
   'collector',
+  'columnar',
   'data',
   'export',
   'extrainfo_descriptor',
@@ -15,6 +17,8 @@ __all__ = [
   'reader',
   'router_status_entry',
   'server_descriptor',
+  'snapshot',
+  'store',
 ]
 
 DESCRIPTOR_TEST_DATA = os.path.join(os.path.dirname(__file__), 'data')
@@ -0,0 +1,164 @@
+"""
+Unit tests for stem.descriptor.archive.
+"""
+
+import bz2
+import datetime
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+
+import stem.descriptor
+
+from stem.descriptor import DocumentHandler
+from stem.descriptor.archive import ArchiveIndex, IndexEntry
+from stem.descriptor.networkstatus import NetworkStatusDocumentV3
+from stem.descriptor.server_descriptor import RelayDescriptor
+from test.unit.descriptor import get_resource
+
+SERVER_DESCRIPTORS = get_resource(os.path.join('collector', 'server-descriptors-2005-12-cropped.tar'))
+MICRODESCRIPTORS = get_resource(os.path.join('collector', 'microdescs-2019-05-cropped.tar'))
+CONSENSUSES = get_resource(os.path.join('collector', 'consensuses-2018-06-cropped.tar'))
+
+
+class TestArchiveIndex(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.TemporaryDirectory()
+
+  def tearDown(self):
+    self.tmp_dir.cleanup()
+
+  def _archive(self, source, compress = None, suffix = ''):
+    """
+    Copies a test archive to our temporary directory, optionally compressing
+    it.
+    """
+
+    path = os.path.join(self.tmp_dir.name, os.path.basename(source) + suffix)
+
+    with open(source, 'rb') as source_file:
+      content = source_file.read()
+
+    with open(path, 'wb') as archive_file:
+      archive_file.write(compress(content) if compress else content)
+
+    return path
+
+  def test_server_descriptors(self):
+    """
+    Index and read server descriptors from an uncompressed archive.
+    """
+
+    expected = list(stem.descriptor.parse_file(SERVER_DESCRIPTORS))
+    path = self._archive(SERVER_DESCRIPTORS)
+
+    with ArchiveIndex(path) as index:
+      self.assertEqual(path + '.index', index.path)
+      self.assertEqual(5, len(index))
+
+      self.assertEqual(IndexEntry(
+        member = 'server-descriptors-2005-12/0/0/00fb872c0df6f97f30c812327965e9a2a091a172',
+        descriptor_type = 'server-descriptor 1.0',
+        offset = 17948,
+        length = 3100,
+        fingerprint = '5C2124E6C5DD75C3C17C03EEA5A51812773DE671',
+        digest = '00FB872C0DF6F97F30C812327965E9A2A091A172',
+        published = datetime.datetime(2005, 12, 16, 13, 21, 20),
+      ), index.entries()[-1])
+
+      self.assertEqual([desc.get_bytes() for desc in expected], list(index.read(index.entries())))
+
+      for desc in expected:
+        matches = list(index.get(fingerprint = desc.fingerprint))
+
+        self.assertEqual([desc], matches)
+        self.assertTrue(isinstance(matches[0], RelayDescriptor))
+        self.assertEqual(os.path.abspath(path), matches[0].get_path())
+        self.assertTrue(matches[0].get_archive_path().startswith('server-descriptors-2005-12/'))
+        self.assertEqual([desc], list(index.get(digest = desc.digest())))
+
+      published = sorted([desc.published for desc in expected])
+      self.assertEqual(3, len(index.entries(start = published[2])))
+      self.assertEqual(2, len(index.entries(start = published[2], end = published[3])))
+      self.assertEqual([], index.entries(fingerprint = 'AB' * 20))
+
+  def test_reuses_index(self):
+    """
+    Only rebuild our index when the archive changes.
+    """
+
+    path = self._archive(SERVER_DESCRIPTORS)
+    index_path = os.path.join(self.tmp_dir.name, 'custom.index')
+
+    with ArchiveIndex(path, index_path) as index:
+      index._conn.execute('DELETE FROM descriptors WHERE offset > 10000')
+      index._conn.commit()
+
+    with ArchiveIndex(path, index_path) as index:
+      self.assertEqual(3, len(index))  # reused our altered index
+
+    shutil.copyfile(CONSENSUSES, path)
+
+    with ArchiveIndex(path, index_path) as index:
+      self.assertEqual(2, len(index))
+
+      consensus = list(index.get(document_handler = DocumentHandler.DOCUMENT))[-1]
+      self.assertTrue(isinstance(consensus, NetworkStatusDocumentV3))
+      self.assertEqual(datetime.datetime(2018, 6, 1, 0, 0), consensus.valid_after)
+
+  def test_compressed_archives(self):
+    """
+    Read descriptors from archives compressed in various ways.
+    """
+
+    expected = [desc.get_bytes() for desc in stem.descriptor.parse_file(MICRODESCRIPTORS, document_handler = DocumentHandler.DOCUMENT)]
+
+    def xz_streams(content):
+      # concatenated xz streams, each of which has a block we can decompress from
+
+      return b''.join([lzma.compress(content[i:i + 50000]) for i in range(0, len(content), 50000)])
+
+    archives = (
+      (gzip.compress, '.gz', 1),
+      (bz2.compress, '.bz2', 1),
+      (lzma.compress, '.xz', 1),
+      (xz_streams, '.xz', 4),
+    )
+
+    for compress, suffix, checkpoint_count in archives:
+      path = self._archive(MICRODESCRIPTORS, compress, suffix)
+
+      with ArchiveIndex(path) as index:
+        entries = index.entries()
+
+        self.assertEqual(4, len(entries))
+        self.assertEqual(checkpoint_count, index._conn.execute('SELECT COUNT(*) FROM checkpoints').fetchone()[0])
+        self.assertEqual(expected, list(index.read(entries)))
+        self.assertEqual(list(reversed(expected)), list(index.read(list(reversed(entries)))))
+
+        for entry, content in zip(entries, expected):
+          self.assertEqual([content], list(index.read([entry])))
+
+        desc = list(index.get(digest = entries[0].digest))[0]
+        self.assertEqual(entries[0].digest, desc.digest())
+
+  def test_truncated_archive(self):
+    """
+    Read from an archive that was truncated after being indexed.
+    """
+
+    path = self._archive(MICRODESCRIPTORS, gzip.compress, '.gz')
+
+    with ArchiveIndex(path) as index:
+      entries = index.entries()
+
+      with open(path, 'rb') as archive_file:
+        content = archive_file.read()
+
+      with open(path, 'wb') as archive_file:
+        archive_file.write(content[:len(content) // 2])
+
+      self.assertRaisesRegex(OSError, 'is truncated, ended before the descriptor at offset 7215', list, index.read(entries))
@@ -11,8 +11,10 @@ import stem.descriptor.certificate
 import stem.util.str_tools
 import test.require
 
+from unittest.mock import patch
+
 from stem.client.datatype import Size, CertType
-from stem.descriptor.certificate import ED25519_SIGNATURE_LENGTH, ExtensionType, Ed25519Certificate, Ed25519CertificateV1, Ed25519Extension
+from stem.descriptor.certificate import ED25519_SIGNATURE_LENGTH, ExtensionType, ExtensionFlag, Ed25519Certificate, Ed25519CertificateV1, Ed25519Extension
 from test.unit.descriptor import get_resource
 
 ED25519_CERT = """
@@ -90,6 +92,40 @@ class TestEd25519Certificate(unittest.TestCase):
     self.assertEqual([Ed25519Extension(4, 0, EXPECTED_EXTENSION_DATA)], cert.extensions)
     self.assertEqual(EXPECTED_SIGNATURE, cert.signature)
 
+  def test_from_base64_is_cached(self):
+    """
+    Parsing the same certificate repeatedly should only decode it once, and
+    provide copies that can be modified independently.
+    """
+
+    Ed25519Certificate.from_base64(ED25519_CERT)
+
+    with patch('stem.descriptor.certificate.Ed25519Certificate.unpack', side_effect = Ed25519Certificate.unpack) as unpack_mock:
+      cert = Ed25519Certificate.from_base64(ED25519_CERT)
+
+    self.assertEqual(0, unpack_mock.call_count)
+
+    pem_cert = Ed25519Certificate.from_base64('-----BEGIN ED25519 CERT-----\n%s\n-----END ED25519 CERT-----' % ED25519_CERT)
+    self.assertEqual(cert.pack(), pem_cert.pack())
+    self.assertEqual(cert, pem_cert)
+
+    cert.signature = b'forged'
+    cert.extensions[0].data = b'tampered'
+    cert.extensions[0].flags.append(ExtensionFlag.UNKNOWN)
+    cert.extensions.append(Ed25519Extension(5, 0, b''))
+
+    unmodified = Ed25519Certificate.from_base64(stem.util.str_tools._to_bytes(ED25519_CERT))
+    self.assertNotEqual(cert, unmodified)
+    self.assertEqual(pem_cert, unmodified)
+    self.assertEqual(EXPECTED_SIGNATURE, unmodified.signature)
+    self.assertEqual([Ed25519Extension(4, 0, EXPECTED_EXTENSION_DATA)], unmodified.extensions)
+    self.assertEqual([], unmodified.extensions[0].flags)
+
+    # malformed content is reported each time rather than cached
+
+    self.assertRaises(ValueError, Ed25519Certificate.from_base64, '')
+    self.assertRaises(ValueError, Ed25519Certificate.from_base64, '')
+
   def test_extension_encoding(self):
     """
     Pack an extension back into what we read.
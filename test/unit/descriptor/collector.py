@@ -2,16 +2,28 @@
 Unit tests for stem.descriptor.collector.
 """
 
+import base64
+import contextlib
 import datetime
+import hashlib
+import http.server
 import io
+import lzma
+import os
+import socket
+import tempfile
+import threading
+import time
 import unittest
 
+import stem
+
 import stem.descriptor.collector
 
 from unittest.mock import Mock, patch
 
 from stem.descriptor import Compression, DocumentHandler
-from stem.descriptor.collector import CollecTor, File
+from stem.descriptor.collector import CollecTor, File, LocalIndex
 from test.unit.descriptor import get_resource
 from test.unit.descriptor.data.collector.index import EXAMPLE_INDEX
 
@@ -19,6 +31,72 @@ with open(get_resource('collector/index.json'), 'rb') as index_file:
   EXAMPLE_INDEX_JSON = index_file.read()
 
 
+class ArchiveHandler(http.server.BaseHTTPRequestHandler):
+  """
+  Local stand-in for CollecTor that supports range requests.
+  """
+
+  content = {}  # path => bytes
+  requests = []  # (path, range header) tuples
+
+  def do_GET(self):
+    content = ArchiveHandler.content.get(self.path)
+    range_header = self.headers.get('Range')
+    ArchiveHandler.requests.append((self.path, range_header))
+
+    if content is None:
+      self.send_error(404)
+      return
+
+    offset = int(range_header[6:-1]) if range_header else 0
+
+    self.send_response(206 if offset else 200)
+    self.send_header('Content-Length', str(len(content) - offset))
+
+    if offset:
+      self.send_header('Content-Range', 'bytes %i-%i/%i' % (offset, len(content) - 1, len(content)))
+
+    self.end_headers()
+    self.wfile.write(content[offset:])
+
+  def log_message(self, *args):
+    pass  # quiet our request logging
+
+
+@contextlib.contextmanager
+def collector_server():
+  """
+  Runs a local http server with our ArchiveHandler's content, providing its
+  url.
+  """
+
+  ArchiveHandler.requests = []
+  server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ArchiveHandler)
+  server_thread = threading.Thread(target = server.serve_forever, kwargs = {'poll_interval': 0.05}, daemon = True)
+  server_thread.start()
+
+  try:
+    yield 'http://127.0.0.1:%i/' % server.server_address[1]
+  finally:
+    server.shutdown()
+    server.server_close()
+    server_thread.join()
+    ArchiveHandler.content = {}
+
+
+def archive(path, content, sha256 = None):
+  """
+  Provides a File for content served by our ArchiveHandler.
+  """
+
+  ArchiveHandler.content['/' + path] = content
+
+  if sha256 is None:
+    sha256 = base64.b64encode(hashlib.sha256(content).digest()).decode('utf-8')
+
+  return File(path, ['server-descriptor 1.0'], len(content), sha256, '2005-12-15 01:42', '2005-12-17 11:06', '2016-06-24 08:12')
+
+
 class TestCollector(unittest.TestCase):
   # tests for the File class
 
@@ -51,8 +129,107 @@ class TestCollector(unittest.TestCase):
       self.assertEqual(expected_start, f.start)
       self.assertEqual(expected_end, f.end)
 
+  def test_file_download_resumes(self):
+    """
+    Resume a partial download with a range request.
+    """
+
+    content = os.urandom(200000)
+    f = archive('archive/resumed.tar', content)
+
+    with collector_server() as url, tempfile.TemporaryDirectory() as directory:
+      with open(os.path.join(directory, 'resumed.tar.part'), 'wb') as partial_file:
+        partial_file.write(content[:50000])
+
+      with patch('stem.descriptor.collector.COLLECTOR_URL', url):
+        path = f._download_streamed(directory, None, 0, False, None, None)
+
+      self.assertEqual([('/archive/resumed.tar', 'bytes=50000-')], ArchiveHandler.requests)
+      self.assertEqual(['resumed.tar'], os.listdir(directory))
+
+      with open(path, 'rb') as downloaded_file:
+        self.assertEqual(content, downloaded_file.read())
+
+  def test_file_download_checksum_mismatch(self):
+    """
+    Downloads that mismatch CollecTor's checksum are discarded.
+    """
+
+    f = archive('archive/corrupt.tar', b'corrupt content', sha256 = base64.b64encode(b'\x00' * 32).decode('utf-8'))
+
+    with collector_server() as url, tempfile.TemporaryDirectory() as directory:
+      with patch('stem.descriptor.collector.COLLECTOR_URL', url):
+        with self.assertRaises(stem.DownloadFailed) as context:
+          f._download_streamed(directory, None, 1, False, None, None)
+
+      self.assertTrue("mismatches CollecTor's checksum" in str(context.exception))
+      self.assertEqual(2, len(ArchiveHandler.requests))
+      self.assertEqual([], os.listdir(directory))
+
+  def test_file_download_deadline(self):
+    """
+    Our timeout covers the whole download, including its retries.
+    """
+
+    f = archive('archive/failing.tar', b'content')
+    clock = [100]
+
+    def failing_fetch(*args):
+      clock[0] += 1  # each attempt takes a second
+      raise OSError('connection reset')
+
+    with tempfile.TemporaryDirectory() as directory:
+      with patch('stem.descriptor.collector.File._fetch', Mock(side_effect = failing_fetch)) as fetch_mock:
+        with patch('time.time', Mock(side_effect = lambda: clock[0])):
+          self.assertRaises(stem.DownloadFailed, f._download_streamed, directory, 4, 10, False, None, None)
+
+      # each attempt shares the same deadline, and we stop retrying once
+      # we've passed it
+
+      self.assertEqual(4, fetch_mock.call_count)
+      self.assertEqual([104] * 4, [call[0][2] for call in fetch_mock.call_args_list])
+
+      with patch('stem.descriptor.collector.File._fetch', Mock(side_effect = socket.timeout('timed out'))):
+        self.assertRaises(stem.DownloadTimeout, f._download_streamed, directory, 4, 10, False, None, None)
+
+      # interrupts aren't retried or reported as a failed download
+
+      with patch('stem.descriptor.collector.File._fetch', Mock(side_effect = KeyboardInterrupt())) as fetch_mock:
+        self.assertRaises(KeyboardInterrupt, f._download_streamed, directory, 4, 10, False, None, None)
+        self.assertEqual(1, fetch_mock.call_count)
+
   # tests for the CollecTor class
 
+  @patch('stem.descriptor.collector.CollecTor.files')
+  def test_download(self, files_mock):
+    files_mock.return_value = [archive('archive/server-descriptors-%i.tar' % i, os.urandom(100000)) for i in range(3)]
+    progress = {}
+
+    def record_progress(f, downloaded, size):
+      progress[f.path] = (downloaded, size)
+
+    with collector_server() as url, tempfile.TemporaryDirectory() as directory:
+      with patch('stem.descriptor.collector.COLLECTOR_URL', url):
+        start_time = time.time()
+        paths = CollecTor().download(directory, concurrency = 2, rate_limit = 1000000, progress = record_progress)
+        runtime = time.time() - start_time
+
+        # files we already have aren't downloaded again
+
+        self.assertEqual(paths, CollecTor().download(directory))
+
+      self.assertEqual([os.path.join(directory, 'server-descriptors-%i.tar' % i) for i in range(3)], paths)
+      self.assertEqual(3, len(ArchiveHandler.requests))
+      self.assertTrue(runtime >= 0.25)  # 300 KB at 1 MB/s
+
+      for f in files_mock.return_value:
+        self.assertEqual((100000, 100000), progress[f.path])
+
+        with open(f._downloaded_to, 'rb') as downloaded_file:
+          self.assertEqual(ArchiveHandler.content['/' + f.path], downloaded_file.read())
+
+    self.assertRaisesWith(ValueError, 'Concurrency must be a positive integer, was 0', CollecTor().download, '/tmp', concurrency = 0)
+
   @patch('urllib.request.urlopen')
   def test_index_plaintext(self, urlopen_mock):
     urlopen_mock.return_value = io.BytesIO(EXAMPLE_INDEX_JSON)
@@ -171,6 +348,113 @@ class TestCollector(unittest.TestCase):
       'archive/relay-descriptors/server-descriptors/server-descriptors-2006-03.tar.xz',
     ], [f.path for f in collector.files(descriptor_type = 'server-descriptor', start = datetime.datetime(2006, 2, 10), end = datetime.datetime(2007, 1, 1))])
 
+  def test_local_index_files(self):
+    """
+    Query our local index, which should match the files we get from
+    CollecTor's index.
+    """
+
+    collector = CollecTor()
+    local_index = LocalIndex(':memory:')
+    self.assertEqual(96, len(local_index.sync(CollecTor._files(EXAMPLE_INDEX, []))[0]))
+
+    queries = (
+      (None, None, None),
+      ('server-descriptor', None, None),
+      ('server-descriptor', datetime.datetime(2007, 1, 1), None),
+      ('server-descriptor', datetime.datetime(2006, 2, 10), datetime.datetime(2007, 1, 1)),
+      ('network-status', datetime.datetime(2019, 11, 28), None),
+      (None, None, datetime.datetime(2005, 1, 1)),
+      ('no-such-type', None, None),
+    )
+
+    with patch('stem.descriptor.collector.CollecTor.index', Mock(return_value = EXAMPLE_INDEX)):
+      for descriptor_type, start, end in queries:
+        expected = collector.files(descriptor_type, start, end)
+        self.assertEqual(sorted([f.path for f in expected]), sorted([f.path for f in local_index.files(descriptor_type, start, end)]))
+        self.assertEqual([f.start for f in expected], [f.start for f in local_index.files(descriptor_type, start, end)])
+
+    f = local_index.files('microdescriptor', datetime.datetime(2014, 3, 15), datetime.datetime(2014, 3, 16))[0]
+    self.assertEqual('archive/relay-descriptors/microdescs/microdescs-2014-03.tar.xz', f.path)
+    self.assertEqual(('microdescriptor 1.0', 'network-status-microdesc-consensus-3 1.0'), f.types)
+    self.assertEqual(Compression.LZMA, f.compression)
+    self.assertEqual(datetime.datetime(2014, 3, 1), f.start)
+    self.assertEqual(datetime.datetime(2014, 3, 31, 23, 0), f.end)
+    self.assertEqual(datetime.datetime(2014, 4, 7, 3, 54), f.last_modified)
+
+  def test_local_index_sync(self):
+    """
+    Incrementally sync our local index with CollecTor.
+    """
+
+    files = CollecTor._files(EXAMPLE_INDEX, [])
+    modified_file, removed_file = files[0], files[1]
+
+    local_index = LocalIndex(':memory:')
+    self.assertEqual(0, local_index.synced_at())
+
+    local_index.sync(files)
+    self.assertEqual(([], [], []), local_index.sync(files))
+    self.assertTrue(local_index.synced_at() > 0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      path = os.path.join(tmp_dir, 'archive.tar.xz')
+
+      with open(path, 'wb') as archive_file:
+        archive_file.write(b'x' * modified_file.size)
+
+      local_index.record_download(modified_file, path)
+      self.assertEqual(path, local_index.downloaded_to(modified_file))
+      self.assertEqual(path, local_index.files(modified_file.types[0], modified_file.start, modified_file.start)[0]._downloaded_to)
+
+      # when CollecTor modifies a file our copy is no longer current
+
+      modified_file.last_modified = datetime.datetime(2020, 1, 1)
+      self.assertEqual(([], [modified_file.path], [removed_file.path]), local_index.sync([f for f in files if f != removed_file]))
+      self.assertEqual(None, local_index.downloaded_to(modified_file))
+      self.assertEqual(95, len(local_index.files()))
+
+  def test_local_index_persists(self):
+    """
+    Only fetch CollecTor's index when our local copy is stale.
+    """
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      index_path = os.path.join(tmp_dir, 'collector.sqlite')
+
+      with patch('stem.descriptor.collector.CollecTor.index', Mock(return_value = EXAMPLE_INDEX)) as index_mock:
+        self.assertEqual(96, len(CollecTor(index_path = index_path).files()))
+        self.assertEqual(3, len(CollecTor(index_path = index_path).files('server-descriptor', datetime.datetime(2007, 1, 1))))
+        self.assertEqual(1, index_mock.call_count)
+
+  def test_plan(self):
+    """
+    Skip recent files that an archive already spans.
+    """
+
+    consensus_archive = File('archive/relay-descriptors/consensuses/consensuses-2019-11.tar.xz', ['network-status-consensus-3 1.0'], 1024, None, '2019-11-01 00:00', '2019-11-27 23:00', '2019-11-28 00:00')
+    votes_archive = File('archive/relay-descriptors/votes/votes-2019-11.tar.xz', ['network-status-vote-3 1.0'], 1024, None, '2019-11-01 00:00', '2019-11-28 01:00', '2019-11-28 00:00')
+
+    local_index = LocalIndex(':memory:')
+    local_index.sync(CollecTor._files(EXAMPLE_INDEX, []) + [consensus_archive, votes_archive])
+
+    self.assertEqual([
+      'archive/relay-descriptors/consensuses/consensuses-2019-11.tar.xz',
+      'recent/relay-descriptors/consensuses/2019-11-28-00-00-00-consensus',
+      'recent/relay-descriptors/consensuses/2019-11-28-01-00-00-consensus',
+    ], [f.path for f in local_index.plan('network-status-consensus-3', start = datetime.datetime(2019, 11, 20))])
+
+    self.assertEqual([
+      'archive/relay-descriptors/votes/votes-2019-11.tar.xz',
+    ], [f.path for f in local_index.plan('network-status-vote-3', start = datetime.datetime(2019, 11, 20))])
+
+    with patch('stem.descriptor.collector.CollecTor.index', Mock(return_value = EXAMPLE_INDEX)):
+      self.assertEqual([
+        'recent/relay-descriptors/consensuses/2019-11-27-23-00-00-consensus',
+        'recent/relay-descriptors/consensuses/2019-11-28-00-00-00-consensus',
+        'recent/relay-descriptors/consensuses/2019-11-28-01-00-00-consensus',
+      ], [f.path for f in CollecTor().plan('network-status-consensus-3', start = datetime.datetime(2019, 11, 20))])
+
   @patch('stem.util.connection.download')
   @patch('stem.descriptor.collector.CollecTor.files')
   def test_reading_server_descriptors(self, files_mock, download_mock):
@@ -194,6 +478,76 @@ class TestCollector(unittest.TestCase):
     self.assertEqual('RelayDescriptor', type(f).__name__)
     self.assertEqual('3E2F63E2356F52318B536A12B6445373808A5D6C', f.fingerprint)
 
+  @patch('stem.util.connection.download')
+  def test_reading_with_pipeline(self, download_mock):
+    """
+    Read a compressed archive that's decompressed on a separate thread.
+    """
+
+    with open(get_resource('collector/server-descriptors-2005-12-cropped.tar'), 'rb') as archive:
+      download_mock.return_value = lzma.compress(archive.read())
+
+    f = File('archive/relay-descriptors/server-descriptors/server-descriptors-2005-12.tar.xz', ['server-descriptor 1.0'], 0, None, '2005-12-15 01:42', '2005-12-17 11:06', '2016-06-24 08:12')
+
+    descriptors = list(f.read(pipeline = 2))
+    self.assertEqual(5, len(descriptors))
+    self.assertEqual('3E2F63E2356F52318B536A12B6445373808A5D6C', descriptors[0].fingerprint)
+
+  @patch('stem.util.connection.download')
+  @patch('stem.descriptor.collector.CollecTor.files')
+  def test_reading_skips_unpublished_range(self, files_mock, download_mock):
+    """
+    Only parse archive members that were published within our time range.
+    """
+
+    with open(get_resource('collector/server-descriptors-2005-12-cropped.tar'), 'rb') as archive:
+      download_mock.return_value = archive.read()
+
+    files_mock.return_value = [stem.descriptor.collector.File(
+      'archive/relay-descriptors/server-descriptors/server-descriptors-2005-12.tar',
+      ['server-descriptor 1.0'],
+      1348620,
+      'v3ANi2FD4xAhmyzigQq9gvlLwpXH8I6fGoiYlWLjOy8=',
+      '2005-12-15 01:42',
+      '2005-12-17 11:06',
+      '2016-06-24 08:12',
+    )]
+
+    start, end = datetime.datetime(2005, 12, 16, 12, 0), datetime.datetime(2005, 12, 16, 16, 0)
+
+    with patch('stem.descriptor.parse_file', wraps = stem.descriptor.parse_file) as parse_file_mock:
+      descriptors = list(stem.descriptor.collector.get_server_descriptors(start, end))
+
+    self.assertEqual(2, parse_file_mock.call_count)
+    self.assertEqual([datetime.datetime(2005, 12, 16, 15, 31, 25), datetime.datetime(2005, 12, 16, 13, 21, 20)], [desc.published for desc in descriptors])
+    self.assertTrue(descriptors[0].get_archive_path().startswith('server-descriptors-2005-12/0/5/'))
+
+  @patch('stem.util.connection.download')
+  @patch('stem.descriptor.collector.CollecTor.files')
+  def test_reading_skips_other_types(self, files_mock, download_mock):
+    """
+    Skip archive members with a different '@type' annotation without parsing
+    them.
+    """
+
+    with open(get_resource('collector/microdescs-2019-05-cropped.tar'), 'rb') as archive:
+      download_mock.return_value = archive.read()
+
+    files_mock.return_value = [stem.descriptor.collector.File(
+      'archive/relay-descriptors/microdescs/microdescs-2014-01.tar',
+      ['microdescriptor 1.0', 'network-status-microdesc-consensus-3 1.0'],
+      7515396,
+      'DFugbV1phhpiEB0QeyyueKp0V/bicmAAkdBk/95RjKk=',
+      '2014-01-22 09:00',
+      '2014-01-31 23:00',
+      '2014-02-07 03:59',
+    )]
+
+    with patch('stem.descriptor.networkstatus._parse_file') as consensus_mock:
+      self.assertEqual(3, len(list(stem.descriptor.collector.get_microdescriptors())))
+
+    consensus_mock.assert_not_called()
+
   @patch('stem.util.connection.download')
   @patch('stem.descriptor.collector.CollecTor.files')
   def test_reading_bridge_server_descriptors(self, files_mock, download_mock):
@@ -0,0 +1,125 @@
+"""
+Unit tests for stem.descriptor.columnar.
+"""
+
+import datetime
+import unittest
+
+import stem.descriptor
+import test.require
+
+from stem.descriptor.columnar import Column, ColumnType, Format, batches, schema
+from stem.descriptor.extrainfo_descriptor import RelayExtraInfoDescriptor
+from stem.descriptor.router_status_entry import RouterStatusEntryV3
+from stem.descriptor.server_descriptor import RelayDescriptor
+from test.unit.descriptor import get_resource
+
+
+def consensus_entries():
+  with open(get_resource('cached-consensus'), 'rb') as consensus_file:
+    return list(stem.descriptor.parse_file(consensus_file, 'network-status-consensus-3 1.0'))
+
+
+class TestColumnar(unittest.TestCase):
+  def test_schema(self):
+    """
+    Derive column types from our descriptor attributes.
+    """
+
+    self.assertEqual([
+      Column('nickname', ColumnType.STR),
+      Column('published', ColumnType.DATETIME),
+      Column('or_port', ColumnType.INT),
+      Column('flags', ColumnType.LIST),
+      Column('is_unmeasured', ColumnType.BOOL),
+      Column('protocols', ColumnType.DICT),
+      Column('version', ColumnType.OBJECT),
+    ], schema(RouterStatusEntryV3, ['nickname', 'published', 'or_port', 'flags', 'is_unmeasured', 'protocols', 'version']))
+
+    self.assertEqual(Column('dir_v2_share', ColumnType.FLOAT), schema(RelayExtraInfoDescriptor, ['dir_v2_share'])[0])
+    self.assertEqual(list(RelayDescriptor.ATTRIBUTES.keys()), [column.name for column in schema(RelayDescriptor)])
+
+    exc_msg = "'pepperjack' isn't an attribute of RouterStatusEntryV3"
+    self.assertRaisesWith(ValueError, exc_msg, schema, RouterStatusEntryV3, ['nickname', 'pepperjack'])
+
+  def test_batches(self):
+    """
+    Convert router status entries into batches of columns.
+    """
+
+    entries = consensus_entries()
+    results = list(batches(iter(entries), ['nickname', 'or_port', 'published'], batch_size = 2))
+
+    self.assertEqual(2, len(results))
+    self.assertEqual(['nickname', 'or_port', 'published'], list(results[0].keys()))
+    self.assertEqual(['test002r', 'test001a'], results[0]['nickname'])
+    self.assertEqual([5002, 5001], results[0]['or_port'])
+    self.assertEqual([datetime.datetime(2017, 5, 25, 4, 46, 11), datetime.datetime(2017, 5, 25, 4, 46, 12)], results[0]['published'])
+    self.assertEqual({'nickname': ['test000a'], 'or_port': [5000], 'published': [datetime.datetime(2017, 5, 25, 4, 46, 12)]}, dict(results[1]))
+
+    self.assertEqual([], list(batches([], ['nickname'])))
+    self.assertRaises(ValueError, list, batches(entries, ['nickname'], batch_size = 0))
+    self.assertRaises(ValueError, list, batches(entries, ['nickname'], format = 'pepperjack'))
+
+  def test_batches_with_nested_attributes(self):
+    """
+    Read bandwidth file attributes that are nested within its header.
+    """
+
+    with open(get_resource('bandwidth_file_v1.4'), 'rb') as bandwidth_file:
+      results = list(batches(stem.descriptor.parse_file(bandwidth_file, 'bandwidth-file 1.4'), ['recent_stats.consensus_count', 'recent_stats.relay_failures.stale', 'timestamp']))
+
+    self.assertEqual({
+      'recent_stats.consensus_count': [34],
+      'recent_stats.relay_failures.stale': [0],
+      'timestamp': [datetime.datetime(2019, 4, 21, 21, 34, 57)],
+    }, dict(results[0]))
+
+  def test_batches_are_bounded(self):
+    """
+    Only read as many descriptors as we need for each batch.
+    """
+
+    consumed = []
+
+    def descriptors():
+      for entry in consensus_entries():
+        consumed.append(entry)
+        yield entry
+
+    results = batches(descriptors(), ['nickname'], batch_size = 1)
+
+    next(results)
+    self.assertEqual(1, len(consumed))
+
+    next(results)
+    self.assertEqual(2, len(consumed))
+
+  @test.require.module('numpy')
+  def test_batches_as_numpy(self):
+    """
+    Convert router status entries into numpy arrays.
+    """
+
+    entries = consensus_entries()
+    batch = next(batches(entries, ['nickname', 'or_port', 'measured', 'published'], format = Format.NUMPY))
+
+    self.assertEqual(len(entries), len(batch))
+    self.assertEqual('test002r', batch['nickname'][0])
+    self.assertEqual(5002, batch['or_port'][0])
+    self.assertTrue(batch['measured'].mask.all())
+
+  @test.require.module('pyarrow')
+  def test_batches_as_arrow(self):
+    """
+    Convert router status entries into arrow record batches.
+    """
+
+    entries = consensus_entries()
+    batch = next(batches(entries, ['nickname', 'or_port', 'flags', 'version'], format = Format.ARROW))
+
+    self.assertEqual(len(entries), batch.num_rows)
+    self.assertEqual(['nickname', 'or_port', 'flags', 'version'], batch.schema.names)
+    self.assertEqual('test002r', batch.column(0)[0].as_py())
+    self.assertEqual(5002, batch.column(1)[0].as_py())
+    self.assertEqual([str(flag) for flag in entries[0].flags], batch.column(2)[0].as_py())
@@ -34,5 +34,13 @@ class TestCompression(unittest.TestCase):
       self.skipTest('(%s unavailable)' % compression)
 
     with open(get_resource(filename), 'rb') as compressed_file:
-      content = compression.decompress(compressed_file.read())
-      self.assertTrue(content.startswith(b'router moria1 128.31.0.34 9101 0 9131'))
+      compressed_content = compressed_file.read()
+
+    content = compression.decompress(compressed_content)
+    self.assertTrue(content.startswith(b'router moria1 128.31.0.34 9101 0 9131'))
+
+    # incrementally decompressing should provide the same content
+
+    decompressor = compression.decompressor()
+    incremental_content = b''.join([decompressor.decompress(compressed_content[i:i + 50]) for i in range(0, len(compressed_content), 50)])
+    self.assertEqual(content, incremental_content + decompressor.flush())
@@ -2,10 +2,44 @@
 Unit tests for the base stem.descriptor module.
 """
 
+import bz2
+import gzip
+import io
+import lzma
+import os
+import tarfile
+import tempfile
+import threading
 import unittest
 
-from stem.descriptor import Descriptor
+import stem.descriptor
+
+from stem.descriptor import Descriptor, JoinedDescriptor
+from stem.descriptor.microdescriptor import Microdescriptor
+from stem.descriptor.networkstatus import NetworkStatusDocumentV3
+from stem.descriptor.router_status_entry import RouterStatusEntryMicroV3
 from stem.descriptor.server_descriptor import RelayDescriptor
+from test.unit.descriptor import get_resource
+
+
+class Unseekable(io.RawIOBase):
+  """
+  File that can only be read, like a socket.
+  """
+
+  def __init__(self, content):
+    self._content = io.BytesIO(content)
+
+  def readable(self):
+    return True
+
+  def readinto(self, buffer):
+    return self._content.readinto(buffer)
+
+
+def read_resource(name):
+  with open(get_resource(name), 'rb') as resource:
+    return resource.read()
 
 
 class TestDescriptor(unittest.TestCase):
@@ -49,3 +83,190 @@ class TestDescriptor(unittest.TestCase):
     self.assertEqual(0, len(RelayDescriptor.from_str('', multiple = True)))
 
     self.assertRaisesWith(ValueError, "Descriptor.from_str() expected a single descriptor, but had 2 instead. Please include 'multiple = True' if you want a list of results instead.", RelayDescriptor.from_str, desc_text)
+
+  def test_join_by_digest(self):
+    """
+    Pair microdescriptor consensus entries with their microdescriptors.
+    """
+
+    desc1, desc2, desc3 = [Microdescriptor.create() for i in range(3)]
+
+    entry1 = RouterStatusEntryMicroV3.create({'m': desc1.digest()})
+    entry2 = RouterStatusEntryMicroV3.create({'m': desc2.digest()})
+    entry_without_desc = RouterStatusEntryMicroV3.create({'m': 'aiUklwBrua82obG5AsTX+iEpkjQA2+AQHxZ7GwMfY70'})
+
+    expected = [
+      JoinedDescriptor(desc1.digest(), entry1, desc1),
+      JoinedDescriptor(desc2.digest(), entry2, desc2),
+      JoinedDescriptor(desc3.digest(), None, desc3),
+      JoinedDescriptor('aiUklwBrua82obG5AsTX+iEpkjQA2+AQHxZ7GwMfY70', entry_without_desc, None),
+    ]
+
+    # descriptors are streamed when lengths are unknown
+
+    results = stem.descriptor.join_by_digest([entry1, entry2, entry_without_desc], iter([desc1, desc2, desc3]))
+    self.assertFalse(isinstance(results, list))
+    self.assertEqual(expected, list(results))
+
+    # the shorter side is indexed when we have lengths
+
+    results = list(stem.descriptor.join_by_digest([entry1, entry2, entry_without_desc], [desc3, desc1]))
+    self.assertEqual([(entry1.microdescriptor_digest, entry1, desc1), (entry2.microdescriptor_digest, entry2, None), (entry_without_desc.microdescriptor_digest, entry_without_desc, None), (desc3.digest(), None, desc3)], results)
+
+  def test_join_by_digest_server_descriptors(self):
+    """
+    Pair consensus entries with their server descriptors.
+    """
+
+    desc = RelayDescriptor.create({'fingerprint': '4F0C 867D F0EF 6816 0568 C826 838F 482C EA7C FE44'})
+    entry = desc.make_router_status_entry()
+    consensus = NetworkStatusDocumentV3.create(routers = [entry])
+
+    results = list(stem.descriptor.join_by_digest(consensus, [desc]))
+    self.assertEqual(1, len(results))
+    self.assertEqual(desc.digest(), results[0].digest)
+    self.assertEqual(entry.fingerprint, results[0].entry.fingerprint)
+    self.assertEqual(desc, results[0].descriptor)
+
+  def test_parse_file_from_pipe(self):
+    """
+    Parse descriptors from a pipe, which can't seek.
+    """
+
+    expected = list(stem.descriptor.parse_file(get_resource('cached-consensus')))
+    read_fd, write_fd = os.pipe()
+
+    def write_content():
+      with os.fdopen(write_fd, 'wb') as pipe:
+        pipe.write(read_resource('cached-consensus'))
+
+    writer = threading.Thread(target = write_content)
+    writer.start()
+
+    with os.fdopen(read_fd, 'rb') as pipe:
+      self.assertFalse(pipe.seekable())
+      self.assertEqual(expected, list(stem.descriptor.parse_file(pipe, 'network-status-consensus-3 1.0')))
+
+    writer.join()
+
+  def test_parse_file_from_streams(self):
+    """
+    Parse unseekable and compressed streams, which we should read in a single
+    forward pass.
+    """
+
+    for resource, descriptor_type in (('cached-microdescs', 'microdescriptor 1.0'), ('metrics_server_desc_multiple', None), ('cached-consensus', 'network-status-consensus-3 1.0')):
+      content = read_resource(resource)
+      expected = list(stem.descriptor.parse_file(io.BytesIO(content), descriptor_type))
+      self.assertTrue(len(expected) > 1)
+
+      self.assertEqual(expected, list(stem.descriptor.parse_file(io.BufferedReader(Unseekable(content)), descriptor_type)))
+
+      with gzip.GzipFile(fileobj = io.BytesIO(gzip.compress(content))) as gzip_file:
+        self.assertEqual(expected, list(stem.descriptor.parse_file(gzip_file, descriptor_type)))
+
+  def test_parse_file_from_compressed_tarball(self):
+    """
+    Parse a tarball that's read from an lzma stream.
+    """
+
+    expected = list(stem.descriptor.parse_file(get_resource('descriptor_archive.tar')))
+    self.assertEqual(3, len(expected))
+
+    with lzma.LZMAFile(io.BytesIO(lzma.compress(read_resource('descriptor_archive.tar')))) as archive:
+      with tarfile.open(fileobj = archive, mode = 'r|') as tar_file:
+        self.assertEqual(expected, list(stem.descriptor.parse_file(tar_file)))
+
+  def test_parse_file_with_pipeline(self):
+    """
+    Parse compressed tarballs that are decompressed on a separate thread.
+    """
+
+    content = read_resource('descriptor_archive.tar')
+    expected = list(stem.descriptor.parse_file(get_resource('descriptor_archive.tar')))
+
+    def xz_streams(content):
+      return b''.join([lzma.compress(content[i:i + 4096]) for i in range(0, len(content), 4096)])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      for compress in (lambda content: content, gzip.compress, bz2.compress, lzma.compress, xz_streams):
+        path = os.path.join(tmp_dir, 'descriptor_archive.tar')
+
+        with open(path, 'wb') as archive_file:
+          archive_file.write(compress(content))
+
+        descriptors = list(stem.descriptor.parse_file(path, pipeline = 2))
+
+        self.assertEqual(expected, descriptors)
+        self.assertEqual(os.path.abspath(path), descriptors[0].get_path())
+
+        # reading in small chunks that block on our queue
+
+        reader = stem.descriptor._PipelineReader(path, 1, chunk_size = 100)
+        self.assertEqual(content, b''.join(iter(lambda: reader.read(75), b'')))
+        reader.close()
+
+        # stop reading partway through
+
+        descriptors = stem.descriptor.parse_file(path, pipeline = 1)
+        self.assertEqual(expected[0], next(descriptors))
+        descriptors.close()
+
+      with open(path, 'wb') as archive_file:
+        archive_file.write(lzma.compress(content)[:-100])
+
+      self.assertRaisesRegex(OSError, 'Unable to decompress .*: Compressed file ended before the end-of-stream marker was reached', list, stem.descriptor.parse_file(path, pipeline = 2))
+
+    self.assertEqual(0, len([thread for thread in threading.enumerate() if thread.name == 'descriptor decompression']))
+    self.assertRaisesWith(ValueError, 'Pipeline depth must be positive, but was -1', stem.descriptor._PipelineReader, get_resource('descriptor_archive.tar'), -1)
+
+  def test_parse_file_with_fields(self):
+    """
+    Read only particular fields from each type of descriptor that supports it.
+    """
+
+    for resource, descriptor_type, fields in (
+      ('cached-consensus', 'network-status-consensus-3 1.0', ['flags', 'bandwidth']),
+      ('cached-microdescs', 'microdescriptor 1.0', ['family']),
+      ('extrainfo_relay_descriptor', 'extra-info 1.0', ['dir_v3_responses']),
+      ('metrics_server_desc_multiple', 'server-descriptor 1.0', ['average_bandwidth', 'exit_policy']),
+    ):
+      expected = list(stem.descriptor.parse_file(get_resource(resource), descriptor_type))
+      descriptors = list(stem.descriptor.parse_file(get_resource(resource), descriptor_type, fields = fields))
+
+      self.assertEqual(expected, descriptors)
+
+      for expected_desc, desc in zip(expected, descriptors):
+        self.assertTrue(len(desc._entries) < len(expected_desc._tokenize(False)))
+
+        for field in fields:
+          self.assertEqual(getattr(expected_desc, field), getattr(desc, field))
+
+    self.assertRaisesWith(ValueError, "'pepperjack' isn't an attribute of RouterStatusEntryV3", list, stem.descriptor.parse_file(get_resource('cached-consensus'), fields = ['pepperjack']))
+    self.assertRaisesWith(ValueError, 'Fields can only be used when reading router status entries, not with the DOCUMENT document handler', list, stem.descriptor.parse_file(get_resource('cached-consensus'), document_handler = stem.descriptor.DocumentHandler.DOCUMENT, fields = ['flags']))
+    self.assertRaisesWith(ValueError, "'pepperjack' isn't an attribute of RelayDescriptor", list, stem.descriptor.parse_file(get_resource('metrics_server_desc_multiple'), validate = True, fields = ['pepperjack']))
+
+    for resource in ('hidden_service_duckduckgo', 'metrics_cert', 'detached_signatures', 'bandwidth_file_v1.4'):
+      descriptor_type = {'detached_signatures': 'detached-signature-3 1.0', 'bandwidth_file_v1.4': 'bandwidth-file 1.4'}.get(resource)
+      self.assertRaisesRegex(ValueError, 'Fields are only supported by server, extrainfo, microdescriptor and router status entries', list, stem.descriptor.parse_file(get_resource(resource), descriptor_type, fields = ['published']))
+
+  def test_forward_reader(self):
+    """
+    Only seek back onto the line we last read.
+    """
+
+    reader = stem.descriptor._ForwardReader(Unseekable(b'first\nsecond\nthird\n'))
+
+    self.assertEqual(b'first\n', reader.readline())
+    self.assertEqual(6, reader.tell())
+    self.assertEqual(0, reader.seek(0))
+    self.assertEqual(b'first\n', reader.readline())
+    self.assertEqual(b'second\n', reader.readline())
+    self.assertRaises(OSError, reader.seek, 0)
+
+    self.assertEqual(6, reader.seek(6))
+    self.assertRaises(OSError, reader.seek, 0)
+    self.assertEqual(b'se', reader.read(2))
+    self.assertEqual(15, reader.seek(15))
+    self.assertEqual(b'ird\n', reader.read())
+    self.assertEqual(b'', reader.readline())
@@ -4,7 +4,10 @@ Unit tests for stem.descriptor.hidden_service for version 3.
 
 import base64
 import collections
+import datetime
 import functools
+import hashlib
+import struct
 import unittest
 
 import stem.client.datatype
@@ -13,7 +16,11 @@ import stem.descriptor.hidden_service
 
 import test.require
 
+from stem.descriptor.networkstatus import NetworkStatusDocumentV3
+from stem.descriptor.router_status_entry import RouterStatusEntryV3
+
 from stem.descriptor.hidden_service import (
+  HSDirRing,
   IntroductionPointV3,
   HiddenServiceDescriptorV3,
   AuthorizedClient,
@@ -452,3 +459,67 @@ class TestHiddenServiceDescriptorV3(unittest.TestCase):
 
     self.assertEqual(64, len(desc.signing_cert.signature))
     self.assertEqual(expected_blinded_key, desc.signing_cert.signing_key())
+
+  def test_time_period(self):
+    """
+    Check time period computation against the rend-spec-v3 example.
+    """
+
+    self.assertEqual(16903, stem.descriptor.hidden_service.time_period(datetime.datetime(2016, 4, 13, 11, 0)))
+    self.assertEqual(16903, stem.descriptor.hidden_service.time_period(1460545200))
+    self.assertEqual(16904, stem.descriptor.hidden_service.time_period(datetime.datetime(2016, 4, 13, 12, 0)))
+
+  def test_hsdir_ring(self):
+    """
+    Compare responsible hsdirs of our ring against an exhaustive search.
+    """
+
+    relays = dict([('%040X' % i, hashlib.sha256(b'relay %i' % i).digest()) for i in range(50)])
+    ring = HSDirRing(relays, b'\x2b' * 32, 16903)
+
+    self.assertEqual(50, len(ring))
+    self.assertEqual(sorted(ring), list(ring))
+
+    blinded_key = stem.descriptor.hidden_service._blinded_identity_key(HS_PUBKEY, 16903, 1440)
+    expected = []
+
+    for replica in (1, 2):
+      service_index = hashlib.sha3_256(b'store-at-idx' + blinded_key + struct.pack('>QQQ', replica, 1440, 16903)).digest()
+      following = [fingerprint for index, fingerprint in sorted(ring) if index >= service_index] + [fingerprint for index, fingerprint in sorted(ring) if index < service_index]
+      expected += [fingerprint for fingerprint in following if fingerprint not in expected][:4]
+
+    self.assertEqual(expected, ring.responsible_hsdirs(HS_ADDRESS))
+    self.assertEqual(expected, ring.responsible_hsdirs(HS_PUBKEY))
+    self.assertEqual(6, len(ring.responsible_hsdirs(HS_ADDRESS, spread = 3)))
+    self.assertEqual({HS_ADDRESS: expected}, ring.responsible_hsdirs_for([HS_ADDRESS]))
+
+    self.assertRaises(ValueError, ring.responsible_hsdirs, 'not_an_address')
+    self.assertRaises(ValueError, HSDirRing, {'%040X' % 1: b'too short'}, None, 16903)
+
+  def test_hsdir_ring_from_consensus(self):
+    """
+    Build a ring from the relays of a consensus with the HSDir flag.
+    """
+
+    hsdir = RouterStatusEntryV3.create({'r': 'hsdir AAAAAAAAAAAAAAAAAAAAAAAAAAA oQZFLYe9e4A7bOkWKR7TaNxb0JE 2012-08-06 11:19:31 71.35.150.29 9001 0', 's': 'Fast HSDir'})
+    other_hsdir = RouterStatusEntryV3.create({'r': 'other BBBBBBBBBBBBBBBBBBBBBBBBBBB oQZFLYe9e4A7bOkWKR7TaNxb0JE 2012-08-06 11:19:31 71.35.150.29 9001 0', 's': 'HSDir'})
+    not_hsdir = RouterStatusEntryV3.create({'s': 'Fast'})
+
+    consensus = NetworkStatusDocumentV3.create({
+      'valid-after': '2016-04-13 15:00:00',
+      'fresh-until': '2016-04-13 16:00:00',
+      'shared-rand-current-value': '9 ' + base64.b64encode(b'\x2b' * 32).decode('utf-8'),
+    }, routers = (hsdir, other_hsdir, not_hsdir))
+
+    identities = {
+      hsdir.fingerprint: hashlib.sha256(b'hsdir').digest(),
+      other_hsdir.fingerprint: base64.b64encode(hashlib.sha256(b'other').digest()).rstrip(b'=').decode('utf-8'),
+      not_hsdir.fingerprint: hashlib.sha256(b'not hsdir').digest(),
+    }
+
+    ring = HSDirRing.from_consensus(consensus, identities)
+
+    self.assertEqual(2, len(ring))
+    self.assertEqual(16904, ring.period_num)
+    self.assertEqual(b'\x2b' * 32, ring.shared_random_value)  # current srv is used between the time period and next srv
+    self.assertEqual(set([hsdir.fingerprint, other_hsdir.fingerprint]), set(ring.responsible_hsdirs(HS_ADDRESS)))
@@ -2,12 +2,14 @@
 Unit tests for stem.descriptor.microdescriptor.
 """
 
+import hashlib
 import unittest
 
 import stem.descriptor
 import stem.exit_policy
 
-from stem.descriptor.microdescriptor import Microdescriptor
+from stem.descriptor import DigestHash, DigestEncoding
+from stem.descriptor.microdescriptor import Microdescriptor, CompactMicrodescriptor
 from test.unit.descriptor import get_resource
 
 FIRST_ONION_KEY = """\
@@ -80,6 +82,45 @@ class TestMicrodescriptor(unittest.TestCase):
       self.assertEqual('uhCGfIM6RbeD1Z/C6e9ct41+NIl9EbpgP8wG7uZT2Rw', router.digest())
       self.assertEqual('@type microdescriptor 1.0', str(router.type_annotation()))
 
+  def test_precomputed_digests(self):
+    """
+    Calculate digests as we read microdescriptors.
+    """
+
+    with open(get_resource('cached-microdescs'), 'rb') as descriptor_file:
+      descriptors = list(stem.descriptor.parse_file(descriptor_file, 'microdescriptor 1.0', digests = [DigestHash.SHA256]))
+
+    router = descriptors[2]
+    self.assertEqual([DigestHash.SHA256], list(router._digests.keys()))
+    self.assertEqual('uhCGfIM6RbeD1Z/C6e9ct41+NIl9EbpgP8wG7uZT2Rw', router.digest())
+    self.assertEqual(hashlib.sha256(router.get_bytes()).hexdigest().upper(), router.digest(DigestHash.SHA256, DigestEncoding.HEX))
+    self.assertEqual(hashlib.sha256(router.get_bytes()).digest(), router.digest(DigestHash.SHA256, DigestEncoding.RAW).digest())
+
+    with open(get_resource('cached-microdescs'), 'rb') as descriptor_file:
+      self.assertRaises(ValueError, list, stem.descriptor.parse_file(descriptor_file, 'microdescriptor 1.0', digests = ['md5']))
+
+  def test_compact(self):
+    """
+    Compact microdescriptors should provide the same attributes without a
+    __dict__.
+    """
+
+    with open(get_resource('cached-microdescs'), 'rb') as descriptor_file:
+      descriptors = list(stem.descriptor.parse_file(descriptor_file, 'microdescriptor 1.0'))
+
+    compact = [CompactMicrodescriptor(desc.get_bytes(), annotations = desc.get_annotation_lines()) for desc in descriptors]
+
+    for expected, desc in zip(descriptors, compact):
+      self.assertTrue(isinstance(desc, Microdescriptor))
+      self.assertEqual({}, vars(desc))
+      self.assertEqual(expected.digest(), desc.digest())
+      self.assertEqual(expected.get_annotations(), desc.get_annotations())
+
+      for attr in Microdescriptor.ATTRIBUTES:
+        self.assertEqual(getattr(expected, attr), getattr(desc, attr))
+
+    self.assertTrue(compact[0].get_annotation_lines()[0] is compact[2].get_annotation_lines()[0])
+
   def test_minimal_microdescriptor(self):
     """
     Basic sanity check that we can parse a microdescriptor with minimal
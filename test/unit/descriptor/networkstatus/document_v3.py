@@ -13,7 +13,7 @@ import test.require
 
 from stem import Flag
 
-from stem.descriptor import CRYPTO_BLOB
+from stem.descriptor import CRYPTO_BLOB, DigestHash
 
 from stem.descriptor.networkstatus import (
   HEADER_STATUS_DOCUMENT_FIELDS,
@@ -449,6 +449,24 @@ DnN5aFtYKiTc19qIC7Nmo+afPdDEf0MlJvEOP5EWl3w=
     self.assertEqual(entry1, entries[0])
     self.assertEqual(entry2, entries[1])
 
+  def test_parse_file_with_digests(self):
+    """
+    Precompute digests while reading a consensus. Router status entries have
+    a digest attribute for their server descriptor rather than a method, so
+    they're left alone.
+    """
+
+    expected = list(stem.descriptor.parse_file(get_resource('cached-consensus')))
+    entries = list(stem.descriptor.parse_file(get_resource('cached-consensus'), digests = [DigestHash.SHA1]))
+
+    self.assertEqual(expected, entries)
+    self.assertEqual([desc.digest for desc in expected], [desc.digest for desc in entries])
+    self.assertEqual({}, entries[0]._digests)
+
+    document = list(stem.descriptor.parse_file(get_resource('cached-consensus'), digests = [DigestHash.SHA1], document_handler = stem.descriptor.DocumentHandler.DOCUMENT))[0]
+    self.assertEqual([DigestHash.SHA1], list(document._digests.keys()))
+    self.assertEqual(document.digest(), list(stem.descriptor.parse_file(get_resource('cached-consensus'), document_handler = stem.descriptor.DocumentHandler.DOCUMENT))[0].digest())
+
   def test_missing_fields(self):
     """
     Excludes mandatory fields from both a vote and consensus document.
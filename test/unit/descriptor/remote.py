@@ -2,8 +2,13 @@
 Unit tests for stem.descriptor.remote.
 """
 
+import asyncio
+import email.utils
+import os
+import tempfile
 import time
 import unittest
+import zlib
 
 import stem
 import stem.descriptor
@@ -154,6 +159,38 @@ class TestDescriptorDownloader(unittest.TestCase):
     self.assertEqual('9695DFC35FFEB861329B9F1AB04C46397020CE31', desc.fingerprint)
     self.assertEqual(TEST_DESCRIPTOR.rstrip(), desc.get_bytes())
 
+  def test_orport_connections_closed(self):
+    """
+    Blocking queries run within their own event loop, so close their ORPort
+    connections when done rather than leaking them.
+    """
+
+    reply = b'HTTP/1.0 200 OK\r\n' + stem.util.str_tools._to_bytes(HEADER % 'identity') + b'\r\n\r\n' + TEST_DESCRIPTOR
+    relays = []
+
+    async def connect(address, port, link_protocols):
+      circuit = Mock(_error = None)
+      circuit.directory = Mock(side_effect = coro_func_returning_value(reply))
+
+      relay = Mock()
+      relay.create_circuit = Mock(side_effect = coro_func_returning_value(circuit))
+      relay.close = Mock(side_effect = coro_func_returning_value(None))
+      relays.append(relay)
+
+      return relay
+
+    with patch('stem.client.Relay.connect', Mock(side_effect = connect)):
+      for i in range(3):
+        query = stem.descriptor.remote.their_server_descriptor(endpoints = [stem.ORPort('12.34.56.78', 1100)], block = True)
+        self.assertEqual('moria1', list(query)[0].nickname)
+
+      query = stem.descriptor.remote.their_server_descriptor(endpoints = [stem.ORPort('12.34.56.78', 1100)], start = False)
+      self.assertEqual('moria1', list(query.stream())[0].nickname)
+
+    self.assertEqual(4, len(relays))
+    self.assertTrue(all([relay.close.called for relay in relays]))
+    self.assertEqual(0, len(stem.descriptor.remote.ORPORT_POOL))
+
   def test_response_header_code(self):
     """
     When successful Tor provides a '200 OK' status, but we should accept other 2xx
@@ -203,6 +240,23 @@ class TestDescriptorDownloader(unittest.TestCase):
     self.assertEqual(1, len(descriptors))
     self.assertEqual('moria1', descriptors[0].nickname)
 
+  def test_positional_arguments(self):
+    """
+    Arguments added later come after our original ones, so callers providing
+    those positionally are unaffected.
+    """
+
+    query = stem.descriptor.remote.Query(TEST_RESOURCE, 'server-descriptor 1.0', None, (Compression.PLAINTEXT,), 3, True, 5.0, False, False, True, stem.descriptor.DocumentHandler.DOCUMENT)
+
+    self.assertEqual(3, query.retries)
+    self.assertEqual(True, query.fall_back_to_authority)
+    self.assertEqual(5.0, query.timeout)
+    self.assertEqual(True, query.validate)
+    self.assertEqual(stem.descriptor.DocumentHandler.DOCUMENT, query.document_handler)
+    self.assertEqual(False, query.hedge)
+    self.assertEqual(None, query.cache)
+    self.assertEqual(None, query.start_time)  # not started
+
   def test_gzip_url_override(self):
     query = stem.descriptor.remote.Query(TEST_RESOURCE + '.z', compression = Compression.PLAINTEXT, start = False)
     self.assertEqual([stem.descriptor.Compression.GZIP], query.compression)
@@ -359,3 +413,249 @@ class TestDescriptorDownloader(unittest.TestCase):
     self.assertEqual(1, len(list(query)))
     self.assertEqual(1, len(list(query)))
     self.assertEqual(1, len(list(query)))
+
+  def test_get_bulk(self):
+    """
+    Download more descriptors than tor will provide in a single request.
+    """
+
+    endpoints = [stem.DirPort('10.0.0.%i' % i, 80) for i in range(1, 4)]
+    fingerprints = ['%040X' % i for i in range(200)]
+    requested_from = []
+
+    async def download_from(endpoint):
+      requested_from.append(endpoint)
+      return b'HTTP/1.0 200 OK\r\n' + stem.util.str_tools._to_bytes(HEADER % 'identity') + b'\r\n\r\n' + TEST_DESCRIPTOR
+
+    downloader = stem.descriptor.remote.DescriptorDownloader()
+    downloader._endpoints = endpoints
+
+    with patch('stem.descriptor.remote.Query._download_from', Mock(side_effect = download_from)):
+      descriptors = list(downloader.get_bulk('server', fingerprints + fingerprints[:10]))
+
+    # duplicates are dropped, leaving batches of 96, 96, and 8 fingerprints
+    # that are each fetched from a different directory
+
+    self.assertEqual(3, len(descriptors))
+    self.assertEqual('moria1', descriptors[0].nickname)
+    self.assertEqual(set(endpoints), set(requested_from))
+
+    self.assertRaisesWith(ValueError, "Bulk downloads can be for 'server', 'extrainfo', or 'micro' descriptors, not 'consensus'", downloader.get_bulk, 'consensus', fingerprints)
+
+  def test_get_bulk_retries(self):
+    """
+    Retry a failed batch on another directory.
+    """
+
+    broken, working = stem.DirPort('10.0.0.1', 80), stem.DirPort('10.0.0.2', 80)
+    requested_from = []
+
+    async def download_from(endpoint):
+      requested_from.append(endpoint)
+
+      if endpoint == broken:
+        raise stem.DownloadFailed('http://10.0.0.1:80', OSError('connection refused'), None)
+
+      return b'HTTP/1.0 200 OK\r\n' + stem.util.str_tools._to_bytes(HEADER % 'identity') + b'\r\n\r\n' + TEST_DESCRIPTOR
+
+    downloader = stem.descriptor.remote.DescriptorDownloader()
+    downloader._endpoints = [broken, working]
+
+    with patch('stem.descriptor.remote.Query._download_from', Mock(side_effect = download_from)):
+      descriptors = list(downloader.get_bulk('server', ['9695DFC35FFEB861329B9F1AB04C46397020CE31'], attempts = 2))
+
+      self.assertEqual(1, len(descriptors))
+      self.assertEqual(working, requested_from[-1])
+
+      downloader._endpoints = [broken]
+      self.assertRaises(stem.DownloadFailed, list, downloader.get_bulk('server', ['9695DFC35FFEB861329B9F1AB04C46397020CE31'], attempts = 2))
+
+  def test_hedged_download(self):
+    """
+    Request from a second endpoint when the first is slow to respond.
+    """
+
+    slow, fast = stem.DirPort('10.0.0.1', 80), stem.DirPort('10.0.0.2', 80)
+
+    async def download_from(endpoint):
+      if endpoint == slow:
+        await asyncio.sleep(5)
+
+      return b'HTTP/1.0 200 OK\r\n' + stem.util.str_tools._to_bytes(HEADER % 'identity') + b'\r\n\r\n' + TEST_DESCRIPTOR
+
+    with patch('stem.descriptor.remote.Query._download_from', Mock(side_effect = download_from)):
+      with patch('stem.descriptor.remote.Query._pick_endpoint', Mock(side_effect = [slow, fast])):
+        query = stem.descriptor.remote.Query(TEST_RESOURCE, endpoints = [slow, fast], hedge = 0.05, start = False)
+        descriptors = query.run()
+
+    self.assertEqual(1, len(descriptors))
+    self.assertEqual('http://10.0.0.2:80/tor/server/fp/9695DFC35FFEB861329B9F1AB04C46397020CE31', query.download_url)
+    self.assertTrue(query.runtime < 5)
+
+    self.assertRaisesWith(ValueError, 'Hedge should be a boolean or non-negative number of seconds, was -1 (int)', stem.descriptor.remote.Query, TEST_RESOURCE, hedge = -1, start = False)
+
+  def test_endpoint_health(self):
+    """
+    Favor endpoints that respond quickly and reliably.
+    """
+
+    health = stem.descriptor.remote._EndpointHealth()
+    fast, slow, broken, unused = [stem.DirPort('10.0.0.%i' % i, 80) for i in range(1, 5)]
+
+    for i in range(5):
+      health.record_success(fast, 0.5)
+      health.record_success(slow, 4.0)
+      health.record_success(broken, 0.5)
+      health.record_failure(broken)
+
+    self.assertEqual(0.5, health.latency(fast))
+    self.assertEqual(None, health.latency(unused))
+    self.assertEqual(4.0, health.percentile(0.9))
+    self.assertEqual(0.5, health.percentile(0.5))
+
+    self.assertTrue(health.weight(fast) > health.weight(slow))
+    self.assertTrue(health.weight(fast) > health.weight(broken))
+    self.assertEqual(health.weight(fast), health.weight(unused))
+
+    with patch('stem.descriptor.remote._ENDPOINT_HEALTH', health):
+      query = stem.descriptor.remote.Query(TEST_RESOURCE, endpoints = [fast, slow], start = False)
+      self.assertEqual(slow, query._pick_endpoint(exclude = [fast]))
+      self.assertEqual(health.percentile(stem.descriptor.remote.HEDGE_PERCENTILE), stem.descriptor.remote.Query(TEST_RESOURCE, hedge = True, start = False)._hedge_delay())
+
+  def test_streamed_response(self):
+    """
+    Parse descriptors from a gzip compressed response that arrives a few bytes
+    at a time.
+    """
+
+    response = b'HTTP/1.0 200 OK\r\n' + stem.util.str_tools._to_bytes(HEADER % 'gzip') + b'\r\n\r\n' + zlib.compress(TEST_DESCRIPTOR * 3)
+
+    decoder = stem.descriptor.remote._HttpStreamDecoder()
+    splitter = stem.descriptor.remote._DescriptorSplitter(b'router ')
+    descriptors = []
+
+    for i in range(0, len(response), 7):
+      descriptors += splitter.feed(decoder.feed(response[i:i + 7]))
+
+      if i == 0:
+        self.assertEqual(None, decoder.headers)
+        self.assertEqual([], descriptors)
+
+    descriptors += splitter.feed(decoder.flush()) + splitter.finish()
+
+    self.assertEqual('gzip', decoder.headers['Content-Encoding'])
+    self.assertEqual([TEST_DESCRIPTOR] * 2 + [TEST_DESCRIPTOR.rstrip()], descriptors)
+
+    # truncated content
+
+    decoder = stem.descriptor.remote._HttpStreamDecoder()
+    decoder.feed(response[:-10])
+    self.assertRaisesWith(OSError, 'Failed to decompress as gzip: content was truncated', decoder.flush)
+
+    decoder = stem.descriptor.remote._HttpStreamDecoder()
+    decoder.feed(b'HTTP/1.0 200 OK\r\n')
+    self.assertRaisesWith(stem.ProtocolError, 'HTTP response ended before its headers were complete', decoder.flush)
+
+  @mock_download(TEST_DESCRIPTOR * 2)
+  def test_stream(self):
+    """
+    Stream descriptors rather than downloading them all at once.
+    """
+
+    query = stem.descriptor.remote.Query(TEST_RESOURCE, endpoints = [stem.ORPort('12.34.56.78', 1100)], start = False)
+    descriptors = list(query.stream())
+
+    self.assertEqual(['moria1', 'moria1'], [desc.nickname for desc in descriptors])
+    self.assertEqual(5, len(query.reply_headers))
+    self.assertEqual(None, query.downloaded)
+
+    # queries that have already started provide their results
+
+    query = stem.descriptor.remote.Query(TEST_RESOURCE, endpoints = [stem.ORPort('12.34.56.78', 1100)])
+    self.assertEqual(['moria1', 'moria1'], [desc.nickname for desc in query.stream()])
+
+  def test_cache(self):
+    """
+    Provide fresh responses from our cache, and revalidate stale ones.
+    """
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+      cache = stem.descriptor.remote.DescriptorCache(cache_dir)
+      expires = email.utils.formatdate(time.time() + 60, usegmt = True)
+      response = b'HTTP/1.0 200 OK\r\nContent-Encoding: identity\r\nExpires: %s\r\nLast-Modified: Fri, 13 Apr 2018 16:35:50 GMT\r\n\r\n%s' % (stem.util.str_tools._to_bytes(expires), TEST_DESCRIPTOR)
+
+      with patch('stem.descriptor.remote.Query._download_from', Mock(side_effect = coro_func_returning_value(response))) as download_mock:
+        self.assertEqual('moria1', stem.descriptor.remote.Query(TEST_RESOURCE, cache = cache).run()[0].nickname)
+        self.assertEqual('moria1', stem.descriptor.remote.Query(TEST_RESOURCE, cache = cache).run()[0].nickname)
+        self.assertEqual(1, download_mock.call_count)
+
+      cached = cache.get(TEST_RESOURCE)
+      self.assertEqual(TEST_DESCRIPTOR.rstrip(), cached.content)
+      self.assertEqual('Fri, 13 Apr 2018 16:35:50 GMT', cached.last_modified)
+      self.assertEqual(None, cache.get('/tor/server/all'))
+
+      # once stale we check if the response has changed
+
+      cache.put(TEST_RESOURCE, cached.content, dict(cached.headers, Expires = 'Fri, 13 Apr 2018 16:35:50 GMT'))
+
+      with patch('stem.descriptor.remote.Query._download_from', Mock(side_effect = coro_func_returning_value(b'HTTP/1.0 304 Not modified\r\n\r\n'))) as download_mock:
+        query = stem.descriptor.remote.Query(TEST_RESOURCE, cache = cache_dir)
+        self.assertEqual('moria1', query.run()[0].nickname)
+        self.assertEqual(1, download_mock.call_count)
+        self.assertTrue('If-Modified-Since: Fri, 13 Apr 2018 16:35:50 GMT' in query._http_request())
+
+        # revalidated responses are fresh again rather than going back to the
+        # network with each query
+
+        self.assertEqual('moria1', stem.descriptor.remote.Query(TEST_RESOURCE, cache = cache_dir).run()[0].nickname)
+        self.assertEqual(1, download_mock.call_count)
+
+      refreshed = cache.get(TEST_RESOURCE)
+      self.assertEqual(cached.content, refreshed.content)
+      self.assertTrue(refreshed.fresh_until > time.time() + stem.descriptor.remote.NOT_MODIFIED_FRESHNESS - 60)
+
+      # an Expires header on the 304 response says how long it's fresh for
+
+      expires = email.utils.formatdate(time.time() + 3600, usegmt = True)
+      cache.refresh(TEST_RESOURCE, {'Expires': expires})
+
+      refreshed = cache.get(TEST_RESOURCE)
+      self.assertEqual(email.utils.parsedate_to_datetime(expires).timestamp(), refreshed.fresh_until)
+      self.assertEqual(expires, refreshed.headers['Expires'])
+
+  def test_cache_eviction(self):
+    """
+    Evict the least recently used responses when our cache is too large.
+    """
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+      cache = stem.descriptor.remote.DescriptorCache(cache_dir, max_size = 25)
+
+      for i, resource in enumerate(('/tor/server/all', '/tor/extra/all', '/tor/micro/d/hash')):
+        cache.put(resource, b'x' * 10, {})
+        os.utime(cache._paths(resource)[1], (i, i))
+
+      cache.evict()
+
+      self.assertEqual(None, cache.get('/tor/server/all'))
+      self.assertEqual(b'x' * 10, cache.get('/tor/extra/all').content)
+      self.assertEqual(b'x' * 10, cache.get('/tor/micro/d/hash').content)
+
+      # stale responses are removed once they're older than our max_age
+
+      cache.max_age = -1
+      cache.evict()
+
+      self.assertEqual([], os.listdir(cache_dir))
+
+  def test_fresh_until(self):
+    """
+    Determine how long responses are fresh for.
+    """
+
+    consensus = b'network-status-version 3\nvote-status consensus\nvalid-after 2018-04-13 16:00:00\nfresh-until 2018-04-13 17:00:00\n'
+
+    self.assertEqual(1523638800.0, stem.descriptor.remote._fresh_until(consensus, {}, 5.0))
+    self.assertEqual(1523637350.0, stem.descriptor.remote._fresh_until(b'', {'Expires': 'Fri, 13 Apr 2018 16:35:50 GMT'}, 5.0))
+    self.assertEqual(5.0, stem.descriptor.remote._fresh_until(b'', {'Expires': 'invalid'}, 5.0))
+    self.assertEqual(5.0, stem.descriptor.remote._fresh_until(b'', {}, 5.0))
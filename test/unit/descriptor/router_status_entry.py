@@ -5,16 +5,21 @@ Unit tests for stem.descriptor.router_status_entry.
 import collections
 import datetime
 import functools
+import io
 import unittest
 
 import stem.descriptor
 
+from unittest.mock import patch
+
 from stem import Flag
+from stem.descriptor.networkstatus import NetworkStatusDocumentV3
 from stem.exit_policy import MicroExitPolicy
 from stem.version import Version
 
 from test.unit.descriptor import (
   get_resource,
+  read_resource,
   base_expect_invalid_attr,
   base_expect_invalid_attr_for_text,
 )
@@ -24,7 +29,10 @@ from stem.descriptor.router_status_entry import (
   RouterStatusEntryV2,
   RouterStatusEntryV3,
   RouterStatusEntryMicroV3,
+  CompactRouterStatusEntryV3,
   _base64_to_hex,
+  _base64_to_hex_batch,
+  _cache_fingerprints,
 )
 
 ENTRY_WITHOUT_ED25519 = """\
@@ -113,6 +121,52 @@ class TestRouterStatusEntry(unittest.TestCase):
     for arg in ('', '20wYcb', '20wYcb' * 30):
       self.assertRaises(ValueError, _base64_to_hex, arg, True)
 
+    self.assertEqual(test_values, _base64_to_hex_batch(list(test_values.keys()) + ['', '20wYcb', '20wYcb' * 30]))
+    self.assertEqual(test_values, _base64_to_hex_batch(list(test_values.keys()) + ['20wYcbFGwFfMktmuffYj6Z1RM9!']))
+    self.assertEqual({}, _base64_to_hex_batch([]))
+
+  def test_fingerprint_cache(self):
+    """
+    Reuse the fingerprints of identities we've decoded, evicting the least
+    recently used beyond our cache's size.
+    """
+
+    identities = ['p1aag7VwarGxqctS7/fS0y5FU+s', 'IbhGa8T+8tyy/MhxCk/qI+EI2LU', '20wYcbFGwFfMktmuffYj6Z1RM9k']
+
+    with patch('stem.descriptor.router_status_entry.FINGERPRINT_CACHE_SIZE', 2):
+      with patch('stem.descriptor.router_status_entry._FINGERPRINT_CACHE', collections.OrderedDict()) as cache:
+        _cache_fingerprints(identities[:2])
+        self.assertEqual(identities[:2], list(cache.keys()))
+
+        self.assertEqual('A7569A83B5706AB1B1A9CB52EFF7D2D32E4553EB', _base64_to_hex(identities[0]))
+        self.assertEqual('DB4C1871B146C057CC92D9AE7DF623E99D5133D9', _base64_to_hex(identities[2]))
+        self.assertEqual([identities[0], identities[2]], list(cache.keys()))
+
+        _base64_to_hex('20wYcb', False)  # only fingerprints are cached
+        self.assertRaises(ValueError, _base64_to_hex, '20wYcb')
+        self.assertEqual([identities[0], identities[2]], list(cache.keys()))
+
+        # entries we parse from a consensus are decoded through our cache
+
+        with patch('stem.descriptor.router_status_entry._base64_to_hex_batch', side_effect = _base64_to_hex_batch) as batch_mock:
+          routers = list(stem.descriptor.parse_file(get_resource('cached-consensus'), 'network-status-consensus-3 1.0'))
+
+        self.assertEqual(1, batch_mock.call_count)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(routers[-1].digest, cache[list(cache.keys())[-1]])
+
+    # microdescriptor consensuses lack digests, so only their identities are
+    # decoded
+
+    micro_entries = [RouterStatusEntryMicroV3.create() for i in range(3)]
+    content = NetworkStatusDocumentV3.content({'network-status-version': '3 microdesc'}, routers = micro_entries)
+
+    with patch('stem.descriptor.router_status_entry._cache_fingerprints') as cache_mock:
+      routers = list(stem.descriptor.parse_file(io.BytesIO(content), 'network-status-microdesc-consensus-3 1.0'))
+
+    identities = sum([call[0][0] for call in cache_mock.call_args_list], [])
+    self.assertEqual([router.fingerprint for router in routers], [_base64_to_hex(identity) for identity in identities])
+
   def test_minimal_v2(self):
     """
     Parses a minimal v2 router status entry.
@@ -240,6 +294,26 @@ class TestRouterStatusEntry(unittest.TestCase):
     self.assertEqual('CAB27A6FFEF7A661C18B0B11120C3E8A77FC585C', entry.digest)
     self.assertEqual([], entry.get_unrecognized_lines())
 
+  def test_compact(self):
+    """
+    Compact router status entries should provide the same attributes without a
+    __dict__.
+    """
+
+    expected = RouterStatusEntryV3(ENTRY_WITH_ED25519, document = vote_document())
+    entry = CompactRouterStatusEntryV3(ENTRY_WITH_ED25519, document = vote_document())
+
+    self.assertTrue(isinstance(entry, RouterStatusEntryV3))
+    self.assertEqual({}, vars(entry))
+    self.assertEqual({}, entry._entries)
+
+    for attr in RouterStatusEntryV3.ATTRIBUTES:
+      self.assertEqual(getattr(expected, attr), getattr(entry, attr))
+
+    other = CompactRouterStatusEntryV3(ENTRY_WITHOUT_ED25519, validate = True, document = vote_document())
+    self.assertEqual('seele', other.nickname)
+    self.assertTrue(entry.flags[-1] is other.flags[-1])  # both are 'Valid'
+
   def test_with_ipv6(self):
     """
     Parse a router status entry with an IPv6 address.
@@ -679,3 +753,47 @@ class TestRouterStatusEntry(unittest.TestCase):
 
       router = next(descriptors)
       self.assertEqual([Flag.FAST, Flag.RUNNING, Flag.STABLE, Flag.VALID], router.flags)
+
+  def test_parsing_documents(self):
+    """
+    Entries we parse from documents are fully populated, with the same
+    attributes as individually constructed entries.
+    """
+
+    entries = (
+      RouterStatusEntryV3.content({'s': 'Fast'}),
+      ENTRY_WITHOUT_ED25519.encode('utf-8'),
+      ENTRY_WITH_ED25519.encode('utf-8'),
+      RouterStatusEntryV3.content({'s': 'Fast Fast', 'w': 'Bandwidth=moo', 'p': 'accept 80,eighty', 'pr': 'Link=x'}),
+      RouterStatusEntryV3.content({'r': 'caerSidi p1aag7VwarGxqctS7/fS0y5FU+s oQZFLYe9e4A7bOkWKR7TaNxb0JE 2012-08-06 11:19:31 71.35.150.29 -1 0'}),
+      RouterStatusEntryV3.content({'z': 'New tor feature: sparkly unicorns!'}),
+      RouterStatusEntryV3.content() + b'opt v Tor 0.2.2.35\n',
+      RouterStatusEntryV3.content() + b'\nv  Tor 0.2.2.35\n\n',
+      RouterStatusEntryV3.content({'s': 'Fast\tValid'}),
+      RouterStatusEntryV3.content().replace(b'\n', b'\r\n'),
+    )
+
+    entries = [RouterStatusEntryV3(entry, False) for entry in entries]
+    micro_entries = (RouterStatusEntryMicroV3.create({'s': 'Fast'}), RouterStatusEntryMicroV3.create({'m': 'moo'}))
+
+    documents = (
+      (NetworkStatusDocumentV3.content(routers = entries), RouterStatusEntryV3),
+      (NetworkStatusDocumentV3.content({'vote-status': 'vote'}, routers = entries), RouterStatusEntryV3),
+      (NetworkStatusDocumentV3.content({'network-status-version': '3 microdesc'}, routers = micro_entries), RouterStatusEntryMicroV3),
+      (read_resource('cached-consensus'), RouterStatusEntryV3),
+      (read_resource('unparseable/cached-microdesc-consensus_with_carriage_returns'), RouterStatusEntryMicroV3),
+    )
+
+    for content, entry_class in documents:
+      parsed = list(stem.descriptor.parse_file(io.BytesIO(content), 'network-status-consensus-3 1.0' if entry_class == RouterStatusEntryV3 else 'network-status-microdesc-consensus-3 1.0'))
+      self.assertTrue(len(parsed) > 1)
+
+      for entry in parsed:
+        self.assertEqual(entry_class, type(entry))
+
+        expected = entry_class(entry.get_bytes(), False, entry.document)
+
+        for attr in entry_class.ATTRIBUTES:
+          self.assertEqual(getattr(expected, attr), getattr(entry, attr), '%s differed for:\n%s' % (attr, entry))
+
+        self.assertEqual(expected.get_unrecognized_lines(), entry.get_unrecognized_lines())
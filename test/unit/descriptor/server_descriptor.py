@@ -25,7 +25,7 @@ from unittest.mock import Mock, patch
 from stem.client.datatype import CertType
 from stem.descriptor import DigestHash, DigestEncoding
 from stem.descriptor.certificate import ExtensionType
-from stem.descriptor.server_descriptor import BridgeDistribution, RelayDescriptor, BridgeDescriptor
+from stem.descriptor.server_descriptor import BridgeDistribution, RelayDescriptor, BridgeDescriptor, CompactRelayDescriptor
 
 from test.unit.descriptor import (
   get_resource,
@@ -560,6 +560,72 @@ Qlx9HNCqCY877ztFRC624ja2ql6A2hBcuoYMbkHjcQ4=
     self.assertRaisesWith(NotImplementedError, 'Server descriptor digests are only available in sha1 and sha256, not bad-hash', desc.digest, 'bad-hash')
     self.assertRaisesWith(ValueError, 'Digest encodings should be among our DigestEncoding enumeration (RAW, HEX, BASE64), not BAD_ENCODING', desc.digest, DigestHash.SHA1, 'BAD_ENCODING')
 
+  def test_fields(self):
+    """
+    Only tokenize the lines for the fields we're asked for.
+    """
+
+    with open(get_resource('server_descriptor_with_ed25519'), 'rb') as descriptor_file:
+      expected = next(stem.descriptor.parse_file(descriptor_file))
+
+    desc = RelayDescriptor(expected.get_bytes(), fields = ['average_bandwidth'])
+
+    self.assertEqual(['bandwidth'], list(desc._entries.keys()))
+    self.assertEqual(expected.get_bytes(), desc.get_bytes())
+    self.assertEqual((149715200, 1048576000, 51867731), (desc.average_bandwidth, desc.burst_bandwidth, desc.observed_bandwidth))
+    self.assertEqual(['bandwidth'], list(desc._entries.keys()))  # burst and observed came from the same line
+
+    # other attributes are still available, but require tokenizing everything
+
+    self.assertEqual('destiny', desc.nickname)
+    self.assertEqual(list(expected._entries.keys()), list(desc._entries.keys()))
+
+    desc = RelayDescriptor(expected.get_bytes(), fields = ['exit_policy', 'onion_key'])
+    self.assertEqual(['onion-key'], list(desc._entries.keys()))
+    self.assertEqual(expected.exit_policy, desc.exit_policy)
+    self.assertEqual(expected.onion_key, desc.onion_key)
+
+    desc = RelayDescriptor(expected.get_bytes(), fields = ['average_bandwidth'])
+    self.assertEqual(expected.get_unrecognized_lines(), desc.get_unrecognized_lines())
+
+    # fields are ignored when validating, which requires everything
+
+    desc = RelayDescriptor(expected.get_bytes(), validate = True, skip_crypto_validation = True, fields = ['average_bandwidth'])
+    self.assertEqual(None, desc._fields)
+    self.assertEqual('destiny', desc.nickname)
+
+    self.assertRaisesWith(ValueError, "'pepperjack' isn't an attribute of RelayDescriptor", RelayDescriptor, expected.get_bytes(), fields = ['pepperjack'])
+
+  def test_compact(self):
+    """
+    Compact descriptors should provide the same attributes without a __dict__.
+    """
+
+    with open(get_resource('server_descriptor_with_ed25519'), 'rb') as descriptor_file:
+      expected = next(stem.descriptor.parse_file(descriptor_file))
+
+    desc = CompactRelayDescriptor(expected.get_bytes())
+
+    self.assertTrue(isinstance(desc, RelayDescriptor))
+    self.assertEqual({}, vars(desc))
+    self.assertEqual({}, desc._entries)
+    self.assertEqual(expected.get_bytes(), desc.get_bytes())
+
+    for attr in RelayDescriptor.ATTRIBUTES:
+      self.assertEqual(getattr(expected, attr), getattr(desc, attr))
+
+    self.assertEqual(expected.get_unrecognized_lines(), desc.get_unrecognized_lines())
+
+    # repeated strings are shared between descriptors
+
+    other = CompactRelayDescriptor(expected.get_bytes())
+    self.assertTrue(desc.platform is other.platform)
+    self.assertTrue(desc.nickname is other.nickname)
+    self.assertEqual(desc, pickle.loads(pickle.dumps(desc)))
+
+    desc = CompactRelayDescriptor(expected.get_bytes(), free_entries = False)
+    self.assertEqual(list(expected._entries.keys()), list(desc._entries.keys()))
+
   def test_with_opt(self):
     """
     Includes an 'opt <keyword> <value>' entry.
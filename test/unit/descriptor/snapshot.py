@@ -0,0 +1,124 @@
+"""
+Unit tests for stem.descriptor.snapshot.
+"""
+
+import datetime
+import os
+import tempfile
+import unittest
+
+import stem.descriptor
+import stem.descriptor.snapshot
+import test.require
+
+from stem.descriptor import DocumentHandler
+from stem.descriptor.microdescriptor import Microdescriptor
+from stem.descriptor.router_status_entry import RouterStatusEntryV3
+from stem.descriptor.server_descriptor import RelayDescriptor
+from stem.descriptor.snapshot import Record, Snapshot
+from test.unit.descriptor import get_resource
+
+
+class TestSnapshot(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.TemporaryDirectory()
+    self.path = os.path.join(self.tmp_dir.name, 'descriptors.snapshot')
+
+  def tearDown(self):
+    self.tmp_dir.cleanup()
+
+  def test_router_status_entries(self):
+    """
+    Snapshot the router status entries of a consensus.
+    """
+
+    entries = list(stem.descriptor.parse_file(get_resource('cached-consensus')))
+    stem.descriptor.snapshot.save(entries, self.path)
+
+    with Snapshot(self.path) as snapshot:
+      self.assertEqual(RouterStatusEntryV3, snapshot.descriptor_type)
+      self.assertEqual(3, len(snapshot))
+      self.assertEqual(entries, list(snapshot))
+      self.assertEqual(entries[-1], snapshot[-1])
+      self.assertEqual(entries[1].get_bytes(), snapshot.raw(1))
+      self.assertEqual(None, snapshot.document())
+
+      self.assertEqual(Record(
+        index = 0,
+        identifier = '348225F83C854796B2DD6364E65CB189B33BD696',
+        nickname = 'test002r',
+        address = '127.0.0.1',
+        or_port = 5002,
+        dir_port = 7002,
+        published = datetime.datetime(2017, 5, 25, 4, 46, 11),
+        bandwidth = 0,
+        flags = ('Exit', 'Fast', 'Guard', 'HSDir', 'Running', 'Stable', 'V2Dir', 'Valid'),
+      ), snapshot.record(0))
+
+      for entry in entries:
+        self.assertEqual(entry, snapshot.get(entry.fingerprint))
+
+      self.assertEqual(None, snapshot.get('0' * 40))
+      self.assertEqual('default', snapshot.get('not a fingerprint', 'default'))
+      self.assertRaises(IndexError, snapshot.record, 3)
+
+  def test_document(self):
+    """
+    Snapshot a network status document, whose entries should reference it.
+    """
+
+    document = next(stem.descriptor.parse_file(get_resource('cached-consensus'), document_handler = DocumentHandler.DOCUMENT))
+    stem.descriptor.snapshot.save(document, self.path)
+
+    with Snapshot(self.path) as snapshot:
+      self.assertEqual(list(document.routers.values()), list(snapshot))
+      self.assertEqual(document.valid_after, snapshot.document().valid_after)
+      self.assertEqual(document.signatures, snapshot.document().signatures)
+      self.assertTrue(snapshot[0].document is snapshot.document())
+
+  def test_microdescriptors(self):
+    """
+    Snapshot microdescriptors, which we look up by their digest.
+    """
+
+    descriptors = list(stem.descriptor.parse_file(get_resource('cached-microdescs'), 'microdescriptor 1.0'))
+    stem.descriptor.snapshot.save(descriptors, self.path)
+
+    with Snapshot(self.path) as snapshot:
+      self.assertEqual(Microdescriptor, snapshot.descriptor_type)
+      self.assertEqual(descriptors, list(snapshot))
+      self.assertEqual(descriptors[2], snapshot.get('uhCGfIM6RbeD1Z/C6e9ct41+NIl9EbpgP8wG7uZT2Rw'))
+      self.assertEqual('uhCGfIM6RbeD1Z/C6e9ct41+NIl9EbpgP8wG7uZT2Rw', snapshot.record(2).identifier)
+      self.assertEqual(None, snapshot.record(2).nickname)
+
+  def test_server_descriptors(self):
+    """
+    Snapshot server descriptors, which should still validate after we read
+    them back.
+    """
+
+    descriptors = list(stem.descriptor.parse_file(get_resource('metrics_server_desc_multiple')))
+    stem.descriptor.snapshot.save(descriptors, self.path)
+
+    with Snapshot(self.path) as snapshot:
+      self.assertEqual(RelayDescriptor, snapshot.descriptor_type)
+      self.assertEqual(descriptors, list(snapshot))
+      self.assertEqual(442368, snapshot.record(0).bandwidth)
+
+      desc = RelayDescriptor(snapshot.raw(1), validate = True, skip_crypto_validation = not test.require.CRYPTOGRAPHY_AVAILABLE)
+      self.assertEqual(descriptors[1].fingerprint, desc.fingerprint)
+
+  def test_unsupported_content(self):
+    """
+    Save descriptors we can't snapshot, and read something that isn't a
+    snapshot.
+    """
+
+    entries = list(stem.descriptor.parse_file(get_resource('cached-consensus')))
+    microdescriptors = list(stem.descriptor.parse_file(get_resource('cached-microdescs'), 'microdescriptor 1.0'))
+    extrainfo = list(stem.descriptor.parse_file(get_resource('extrainfo_relay_descriptor'), 'extra-info 1.0'))
+
+    self.assertRaisesWith(TypeError, 'Snapshots cannot contain RelayExtraInfoDescriptor', stem.descriptor.snapshot.save, extrainfo, self.path)
+    self.assertRaisesWith(TypeError, 'Snapshots can only contain a single descriptor type, but had both RouterStatusEntryV3 and Microdescriptor', stem.descriptor.snapshot.save, entries + microdescriptors, self.path)
+
+    self.assertRaisesWith(ValueError, "%s isn't a descriptor snapshot" % get_resource('cached-consensus'), Snapshot, get_resource('cached-consensus'))
@@ -0,0 +1,190 @@
+"""
+Unit tests for stem.descriptor.store.
+"""
+
+import os
+import tarfile
+import tempfile
+import unittest
+
+import stem.descriptor
+
+from unittest.mock import patch
+
+from stem.descriptor.microdescriptor import Microdescriptor
+from stem.descriptor.server_descriptor import RelayDescriptor
+from stem.descriptor.store import DescriptorStore
+from test.unit.descriptor import get_resource
+
+SERVER_DESCRIPTORS = get_resource('metrics_server_desc_multiple')
+MICRODESCRIPTORS = get_resource('cached-microdescs')
+
+
+class TestDescriptorStore(unittest.TestCase):
+  def test_provides_stored_descriptors(self):
+    """
+    Parse files with a store, providing descriptors we've seen before without
+    parsing them again.
+    """
+
+    store = DescriptorStore()
+
+    for path, descriptor_type in ((SERVER_DESCRIPTORS, RelayDescriptor), (MICRODESCRIPTORS, Microdescriptor)):
+      first_pass = list(stem.descriptor.parse_file(path, store = store))
+
+      with patch.object(descriptor_type, '__init__', side_effect = AssertionError('descriptor was parsed')):
+        second_pass = list(stem.descriptor.parse_file(path, store = store))
+
+      self.assertEqual(list(stem.descriptor.parse_file(path)), second_pass)
+
+      for first, second in zip(first_pass, second_pass):
+        self.assertFalse(first is second)
+        self.assertEqual(first, second)
+        self.assertEqual(path, second.get_path())
+        self.assertEqual(first, store.get(first.digest()))
+
+    self.assertEqual(2 + 3, len(store))
+
+  def test_annotations_and_path(self):
+    """
+    Descriptors from our store reflect the file they were just read from,
+    rather than the one they were stored from.
+    """
+
+    store = DescriptorStore()
+
+    with open(MICRODESCRIPTORS, 'rb') as descriptor_file:
+      content = descriptor_file.read()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      first_path = os.path.join(tmp_dir, 'first-microdescs')
+      second_path = os.path.join(tmp_dir, 'second-microdescs')
+
+      with open(first_path, 'wb') as descriptor_file:
+        descriptor_file.write(content)
+
+      with open(second_path, 'wb') as descriptor_file:
+        descriptor_file.write(content.replace(b'@last-listed 2013-02-24 00:18:36', b'@last-listed 2020-06-01 12:00:00'))
+
+      first = list(stem.descriptor.parse_file(first_path, 'microdescriptor 1.0', store = store))[0]
+      second = list(stem.descriptor.parse_file(second_path, 'microdescriptor 1.0', store = store))[0]
+
+      self.assertEqual({b'@last-listed': b'2013-02-24 00:18:36'}, first.get_annotations())
+      self.assertEqual({b'@last-listed': b'2020-06-01 12:00:00'}, second.get_annotations())
+      self.assertEqual(first_path, first.get_path())
+      self.assertEqual(second_path, second.get_path())
+
+      stored = store.get(first.digest())
+      self.assertEqual(None, stored.get_path())
+      self.assertEqual({b'@last-listed': b'2013-02-24 00:18:36'}, stored.get_annotations())
+
+  def test_other_descriptor_types(self):
+    """
+    Descriptor types we don't store are simply parsed, including within
+    tarballs alongside those we do.
+    """
+
+    store = DescriptorStore()
+
+    for resource in ('cached-consensus', 'cached-consensus-v2', 'bridge_network_status', 'hidden_service_duckduckgo', 'metrics_cert'):
+      path = get_resource(resource)
+      self.assertEqual(list(stem.descriptor.parse_file(path)), list(stem.descriptor.parse_file(path, store = store)))
+
+    self.assertEqual(0, len(store))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      tarball_path = os.path.join(tmp_dir, 'descriptors.tar')
+
+      microdescriptors_path = os.path.join(tmp_dir, 'microdescs')
+
+      with open(microdescriptors_path, 'wb') as microdescriptors_file, open(MICRODESCRIPTORS, 'rb') as original_file:
+        microdescriptors_file.write(b'@type microdescriptor 1.0\n' + original_file.read())
+
+      with tarfile.open(tarball_path, 'w') as tarball:
+        for resource in ('metrics_consensus', 'metrics_server_desc_multiple', 'bridge_network_status'):
+          tarball.add(get_resource(resource), arcname = resource)
+
+        tarball.add(microdescriptors_path, arcname = 'microdescs')
+
+      expected = list(stem.descriptor.parse_file(tarball_path))
+      self.assertEqual(expected, list(stem.descriptor.parse_file(tarball_path, store = store)))
+      self.assertEqual(2 + 3, len(store))
+
+      with patch.object(RelayDescriptor, '__init__', side_effect = AssertionError('descriptor was parsed')):
+        self.assertEqual(expected, list(stem.descriptor.parse_file(tarball_path, store = store)))
+
+  def test_skip_seen(self):
+    """
+    Only provide descriptors that are new to the store.
+    """
+
+    store = DescriptorStore(skip_seen = True)
+
+    self.assertEqual(2, len(list(stem.descriptor.parse_file(SERVER_DESCRIPTORS, store = store))))
+    self.assertEqual([], list(stem.descriptor.parse_file(SERVER_DESCRIPTORS, store = store)))
+
+  def test_eviction(self):
+    """
+    Evict the least recently used descriptors beyond our size.
+    """
+
+    descriptors = list(stem.descriptor.parse_file(MICRODESCRIPTORS))
+    digests = [desc.digest() for desc in descriptors]
+    store = DescriptorStore(max_size = 2)
+
+    store.add(descriptors[0])
+    store.add(descriptors[1])
+    store.get(digests[0])  # makes the second descriptor our least recently used
+    store.add(descriptors[2])
+
+    self.assertEqual(2, len(store))
+    self.assertTrue(digests[0] in store)
+    self.assertFalse(digests[1] in store)
+    self.assertEqual(None, store.get(digests[1]))
+    self.assertTrue(store.get(digests[2]) is descriptors[2])
+
+    self.assertRaisesRegex(ValueError, 'Store size must be positive, but was 0', DescriptorStore, 0)
+
+  def test_validated(self):
+    """
+    Parse descriptors again if we're validating and they weren't.
+    """
+
+    store = DescriptorStore()
+
+    unvalidated = list(stem.descriptor.parse_file(MICRODESCRIPTORS, store = store))
+    validated = list(stem.descriptor.parse_file(MICRODESCRIPTORS, validate = True, store = store))
+
+    self.assertEqual(unvalidated, validated)
+    self.assertTrue(store.get(validated[0].digest(), validated = True) is not None)
+
+    with patch.object(Microdescriptor, '__init__', side_effect = AssertionError('descriptor was parsed')):
+      self.assertEqual(validated, list(stem.descriptor.parse_file(MICRODESCRIPTORS, validate = True, store = store)))
+      self.assertEqual(validated, list(stem.descriptor.parse_file(MICRODESCRIPTORS, store = store)))
+
+  def test_persistence(self):
+    """
+    Persist descriptors to disk, so they're available once evicted from memory
+    and across stores.
+    """
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      path = os.path.join(tmp_dir, 'descriptors.store')
+      expected = list(stem.descriptor.parse_file(MICRODESCRIPTORS))
+
+      with DescriptorStore(max_size = 1, path = path) as store:
+        self.assertEqual(expected, list(stem.descriptor.parse_file(MICRODESCRIPTORS, store = store)))
+        self.assertEqual(3, len(store))
+        self.assertEqual(expected[0], store.get(expected[0].digest()))  # evicted from memory
+
+      with DescriptorStore(path = path) as store:
+        self.assertEqual(3, len(store))
+
+        with patch.object(Microdescriptor, '__init__', side_effect = AssertionError('descriptor was parsed')):
+          stored = list(stem.descriptor.parse_file(MICRODESCRIPTORS, store = store))
+
+        self.assertEqual(expected, stored)
+        self.assertEqual(expected[0].onion_key, stored[0].onion_key)
+
+      with DescriptorStore(path = path, skip_seen = True) as store:
+        self.assertEqual([], list(stem.descriptor.parse_file(MICRODESCRIPTORS, store = store)))
@@ -78,6 +78,7 @@ class TestDocumentation(unittest.TestCase):
       elif path.endswith('/stem/descriptor/router_status_entry.py'):
         args['globs'] = {
           '_base64_to_hex': stem.descriptor.router_status_entry._base64_to_hex,
+          '_base64_to_hex_batch': stem.descriptor.router_status_entry._base64_to_hex_batch,
         }
 
         test_run = doctest.testfile(path, **args)
@@ -2,6 +2,7 @@
 Exercise the code in our examples directory.
 """
 
+import asyncio
 import base64
 import binascii
 import functools
@@ -351,6 +352,32 @@ class TestExamples(unittest.TestCase):
     import bandwidth_stats
     self.assertEqual(EXPECTED_BANDWIDTH_STATS, stdout_mock.getvalue())
 
+  @patch('sys.stdout', new_callable = io.StringIO)
+  def test_benchmark_compact_descriptors(self, stdout_mock):
+    import benchmark_compact_descriptors as module
+
+    path = os.path.join(DESC_DIR, 'collector', 'server-descriptors-2005-12-cropped.tar')
+    module.measure_memory_usage(path)
+
+    output = stdout_mock.getvalue()
+    self.assertTrue(output.startswith("Finished measure_memory_usage('%s')\n  Processed server descriptors: 5\n" % path))
+
+    sizes = dict(re.findall('  (.*): (\\d+) bytes', output))
+    self.assertEqual(['Compact', 'Fully parsed', 'Lazy loaded'], sorted(sizes.keys()))
+    self.assertTrue(int(sizes['Compact']) < int(sizes['Fully parsed']))
+
+  @patch('sys.stdout', new_callable = io.StringIO)
+  def test_benchmark_router_status_entries(self, stdout_mock):
+    import benchmark_router_status_entries as module
+
+    path = os.path.join(DESC_DIR, 'cached-consensus')
+    module.measure_consensus_parsing(path)
+
+    output = stdout_mock.getvalue()
+    self.assertTrue(output.startswith("Finished measure_consensus_parsing('%s')\n  Processed router status entries: 3\n" % path))
+    self.assertTrue('  Parsed by parse_file: ' in output)
+    self.assertTrue('  Lazily loaded: ' in output)
+
   @patch('sys.stdout', new_callable = io.StringIO)
   def test_benchmark_server_descriptor_stem(self, stdout_mock):
     import benchmark_server_descriptor_stem as module
@@ -362,6 +389,18 @@ class TestExamples(unittest.TestCase):
 
     self.assertTrue(stdout_mock.getvalue().startswith(expected_prefix))
 
+  @test.require.cryptography
+  def test_benchmark_relay_streams(self):
+    import benchmark_relay_streams as module
+
+    with patch('sys.stdout', new_callable = io.StringIO) as stdout_mock:
+      asyncio.run(module.measure_directory_requests(requests = 5, latency = 0.01, response_size = 1000))
+
+      output = stdout_mock.getvalue()
+      self.assertTrue(output.startswith('Finished 5 serial directory requests\n'))
+      self.assertTrue('Finished 5 concurrent directory requests\n' in output)
+      self.assertEqual(2, output.count('  Downloaded: 5000 bytes\n'))
+
   def test_benchmark_stem(self):
     import benchmark_stem as module
 
@@ -461,7 +500,7 @@ class TestExamples(unittest.TestCase):
 
     server_desc = list(stem.descriptor.parse_file(os.path.join(DESC_DIR, 'collector', 'server-descriptors-2005-12-cropped.tar')))
 
-    with patch('stem.descriptor.parse_file', Mock(return_value = server_desc)):
+    with patch('stem.descriptor.collector._parse_archive', Mock(return_value = server_desc)):
       import collector_caching
 
     self.assertEqual(EXPECTED_COLLECTOR_CACHING, stdout_mock.getvalue())
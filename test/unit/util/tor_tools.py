@@ -4,6 +4,7 @@ Unit tests for the stem.util.tor_tools functions.
 
 import unittest
 
+import stem.descriptor.hidden_service
 import stem.util.str_tools
 import stem.util.tor_tools
 
@@ -60,6 +61,34 @@ class TestTorTools(unittest.TestCase):
       self.assertFalse(stem.util.tor_tools.is_valid_hidden_service_address(address))
       self.assertFalse(stem.util.tor_tools.is_valid_hidden_service_address(address, version = 3))
 
+  def test_validate_hidden_service_addresses(self):
+    """
+    Checks the validate_hidden_service_addresses function.
+    """
+
+    addresses = [
+      'pg6mmjiyjmcrsslvykfwnntlaru7p5svn6y2ymmju6nubxndf4pscryd',
+      'sp3k262uwy4r2k3ycr5awluarykdpag6a7y33jxop4cs2lu5uz5sseqd.onion',
+      'pg6mmjiyjmcrsslvykfwnntlaru7p5svn6y2ymmju6nubxndf4pscryc',  # bad version
+      'sp3k262uwy4r2k4ycr5awluarykdpag6a7y33jxop4cs2lu5uz5sseqd',  # checksum mismatch
+      'xa4r2iadxm55fbnqgwwi5mymqdcofiu3w6rpbtqn7b2dyn7mgwj64jy',  # too short
+      'facebookcorewwwi',  # v2 address
+      None,
+      'pg6mmjiyjmcrsslvykfwnntlaru7p5svn6y2ymmju6nubxndf4pscryd',  # repeated
+    ]
+
+    results = stem.util.tor_tools.validate_hidden_service_addresses(addresses)
+    self.assertEqual([True, True, False, False, False, False, False, True], [is_valid for _, is_valid in results])
+
+    self.assertEqual(32, len(results[0][0]))
+    self.assertEqual(results[0], results[-1])
+    self.assertEqual(32, len(results[3][0]))  # key is still provided when the checksum mismatches
+    self.assertEqual([None, None, None], [key for key, _ in results[4:7]])
+
+    for address, (key, is_valid) in zip(addresses, results):
+      if is_valid:
+        self.assertEqual(address.replace('.onion', ''), stem.descriptor.hidden_service.HiddenServiceDescriptorV3.address_from_identity_key(key, suffix = False))
+
   def test_is_valid_fingerprint(self):
     """
     Checks the is_valid_fingerprint function.